@@ -56,7 +56,8 @@ axiosInstance.interceptors.response.use(
       pagedData._paginationContext = {
           count: response.data.count,
           next: response.data.next,
-          previous: response.data.previous
+          previous: response.data.previous,
+          unread_count: response.data.unread_count
       };
       return { ...response, data: pagedData };
     }
@@ -78,4 +79,10 @@ axiosInstance.interceptors.response.use(
   }
 );
 
+// The `cursor` to request the page after an unwrapped paginated response, or null on the last page
+export const nextCursor = (data) => {
+  const next = data?._paginationContext?.next;
+  return next ? new URL(next).searchParams.get('cursor') : null;
+};
+
 export default axiosInstance;
@@ -6,9 +6,9 @@ import axiosInstance from "./axiosInstance";
  * Fetches the user's chat inbox (list of all chat rooms).
  * @returns {Array} List of chat room objects, sorted by last message time.
  */
-export const getChatInbox = async () => {
+export const getChatInbox = async (cursor = null) => {
   try {
-    const response = await axiosInstance.get("/chats/");
+    const response = await axiosInstance.get("/chats/", { params: cursor ? { cursor } : {} });
     return response.data;
   } catch (error) {
     console.error("Error fetching chat inbox:", error);
@@ -17,14 +17,16 @@ export const getChatInbox = async () => {
 };
 
 /**
- * Fetches the message history for a specific chat partner.
+ * Fetches one page of message history for a specific chat partner (newest page first,
+ * each page oldest-first). `_paginationContext.next` points at older messages.
  * @param {number} userId - The ID of the other user in the chat.
+ * @param {object} params - Optional { cursor } for older pages or { since: messageId } for delta sync.
  * @returns {Array} List of ChatMessage objects.
  */
-export const getChatHistory = async (userId) => {
+export const getChatHistory = async (userId, params = {}) => {
   try {
     // This API call automatically marks incoming messages as read.
-    const response = await axiosInstance.get(`/chats/${userId}/`);
+    const response = await axiosInstance.get(`/chats/${userId}/`, { params });
     return response.data;
   } catch (error) {
     console.error(`Error fetching chat history with user ${userId}:`, error);
@@ -51,18 +53,18 @@ export const sendMessage = async (recipientUsername, content, storyId = null) =>
 
 // --- Group Chat ---
 
-export const getGroups = async () => {
+export const getGroups = async (cursor = null) => {
     try {
-        const response = await axiosInstance.get('/groups/');
+        const response = await axiosInstance.get('/groups/', { params: cursor ? { cursor } : {} });
         return response.data;
     } catch (error) {
         throw error;
     }
 };
 
-export const getGroupMessages = async (groupId) => {
+export const getGroupMessages = async (groupId, params = {}) => {
     try {
-        const response = await axiosInstance.get(`/groups/${groupId}/messages/`);
+        const response = await axiosInstance.get(`/groups/${groupId}/messages/`, { params });
         return response.data;
     } catch (error) {
         throw error;
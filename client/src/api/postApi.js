@@ -2,10 +2,11 @@
 
 import axiosInstance from "./axiosInstance";
 
-export const getFeedPosts = async (page = 1) => {
+export const getFeedPosts = async (cursor = null) => {
   try {
-    const response = await axiosInstance.get(`/posts/?page=${page}`);
-    return response.data; // Now returns { count, next, previous, results }
+    // The feed is cursor-paginated: pass the `cursor` from the previous page's `next` link
+    const response = await axiosInstance.get("/posts/", { params: cursor ? { cursor } : {} });
+    return response.data; // Now returns { next, previous, results }
   } catch (error) {
     console.error("Error fetching feed posts:", error);
     throw error;
@@ -59,9 +60,9 @@ export const toggleLike = async (postId) => {
   }
 };
 
-export const getComments = async (postId) => {
+export const getComments = async (postId, cursor = null) => {
   try {
-    const response = await axiosInstance.get(`/posts/${postId}/comments/`);
+    const response = await axiosInstance.get(`/posts/${postId}/comments/`, { params: cursor ? { cursor } : {} });
     return response.data;
   } catch (error) {
     console.error("Error fetching comments:", error);
@@ -110,9 +111,9 @@ export const createTwist = async (twistData) => {
   }
 };
 
-export const getTwistsByUser = async (userId) => {
+export const getTwistsByUser = async (userId, cursor = null) => {
   try {
-    const response = await axiosInstance.get(`/users/${userId}/twists/`);
+    const response = await axiosInstance.get(`/users/${userId}/twists/`, { params: cursor ? { cursor } : {} });
     return response.data;
   } catch (error) {
     console.error(`Error fetching twists for user ${userId}:`, error);
@@ -120,9 +121,10 @@ export const getTwistsByUser = async (userId) => {
   }
 };
 
-export const getPublicTwists = async (tag) => {
+// One page of the public stream; pass nextCursor(previousPage) for the page after it
+export const getPublicTwists = async (tag, cursor = null) => {
     try {
-        const response = await axiosInstance.get(`/twists/public/?tag=${tag || ''}`);
+        const response = await axiosInstance.get("/twists/public/", { params: { tag: tag || '', ...(cursor ? { cursor } : {}) } });
         return response.data;
     } catch (error) {
         console.error("Error fetching public twists:", error);
@@ -130,9 +132,9 @@ export const getPublicTwists = async (tag) => {
     }
 }
 
-export const getTwistsForPost = async (postId) => {
+export const getTwistsForPost = async (postId, cursor = null) => {
     try {
-        const response = await axiosInstance.get(`/posts/${postId}/twists/`);
+        const response = await axiosInstance.get(`/posts/${postId}/twists/`, { params: cursor ? { cursor } : {} });
         return response.data;
     } catch (error) {
         console.error("Error fetching twists for post:", error);
@@ -159,9 +161,9 @@ export const deleteTwist = async (twistId) => {
     }
 };
 
-export const getTwistComments = async (twistId) => {
+export const getTwistComments = async (twistId, cursor = null) => {
     try {
-        const response = await axiosInstance.get(`/twists/${twistId}/comments/`);
+        const response = await axiosInstance.get(`/twists/${twistId}/comments/`, { params: cursor ? { cursor } : {} });
         return response.data;
     } catch (error) {
         console.error("Error fetching twist comments:", error);
@@ -188,9 +190,9 @@ export const deleteTwistComment = async (commentId) => {
     }
 }
 
-export const getPostsByUser = async (userId) => {
+export const getPostsByUser = async (userId, cursor = null) => {
   try {
-    const response = await axiosInstance.get(`/users/${userId}/posts/`);
+    const response = await axiosInstance.get(`/users/${userId}/posts/`, { params: cursor ? { cursor } : {} });
     return response.data;
   } catch (error) {
     console.error(`Error fetching posts for user ${userId}:`, error);
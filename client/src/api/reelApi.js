@@ -1,5 +1,6 @@
 import axiosInstance from './axiosInstance';
 
+// Endless recommended feed: every call returns the next page of reels this user hasn't seen yet
 export const fetchReels = async () => {
     const response = await axiosInstance.get('/reels/');
     return response.data;
@@ -24,8 +25,8 @@ export const likeReel = async (id) => {
     return response.data;
 };
 
-export const fetchReelComments = async (id) => {
-    const response = await axiosInstance.get(`/reels/${id}/comments/`);
+export const fetchReelComments = async (id, cursor = null) => {
+    const response = await axiosInstance.get(`/reels/${id}/comments/`, { params: cursor ? { cursor } : {} });
     return response.data;
 };
 
@@ -35,8 +36,8 @@ export const addReelComment = async (id, text) => {
 };
 
 // New function for profile integration
-export const getReelsByUser = async (userId) => {
-    const response = await axiosInstance.get(`/reels/user/${userId}/`);
+export const getReelsByUser = async (userId, cursor = null) => {
+    const response = await axiosInstance.get(`/reels/user/${userId}/`, { params: cursor ? { cursor } : {} });
     return response.data;
 };
 
@@ -48,10 +48,10 @@ export const createStory = async (storyData) => {
   }
 };
 
-export const getStoryAnalytics = async (storyId) => {
+export const getStoryAnalytics = async (storyId, cursor = null) => {
   try {
-    // Calls the backend endpoint created in views.py
-    const response = await axiosInstance.get(`/stories/${storyId}/analytics/`);
+    // Calls the backend endpoint created in views.py: { total_views, viewers, next }, one page of viewers at a time
+    const response = await axiosInstance.get(`/stories/${storyId}/analytics/`, { params: cursor ? { cursor } : {} });
     return response.data;
   } catch (error) {
     console.error("Error fetching story analytics:", error);
@@ -94,9 +94,9 @@ export const likeStory = async (storyId) => {
   }
 };
 
-export const getStoryArchive = async () => {
+export const getStoryArchive = async (cursor = null) => {
   try {
-    const response = await axiosInstance.get('/stories/archive/');
+    const response = await axiosInstance.get('/stories/archive/', { params: cursor ? { cursor } : {} });
     return response.data;
   } catch (error) {
     console.error("Error fetching story archive:", error);
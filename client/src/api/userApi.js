@@ -52,11 +52,10 @@ export const toggleFollow = async (userId) => {
   }
 };
 
-export const getFollowers = async (username) => {
+// List endpoints are cursor-paginated: pass nextCursor(previousPage) for the page after it
+export const getFollowers = async (username, cursor = null) => {
   try {
-    const response = await axiosInstance.get(
-      `/profiles/${username}/followers/`
-    );
+    const response = await axiosInstance.get(`/profiles/${username}/followers/`, { params: cursor ? { cursor } : {} });
     return response.data;
   } catch (error) {
     console.error("Error fetching followers:", error);
@@ -64,11 +63,9 @@ export const getFollowers = async (username) => {
   }
 };
 
-export const getFollowing = async (username) => {
+export const getFollowing = async (username, cursor = null) => {
   try {
-    const response = await axiosInstance.get(
-      `/profiles/${username}/following/`
-    );
+    const response = await axiosInstance.get(`/profiles/${username}/following/`, { params: cursor ? { cursor } : {} });
     return response.data;
   } catch (error) {
     console.error("Error fetching following list:", error);
@@ -88,10 +85,10 @@ export const getSubscribers = async (username) => {
   }
 };
 
-export const getFollowRequests = async () => {
+export const getFollowRequests = async (cursor = null) => {
   try {
     // API endpoint: GET /api/requests/
-    const response = await axiosInstance.get("/requests/");
+    const response = await axiosInstance.get("/requests/", { params: cursor ? { cursor } : {} });
     return response.data;
   } catch (error) {
     console.error("Error fetching follow requests:", error);
@@ -117,6 +114,12 @@ export const searchUsers = async (query) => {
     return response.data;
 };
 
+// Per-keystroke suggestions for @mentions and share pickers (people you follow first)
+export const mentionUsers = async (query, limit = 8) => {
+    const response = await axiosInstance.get('/users/mentions/', { params: { q: query, limit } });
+    return response.data;
+};
+
 // --- Save/Bookmark Logic ---
 
 export const toggleSave = async (type, id) => {
@@ -129,9 +132,9 @@ export const toggleSave = async (type, id) => {
   }
 };
 
-export const getSavedItems = async (type) => {
+export const getSavedItems = async (type, cursor = null) => {
   try {
-    const response = await axiosInstance.get(`/saved/?type=${type}`);
+    const response = await axiosInstance.get("/saved/", { params: { type, ...(cursor ? { cursor } : {}) } });
     return response.data;
   } catch (error) {
     console.error('Error fetching saved items:', error);
@@ -43,6 +43,10 @@ const ChatWindow = ({ room, otherUser, onBack, onMessageUpdate, isGroup, activeC
   const [messages, setMessages] = useState([]);
   const [newMessage, setNewMessage] = useState('');
   const [loading, setLoading] = useState(true);
+  const [olderCursor, setOlderCursor] = useState(null); // Cursor for the page before the oldest loaded message
+  const [loadingOlder, setLoadingOlder] = useState(false);
+  const skipScrollRef = useRef(false); // Prepending older messages should not jump to the bottom
+  const lastMessageIdRef = useRef(null); // Newest server message id, for ?since= delta sync on reconnect
   const [wsStatus, setWsStatus] = useState('Connecting...');
 
   // Derive a stable room ID for encryption key derivation
@@ -106,32 +110,40 @@ const ChatWindow = ({ room, otherUser, onBack, onMessageUpdate, isGroup, activeC
   }, [callStatus]);
 
   // --- 1. Fetch History on Load (with decryption) ---
+  const fetchHistoryPage = useCallback(async (params = {}) => {
+    let history = isGroup
+      ? await getGroupMessages(activeChat.id, params)
+      : await getChatHistory(otherUser.id, params);
+    const next = history._paginationContext?.next;
+
+    // Decrypt history messages
+    if (roomId) {
+      history = await Promise.all(
+        history.map(async (msg) => {
+          if (msg.content && isEncrypted(msg.content)) {
+            return { ...msg, content: await decryptMessage(msg.content, roomId) };
+          }
+          return msg;
+        })
+      );
+    }
+    return { history, next };
+  }, [activeChat, otherUser, isGroup, roomId]);
+
+  useEffect(() => {
+    lastMessageIdRef.current = messages.reduce((max, m) => (typeof m.id === 'number' && m.id > max ? m.id : max), 0) || null;
+  }, [messages]);
+
   useEffect(() => {
     const fetchHistory = async () => {
       setLoading(true);
       try {
-        let history;
-        if (isGroup) {
-          history = await getGroupMessages(activeChat.id);
-        } else {
-          history = await getChatHistory(otherUser.id);
-        }
-
-        // Decrypt history messages
-        if (roomId) {
-          history = await Promise.all(
-            history.map(async (msg) => {
-              if (msg.content && isEncrypted(msg.content)) {
-                return { ...msg, content: await decryptMessage(msg.content, roomId) };
-              }
-              return msg;
-            })
-          );
-        }
-
+        const { history, next } = await fetchHistoryPage();
         setMessages(history);
+        setOlderCursor(next ? new URL(next).searchParams.get('cursor') : null);
       } catch (e) {
         setMessages([]);
+        setOlderCursor(null);
         console.error('Failed to load history.', e);
       } finally {
         setLoading(false);
@@ -142,6 +154,40 @@ const ChatWindow = ({ room, otherUser, onBack, onMessageUpdate, isGroup, activeC
     }
   }, [activeChat, otherUser, isGroup, roomId]);
 
+  const loadOlderMessages = async () => {
+    if (!olderCursor || loadingOlder) return;
+    setLoadingOlder(true);
+    try {
+      const { history, next } = await fetchHistoryPage({ cursor: olderCursor });
+      skipScrollRef.current = true;
+      setMessages(prev => [...history.filter(m => !prev.find(p => p.id === m.id)), ...prev]);
+      setOlderCursor(next ? new URL(next).searchParams.get('cursor') : null);
+    } catch (e) {
+      console.error('Failed to load older messages.', e);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
+  // Catch up on anything sent while the socket was down
+  const syncMissedMessages = async () => {
+    let since = lastMessageIdRef.current;
+    if (!since) return;
+    try {
+      let next;
+      do {
+        const page = await fetchHistoryPage({ since });
+        if (page.history.length) {
+          since = page.history[page.history.length - 1].id;
+          setMessages(prev => [...prev, ...page.history.filter(m => !prev.find(p => p.id === m.id))]);
+        }
+        next = page.next;
+      } while (next);
+    } catch (e) {
+      console.error('Failed to sync missed messages.', e);
+    }
+  };
+
   // --- Auto-Accept Global Call Handover ---
   useEffect(() => {
     if (incomingCallDataFromState && callStatus === 'idle') {
@@ -460,6 +506,7 @@ const ChatWindow = ({ room, otherUser, onBack, onMessageUpdate, isGroup, activeC
     ws.onopen = () => {
       setWsStatus('Connected.');
       if (!isGroup) ws.send(JSON.stringify({ type: 'mark_read' }));
+      if (refreshTrigger > 0) syncMissedMessages();
     };
 
     ws.onmessage = async (e) => {
@@ -535,6 +582,10 @@ const ChatWindow = ({ room, otherUser, onBack, onMessageUpdate, isGroup, activeC
 
   // --- 3. Scroll to Bottom ---
   useEffect(() => {
+    if (skipScrollRef.current) {
+      skipScrollRef.current = false;
+      return;
+    }
     chatEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   }, [messages, loading]);
 
@@ -677,6 +728,17 @@ const ChatWindow = ({ room, otherUser, onBack, onMessageUpdate, isGroup, activeC
 
       {/* --- Message History --- */}
       <div className="flex-1 overflow-y-auto p-4 space-y-3">
+        {!loading && olderCursor && (
+          <div className="flex justify-center">
+            <button
+              onClick={loadOlderMessages}
+              disabled={loadingOlder}
+              className="text-xs text-text-secondary hover:text-text-primary px-3 py-1 rounded-full bg-background-accent/50"
+            >
+              {loadingOlder ? 'Loading...' : 'Load earlier messages'}
+            </button>
+          </div>
+        )}
         {loading ? (
           <div className="flex justify-center py-8"><Spinner size="md" /></div>
         ) : (
@@ -1,13 +1,15 @@
 // frontend/src/components/features/chat/Inbox.jsx
 
-import React, { useState, useEffect, useContext } from 'react';
+import React, { useState, useEffect, useContext, useCallback } from 'react';
 import { getChatInbox, getGroups } from '../../../api/chatApi';
+import { nextCursor } from '../../../api/axiosInstance';
 import Avatar from '../../common/Avatar';
 import Spinner from '../../common/Spinner';
 import CreateGroupModal from './CreateGroupModal';
 import { IoChatbubbleEllipsesOutline, IoAdd, IoPeople } from 'react-icons/io5';
 import { AuthContext } from '../../../context/AuthContext';
 import { decryptMessage, getRoomId, isEncrypted } from '../../../utils/encryption';
+import useInfiniteScroll from '../../../hooks/useInfiniteScroll';
 
 /**
  * Displays the list of all chat rooms (DM Inbox) and Groups.
@@ -17,10 +19,6 @@ import { decryptMessage, getRoomId, isEncrypted } from '../../../utils/encryptio
  */
 const Inbox = ({ onSelectChat, activeChat, refreshTrigger, autoSelectGroupId, onAutoSelectHandled }) => {
   const { user } = useContext(AuthContext);
-  const [inbox, setInbox] = useState([]);
-  const [groups, setGroups] = useState([]); // State for groups
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState(null);
   const [isModalOpen, setIsModalOpen] = useState(false); // Modal state
   const [activeTab, setActiveTab] = useState('all'); // 'all', 'dms', 'groups'
 
@@ -49,33 +47,54 @@ const Inbox = ({ onSelectChat, activeChat, refreshTrigger, autoSelectGroupId, on
     }
   };
 
-  const fetchData = async () => {
-    try {
-      setLoading(true);
-      const [inboxData, groupsData] = await Promise.all([getChatInbox(), getGroups()]);
+  // Decrypts a page of rooms, keeping its pagination context for the next cursor
+  const decryptPage = async (page, isGroup) => {
+    const decrypted = await Promise.all(page.map((item) => decryptLastMessage(item, isGroup)));
+    decrypted._paginationContext = page._paginationContext;
+    return decrypted;
+  };
 
-      // Decrypt last message previews in parallel
-      const [decryptedInbox, decryptedGroups] = await Promise.all([
-        Promise.all(inboxData.map((item) => decryptLastMessage(item, false))),
-        Promise.all(groupsData.map((item) => decryptLastMessage(item, true))),
+  // Most recent activity first, older rooms as the end of the list scrolls into view
+  const inboxList = useInfiniteScroll(
+    async (cursor) => decryptPage(await getChatInbox(cursor), false), [refreshTrigger]
+  );
+  const groupsList = useInfiniteScroll(
+    async (cursor) => decryptPage(await getGroups(cursor), true), [refreshTrigger]
+  );
+  const inbox = inboxList.items;
+  const groups = groupsList.items;
+  const loading = inboxList.loading || groupsList.loading;
+
+  // Polling refreshes the first page only, keeping any older pages already scrolled in
+  const refreshHead = async () => {
+    const mergeHead = (fresh) => (prev) => {
+      if (!nextCursor(fresh)) return fresh;
+      const ids = new Set(fresh.map(item => item.id));
+      return [...fresh, ...prev.slice(fresh.length).filter(item => !ids.has(item.id))];
+    };
+    try {
+      const [inboxData, groupsData] = await Promise.all([
+        getChatInbox().then((page) => decryptPage(page, false)),
+        getGroups().then((page) => decryptPage(page, true)),
       ]);
-
-      setInbox(decryptedInbox);
-      setGroups(decryptedGroups);
+      inboxList.setItems(mergeHead(inboxData));
+      groupsList.setItems(mergeHead(groupsData));
     } catch (err) {
-      setError('Failed to load messages. Check connection.');
       console.error(err);
-    } finally {
-      setLoading(false);
     }
   };
 
   useEffect(() => {
-    fetchData();
-    const interval = setInterval(fetchData, 15000);
+    const interval = setInterval(refreshHead, 15000);
     return () => clearInterval(interval);
   }, [refreshTrigger]);
 
+  // One sentinel at the end of the merged list pages both sources
+  const sentinelRef = useCallback((node) => {
+    inboxList.sentinelRef(node);
+    groupsList.sentinelRef(node);
+  }, [inboxList.sentinelRef, groupsList.sentinelRef]);
+
   // Handle Auto-Selection for Groups (from Toast)
   useEffect(() => {
     if (autoSelectGroupId && groups.length > 0) {
@@ -89,7 +108,7 @@ const Inbox = ({ onSelectChat, activeChat, refreshTrigger, autoSelectGroupId, on
   }, [groups, autoSelectGroupId]);
 
   const handleGroupCreated = () => {
-    fetchData();
+    groupsList.reload();
   };
 
   const renderItem = (item, type) => {
@@ -191,6 +210,10 @@ const Inbox = ({ onSelectChat, activeChat, refreshTrigger, autoSelectGroupId, on
         ) : (
           displayedItems.map(item => renderItem(item, item.type))
         )}
+        <div ref={sentinelRef} />
+        {(inboxList.loadingMore || groupsList.loadingMore) && (
+          <div className="flex justify-center py-3"><Spinner size="sm" /></div>
+        )}
       </div>
 
       <CreateGroupModal
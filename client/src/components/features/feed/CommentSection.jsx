@@ -1,6 +1,6 @@
 // frontend/src/components/features/feed/CommentSection.jsx
 
-import React, { useState, useEffect, useContext } from 'react';
+import React, { useState, useContext } from 'react';
 import { getComments, createComment, deleteComment as apiDeleteComment } from '../../../api/postApi';
 import { AuthContext } from '../../../context/AuthContext';
 import Input from '../../common/Input';
@@ -9,6 +9,7 @@ import Spinner from '../../common/Spinner';
 import Avatar from '../../common/Avatar';
 import { IoTrashOutline, IoChatbubbleOutline } from 'react-icons/io5';
 import { Link } from 'react-router-dom';
+import useInfiniteScroll from '../../../hooks/useInfiniteScroll';
 
 // --- Utility: Format Time ---
 const formatTimeAgo = (dateString) => {
@@ -74,28 +75,14 @@ const Comment = ({ comment, onDelete }) => {
  */
 const CommentSection = ({ postId }) => {
   const { user } = useContext(AuthContext);
-  const [comments, setComments] = useState([]);
   const [newCommentText, setNewCommentText] = useState('');
-  const [loading, setLoading] = useState(true);
   const [isSubmitting, setIsSubmitting] = useState(false);
-  const [error, setError] = useState(null);
+  const [actionError, setError] = useState(null);
 
-  // --- Fetch Comments ---
-  const fetchComments = async () => {
-    try {
-      setLoading(true);
-      const data = await getComments(postId);
-      setComments(data);
-    } catch (err) {
-      setError('Failed to load comments.');
-    } finally {
-      setLoading(false);
-    }
-  };
-
-  useEffect(() => {
-    fetchComments();
-  }, [postId]);
+  // --- Fetch Comments (oldest first, a page at a time as the list is scrolled) ---
+  const { items: comments, setItems: setComments, loading, loadingMore, hasMore, error: loadError, sentinelRef } =
+    useInfiniteScroll((cursor) => getComments(postId, cursor), [postId]);
+  const error = actionError || (loadError && 'Failed to load comments.');
 
   // --- Handle New Comment Submission ---
   const handleCommentSubmit = async (e) => {
@@ -142,7 +129,7 @@ const CommentSection = ({ postId }) => {
   return (
     <div className="mt-6">
       <h3 className="text-xl font-bold text-text-primary mb-4">
-        Comments ({comments.length})
+        Comments ({comments.length}{hasMore ? '+' : ''})
       </h3>
 
       {/* --- New Comment Form --- */}
@@ -192,6 +179,8 @@ const CommentSection = ({ postId }) => {
             </p>
           </div>
         )}
+        <div ref={sentinelRef} />
+        {loadingMore && <div className="flex justify-center py-4"><Spinner size="sm" /></div>}
       </div>
     </div>
   );
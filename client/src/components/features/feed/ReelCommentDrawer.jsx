@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useContext } from 'react';
+import React, { useState, useContext } from 'react';
 import { fetchReelComments, addReelComment } from '../../../api/reelApi'; // Use reelApi
 import { deleteComment as apiDeleteComment } from '../../../api/postApi'; // Can reuse delete if ID is unique or Create dedicated deleteReelComment
 import { AuthContext } from '../../../context/AuthContext';
@@ -8,6 +8,7 @@ import Spinner from '../../common/Spinner';
 import Avatar from '../../common/Avatar';
 import { IoTrashOutline, IoChatbubbleOutline, IoCloseOutline } from 'react-icons/io5';
 import { Link } from 'react-router-dom';
+import useInfiniteScroll from '../../../hooks/useInfiniteScroll';
 
 const formatTimeAgo = (dateString) => {
   const now = new Date();
@@ -45,28 +46,13 @@ const Comment = ({ comment, onDelete }) => {
 
 const ReelCommentDrawer = ({ reelId, isOpen, onClose }) => {
   const { user } = useContext(AuthContext);
-  const [comments, setComments] = useState([]);
   const [newCommentText, setNewCommentText] = useState('');
-  const [loading, setLoading] = useState(true);
   const [isSubmitting, setIsSubmitting] = useState(false);
 
-  useEffect(() => {
-    if (isOpen && reelId) {
-      fetchComments();
-    }
-  }, [isOpen, reelId]);
-
-  const fetchComments = async () => {
-    try {
-      setLoading(true);
-      const data = await fetchReelComments(reelId);
-      setComments(data);
-    } catch (err) {
-      console.error(err);
-    } finally {
-      setLoading(false);
-    }
-  };
+  // Oldest first, the next page as the end of the drawer scrolls into view
+  const { items: comments, setItems: setComments, loading, loadingMore, sentinelRef } = useInfiniteScroll(
+    (cursor) => fetchReelComments(reelId, cursor), [reelId], { enabled: isOpen && !!reelId }
+  );
 
   const handleCommentSubmit = async (e) => {
     e.preventDefault();
@@ -123,6 +109,8 @@ const ReelCommentDrawer = ({ reelId, isOpen, onClose }) => {
               <p className="text-xs">Start the conversation.</p>
             </div>
           )}
+          <div ref={sentinelRef} />
+          {loadingMore && <div className="flex justify-center py-3"><Spinner size="sm" /></div>}
         </div>
 
         {/* Input */}
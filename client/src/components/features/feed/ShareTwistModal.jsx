@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { IoClose, IoSearch, IoPaperPlane } from 'react-icons/io5';
-import { searchUsers } from '../../../api/userApi';
+import { mentionUsers } from '../../../api/userApi';
 import { shareTwist } from '../../../api/postApi';
 import Avatar from '../../common/Avatar';
 import { motion } from 'framer-motion';
@@ -12,15 +12,15 @@ const ShareTwistModal = ({ isOpen, onClose, twistId }) => {
   const [sending, setSending] = useState(false);
 
   useEffect(() => {
-    if (query.length > 2) {
+    if (query.trim()) {
       const delayDebounceFn = setTimeout(async () => {
         try {
-          const data = await searchUsers(query);
+          const data = await mentionUsers(query);
           setResults(data);
         } catch (error) {
           console.error("Search failed", error);
         }
-      }, 300);
+      }, 150);
       return () => clearTimeout(delayDebounceFn);
     } else {
       setResults([]);
@@ -88,7 +88,7 @@ const ShareTwistModal = ({ isOpen, onClose, twistId }) => {
 
         {/* Results List */}
         <div className="flex-1 overflow-y-auto p-2 space-y-2 scrollbar-hide">
-          {query.length < 3 && results.length === 0 && (
+          {!query.trim() && results.length === 0 && (
             <div className="text-center text-text-secondary/50 py-10">Type name to search...</div>
           )}
 
@@ -101,7 +101,7 @@ const ShareTwistModal = ({ isOpen, onClose, twistId }) => {
                 className={`flex items-center justify-between p-3 rounded-xl cursor-pointer transition-all ${isSelected ? 'bg-text-accent/10 border border-text-accent' : 'hover:bg-white/5 border border-transparent'}`}
               >
                 <div className="flex items-center gap-3">
-                  <Avatar src={user.profile?.profile_picture} size="sm" />
+                  <Avatar src={user.profile_picture} size="sm" />
                   <div>
                     <p className="text-text-primary font-medium text-sm">{user.username}</p>
                     <p className="text-text-secondary text-xs">{user.first_name} {user.last_name}</p>
@@ -1,6 +1,6 @@
 // frontend/src/components/features/feed/StoryAnalyticsModal.jsx
 
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import Modal from '../../common/Modal';
 import Spinner from '../../common/Spinner';
 import Avatar from '../../common/Avatar';
@@ -8,42 +8,28 @@ import Button from '../../common/Button';
 import { IoEyeOutline, IoCloseOutline, IoCloudOfflineOutline } from 'react-icons/io5';
 import { getStoryAnalytics } from '../../../api/storyApi'; // API to fetch viewer list
 import { Link } from 'react-router-dom';
+import useInfiniteScroll from '../../../hooks/useInfiniteScroll';
 
 
 const StoryAnalyticsModal = ({ isOpen, onClose, storyId }) => {
-  const [analytics, setAnalytics] = useState(null);
-  const [loading, setLoading] = useState(false);
-  const [error, setError] = useState(null);
+  const [totalViews, setTotalViews] = useState(0);
 
-  // --- Fetch Analytics on Open ---
-  const fetchAnalytics = async () => {
-    if (!storyId) return;
+  // --- Fetch Analytics on Open, more viewers on scroll ---
+  const { items: viewers, loading, loadingMore, error: loadError, sentinelRef } = useInfiniteScroll(async (cursor) => {
+    // API call to GET /api/stories/<storyId>/analytics/ -> { total_views, viewers, next }
+    const data = await getStoryAnalytics(storyId, cursor);
+    setTotalViews(data.total_views);
+    const page = data.viewers;
+    page._paginationContext = { next: data.next };
+    return page;
+  }, [storyId], { enabled: isOpen && !!storyId });
 
-    setLoading(true);
-    setError(null);
-
-    try {
-      // API call to GET /api/stories/<storyId>/analytics/
-      const data = await getStoryAnalytics(storyId);
-      setAnalytics(data); // data = { total_views: N, viewers: [...] }
-    } catch (e) {
-      // Handle permission errors (e.g., 403 Forbidden if not the author)
-      const errorMsg =
-        e.response?.status === 403
-          ? "Permission Denied. You are not the owner of this story."
-          : "Failed to load viewer list.";
-      setError(errorMsg);
-      setAnalytics(null);
-    } finally {
-      setLoading(false);
-    }
-  };
-
-  useEffect(() => {
-    if (isOpen) {
-      fetchAnalytics();
-    }
-  }, [isOpen, storyId]);
+  // Handle permission errors (e.g., 403 Forbidden if not the author)
+  const error = loadError && (
+    loadError.response?.status === 403
+      ? "Permission Denied. You are not the owner of this story."
+      : "Failed to load viewer list."
+  );
 
   // --- Render Functions ---
 
@@ -61,7 +47,7 @@ const StoryAnalyticsModal = ({ isOpen, onClose, storyId }) => {
       );
     }
 
-    if (!analytics || analytics.total_views === 0) {
+    if (viewers.length === 0) {
       return (
         <div className="text-center py-10 text-text-secondary">
           <IoEyeOutline className="h-10 w-10 mx-auto mb-3" />
@@ -73,7 +59,7 @@ const StoryAnalyticsModal = ({ isOpen, onClose, storyId }) => {
     // Display the list of viewers
     return (
       <div className="space-y-1 overflow-y-auto max-h-[300px] pr-2">
-        {analytics.viewers.map((viewer) => (
+        {viewers.map((viewer) => (
           <Link
             key={viewer.id}
             to={`/profile/${viewer.username}`}
@@ -89,6 +75,8 @@ const StoryAnalyticsModal = ({ isOpen, onClose, storyId }) => {
             </div>
           </Link>
         ))}
+        <div ref={sentinelRef} />
+        {loadingMore && <div className="text-center py-3"><Spinner size="sm" /></div>}
       </div>
     );
   };
@@ -105,7 +93,7 @@ const StoryAnalyticsModal = ({ isOpen, onClose, storyId }) => {
           <div className="flex items-center space-x-2">
             <IoEyeOutline className="h-6 w-6 text-indigo-500" />
             <h3 className="text-xl font-bold text-text-primary">
-              {analytics?.total_views || 0} Total Views
+              {totalViews || 0} Total Views
             </h3>
           </div>
         </div>
@@ -1,27 +1,15 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { getStoryArchive } from '../../../api/storyApi';
 import Spinner from '../../common/Spinner';
 import { IoCalendarOutline, IoTimeOutline } from 'react-icons/io5';
 import StoryViewerModal from './StoryViewerModal';
+import useInfiniteScroll from '../../../hooks/useInfiniteScroll';
 
 const StoryArchive = () => {
-    const [stories, setStories] = useState([]);
-    const [loading, setLoading] = useState(true);
     const [viewerContext, setViewerContext] = useState({ isOpen: false, story: null, monthStories: [] });
 
-    useEffect(() => {
-        const fetchArchive = async () => {
-            try {
-                const data = await getStoryArchive();
-                setStories(data);
-            } catch (err) {
-                console.error(err);
-            } finally {
-                setLoading(false);
-            }
-        };
-        fetchArchive();
-    }, []);
+    // Newest first, older months load as the end of the archive scrolls into view
+    const { items: stories, loading, loadingMore, sentinelRef } = useInfiniteScroll((cursor) => getStoryArchive(cursor));
 
     // Group stories by Month and Year
     const groupStories = (stories) => {
@@ -122,6 +110,9 @@ const StoryArchive = () => {
                 </section>
             ))}
 
+            <div ref={sentinelRef} />
+            {loadingMore && <div className="flex justify-center py-4"><Spinner size="md" /></div>}
+
             {viewerContext.isOpen && (
                 <StoryViewerModal
                     isOpen={viewerContext.isOpen}
@@ -1,6 +1,6 @@
 // frontend/src/components/features/feed/TwistCommentSection.jsx
 
-import React, { useState, useEffect, useContext } from 'react';
+import React, { useState, useContext } from 'react';
 import { getTwistComments, createTwistComment, deleteTwistComment } from '../../../api/postApi';
 import { AuthContext } from '../../../context/AuthContext';
 import Input from '../../common/Input';
@@ -9,6 +9,7 @@ import Spinner from '../../common/Spinner';
 import Avatar from '../../common/Avatar';
 import { IoTrashOutline, IoChatbubbleOutline } from 'react-icons/io5';
 import { Link } from 'react-router-dom';
+import useInfiniteScroll from '../../../hooks/useInfiniteScroll';
 
 // --- Utility: Format Time ---
 const formatTimeAgo = (dateString) => {
@@ -75,28 +76,14 @@ const Comment = ({ comment, onDelete }) => {
  */
 const TwistCommentSection = ({ twistId }) => {
   const { user } = useContext(AuthContext);
-  const [comments, setComments] = useState([]);
   const [newCommentText, setNewCommentText] = useState('');
-  const [loading, setLoading] = useState(true);
   const [isSubmitting, setIsSubmitting] = useState(false);
-  const [error, setError] = useState(null);
+  const [actionError, setError] = useState(null);
 
-  // --- Fetch Comments ---
-  const fetchComments = async () => {
-    try {
-      setLoading(true);
-      const data = await getTwistComments(twistId);
-      setComments(data);
-    } catch (err) {
-      setError('Failed to load replies.');
-    } finally {
-      setLoading(false);
-    }
-  };
-
-  useEffect(() => {
-    fetchComments();
-  }, [twistId]);
+  // --- Fetch Comments (oldest first, a page at a time as the list is scrolled) ---
+  const { items: comments, setItems: setComments, loading, loadingMore, hasMore, error: loadError, sentinelRef } =
+    useInfiniteScroll((cursor) => getTwistComments(twistId, cursor), [twistId]);
+  const error = actionError || (loadError && 'Failed to load replies.');
 
   // --- Handle New Comment Submission ---
   const handleCommentSubmit = async (e) => {
@@ -144,7 +131,7 @@ const TwistCommentSection = ({ twistId }) => {
     <div className="mt-6">
 
       {/* --- New Reply Form --- */}
-      <h3 className="text-lg font-bold text-text-primary mb-4">Replies ({comments.length})</h3>
+      <h3 className="text-lg font-bold text-text-primary mb-4">Replies ({comments.length}{hasMore ? '+' : ''})</h3>
 
       <div className="flex gap-3 mb-6">
         <Avatar src={user?.profile?.profile_picture} size="md" />
@@ -188,6 +175,8 @@ const TwistCommentSection = ({ twistId }) => {
             <p className="text-text-secondary">No replies yet. Be the first to reply!</p>
           </div>
         )}
+        <div ref={sentinelRef} />
+        {loadingMore && <div className="flex justify-center py-4"><Spinner size="sm" /></div>}
       </div>
     </div>
   );
@@ -9,6 +9,7 @@ import Button from '../../common/Button';
 import { Link } from 'react-router-dom';
 import { IoPersonOutline, IoPersonAddOutline, IoCheckmarkOutline, IoArrowBackOutline, IoSearchOutline } from 'react-icons/io5';
 import { AuthContext } from '../../../context/AuthContext';
+import useInfiniteScroll from '../../../hooks/useInfiniteScroll';
 
 const UserListItem = ({ user, onClose }) => {
   const { user: currentUser } = useContext(AuthContext);
@@ -78,10 +79,7 @@ const UserListItem = ({ user, onClose }) => {
 
 const FollowListModal = ({ isOpen, onClose, type, username }) => {
   const [activeTab, setActiveTab] = useState(type || 'followers');
-  const [list, setList] = useState([]);
   const [searchQuery, setSearchQuery] = useState('');
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState(null);
 
   const tabs = [
     { id: 'followers', label: 'Followers' },
@@ -95,34 +93,16 @@ const FollowListModal = ({ isOpen, onClose, type, username }) => {
     }
   }, [isOpen, type]);
 
-  useEffect(() => {
-    if (!isOpen || !username) return;
-
-    const fetchList = async () => {
-      setLoading(true);
-      setError(null);
-      try {
-        let data;
-        if (activeTab === 'followers') data = await getFollowers(username);
-        else if (activeTab === 'following') data = await getFollowing(username);
-        else data = await getSubscribers(username);
-
-        setList(Array.isArray(data) ? data : []);
-      } catch (e) {
-        console.error("Connection fetch error:", e);
-        setError(`Failed to load ${activeTab}.`);
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    fetchList();
-  }, [isOpen, username, activeTab]);
+  // First page on open / tab switch, the next one as the end of the list scrolls into view
+  const { items: list, loading, loadingMore, error: loadError, sentinelRef } = useInfiniteScroll((cursor) => {
+    if (activeTab === 'followers') return getFollowers(username, cursor);
+    if (activeTab === 'following') return getFollowing(username, cursor);
+    return getSubscribers(username);
+  }, [username, activeTab], { enabled: isOpen && !!username });
+  const error = loadError && `Failed to load ${activeTab}.`;
 
   useEffect(() => {
     if (!isOpen) {
-      setList([]);
-      setError(null);
       setSearchQuery('');
     }
   }, [isOpen]);
@@ -193,6 +173,8 @@ const FollowListModal = ({ isOpen, onClose, type, username }) => {
               No connections match "{searchQuery}"
             </div>
           )}
+          <div ref={sentinelRef} />
+          {loadingMore && <div className="flex justify-center py-4"><Spinner size="md" /></div>}
         </div>
       </div>
     );
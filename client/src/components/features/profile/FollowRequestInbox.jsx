@@ -1,39 +1,24 @@
 // frontend/src/components/features/profile/FollowRequestInbox.jsx
 
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { IoCheckmarkCircleOutline, IoCloseCircleOutline, IoPersonOutline } from 'react-icons/io5';
 import { Link } from 'react-router-dom';
 import Spinner from '../../common/Spinner';
 import Button from '../../common/Button';
 import Avatar from '../../common/Avatar';
 import { getFollowRequests, handleFollowRequestAction } from '../../../api/userApi';
+import useInfiniteScroll from '../../../hooks/useInfiniteScroll';
 
 /**
  * Lists pending follow requests for the current user and allows them to be accepted or rejected.
  */
 const FollowRequestInbox = () => {
-  const [requests, setRequests] = useState([]);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState(null);
   const [processingId, setProcessingId] = useState(null);
 
-  // --- Fetch Requests ---
-  const fetchRequests = async () => {
-    setLoading(true);
-    setError(null);
-    try {
-      const data = await getFollowRequests();
-      setRequests(data);
-    } catch (e) {
-      setError('Failed to load follow requests.');
-    } finally {
-      setLoading(false);
-    }
-  };
-
-  useEffect(() => {
-    fetchRequests();
-  }, []);
+  // --- Fetch Requests (a page at a time, the next one on scroll) ---
+  const { items: requests, setItems: setRequests, loading, loadingMore, hasMore, error: loadError, sentinelRef } =
+    useInfiniteScroll((cursor) => getFollowRequests(cursor));
+  const error = loadError && 'Failed to load follow requests.';
 
   // --- Action Handler (Accept/Reject) ---
   const handleAction = async (requestId, action) => {
@@ -63,7 +48,7 @@ const FollowRequestInbox = () => {
   return (
     <div className="space-y-4">
       <h2 className="text-2xl font-bold text-text-primary">
-        Follow Requests ({requests.length})
+        Follow Requests ({requests.length}{hasMore ? '+' : ''})
       </h2>
 
       {requests.length === 0 ? (
@@ -113,6 +98,8 @@ const FollowRequestInbox = () => {
               </div>
             </div>
           ))}
+          <div ref={sentinelRef} />
+          {loadingMore && <div className="text-center py-2"><Spinner size="sm" /></div>}
         </div>
       )}
     </div>
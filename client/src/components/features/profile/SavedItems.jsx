@@ -1,30 +1,19 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { getSavedItems } from '../../../api/userApi';
 import Spinner from '../../common/Spinner';
 import Post from '../feed/Post';
 import ReelCard from '../feed/ReelCard';
 import TwistCard from '../feed/TwistCard';
+import useInfiniteScroll from '../../../hooks/useInfiniteScroll';
 import { IoBookmarkOutline, IoAppsOutline, IoVideocamOutline, IoChatbubbleOutline } from 'react-icons/io5';
 
 const SavedItems = () => {
     const [activeType, setActiveType] = useState('post'); // post, reel, twist
-    const [items, setItems] = useState([]);
-    const [loading, setLoading] = useState(true);
 
-    useEffect(() => {
-        const fetchItems = async () => {
-            setLoading(true);
-            try {
-                const data = await getSavedItems(activeType);
-                setItems(data);
-            } catch (err) {
-                console.error(err);
-            } finally {
-                setLoading(false);
-            }
-        };
-        fetchItems();
-    }, [activeType]);
+    // One page per tab, the next one as the end of the list scrolls into view
+    const { items, setItems, loading, loadingMore, sentinelRef } = useInfiniteScroll(
+        (cursor) => getSavedItems(activeType, cursor), [activeType]
+    );
 
     const Tabs = () => (
         <div className="flex border-b border-border mb-6">
@@ -134,6 +123,8 @@ const SavedItems = () => {
                             })}
                         </div>
                     )}
+                    <div ref={sentinelRef} />
+                    {loadingMore && <div className="flex justify-center py-4"><Spinner size="md" /></div>}
                 </div>
             )}
         </div>
@@ -32,7 +32,7 @@ import { BsCollectionPlay, BsCollectionPlayFill } from 'react-icons/bs';
 
 const Navbar = () => {
   const { user, logoutUser } = useContext(AuthContext);
-  const { unreadCount } = useContext(SocketContext);
+  const { unreadCount, unreadMessages } = useContext(SocketContext);
   const { theme, ThemeToggle } = useContext(ThemeContext);
   const [isProfileMenuOpen, setIsProfileMenuOpen] = useState(false);
   const location = useLocation();
@@ -148,6 +148,11 @@ const Navbar = () => {
                           {unreadCount > 9 ? '9+' : unreadCount}
                         </span>
                       )}
+                      {item.label === 'Messages' && unreadMessages > 0 && (
+                        <span className="absolute -top-1 -right-1 flex h-4 w-4 items-center justify-center rounded-full bg-red-500 text-[10px] text-white ring-2 ring-glass-bg">
+                          {unreadMessages > 9 ? '9+' : unreadMessages}
+                        </span>
+                      )}
                     </span>
                     <span className="text-base font-medium tracking-wide">{item.label}</span>
                   </div>
@@ -251,9 +256,9 @@ const Navbar = () => {
             {({ isActive }) => (
               <>
                 {isActive ? <IoChatbubblesSharp size={26} /> : <IoChatbubblesOutline size={26} />}
-                {unreadCount > 0 && (
+                {unreadMessages > 0 && (
                   <span className="absolute top-3 right-4 flex h-4 w-4 items-center justify-center rounded-full bg-red-500 text-[10px] text-white ring-2 ring-glass-bg">
-                    {unreadCount > 9 ? '9+' : unreadCount}
+                    {unreadMessages > 9 ? '9+' : unreadMessages}
                   </span>
                 )}
               </>
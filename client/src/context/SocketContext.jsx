@@ -14,6 +14,8 @@ export const SocketProvider = ({ children }) => {
   const [socket, setSocket] = useState(null);
   const [notifications, setNotifications] = useState([]);
   const [unreadCount, setUnreadCount] = useState(0);
+  // Unread DMs + group messages, from GET /unread/ and the socket's `unread_counts` pushes
+  const [unreadMessages, setUnreadMessages] = useState(0);
   const [toasts, setToasts] = useState([]);
   const navigate = useNavigate();
 
@@ -28,12 +30,23 @@ export const SocketProvider = ({ children }) => {
     try {
       const res = await api.get('/notifications/');
       setNotifications(res.data);
-      setUnreadCount(res.data.filter(n => !n.is_read).length);
+      // The list is paginated, so the server sends the total unread count alongside the first page
+      setUnreadCount(res.data._paginationContext?.unread_count ?? res.data.filter(n => !n.is_read).length);
     } catch (e) {
       console.error("Notif fetch failure", e);
     }
   }, []);
 
+  const fetchUnreadCounts = useCallback(async () => {
+    try {
+      const res = await api.get('/unread/');
+      setUnreadMessages(res.data.dms + res.data.group_messages);
+      setUnreadCount(res.data.notifications);
+    } catch (e) {
+      console.error("Unread counts fetch failure", e);
+    }
+  }, []);
+
   const markAsRead = useCallback(async (id) => {
     try {
       await api.post(`/notifications/${id}/read/`);
@@ -107,6 +120,8 @@ export const SocketProvider = ({ children }) => {
 
       newSocket.onopen = () => {
         console.log('[SocketContext] Global Feed Active');
+        // Catch up on anything that changed while disconnected
+        fetchUnreadCounts();
       };
 
       newSocket.onmessage = (event) => {
@@ -122,12 +137,21 @@ export const SocketProvider = ({ children }) => {
             } else {
               setNotifications(prev => {
                 const exists = prev.find(n => n.id === notifData.id);
-                if (exists) return prev.map(n => n.id === notifData.id ? notifData : n);
+                if (exists) {
+                  // An aggregated notification ("alice and 3 others") came back: move it to the top
+                  if (exists.is_read && !notifData.is_read) setUnreadCount(c => c + 1);
+                  return [notifData, ...prev.filter(n => n.id !== notifData.id)];
+                }
                 setUnreadCount(c => c + 1);
                 return [notifData, ...prev];
               });
             }
           } 
+          // 1b. Badge counts
+          else if (message.type === 'unread_counts') {
+            setUnreadMessages(message.data.dms + message.data.group_messages);
+            setUnreadCount(message.data.notifications);
+          }
           // 2. Chat Toasts
           else if (message.type === 'chat_alert') {
             setToasts(prev => [...prev, { id: Date.now(), ...message.data }]);
@@ -176,7 +200,7 @@ export const SocketProvider = ({ children }) => {
       if (newSocket) newSocket.close(1000);
       setSocket(null);
     };
-  }, [user, authToken, fetchNotifications]);
+  }, [user, authToken, fetchNotifications, fetchUnreadCounts]);
 
 
 
@@ -203,7 +227,9 @@ export const SocketProvider = ({ children }) => {
       socket, 
       notifications, 
       unreadCount, 
+      unreadMessages,
       fetchNotifications, 
+      fetchUnreadCounts,
       markAsRead, 
       markAllAsRead, 
       removeNotification, 
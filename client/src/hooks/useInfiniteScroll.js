@@ -0,0 +1,84 @@
+// frontend/src/hooks/useInfiniteScroll.js
+import { useState, useEffect, useRef, useCallback } from "react";
+import { nextCursor } from "../api/axiosInstance";
+
+/**
+ * Loads a cursor-paginated list a page at a time: the first page whenever `deps`
+ * change, then the next one each time the element given `sentinelRef` scrolls into view.
+ * @param {Function} fetchPage - (cursor) => Promise of one page, as unwrapped by axiosInstance
+ * @param {Array} deps - Reload from the first page when any of these change
+ * @param {object} options - { enabled }: nothing is fetched while false (e.g. a closed modal)
+ * @returns {object} { items, setItems, loading, loadingMore, hasMore, error, reload, sentinelRef }
+ */
+const useInfiniteScroll = (fetchPage, deps = [], { enabled = true } = {}) => {
+  const [items, setItems] = useState([]);
+  const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [hasMore, setHasMore] = useState(false);
+  const [error, setError] = useState(null);
+  const cursor = useRef(null);
+  const generation = useRef(0); // Pages arriving after a reload belong to the old list
+  const observer = useRef();
+  const fetchRef = useRef(fetchPage);
+  fetchRef.current = fetchPage;
+
+  const reload = useCallback(async () => {
+    const current = ++generation.current;
+    cursor.current = null;
+    setLoading(true);
+    setError(null);
+    try {
+      const page = await fetchRef.current(null);
+      if (current !== generation.current) return;
+      setItems(Array.isArray(page) ? page : []);
+      cursor.current = nextCursor(page);
+      setHasMore(cursor.current !== null);
+    } catch (e) {
+      if (current !== generation.current) return;
+      setError(e);
+      setItems([]);
+      setHasMore(false);
+    } finally {
+      if (current === generation.current) setLoading(false);
+    }
+  }, []);
+
+  const loadMore = useCallback(async () => {
+    if (!cursor.current) return;
+    const current = generation.current;
+    setLoadingMore(true);
+    try {
+      const page = await fetchRef.current(cursor.current);
+      if (current !== generation.current) return;
+      // Items added locally (e.g. a comment just posted) may also arrive in a later page
+      setItems(prev => {
+        const known = new Set(prev.map(item => item.id));
+        return [...prev, ...page.filter(item => !known.has(item.id))];
+      });
+      cursor.current = nextCursor(page);
+      setHasMore(cursor.current !== null);
+    } catch (e) {
+      console.error("Failed to load the next page:", e);
+    } finally {
+      setLoadingMore(false);
+    }
+  }, []);
+
+  useEffect(() => {
+    if (enabled) reload();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [enabled, reload, ...deps]);
+
+  const sentinelRef = useCallback(node => {
+    if (loading || loadingMore) return;
+    if (observer.current) observer.current.disconnect();
+    observer.current = new IntersectionObserver(entries => {
+      if (entries[0].isIntersecting && cursor.current) loadMore();
+    });
+    if (node) observer.current.observe(node);
+  }, [loading, loadingMore, loadMore]);
+
+  return { items, setItems, loading, loadingMore, hasMore, error, reload, sentinelRef };
+};
+
+export default useInfiniteScroll;
@@ -32,6 +32,7 @@ const HomePage = () => {
   const [page, setPage] = useState(1);
   const [hasMore, setHasMore] = useState(false);
   const [loadingMore, setLoadingMore] = useState(false);
+  const nextCursor = useRef(null);
   const observer = useRef();
 
   const lastElementRef = useCallback(node => {
@@ -101,7 +102,7 @@ const HomePage = () => {
     
     setFeedError(null);
     try {
-      const data = await PostApi.getFeedPosts(pageNum);
+      const data = await PostApi.getFeedPosts(pageNum === 1 ? null : nextCursor.current);
       // axiosInstance unwraps the results and attaches _paginationContext
       const results = Array.isArray(data) ? data : (data.results || []);
       
@@ -111,7 +112,8 @@ const HomePage = () => {
       });
 
       const paginationContext = data._paginationContext || {};
-      setHasMore(paginationContext.next !== null && paginationContext.next !== undefined);
+      nextCursor.current = paginationContext.next ? new URL(paginationContext.next).searchParams.get('cursor') : null;
+      setHasMore(nextCursor.current !== null);
     } catch (e) {
       setFeedError("Failed to load your feed.");
       if (pageNum === 1) setFeedPosts([]);
@@ -155,6 +155,11 @@ const NotificationItem = ({ notification, onAction, navigate }) => {
           >
             {notification.sender_username}
           </span>
+          {notification.actor_count > 1 && (
+            <span className="mr-1">
+              and {notification.actor_count - 1} {notification.actor_count === 2 ? 'other' : 'others'}
+            </span>
+          )}
           {text}
         </p>
         <span className="text-xs text-text-secondary mt-1 block">
@@ -8,6 +8,7 @@ import TwistCard from '../components/features/feed/TwistCard';
 import { IoArrowBackOutline } from 'react-icons/io5';
 import Button from '../components/common/Button';
 import useSEO from '../hooks/useSEO';
+import useInfiniteScroll from '../hooks/useInfiniteScroll';
 
 const PostDetailPage = () => {
   const { postId } = useParams();
@@ -111,23 +112,9 @@ const PostDetailPage = () => {
 };
 
 const TwistList = ({ postId }) => {
-  const [twists, setTwists] = useState([]);
-  const [loading, setLoading] = useState(true);
-
-  useEffect(() => {
-    const fetchTwists = async () => {
-      setLoading(true);
-      try {
-        const data = await getTwistsForPost(postId);
-        setTwists(data);
-      } catch (err) {
-        console.error(err);
-      } finally {
-        setLoading(false);
-      }
-    };
-    fetchTwists();
-  }, [postId]);
+  // Newest first, the next page as the end of the list scrolls into view
+  const { items: twists, loading, loadingMore, sentinelRef } =
+    useInfiniteScroll((cursor) => getTwistsForPost(postId, cursor), [postId]);
 
   if (loading) return <div className="text-center py-8"><Spinner /></div>;
 
@@ -147,6 +134,8 @@ const TwistList = ({ postId }) => {
           <TwistCard post={twist} />
         </div>
       ))}
+      <div ref={sentinelRef} />
+      {loadingMore && <div className="flex justify-center py-4"><Spinner size="sm" /></div>}
     </div>
   );
 };
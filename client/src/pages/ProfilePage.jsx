@@ -22,6 +22,7 @@ import { AuthContext } from '../context/AuthContext';
 import StoryViewerModal from '../components/features/feed/StoryViewerModal';
 import TwistCard from '../components/features/feed/TwistCard';
 import useSEO from '../hooks/useSEO';
+import useInfiniteScroll from '../hooks/useInfiniteScroll';
 
 // --- Improved Grid Items ---
 const PostGridItem = ({ post }) => {
@@ -123,15 +124,12 @@ const ProfilePage = () => {
   useSEO(`${username}'s Profile`, `View ${username}'s profile on Trend Twist.`);
 
   const [profileData, setProfileData] = useState(null);
-  const [userPosts, setUserPosts] = useState([]);
-  const [userReels, setUserReels] = useState([]);
-  const [userTwists, setUserTwists] = useState([]);
-  const [userDrafts, setUserDrafts] = useState([]);
   const [userStories, setUserStories] = useState(null);
+  // Whose content to list (null until the profile is known to be viewable); version reloads it
+  const [contentUser, setContentUser] = useState({ id: null, version: 0 });
 
   const [activeTab, setActiveTab] = useState('posts');
   const [loading, setLoading] = useState(true);
-  const [loadingContent, setLoadingContent] = useState(false);
   const [error, setError] = useState(null);
 
   const [isViewerOpen, setIsViewerOpen] = useState(false);
@@ -139,36 +137,33 @@ const ProfilePage = () => {
   const [initialGroupIndex, setInitialGroupIndex] = useState(0);
   const [initialStoryIndex, setInitialStoryIndex] = useState(0); 
 
-  const fetchTwists = useCallback(async (userId) => {
-    try {
-      const twistsData = await PostApi.getTwistsByUser(userId);
-      setUserTwists(twistsData);
-    } catch (e) {
-      console.error("Twists fail:", e);
-      setUserTwists([]);
-    }
-  }, []);
-
-  const fetchPosts = useCallback(async (userId) => {
-    try {
-      const postsData = await PostApi.getPostsByUser(userId);
-      setUserPosts(postsData);
-    } catch (e) {
-      console.error("Posts fail:", e);
-      setUserPosts([]);
-    }
-  }, []);
-
-  const fetchReels = useCallback(async (userId) => {
-    try {
-      const reelsData = await getReelsByUser(userId);
-      setUserReels(reelsData.filter(r => !r.is_draft));
-      setUserDrafts(reelsData.filter(r => r.is_draft));
-    } catch (e) {
-      console.error("Reels fail:", e);
-      setUserReels([]);
-    }
-  }, []);
+  // Posts, twists and reels are paginated: each loads its first page with the profile
+  // and the next one when the end of its tab scrolls into view
+  const contentDeps = [contentUser.id, contentUser.version];
+  const contentOptions = { enabled: contentUser.id !== null };
+  const postsList = useInfiniteScroll((cursor) => PostApi.getPostsByUser(contentUser.id, cursor), contentDeps, contentOptions);
+  const twistsList = useInfiniteScroll((cursor) => PostApi.getTwistsByUser(contentUser.id, cursor), contentDeps, contentOptions);
+  const reelsList = useInfiniteScroll((cursor) => getReelsByUser(contentUser.id, cursor), contentDeps, contentOptions);
+
+  const userPosts = postsList.items;
+  const userTwists = twistsList.items;
+  const userReels = reelsList.items.filter(r => !r.is_draft);
+  const userDrafts = reelsList.items.filter(r => r.is_draft);
+  const loadingContent = contentUser.id !== null && (postsList.loading || twistsList.loading || reelsList.loading);
+
+  // The exclusive tab mixes all three lists, so its end loads more of each
+  const exclusiveSentinelRef = useCallback((node) => {
+    postsList.sentinelRef(node);
+    twistsList.sentinelRef(node);
+    reelsList.sentinelRef(node);
+  }, [postsList.sentinelRef, twistsList.sentinelRef, reelsList.sentinelRef]);
+  const sentinelRef = {
+    posts: postsList.sentinelRef,
+    twists: twistsList.sentinelRef,
+    reels: reelsList.sentinelRef,
+    drafts: reelsList.sentinelRef,
+  }[activeTab] || exclusiveSentinelRef;
+  const loadingMore = postsList.loadingMore || twistsList.loadingMore || reelsList.loadingMore;
 
   const fetchStories = useCallback(async (userId, uname, pPic) => {
     try {
@@ -195,22 +190,16 @@ const ProfilePage = () => {
       const isOwner = data.id === currentUser?.id;
       const canView = !data.profile?.is_private || data.is_following || isOwner;
 
+      setContentUser(prev => ({ id: canView ? data.id : null, version: prev.version + 1 }));
       if (canView) {
-        setLoadingContent(true);
-        await Promise.all([
-          fetchPosts(data.id),
-          fetchTwists(data.id),
-          fetchReels(data.id),
-          fetchStories(data.id, data.username, data.profile?.profile_picture)
-        ]);
-        setLoadingContent(false);
+        await fetchStories(data.id, data.username, data.profile?.profile_picture);
       }
     } catch (err) {
       setError(`Profile not found for: ${username}`);
     } finally {
       setLoading(false);
     }
-  }, [username, currentUser, fetchPosts, fetchReels, fetchStories, fetchTwists]);
+  }, [username, currentUser, fetchStories]);
 
   useEffect(() => {
     fetchProfile();
@@ -386,6 +375,9 @@ const ProfilePage = () => {
                   ))}
                 </div>
               )}
+
+              <div ref={sentinelRef} />
+              {loadingMore && <div className="flex justify-center py-6"><Spinner size="md" /></div>}
             </div>
           )}
         </div>
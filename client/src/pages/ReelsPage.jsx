@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useRef } from 'react';
-import { fetchReels } from '../api/reelApi';
+import { fetchReels, fetchReelDetails } from '../api/reelApi';
 import ReelCard from '../components/features/feed/ReelCard';
 import { FaArrowLeft, FaCamera } from 'react-icons/fa';
 import { useNavigate, useLocation, useParams } from 'react-router-dom';
@@ -11,6 +11,8 @@ const ReelsPage = () => {
   const [loading, setLoading] = useState(true);
   // Track which reel is currently visible to drive progressive loading
   const [currentIndex, setCurrentIndex] = useState(0);
+  const [hasMore, setHasMore] = useState(true);
+  const loadingMore = useRef(false);
   const navigate = useNavigate();
   const location = useLocation();
   const { reelId } = useParams();
@@ -21,34 +23,30 @@ const ReelsPage = () => {
     loadReels();
   }, []);
 
-  // Fisher-Yates shuffle for randomness
-  const shuffleArray = (array) => {
-    let currentIndex = array.length, randomIndex;
-    while (currentIndex !== 0) {
-      randomIndex = Math.floor(Math.random() * currentIndex);
-      currentIndex--;
-      [array[currentIndex], array[randomIndex]] = [
-        array[randomIndex], array[currentIndex]];
-    }
-    return array;
-  };
-
   const loadReels = async () => {
     try {
+      // The server already ranks and rotates the feed per user
       const data = await fetchReels();
-      let shuffled = shuffleArray([...data]); // Randomize reels on load
+      let ordered = [...data];
+      setHasMore(Boolean(data._paginationContext?.next));
       
       // If we have a specific reel ID requested via URL or state, move it to the front
       const targetId = reelId || initialReelId;
       if (targetId) {
-        const index = shuffled.findIndex(r => r.id.toString() === targetId.toString());
+        const index = ordered.findIndex(r => r.id.toString() === targetId.toString());
         if (index !== -1) {
-          const selectedReel = shuffled.splice(index, 1)[0];
-          shuffled.unshift(selectedReel);
+          const selectedReel = ordered.splice(index, 1)[0];
+          ordered.unshift(selectedReel);
+        } else {
+          try {
+            ordered.unshift(await fetchReelDetails(targetId));
+          } catch (e) {
+            // Deleted or not visible: just show the feed
+          }
         }
       }
 
-      setReels(shuffled);
+      setReels(ordered);
     } catch (error) {
       console.error(error);
     } finally {
@@ -58,6 +56,22 @@ const ReelsPage = () => {
 
   // We don't need scrollIntoView anymore because the requested reel is placed at the top (index 0)
 
+  // Fetch the next page when the viewer gets close to the end of what is loaded
+  useEffect(() => {
+    if (loading || !hasMore || loadingMore.current || currentIndex < reels.length - 3) return;
+    loadingMore.current = true;
+    fetchReels()
+      .then((data) => {
+        setHasMore(Boolean(data._paginationContext?.next));
+        setReels(prev => {
+          const known = new Set(prev.map(r => r.id));
+          return [...prev, ...data.filter(r => !known.has(r.id))];
+        });
+      })
+      .catch(console.error)
+      .finally(() => { loadingMore.current = false; });
+  }, [currentIndex, reels.length, loading, hasMore]);
+
   const handleReelDeleted = (deletedId) => {
     setReels(prev => prev.filter(r => r.id !== deletedId));
   };
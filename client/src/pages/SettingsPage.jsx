@@ -14,7 +14,7 @@ import {
 } from 'react-icons/io5';
 
 import { FaCrown, FaStar, FaRocket, FaShieldAlt, FaHandshake, FaMoneyBillWave } from 'react-icons/fa';
-import api from '../api/axiosInstance';
+import api, { nextCursor } from '../api/axiosInstance';
 import StoryArchive from '../components/features/feed/StoryArchive';
 import SavedItems from '../components/features/profile/SavedItems';
 
@@ -543,6 +543,7 @@ const SettingsPage = () => {
   const CreatorEarningsSettings = () => {
     const [data, setData] = useState(null);
     const [history, setHistory] = useState([]);
+    const [historyCursor, setHistoryCursor] = useState(null); // Older withdrawals, fetched on request
     const [loading, setLoading] = useState(true);
     const [withdrawing, setWithdrawing] = useState(false);
     
@@ -568,6 +569,7 @@ const SettingsPage = () => {
         ]);
         setData(eRes.data);
         setHistory(hRes.data);
+        setHistoryCursor(nextCursor(hRes.data));
         
         // Initialize info from data
         if (eRes.data.withdrawal_info) {
@@ -584,6 +586,16 @@ const SettingsPage = () => {
       fetchData();
     }, []);
 
+    const loadOlderWithdrawals = async () => {
+      try {
+        const res = await api.get('/withdrawals/', { params: { cursor: historyCursor } });
+        setHistory(prev => [...prev, ...res.data]);
+        setHistoryCursor(nextCursor(res.data));
+      } catch (e) {
+        console.error('Failed to load older withdrawals:', e);
+      }
+    };
+
     const handleSaveInfo = async () => {
       setLoading(true);
       try {
@@ -822,6 +834,14 @@ const SettingsPage = () => {
                       ))}
                    </tbody>
                  </table>
+                 {historyCursor && (
+                   <button
+                     onClick={loadOlderWithdrawals}
+                     className="w-full py-2 text-xs font-bold text-purple-400 hover:text-purple-300 transition-colors"
+                   >
+                     Load older withdrawals
+                   </button>
+                 )}
                </div>
              )}
           </div>
@@ -1,20 +1,25 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef, useCallback } from 'react';
 import CreateTwistInput from '../components/features/trends/components/CreateTwistInput';
 import TwistCard from '../components/features/feed/TwistCard';
 import Spinner from '../components/common/Spinner';
 import { getPublicTwists } from '../api/postApi';
+import { nextCursor } from '../api/axiosInstance';
 import { IoPlanetOutline } from 'react-icons/io5';
 
 const TrendingPage = () => {
   const [twists, setTwists] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const cursor = useRef(null);
+  const observer = useRef();
 
   const fetchAllTwists = async () => {
     setLoading(true);
     try {
-      // Fetch all public twists (not filtered by tag)
+      // Fetch the first page of public twists (not filtered by tag)
       const response = await getPublicTwists('');
       setTwists(response);
+      cursor.current = nextCursor(response);
     } catch (e) {
       console.error("Error loading twists", e);
     } finally {
@@ -22,6 +27,32 @@ const TrendingPage = () => {
     }
   };
 
+  const fetchMoreTwists = useCallback(async () => {
+    if (!cursor.current) return;
+    setLoadingMore(true);
+    try {
+      const response = await getPublicTwists('', cursor.current);
+      setTwists(prev => [...prev, ...response]);
+      cursor.current = nextCursor(response);
+    } catch (e) {
+      console.error("Error loading more twists", e);
+    } finally {
+      setLoadingMore(false);
+    }
+  }, []);
+
+  // Infinite scroll: load the next page when the last twist comes into view
+  const lastElementRef = useCallback(node => {
+    if (loading || loadingMore) return;
+    if (observer.current) observer.current.disconnect();
+    observer.current = new IntersectionObserver(entries => {
+      if (entries[0].isIntersecting && cursor.current) {
+        fetchMoreTwists();
+      }
+    });
+    if (node) observer.current.observe(node);
+  }, [loading, loadingMore, fetchMoreTwists]);
+
   useEffect(() => {
     fetchAllTwists();
   }, []);
@@ -31,6 +62,7 @@ const TrendingPage = () => {
     try {
       const response = await getPublicTwists('');
       setTwists(response);
+      cursor.current = nextCursor(response);
     } catch (e) { console.error(e); }
   };
 
@@ -58,8 +90,8 @@ const TrendingPage = () => {
           {loading ? (
             <div className="py-20 flex justify-center"><Spinner size="lg" /></div>
           ) : twists.length > 0 ? (
-            twists.map(twist => (
-              <div key={twist.id} className="bg-background-secondary border border-border rounded-2xl overflow-hidden hover:border-text-secondary/30 transition-colors shadow-sm">
+            twists.map((twist, index) => (
+              <div key={twist.id} ref={index === twists.length - 1 ? lastElementRef : null} className="bg-background-secondary border border-border rounded-2xl overflow-hidden hover:border-text-secondary/30 transition-colors shadow-sm">
                 <TwistCard post={twist} onUpdate={handleRefresh} />
               </div>
             ))
@@ -69,6 +101,7 @@ const TrendingPage = () => {
               <p className="text-text-secondary text-sm mt-1">Be the first to start the conversation!</p>
             </div>
           )}
+          {loadingMore && <div className="py-6 flex justify-center"><Spinner size="md" /></div>}
         </div>
 
       </div>
@@ -11,5 +11,11 @@ python manage.py collectstatic --noinput
 # Apply database migrations
 python manage.py migrate
 
+# Repair any drift in the denormalized counter columns
+python manage.py reconcile_counters
+
+# Populate home timelines on first deploy
+python manage.py rebuild_timelines --if-empty
+
 
 python create_admin.py
\ No newline at end of file
@@ -4,6 +4,7 @@ from rest_framework import views, permissions, status
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from .models import Post, Twist, Reel, Comment, Hashtag, Profile, CreatorEarning, WithdrawalRequest, Story
+from .services.counters import adjust, adjust_profile
 from decimal import Decimal
 
 class IsAdminUser(permissions.BasePermission):
@@ -235,6 +236,7 @@ class AdminPostActionView(views.APIView):
         try:
             post = Post.objects.get(id=post_id)
             post.delete()
+            adjust_profile(post.author_id, posts_count=-1)
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Post.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
@@ -310,6 +312,8 @@ class AdminTwistActionView(views.APIView):
         try:
             twist = Twist.objects.get(id=twist_id)
             twist.delete()
+            adjust(Post, twist.original_post_id, twists_count=-1)
+            adjust(Twist, twist.original_twist_id, retwists_count=-1)
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Twist.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
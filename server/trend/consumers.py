@@ -10,6 +10,7 @@ from .models import ChatRoom, ChatMessage, Profile, ChatGroup
 from channels.db import database_sync_to_async
 from .middleware import get_user_from_scope
 from django.db import close_old_connections
+from .services import chat_writer, presence, unread
 
 logger = logging.getLogger(__name__)
 
@@ -42,12 +43,18 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.channel_layer.group_add(self.room_group_name, self.channel_name)
             await self.accept()
             
-            # Start Background Status/Presence Tasks
-            asyncio.create_task(self._ensure_db(self.update_user_status, True))
+            # Presence: refcounted connection + heartbeat (services/presence.py), no Profile write
+            await self._presence_connect()
             await self.channel_layer.group_send(
                 self.room_group_name,
-                {'type': 'status_relay', 'sender_id': self.current_user.id, 'username': self.current_user.username, 'is_online': True}
+                {'type': 'status_relay', 'sender_id': self.current_user.id, 'username': self.current_user.username, 'is_online': True, 'last_seen': None}
             )
+            if self.user_id_param:
+                # Tell the newcomer where the other side stands right away
+                other = await self._ensure_db(Profile.objects.select_related('user').filter(user_id=self.other_user_id).first)
+                if other:
+                    is_online, last_seen = await self._ensure_db(presence.status, other)
+                    await self.send(text_data=json.dumps({'type': 'user_status', 'username': other.user.username, 'is_online': is_online, 'last_seen': last_seen.isoformat() if last_seen else None}))
         except Exception as e:
             logger.exception(f"Chat Connect Error: {e}")
             await self.close()
@@ -55,8 +62,19 @@ class ChatConsumer(AsyncWebsocketConsumer):
     async def disconnect(self, close_code):
         if hasattr(self, 'room_group_name'):
             await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
-            asyncio.create_task(self._ensure_db(self.update_user_status, False))
-            await self.channel_layer.group_send(self.room_group_name, {'type': 'status_relay', 'sender_id': self.current_user.id, 'username': self.current_user.username, 'is_online': False})
+            # Other tabs / the app-wide socket keep the user online: only announce the last disconnect
+            if await self._presence_disconnect():
+                await self.channel_layer.group_send(self.room_group_name, {'type': 'status_relay', 'sender_id': self.current_user.id, 'username': self.current_user.username, 'is_online': False, 'last_seen': timezone.now().isoformat()})
+
+    async def _presence_connect(self):
+        await database_sync_to_async(presence.connect)(self.current_user.id, self.channel_name)
+        self._heartbeat = asyncio.create_task(presence.heartbeat_loop(self.current_user.id, self.channel_name))
+        presence.ensure_flusher()
+
+    async def _presence_disconnect(self):
+        if hasattr(self, '_heartbeat'):
+            self._heartbeat.cancel()
+        return await database_sync_to_async(presence.disconnect)(self.current_user.id, self.channel_name)
 
     async def receive(self, text_data):
         try: data = json.loads(text_data)
@@ -90,7 +108,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
         content = data.get('message') or data.get('content')
         if not content: return
-        msg_id, ts = await self._ensure_db(self.save_message, content)
+        if chat_writer.enabled():
+            msg_id, ts = await self.queue_message(content)
+        else:
+            msg_id, ts = await self._ensure_db(self.save_message, content)
         if not msg_id: return
         await self.channel_layer.group_send(self.room_group_name, {'type': 'chat_message', 'id': msg_id, 'content': content, 'author': self.current_user.id, 'author_username': self.current_user.username, 'timestamp': ts.isoformat(), 'is_read': False, 'group_id': int(self.group_id_param) if self.group_id_param else None})
 
@@ -149,7 +170,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     async def status_relay(self, event):
         if event['sender_id'] != self.current_user.id:
-            await self.send(text_data=json.dumps({'type': 'user_status', 'username': event['username'], 'is_online': event['is_online']}))
+            await self.send(text_data=json.dumps({'type': 'user_status', 'username': event['username'], 'is_online': event['is_online'], 'last_seen': event.get('last_seen')}))
 
     # Protocol sinks
     async def chat_message(self, event): await self.send(text_data=json.dumps(event))
@@ -175,16 +196,36 @@ class ChatConsumer(AsyncWebsocketConsumer):
             if self.group_id_param:
                 msg = ChatMessage.objects.create(group_id=self.group_id_param, author=self.current_user, content=content)
                 ChatGroup.objects.filter(id=self.group_id_param).update(last_message_at=ts)
+                unread.messages_added([msg])
                 return msg.id, msg.timestamp
             else:
                 if not hasattr(self, 'cached_room_id'): self.precache_chat_metadata()
                 msg = ChatMessage.objects.create(room_id=self.cached_room_id, author=self.current_user, content=content)
                 ChatRoom.objects.filter(id=self.cached_room_id).update(last_message_at=ts)
+                unread.messages_added([msg])
                 return msg.id, msg.timestamp
         except: return None, None
-    def update_user_status(self, online): Profile.objects.filter(user=self.current_user).update(is_online=online, last_seen=timezone.now())
+    async def queue_message(self, content):
+        """Write-behind path: id and timestamp are assigned here, the row is persisted by chat_writer."""
+        try:
+            target = {'group_id': int(self.group_id_param)} if self.group_id_param else None
+            if target is None:
+                if not hasattr(self, 'cached_room_id'): await self._ensure_db(self.precache_chat_metadata)
+                if not self.cached_room_id: return None, None
+                target = {'room_id': self.cached_room_id}
+            writer = chat_writer.get_writer()
+            msg_id, ts = await writer.ids.next_id(), timezone.now()
+            await writer.submit(id=msg_id, author_id=self.current_user.id, content=content, timestamp=ts, **target)
+            return msg_id, ts
+        except Exception as e:
+            logger.exception(f"Chat write-behind failed: {e}")
+            return None, None
     def mark_messages_read(self):
-        if hasattr(self, 'cached_room_id'): ChatMessage.objects.filter(room_id=self.cached_room_id, is_read=False).exclude(author=self.current_user).update(is_read=True)
+        if self.group_id_param:
+            unread.conversation_read(self.current_user.id, group_id=int(self.group_id_param))
+        elif hasattr(self, 'cached_room_id'):
+            ChatMessage.objects.filter(room_id=self.cached_room_id, is_read=False).exclude(author=self.current_user).update(is_read=True)
+            unread.conversation_read(self.current_user.id, room_id=self.cached_room_id)
 
 class NotificationConsumer(AsyncWebsocketConsumer):
     async def connect(self):
@@ -196,7 +237,10 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             self.group_name = f"user_{str(self.user.id)}"
             await self.channel_layer.group_add(self.group_name, self.channel_name)
             await self.accept()
-            asyncio.create_task(self.keep_alive())
+            # The app-wide socket is what keeps a user "online" between chats
+            await database_sync_to_async(presence.connect)(self.user.id, self.channel_name)
+            presence.ensure_flusher()
+            self._keep_alive = asyncio.create_task(self.keep_alive())
         except: await self.close()
 
     async def keep_alive(self):
@@ -204,9 +248,14 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             await asyncio.sleep(25)
             try: await self.send(text_data=json.dumps({'type': 'ping'}))
             except: break
+            try: await database_sync_to_async(presence.heartbeat)(self.user.id, self.channel_name)
+            except Exception as e: logger.warning(f"[presence] Heartbeat failed: {e}")
 
     async def disconnect(self, close_code):
-        if hasattr(self, 'group_name'): await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            if hasattr(self, '_keep_alive'): self._keep_alive.cancel()
+            await database_sync_to_async(presence.disconnect)(self.user.id, self.channel_name)
 
     async def notification_gateway(self, event): 
         """Direct push to global UI context (call signals etc.)."""
@@ -219,4 +268,5 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             'data': event['data']
         }))
 
-    async def notification_message(self, event): await self.send(text_data=json.dumps(event))
\ No newline at end of file
+    async def notification_message(self, event): await self.send(text_data=json.dumps(event))
+    async def unread_counts(self, event): await self.send(text_data=json.dumps(event))
\ No newline at end of file
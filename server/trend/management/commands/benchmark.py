@@ -0,0 +1,198 @@
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from rest_framework.test import APIClient
+
+from trend.services.query_budget import QueryRecorder
+
+# (name, weight): roughly how often a real session hits each screen
+SCENARIOS = [
+    ('feed', 30),
+    ('feed_next_page', 10),
+    ('reels', 15),
+    ('stories', 10),
+    ('notifications', 10),
+    ('chat_inbox', 10),
+    ('profile', 10),
+    ('search', 5),
+]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class VirtualUser(threading.Thread):
+    """Loops over weighted scenarios as one user until the deadline, recording every request."""
+
+    def __init__(self, user, others, deadline, max_requests, rng, results):
+        super().__init__(daemon=True)
+        self.user = user
+        self.others = others
+        self.deadline = deadline
+        self.max_requests = max_requests
+        self.rng = rng
+        self.results = results
+        self.next_feed_url = None
+
+    def url_for(self, scenario):
+        if scenario == 'feed_next_page' and self.next_feed_url:
+            return self.next_feed_url
+        if scenario in ('feed', 'feed_next_page'):
+            return '/api/posts/'
+        if scenario == 'reels':
+            return '/api/reels/'
+        if scenario == 'stories':
+            return '/api/stories/'
+        if scenario == 'notifications':
+            return '/api/notifications/'
+        if scenario == 'chat_inbox':
+            return '/api/chats/'
+        if scenario == 'profile':
+            return f"/api/profiles/{self.rng.choice(self.others)}/"
+        return f"/api/users/search/?q={self.rng.choice(self.others)[:3]}"
+
+    def run(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        names, weights = zip(*SCENARIOS)
+        done = 0
+        try:
+            while time.perf_counter() < self.deadline and (not self.max_requests or done < self.max_requests):
+                scenario = self.rng.choices(names, weights)[0]
+                url = self.url_for(scenario)
+                with QueryRecorder() as recorder:
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    elapsed = time.perf_counter() - start
+                self.results.append((scenario, elapsed, recorder.count, response.status_code))
+                done += 1
+
+                if scenario in ('feed', 'feed_next_page') and response.status_code == 200:
+                    next_url = response.data.get('next')
+                    self.next_feed_url = next_url.replace('http://testserver', '') if next_url else None
+        finally:
+            connection.close()
+
+
+class Command(BaseCommand):
+    help = ('Seeds a reproducible dataset and drives the hot endpoints (feed, reels, stories, notifications, '
+            'chat inbox, profile, search) with concurrent virtual users. Reports latency percentiles, '
+            'throughput and queries per request as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed-users', type=int, default=0,
+                            help='Seed this many users with seed_large_data first (0 = use the existing data)')
+        parser.add_argument('--bulk-seed', action='store_true', help='Seed with seed_large_data --bulk (fast, for large user counts)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for seeding and for the virtual users')
+        parser.add_argument('--virtual-users', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=20, help='Seconds to run')
+        parser.add_argument('--requests', type=int, default=0, help='Stop each virtual user after this many requests')
+        parser.add_argument('--warmup', type=int, default=1, help='Untimed requests per endpoint before measuring')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--baseline', help='Previous JSON report to compare p95 / queries against')
+
+    def handle(self, *args, **options):
+        if options['seed_users']:
+            call_command('seed_large_data', options['seed_users'], clear=True, seed=options['seed'],
+                         bulk=options['bulk_seed'], stdout=self.stdout)
+
+        rng = random.Random(options['seed'])
+        usernames = list(User.objects.filter(is_superuser=False).order_by('id').values_list('username', flat=True))
+        if len(usernames) < 2:
+            raise CommandError('Not enough users. Run with --seed-users N or seed the database first.')
+        actors = list(User.objects.filter(username__in=rng.sample(usernames, min(options['virtual_users'], len(usernames)))))
+        if options['virtual_users'] > len(actors):
+            actors = [actors[i % len(actors)] for i in range(options['virtual_users'])]
+
+        self.warm_up(actors[0], usernames, options['warmup'])
+        for alias in connections:
+            connections[alias].close()  # Threads open their own connections
+
+        results = []
+        deadline = time.perf_counter() + options['duration']
+        threads = [
+            VirtualUser(actor, usernames, deadline, options['requests'], random.Random(rng.random()), results)
+            for actor in actors
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+        report = self.build_report(results, wall, options, len(usernames))
+        rendered = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as out:
+                out.write(rendered)
+        self.stdout.write(rendered)
+        if options['baseline']:
+            self.compare(report, options['baseline'])
+
+    def warm_up(self, actor, usernames, rounds):
+        client = APIClient()
+        client.force_authenticate(actor)
+        vu = VirtualUser(actor, usernames, 0, 0, random.Random(0), [])
+        for _ in range(rounds):
+            for name, _ in SCENARIOS:
+                client.get(vu.url_for(name))
+
+    def build_report(self, results, wall, options, user_count):
+        by_scenario = defaultdict(list)
+        for scenario, elapsed, queries, status in results:
+            by_scenario[scenario].append((elapsed, queries, status))
+        by_scenario['ALL'] = [(e, q, s) for _, e, q, s in results]
+
+        endpoints = {}
+        for scenario, rows in sorted(by_scenario.items()):
+            latencies = sorted(e * 1000 for e, _, _ in rows)
+            endpoints[scenario] = {
+                'requests': len(rows),
+                'errors': sum(1 for _, _, s in rows if s >= 400),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'mean_ms': round(sum(latencies) / len(latencies), 2),
+                'throughput_rps': round(len(rows) / wall, 2),
+                'queries_per_request': round(sum(q for _, q, _ in rows) / len(rows), 2),
+            }
+        return {
+            'meta': {
+                'database': connection.vendor,
+                'users_in_db': user_count,
+                'virtual_users': options['virtual_users'],
+                'duration_s': round(wall, 2),
+                'seed': options['seed'],
+            },
+            'endpoints': endpoints,
+        }
+
+    def compare(self, report, baseline_path):
+        try:
+            with open(baseline_path) as f:
+                baseline = json.load(f)['endpoints']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Cannot read baseline {baseline_path}: {e}")
+
+        self.stdout.write(f"\n{'endpoint':<16} {'p95 ms':>18} {'queries/req':>18}")
+        for name, row in report['endpoints'].items():
+            old = baseline.get(name)
+            if not old:
+                continue
+            self.stdout.write(
+                f"{name:<16} {old['p95_ms']:>8} -> {row['p95_ms']:<8} "
+                f"{old['queries_per_request']:>8} -> {row['queries_per_request']:<8}"
+            )
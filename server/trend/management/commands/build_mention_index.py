@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from trend.services import mentions
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the @mention autocomplete prefix index from the users table'
+
+    def handle(self, *args, **options):
+        count = mentions.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Mention index rebuilt ({count} users)."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from trend.services.reels import build_pool
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the cached reel recommendation candidate pool (schedule every few minutes)'
+
+    def handle(self, *args, **options):
+        pool = build_pool()
+        self.stdout.write(self.style.SUCCESS(f"Reel candidate pool rebuilt ({len(pool)} reels)."))
@@ -0,0 +1,106 @@
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class StubState:
+    def __init__(self, latency, fail_rate):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.messages = 0
+        self.invalid = 0
+        self.seen_flaky = set()
+
+
+def make_handler(state, stdout):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            if state.latency:
+                time.sleep(state.latency)
+            if not self.headers.get('Authorization', '').startswith('key='):
+                return self._reply(401, {'error': 'Unauthorized'})
+            if random.random() < state.fail_rate:
+                return self._reply(503, {'error': 'Unavailable'}, {'Retry-After': '1'})
+
+            tokens = body.get('registration_ids') or ([body['to']] if body.get('to') else [])
+            results = [self._result(token) for token in tokens]
+            failures = sum(1 for r in results if 'error' in r)
+            with state.lock:
+                state.requests += 1
+                state.messages += len(tokens) - failures
+            stdout.write(
+                f"POST {len(tokens)} tokens, {failures} failed, collapse_key={body.get('collapse_key')}, "
+                f"title={body.get('notification', {}).get('title')!r}"
+            )
+            self._reply(200, {
+                'multicast_id': random.getrandbits(48), 'success': len(tokens) - failures,
+                'failure': failures, 'canonical_ids': sum(1 for r in results if 'registration_id' in r),
+                'results': results,
+            })
+
+        def _result(self, token):
+            # Token prefixes pick the outcome: invalid-* / stale-* / flaky-* (fails once) / anything else
+            if token.startswith('invalid'):
+                with state.lock:
+                    state.invalid += 1
+                return {'error': 'NotRegistered'}
+            if token.startswith('flaky'):
+                with state.lock:
+                    first = token not in state.seen_flaky
+                    state.seen_flaky.add(token)
+                if first:
+                    return {'error': 'Unavailable'}
+            result = {'message_id': f'0:{uuid.uuid4().hex}'}
+            if token.startswith('stale-'):
+                result['registration_id'] = f'fresh-{token[len("stale-"):]}'
+            return result
+
+        def _reply(self, code, payload, headers=None):
+            data = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class Command(BaseCommand):
+    help = ('Serves a local stand-in for the FCM legacy send endpoint. Run with FCM_ENDPOINT='
+            'http://127.0.0.1:<port>/fcm/send (and any FCM_SERVER_KEY). Tokens starting with "invalid" are '
+            'reported NotRegistered, "stale-" get a canonical id, "flaky" fail once with Unavailable.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency-ms', type=int, default=0, help='Delay added to every request')
+        parser.add_argument('--fail-rate', type=float, default=0, help='Share of requests answered with HTTP 503')
+
+    def handle(self, *args, **options):
+        state = StubState(options['latency_ms'] / 1000, options['fail_rate'])
+        server = ThreadingHTTPServer((options['host'], options['port']), make_handler(state, self.stdout))
+        self.stdout.write(f"FCM stub listening on http://{options['host']}:{options['port']}/fcm/send")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        self.stdout.write(self.style.SUCCESS(
+            f"FCM stub stopped: {state.requests} requests, {state.messages} messages delivered, "
+            f"{state.invalid} invalid tokens."
+        ))
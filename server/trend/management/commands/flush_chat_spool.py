@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from trend.services.chat_writer import replay_spool
+
+
+class Command(BaseCommand):
+    help = 'Persists chat messages left in the write-behind spool file (see trend/services/chat_writer.py)'
+
+    def handle(self, *args, **options):
+        written = replay_spool()
+        self.stdout.write(self.style.SUCCESS(f"Chat spool flushed ({written} messages written)."))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from trend.services.hashtags import SOURCES, index_many
+
+
+class Command(BaseCommand):
+    help = 'Links existing posts, twists and reels to the hashtags in their text'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='*', default=None, choices=['posts', 'twists', 'reels'],
+                            help='Restrict to some of the content types')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total = 0
+        for model, (field, relation) in SOURCES.items():
+            if options['only'] and relation not in options['only']:
+                continue
+            changed = 0
+            rows = model.objects.only('id', 'created_at', field).order_by('id')
+            last_id = 0
+            while True:
+                batch = list(rows.filter(id__gt=last_id)[:batch_size])
+                if not batch:
+                    break
+                changed += index_many(model, batch)
+                last_id = batch[-1].id
+            total += changed
+            self.stdout.write(f"{relation}: {changed} links changed")
+        self.stdout.write(self.style.SUCCESS(f"Hashtag index rebuilt ({total} links changed)."))
@@ -0,0 +1,165 @@
+import json
+from collections import Counter
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.urls import URLPattern, reverse
+from rest_framework.test import APIClient
+
+from trend import urls as trend_urls
+from trend.models import Post, Story
+from trend.services.query_budget import EndpointReport, QueryRecorder, budget_for, instrument_serializers
+
+# GET handlers that talk to Stripe or are otherwise not safe to replay
+DEFAULT_SKIP = {'stripe_webhook', 'verify_subscription', 'peek_session', 'subscription_portal', 'create_checkout_session'}
+
+
+class Command(BaseCommand):
+    help = 'Reports query count, DB time, duplicate queries and serializer time for every GET route in trend/urls.py'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to make requests as (default: the user following the most people)')
+        parser.add_argument('--target', help='Username used for <username>/<user_id> routes (default: most followed user)')
+        parser.add_argument('--only', nargs='*', default=None, help='Restrict to these url names')
+        parser.add_argument('--repeat', type=int, default=1, help='Requests per endpoint')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+        parser.add_argument('--from-log', help='Aggregate a QUERY_BUDGET_LOG file instead of making requests')
+        parser.add_argument('--fail-over-budget', action='store_true', help='Exit with an error if any endpoint is over budget')
+
+    def handle(self, *args, **options):
+        rows = self.from_log(options['from_log']) if options['from_log'] else self.exercise(options)
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2, default=str))
+        else:
+            self.print_table(rows)
+
+        over = [r['endpoint'] for r in rows if r['over_budget']]
+        if over and options['fail_over_budget']:
+            raise CommandError(f"{len(over)} endpoint(s) over query budget: {', '.join(over)}")
+
+    # --- Driving requests ---
+
+    def exercise(self, options):
+        acting = self.pick_user(options['user'], 'following')
+        target = self.pick_user(options['target'], 'followers')
+        if not acting or not target:
+            raise CommandError('No users found. Seed some data first (seed_data / seed_large_data).')
+
+        instrument_serializers()
+        client = APIClient()
+        client.force_authenticate(acting)
+        report = EndpointReport()
+
+        for pattern in trend_urls.urlpatterns:
+            if not isinstance(pattern, URLPattern) or pattern.name in DEFAULT_SKIP:
+                continue
+            if options['only'] and pattern.name not in options['only']:
+                continue
+            view_class = getattr(pattern.callback, 'view_class', None)
+            if view_class is None or not hasattr(view_class, 'get'):
+                continue
+            url = self.build_url(pattern, view_class, acting, target)
+            if url is None:
+                self.stdout.write(f"   skipped {pattern.name} (no sample data for {pattern.pattern})")
+                continue
+
+            for _ in range(options['repeat']):
+                with QueryRecorder() as recorder:
+                    response = client.get(url)
+                report.add(f"GET /api/{pattern.pattern}", pattern.name, recorder)
+            if response.status_code >= 400:
+                self.stdout.write(f"   {pattern.name} returned {response.status_code}")
+        return report.rows()
+
+    def pick_user(self, username, ranked_by):
+        if username:
+            return User.objects.filter(username=username).first()
+        return User.objects.annotate(n=Count(ranked_by)).order_by('-n', 'id').first()
+
+    def build_url(self, pattern, view_class, acting, target):
+        kwargs = {}
+        for name in pattern.pattern.converters:
+            value = self.sample_value(name, view_class, acting, target)
+            if value is None:
+                return None
+            kwargs[name] = value
+        return reverse(pattern.name, kwargs=kwargs)
+
+    def sample_value(self, name, view_class, acting, target):
+        if name == 'username':
+            return target.username
+        if name in ('user_id', 'creator_id'):
+            return target.id
+        if name == 'story_id':
+            return Story.objects.filter(author=acting).values_list('id', flat=True).last()
+        if name == 'post_id':
+            return Post.objects.values_list('id', flat=True).last()
+        if name == 'pk':
+            model = self.view_model(view_class)
+        elif name.endswith('_id'):
+            try:
+                model = apps.get_model('trend', name[:-3].replace('_', ''))
+            except LookupError:
+                return None
+        else:
+            return None
+        return model.objects.values_list('pk', flat=True).last() if model else None
+
+    def view_model(self, view_class):
+        queryset = getattr(view_class, 'queryset', None)
+        if queryset is not None:
+            return queryset.model
+        serializer_class = getattr(view_class, 'serializer_class', None)
+        meta = getattr(serializer_class, 'Meta', None)
+        return getattr(meta, 'model', None)
+
+    # --- Reading a middleware log ---
+
+    def from_log(self, path):
+        endpoints = {}
+        try:
+            with open(path) as log:
+                for line in log:
+                    entry = json.loads(line)
+                    row = endpoints.setdefault(entry['endpoint'], {
+                        'endpoint': entry['endpoint'], 'url_name': entry['url_name'],
+                        'budget': budget_for(entry['url_name']), 'calls': 0, 'queries': [],
+                        'db_ms': 0.0, 'serializer_ms': 0.0, 'over_budget': 0, 'dups': Counter(),
+                    })
+                    row['calls'] += 1
+                    row['queries'].append(entry['queries'])
+                    row['db_ms'] += entry['db_ms']
+                    row['serializer_ms'] += entry['serializer_ms']
+                    row['over_budget'] += entry['queries'] > row['budget']
+                    row['dups'].update(entry.get('duplicate_signatures', {}))
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+        rows = []
+        for row in endpoints.values():
+            calls = row['calls']
+            rows.append({
+                'endpoint': row['endpoint'], 'url_name': row['url_name'], 'calls': calls,
+                'budget': row['budget'], 'queries_avg': round(sum(row['queries']) / calls, 1),
+                'queries_max': max(row['queries']), 'db_ms_avg': round(row['db_ms'] / calls, 2),
+                'serializer_ms_avg': round(row['serializer_ms'] / calls, 2),
+                'over_budget': row['over_budget'], 'top_duplicates': row['dups'].most_common(3),
+            })
+        return sorted(rows, key=lambda r: r['queries_max'], reverse=True)
+
+    # --- Output ---
+
+    def print_table(self, rows):
+        self.stdout.write(f"{'endpoint':<55} {'calls':>5} {'q avg':>6} {'q max':>6} {'budget':>6} {'db ms':>8} {'ser ms':>8}")
+        for r in rows:
+            line = (f"{r['endpoint'][:55]:<55} {r['calls']:>5} {r['queries_avg']:>6} {r['queries_max']:>6} "
+                    f"{r['budget']:>6} {r['db_ms_avg']:>8} {r['serializer_ms_avg']:>8}")
+            self.stdout.write(self.style.ERROR(line) if r['over_budget'] else line)
+            for signature, times in r['top_duplicates'][:1]:
+                self.stdout.write(f"      repeated x{times}: {signature[:110]}")
+        over = sum(1 for r in rows if r['over_budget'])
+        summary = f"{len(rows)} endpoints, {over} over budget."
+        self.stdout.write(self.style.ERROR(summary) if over else self.style.SUCCESS(summary))
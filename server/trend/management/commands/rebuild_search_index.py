@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from trend.models import SearchToken
+from trend.services import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the inverted search index (SearchToken) for the non-Postgres search backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='*', default=None, choices=list(search.SOURCES),
+                            help='Restrict to some of the kinds')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if search.backend() != 'index':
+            self.stdout.write(f"Search backend is '{search.backend()}', which needs no index; nothing to do.")
+            return
+
+        batch_size = options['batch_size']
+        total = 0
+        for kind, (model, fields) in search.SOURCES.items():
+            if options['only'] and kind not in options['only']:
+                continue
+            SearchToken.objects.filter(kind=kind).delete()
+            rows = model.objects.only('id', *fields).order_by('id')
+            written = 0
+            last_id = 0
+            while True:
+                batch = list(rows.filter(id__gt=last_id)[:batch_size])
+                if not batch:
+                    break
+                written += search.index_many(kind, batch)
+                last_id = batch[-1].id
+            total += written
+            self.stdout.write(f"{kind}: {written} terms")
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt ({total} terms written)."))
@@ -0,0 +1,30 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from trend.models import TimelineEntry
+from trend.services.timeline import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the materialized home timelines from follows, subscriptions and posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', nargs='*', default=None, help='Only rebuild these usernames')
+        parser.add_argument('--if-empty', action='store_true',
+                            help='Do nothing if any timeline entries exist (safe to run on every deploy)')
+
+    def handle(self, *args, **options):
+        if options['if_empty'] and TimelineEntry.objects.exists():
+            self.stdout.write("Timelines already populated, skipping.")
+            return
+
+        users = User.objects.all()
+        if options['user']:
+            users = users.filter(username__in=options['user'])
+
+        total = 0
+        for count, user_id in enumerate(users.values_list('id', flat=True).iterator(), start=1):
+            total += rebuild(user_id)
+            if count % 500 == 0:
+                self.stdout.write(f"   {count} timelines rebuilt...")
+        self.stdout.write(self.style.SUCCESS(f"Timelines rebuilt ({total} entries written)."))
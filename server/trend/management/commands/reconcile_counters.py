@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from trend.services import mentions
+from trend.services.counters import COUNTER_SPECS, reconcile
+
+
+class Command(BaseCommand):
+    help = 'Repairs drift in the denormalized like/comment/follower/... counter columns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='*', default=None,
+                            help='Restrict to counters like Post.likes_count Profile.followers_count')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        only = set(options['only'] or [])
+        total = 0
+        for model, field, source, fk, outer in COUNTER_SPECS:
+            label = f"{model.__name__}.{field}"
+            if only and label not in only:
+                continue
+            fixed = reconcile(model, field, source, fk, outer, options['batch_size'])
+            total += fixed
+            self.stdout.write(f"{label}: {fixed} corrected")
+            if fixed and label == 'Profile.followers_count':
+                # Corrected with bulk_update, which the mention cards' signals don't see
+                mentions.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Counter reconciliation finished ({total} rows corrected)."))
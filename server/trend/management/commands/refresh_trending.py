@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from trend.services import trending
+
+
+class Command(BaseCommand):
+    help = 'Re-ranks the trending hashtags into the cache (safe to run from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Recount the mention buckets from the hashtag links first (after index_hashtags)')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            mentions = trending.rebuild()
+            self.stdout.write(f"Buckets rebuilt from {mentions} mentions")
+        tags = trending.refresh()
+        for tag in tags[:10]:
+            self.stdout.write(f"   #{tag['name']}: {tag['post_count']} mentions, score {tag['score']}, velocity {tag['velocity']}")
+        self.stdout.write(self.style.SUCCESS(f"Trending hashtags refreshed ({len(tags)} ranked)."))
@@ -0,0 +1,23 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from trend.services import jobs
+
+
+class Command(BaseCommand):
+    help = 'Runs queued background jobs from trend/tasks.py (see trend/services/jobs.py) until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=None, help='Jobs run at once (default JOBS_CONCURRENCY)')
+        parser.add_argument('--burst', action='store_true', help='Exit once nothing is due instead of waiting for more')
+
+    def handle(self, *args, **options):
+        jobs.standalone = True
+        worker = jobs.Worker(concurrency=options['concurrency'])
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            # Finish the jobs in hand, then exit
+            signal.signal(sig, lambda *_: worker.stop())
+        self.stdout.write(f"Job worker started ({type(worker.broker).__name__}, concurrency {worker.concurrency})")
+        worker.run(burst=options['burst'])
+        self.stdout.write(self.style.SUCCESS("Job worker stopped."))
@@ -1,17 +1,158 @@
+import bisect
+import multiprocessing
+import os
 import random
 import time
+from contextlib import contextmanager
+from datetime import timedelta
+from django.conf import settings
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.db import transaction
+from django.db import connection, connections, transaction
 from django.utils import timezone
 from faker import Faker
 from django.urls import reverse
 from rest_framework.test import APIClient
 from io import BytesIO
-from PIL import Image, ImageDraw
+from PIL import Image, ImageDraw, ImageOps
+
+from trend.models import (
+    Profile, Post, Reel, Story, SubscriptionPlan, Twist, Comment, ReelComment, Like, Follow,
+    ReelLike, TimelineEntry,
+)
+
+# ---------------------------------------------------------------------------
+# Bulk mode (--bulk)
+# ---------------------------------------------------------------------------
+# Rows are generated in fixed-size chunks of users, each with its own seeded
+# RNG, so the dataset is identical for a given --seed whatever the worker
+# count. Workers are forked processes that inherit the id lists below and
+# write with bulk_create; media comes from a small pre-rendered pool of files.
+
+CHUNK_SIZE = 500
+_shared = {}  # Filled by the parent before forking: user ids, post/reel lists, media pool, options
+
+
+def _chunk_rng(seed, chunk_start, salt):
+    return random.Random(seed * 1_000_003 + chunk_start * 7 + salt)
+
+
+@contextmanager
+def _manual_timestamps(*models):
+    """Lets bulk rows carry their own spread-out created_at instead of auto_now_add."""
+    fields = [m._meta.get_field('created_at') for m in models]
+    for f in fields:
+        f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f in fields:
+            f.auto_now_add = True
+
+
+def _random_time(rng, now, days):
+    return now - timedelta(seconds=rng.randint(0, days * 86400))
+
+
+def _bulk_content(chunk_start):
+    """Posts and reels for users [chunk_start, chunk_start + CHUNK_SIZE)."""
+    opts, user_ids, media = _shared['options'], _shared['user_ids'], _shared['media']
+    rng = _chunk_rng(opts['seed'], chunk_start, 1)
+    fake = Faker()
+    fake.seed_instance(opts['seed'] + chunk_start)
+    texts = [fake.paragraph(nb_sentences=2) for _ in range(200)]
+    captions = [fake.sentence() for _ in range(100)]
+    now = timezone.now()
+
+    posts, reels = [], []
+    for user_id in user_ids[chunk_start:chunk_start + CHUNK_SIZE]:
+        for _ in range(rng.randint(1, opts['posts_per_user'] * 2 - 1)):
+            posts.append(Post(
+                author_id=user_id, content=rng.choice(texts), created_at=_random_time(rng, now, opts['days']),
+                media_file=rng.choice(media['images']) if rng.random() < 0.5 else None,
+            ))
+        if rng.random() < opts['reel_ratio']:
+            reels.append(Reel(
+                author_id=user_id, caption=rng.choice(captions), media_file=media['video'], media_type='video',
+                music_name=fake.catch_phrase(), views_count=rng.randint(0, 5000),
+                created_at=_random_time(rng, now, opts['days']),
+            ))
+
+    with _manual_timestamps(Post, Reel):
+        Post.objects.bulk_create(posts, batch_size=opts['batch_size'])
+        Reel.objects.bulk_create(reels, batch_size=opts['batch_size'])
+    connection.close()
+    return len(posts), len(reels)
+
+
+def _bulk_engagement(chunk_start):
+    """Follows (skewed toward popular users), likes, comments and home timelines for one chunk of users."""
+    opts, user_ids, cum_weights = _shared['options'], _shared['user_ids'], _shared['cum_weights']
+    posts, reels, posts_by_author = _shared['posts'], _shared['reels'], _shared['posts_by_author']
+    rng = _chunk_rng(opts['seed'], chunk_start, 2)
+    fake = Faker()
+    fake.seed_instance(opts['seed'] + chunk_start + 1)
+    comment_texts = [fake.sentence(nb_words=8)[:255] for _ in range(300)]
+    now = timezone.now()
+    total = cum_weights[-1]
+
+    follows, likes, comments, reel_likes, timeline = [], [], [], [], []
+    counts = {'follows': 0, 'likes': 0, 'comments': 0, 'reel_likes': 0, 'timeline': 0}
+
+    def flush(force=False):
+        for model, rows, key in ((Follow, follows, 'follows'), (Like, likes, 'likes'), (Comment, comments, 'comments'),
+                                 (ReelLike, reel_likes, 'reel_likes'), (TimelineEntry, timeline, 'timeline')):
+            if rows and (force or len(rows) >= opts['batch_size']):
+                model.objects.bulk_create(rows, batch_size=opts['batch_size'], ignore_conflicts=True)
+                counts[key] += len(rows)
+                rows.clear()
+
+    with _manual_timestamps(Comment):
+        for user_id in user_ids[chunk_start:chunk_start + CHUNK_SIZE]:
+            targets = set()
+            for _ in range(opts['follows_per_user']):
+                target = user_ids[bisect.bisect(cum_weights, rng.random() * total)]
+                if target != user_id:
+                    targets.add(target)
+            follows.extend(Follow(follower_id=user_id, following_id=t) for t in targets)
+            for author_id in targets | {user_id}:
+                timeline.extend(
+                    TimelineEntry(owner_id=user_id, post_id=pk, author_id=author_id, created_at=created_at)
+                    for pk, created_at in posts_by_author.get(author_id, ())
+                )
+
+            if posts:
+                for i in rng.sample(range(len(posts)), min(opts['likes_per_user'], len(posts))):
+                    likes.append(Like(post_id=posts[i][0], user_id=user_id))
+                for _ in range(opts['comments_per_user']):
+                    pk, _, created_at = posts[rng.randrange(len(posts))]
+                    comments.append(Comment(
+                        post_id=pk, author_id=user_id, text=rng.choice(comment_texts),
+                        created_at=created_at + (now - created_at) * rng.random(),
+                    ))
+            if reels:
+                for i in rng.sample(range(len(reels)), min(opts['likes_per_user'] // 4, len(reels))):
+                    reel_likes.append(ReelLike(reel_id=reels[i], user_id=user_id))
+            flush()
+        flush(force=True)
+    connection.close()
+    return counts
+
+
+def _render_pool_image(rng, width, height):
+    """Gradient JPEG rendered in C (linear_gradient + colorize) instead of line by line."""
+    c1 = tuple(rng.randint(0, 255) for _ in range(3))
+    c2 = tuple(rng.randint(0, 255) for _ in range(3))
+    img = ImageOps.colorize(Image.linear_gradient('L').resize((width, height)), c1, c2)
+    buf = BytesIO()
+    img.save(buf, format='JPEG', quality=80)
+    return buf.getvalue()
 
-from trend.models import Profile, Post, Reel, Story, SubscriptionPlan, Twist, Comment, ReelComment, Like, Follow
 
 class Command(BaseCommand):
     help = 'Seeds the database with massive dynamic data using API logic for real feeling'
@@ -19,6 +160,18 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('user_count', type=int, default=100, help='Number of users (e.g., 500 for large testing)')
         parser.add_argument('--clear', action='store_true', help='Clear before seeding')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for a reproducible dataset')
+        # Bulk mode
+        parser.add_argument('--bulk', action='store_true', help='Write rows directly with bulk_create instead of through the API')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Parallel worker processes (bulk mode, forced to 1 on SQLite)')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--media-pool', type=int, default=24, help='Pre-rendered images shared by all seeded media')
+        parser.add_argument('--posts-per-user', type=int, default=3, help='Average posts per user')
+        parser.add_argument('--reel-ratio', type=float, default=0.5, help='Share of users with a reel')
+        parser.add_argument('--follows-per-user', type=int, default=50)
+        parser.add_argument('--likes-per-user', type=int, default=100)
+        parser.add_argument('--comments-per-user', type=int, default=10)
+        parser.add_argument('--days', type=int, default=30, help='Spread content timestamps over this many days')
 
     def get_gradient_image(self, width=800, height=800):
         c1 = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
@@ -35,6 +188,9 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         user_count = options['user_count']
+        if options['seed'] is not None:
+            random.seed(options['seed'])
+            Faker.seed(options['seed'])
         fake = Faker()
         client = APIClient()
 
@@ -51,6 +207,9 @@ class Command(BaseCommand):
         for t, p in plans:
             SubscriptionPlan.objects.get_or_create(tier=t, defaults={'price': p, 'features': f'Access to {t} perks'})
 
+        if options['bulk']:
+            return self.handle_bulk(user_count, fake, options)
+
         # 2. Users
         users = []
         for i in range(user_count):
@@ -124,4 +283,100 @@ class Command(BaseCommand):
         Follow.objects.bulk_create(all_follows, ignore_conflicts=True)
         Like.objects.bulk_create(all_likes, ignore_conflicts=True)
 
+        # Bulk inserts skip signals, so bring derived data up to date
+        call_command('reconcile_counters')
+        call_command('rebuild_timelines')
+
         self.stdout.write(self.style.SUCCESS(f"✨ Large Scale Seeding Finished! Created {user_count} users, {Post.objects.count()} posts, and {Reel.objects.count()} reels."))
+
+    # --- Bulk mode ---
+
+    def handle_bulk(self, user_count, fake, options):
+        opts = {
+            'seed': options['seed'] if options['seed'] is not None else 0,
+            'batch_size': options['batch_size'],
+            'posts_per_user': max(options['posts_per_user'], 1),
+            'reel_ratio': options['reel_ratio'],
+            'follows_per_user': options['follows_per_user'],
+            'likes_per_user': options['likes_per_user'],
+            'comments_per_user': options['comments_per_user'],
+            'days': options['days'],
+        }
+        workers = max(options['workers'], 1)
+        if connection.vendor == 'sqlite' and workers > 1:
+            self.stdout.write("   SQLite allows a single writer, using 1 worker.")
+            workers = 1
+        rng = random.Random(opts['seed'])
+        started = time.time()
+
+        # 1. Media pool: a handful of files every seeded row points at
+        media = {
+            'images': [
+                default_storage.save(f"seed_pool/img_{opts['seed']}_{i}.jpg", ContentFile(_render_pool_image(rng, 800, 800)))
+                for i in range(options['media_pool'])
+            ],
+            'video': default_storage.save(f"seed_pool/reel_{opts['seed']}.mp4", ContentFile(b"data")),
+        }
+
+        # 2. Users + profiles (profile signals do not fire on bulk_create)
+        password = make_password('password123')
+        offset = User.objects.count()
+        users = [
+            User(username=f"{fake.user_name()}_{offset + i}", email=fake.email(), password=password,
+                 first_name=fake.first_name(), last_name=fake.last_name())
+            for i in range(user_count)
+        ]
+        with transaction.atomic():
+            User.objects.bulk_create(users, batch_size=opts['batch_size'])
+            user_ids = list(User.objects.filter(username__in=[u.username for u in users]).order_by('id').values_list('id', flat=True))
+            Profile.objects.bulk_create([
+                Profile(user_id=uid, bio=fake.sentence(nb_words=12), is_creator=True,
+                        profile_picture=rng.choice(media['images']) if rng.random() < 0.2 else 'profiles/default_avatar.png')
+                for uid in user_ids
+            ], batch_size=opts['batch_size'], ignore_conflicts=True)
+        self.stdout.write(f"   👤 {len(user_ids)} users ({time.time() - started:.1f}s)")
+
+        # Skewed popularity: rank r is followed with weight 1 / (r + 1) ** 0.8
+        shuffled = user_ids[:]
+        rng.shuffle(shuffled)
+        popularity = {uid: 1 / (rank + 1) ** 0.8 for rank, uid in enumerate(shuffled)}
+        cum_weights, acc = [], 0.0
+        for uid in user_ids:
+            acc += popularity[uid]
+            cum_weights.append(acc)
+
+        _shared.update({'options': opts, 'user_ids': user_ids, 'media': media, 'cum_weights': cum_weights})
+        chunks = list(range(0, len(user_ids), CHUNK_SIZE))
+
+        # 3. Content
+        results = self.run_chunks(_bulk_content, chunks, workers)
+        self.stdout.write(f"   📩 {sum(r[0] for r in results)} posts, {sum(r[1] for r in results)} reels ({time.time() - started:.1f}s)")
+
+        # 4. Engagement. Sorting by author / time keeps indexes stable whatever order workers inserted in
+        posts = sorted(Post.objects.filter(author_id__in=user_ids).values_list('id', 'author_id', 'created_at'),
+                       key=lambda p: (p[1], p[2], p[0]))
+        posts_by_author = {}
+        for pk, author_id, created_at in posts:
+            posts_by_author.setdefault(author_id, []).append((pk, created_at))
+        limit = getattr(settings, 'TIMELINE_BACKFILL_LIMIT', 200)
+        posts_by_author = {a: sorted(p, key=lambda x: x[1], reverse=True)[:limit] for a, p in posts_by_author.items()}
+        reels = sorted(Reel.objects.filter(author_id__in=user_ids).values_list('id', flat=True))
+        _shared.update({'posts': [(pk, a, c) for pk, a, c in posts], 'reels': reels, 'posts_by_author': posts_by_author})
+
+        results = self.run_chunks(_bulk_engagement, chunks, workers)
+        totals = {k: sum(r[k] for r in results) for k in results[0]} if results else {}
+        self.stdout.write(f"   🤝 {totals} ({time.time() - started:.1f}s)")
+
+        # 5. Derived data written by signals / views in normal operation
+        call_command('reconcile_counters', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f"✨ Bulk Seeding Finished in {time.time() - started:.1f}s! Created {len(user_ids)} users."
+        ))
+
+    def run_chunks(self, func, chunks, workers):
+        if workers == 1 or len(chunks) == 1:
+            return [func(c) for c in chunks]
+        # Children inherit _shared through fork and must open their own DB connections
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(workers) as pool:
+            return pool.map(func, chunks)
@@ -0,0 +1,264 @@
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from rest_framework_simplejwt.tokens import AccessToken
+
+from trend.management.commands.benchmark import percentile
+from trend.models import Profile, UserBlock
+from trend.services.matchmaking import GENDERS, MemoryMatchmaker, get_matchmaker
+
+SIM_PREFIX = 'stranger_sim_'
+ACTIONS = ('switch', 'block', 'leave')
+
+
+class Stats:
+    """Everything the simulated clients and the instrumented matchmaker record."""
+
+    def __init__(self):
+        self.time_to_match = []      # seconds from entering the queue to 'matched'
+        self.match_calls = []        # seconds per find_or_enqueue call
+        self.call_outcomes = Counter()
+        self.matched_events = []     # (username, partner_username, at)
+        self.server_matches = []     # (user_id, partner_id, unix time) as the matchmaker made them
+        self.actions = Counter()
+        self.timeouts = 0
+        self.errors = Counter()
+
+
+def instrument(matchmaker, stats):
+    """Times every find_or_enqueue call and counts its outcome ('paired' = lost a race to another searcher)."""
+    original = matchmaker.find_or_enqueue
+
+    async def timed(channel, info, exclude=None):
+        start = time.perf_counter()
+        result = await original(channel, info, exclude=exclude)
+        stats.match_calls.append(time.perf_counter() - start)
+        stats.call_outcomes[result[0]] += 1
+        if result[0] == 'matched':
+            partner = await matchmaker.info(result[1]) or {}
+            stats.server_matches.append((info['id'], partner.get('id'), time.time()))
+        return result
+
+    matchmaker.find_or_enqueue = timed
+    return original
+
+
+class SimulatedClient:
+    """One user looping connect -> wait -> matched -> switch / block / leave until the deadline."""
+
+    def __init__(self, application, user, preferred_gender, rng, options, stats, deadline):
+        self.application = application
+        self.user = user
+        self.preferred_gender = preferred_gender
+        self.rng = rng
+        self.options = options
+        self.stats = stats
+        self.deadline = deadline
+
+    async def run(self):
+        await asyncio.sleep(self.rng.random() * self.options['ramp_up'])
+        while time.perf_counter() < self.deadline:
+            if not await self.session():
+                break
+
+    async def session(self):
+        """One WebSocket connection. Returns False once the run is over."""
+        query = f"token={AccessToken.for_user(self.user)}&preferred_gender={self.preferred_gender or 'any'}"
+        comm = WebsocketCommunicator(self.application, f"/ws/stranger/?{query}")
+        try:
+            connected, _ = await comm.connect(timeout=10)
+        except Exception as e:
+            self.stats.errors[type(e).__name__] += 1
+            return True
+        if not connected:
+            self.stats.errors['rejected'] += 1
+            return True
+
+        self.entered = time.perf_counter()
+        try:
+            while time.perf_counter() < self.deadline:
+                # receive_nothing polls without cancelling the app the way a receive timeout would
+                if await comm.receive_nothing(timeout=self.options['match_timeout'], interval=0.01):
+                    self.stats.timeouts += 1
+                    continue
+                partner = self.record(await comm.receive_json_from())
+                if partner is None:
+                    continue
+                await asyncio.sleep(self.rng.uniform(0, self.options['dwell']))
+                if not await comm.receive_nothing(timeout=0):
+                    continue  # Partner left or we were re-matched meanwhile: react to that first
+                action = self.rng.choices(ACTIONS, self.options['action_weights'])[0]
+                self.stats.actions[action] += 1
+                if action == 'leave':
+                    return True
+                await comm.send_json_to({'type': action})
+                self.entered = time.perf_counter()
+            return False
+        finally:
+            # Count anything already delivered so both sides of every match are seen
+            while not await comm.receive_nothing(timeout=0.05, interval=0.01):
+                self.record(await comm.receive_json_from(), timed=False)
+            await comm.disconnect()
+
+    def record(self, message, timed=True):
+        """Books a server message; returns the partner's username for 'matched'."""
+        kind = message.get('type')
+        if kind == 'partner_left':
+            self.entered = time.perf_counter()
+        if kind != 'matched':
+            return None
+        now = time.perf_counter()
+        partner = message['stranger']['username']
+        if timed:
+            self.stats.time_to_match.append(now - self.entered)
+        self.stats.matched_events.append((self.user.username, partner, now))
+        return partner
+
+
+class Command(BaseCommand):
+    help = ('Simulates Stranger Talk users (WebsocketCommunicator against the configured channel layer and '
+            'matchmaker) churning through switches, blocks and reconnects. Reports time-to-match, match-call '
+            'latency and races, failed / one-sided matches, rule violations, orphaned queue entries and throughput.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=200, help='Simulated users connected at once')
+        parser.add_argument('--duration', type=float, default=20, help='Seconds to run')
+        parser.add_argument('--ramp-up', type=float, default=2, help='Spread initial connects over this many seconds')
+        parser.add_argument('--dwell', type=float, default=0.5, help='Max seconds a pair stays together')
+        parser.add_argument('--match-timeout', type=float, default=5, help='Waiting longer than this counts as a timeout')
+        parser.add_argument('--switch', type=float, default=6, help='Relative weight of switching after a match')
+        parser.add_argument('--block', type=float, default=1, help='Relative weight of blocking after a match')
+        parser.add_argument('--leave', type=float, default=3, help='Relative weight of disconnecting and reconnecting')
+        parser.add_argument('--prefer-ratio', type=float, default=0.3, help='Share of users with a gender preference')
+        parser.add_argument('--seed', type=int, default=7)
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        options['action_weights'] = (options['switch'], options['block'], options['leave'])
+        rng = random.Random(options['seed'])
+        users = self.prepare_users(options['clients'], rng)
+        preferences = {u.id: rng.choice(GENDERS[:2]) if rng.random() < options['prefer_ratio'] else None for u in users}
+        genders = dict(Profile.objects.filter(user__in=users).values_list('user__username', 'gender'))
+
+        stats = Stats()
+        report = asyncio.run(self.simulate(users, preferences, rng, options, stats))
+        report['checks'] = self.validate(stats, users, preferences, genders)
+
+        rendered = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as out:
+                out.write(rendered)
+        self.stdout.write(rendered)
+
+    def prepare_users(self, count, rng):
+        """Reuses or creates the simulation users, with a seeded gender mix and no blocks left from earlier runs."""
+        existing = set(User.objects.filter(username__startswith=SIM_PREFIX).values_list('username', flat=True))
+        password = make_password(None)
+        User.objects.bulk_create([
+            User(username=f'{SIM_PREFIX}{i}', password=password)
+            for i in range(count) if f'{SIM_PREFIX}{i}' not in existing
+        ])
+        users = list(User.objects.filter(username__in=[f'{SIM_PREFIX}{i}' for i in range(count)]).order_by('id'))
+        Profile.objects.bulk_create([Profile(user=u) for u in users], ignore_conflicts=True)
+        genders = {}
+        for user in users:
+            genders.setdefault(rng.choice(GENDERS[:2]), []).append(user.id)
+        for gender, ids in genders.items():
+            Profile.objects.filter(user_id__in=ids).update(gender=gender)
+        UserBlock.objects.filter(Q(blocker__in=users) | Q(blocked__in=users)).delete()
+        return users
+
+    async def simulate(self, users, preferences, rng, options, stats):
+        from trend_twist_api.asgi import application
+
+        matchmaker = get_matchmaker()
+        if isinstance(matchmaker, MemoryMatchmaker):
+            matchmaker.reset()
+        original = instrument(matchmaker, stats)
+
+        started = time.perf_counter()
+        deadline = started + options['duration']
+        clients = [
+            SimulatedClient(application, user, preferences[user.id], random.Random(rng.random()), options, stats, deadline)
+            for user in users
+        ]
+        try:
+            await asyncio.gather(*(client.run() for client in clients))
+            wall = time.perf_counter() - started
+            await asyncio.sleep(0.2)  # Let the last disconnect handlers finish
+            leftover = await matchmaker.snapshot()
+        finally:
+            matchmaker.find_or_enqueue = original
+
+        ttm = sorted(t * 1000 for t in stats.time_to_match)
+        calls = sorted(t * 1000 for t in stats.match_calls)
+        pairs = len(stats.matched_events) / 2
+        return {
+            'meta': {
+                'clients': len(users), 'duration_s': round(wall, 2), 'seed': options['seed'],
+                'matchmaker': type(matchmaker).__name__,
+            },
+            'time_to_match_ms': self.distribution(ttm),
+            'match_call_ms': self.distribution(calls),
+            'match_calls': dict(stats.call_outcomes),
+            'contention': {
+                # With atomic matching there is no lock to wait on: the cost of contention is searchers
+                # finding they were already taken ('paired') and the tail of match_call_ms
+                'lost_races': stats.call_outcomes.get('paired', 0),
+            },
+            'throughput': {
+                'pairs': pairs,
+                'pairs_per_s': round(pairs / wall, 2),
+                'match_calls_per_s': round(len(calls) / wall, 2),
+            },
+            'actions': dict(stats.actions),
+            'waiting_timeouts': stats.timeouts,
+            'connect_errors': dict(stats.errors),
+            'orphaned_queue_entries': len(leftover['orphaned']),
+            'left_in_queue_after_disconnect': leftover['waiting'],
+        }
+
+    def distribution(self, values):
+        if not values:
+            return {'count': 0}
+        return {
+            'count': len(values),
+            'p50': round(percentile(values, 50), 2),
+            'p95': round(percentile(values, 95), 2),
+            'p99': round(percentile(values, 99), 2),
+            'max': round(values[-1], 2),
+        }
+
+    def validate(self, stats, users, preferences, genders):
+        """Failed (one-sided) matches and pairs that break gender preferences or blocks."""
+        preferred = {u.username: preferences[u.id] for u in users}
+        seen = Counter((me, partner) for me, partner, _ in stats.matched_events)
+        one_sided = sum(max(n - seen.get((partner, me), 0), 0) for (me, partner), n in seen.items())
+        preference_violations = sum(
+            1 for me, partner, _ in stats.matched_events
+            if preferred.get(me) and genders.get(partner) != preferred[me]
+        )
+        # A block rules out every later match between the two, in either direction. Compared against the
+        # matchmaker's own decisions, since a client can still be reading a match made before the block.
+        blocked_at = {}
+        for blocker, blocked, created in UserBlock.objects.filter(blocker__in=users).values_list('blocker_id', 'blocked_id', 'created_at'):
+            pair = frozenset((blocker, blocked))
+            blocked_at[pair] = min(blocked_at.get(pair, created.timestamp()), created.timestamp())
+        rematched_after_block = sum(
+            1 for me, partner, at in stats.server_matches
+            if at > blocked_at.get(frozenset((me, partner)), float('inf'))
+        )
+        return {
+            'one_sided_matches': one_sided,
+            'preference_violations': preference_violations,
+            'blocks_created': len(blocked_at),
+            'rematched_after_block': rematched_after_block,
+        }
@@ -24,6 +24,87 @@ class BlockedUserMiddleware:
         return response
 
 
+# ---------------------------------------------------------------------------
+# Viewer Context Middleware
+# ---------------------------------------------------------------------------
+# Opens a request scope for services/viewer.py so the requesting user's
+# following / subscription / pending-request / block sets are loaded at most
+# once per request, however many serializers and views ask.
+# ---------------------------------------------------------------------------
+
+class ViewerContextMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from .services.viewer import viewer_scope
+
+        with viewer_scope():
+            return self.get_response(request)
+
+
+# ---------------------------------------------------------------------------
+# Query Budget Middleware (opt-in: QUERY_BUDGET_ENABLED=True)
+# ---------------------------------------------------------------------------
+# Records query count, DB time, duplicate queries and serializer time for
+# every resolved request, exposes them as X-Query-* response headers and adds
+# them to the per-endpoint report (see trend/services/query_budget.py).
+# ---------------------------------------------------------------------------
+import json
+import logging
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+query_logger = logging.getLogger('trend.query_budget')
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', False):
+            raise MiddlewareNotUsed()
+        from .services.query_budget import instrument_serializers
+        instrument_serializers()
+        self.get_response = get_response
+        self.log_path = getattr(settings, 'QUERY_BUDGET_LOG', None)
+
+    def __call__(self, request):
+        from .services.query_budget import QueryRecorder, REPORT, budget_for
+
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return response
+
+        endpoint = f"{request.method} /{match.route}"
+        budget = budget_for(match.url_name)
+        REPORT.add(endpoint, match.url_name, recorder)
+
+        summary = recorder.summary()
+        response['X-Query-Count'] = str(summary['queries'])
+        response['X-Query-DB-Ms'] = str(summary['db_ms'])
+        response['X-Query-Duplicates'] = str(summary['duplicates'])
+        response['X-Serializer-Ms'] = str(summary['serializer_ms'])
+        response['X-Query-Budget'] = str(budget)
+
+        if recorder.count > budget:
+            query_logger.warning(
+                f"[query-budget] {endpoint} ran {recorder.count} queries (budget {budget}), "
+                f"most repeated: {list(recorder.duplicates().items())[:2]}"
+            )
+        if self.log_path:
+            try:
+                with open(self.log_path, 'a') as log:
+                    log.write(json.dumps({
+                        'endpoint': endpoint, 'url_name': match.url_name, **summary,
+                        'duplicate_signatures': recorder.duplicates(),
+                    }) + '\n')
+            except OSError as e:
+                query_logger.warning(f"[query-budget] Could not write {self.log_path}: {e}")
+        return response
+
+
 # ---------------------------------------------------------------------------
 # JWT WebSocket Auth Middleware
 # ---------------------------------------------------------------------------
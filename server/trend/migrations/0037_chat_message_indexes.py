@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trend', '0036_home_timeline'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['room', '-timestamp', '-id'], name='chatmsg_room_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['group', '-timestamp', '-id'], name='chatmsg_group_recent'),
+        ),
+    ]
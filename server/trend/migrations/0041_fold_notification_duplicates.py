@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:44
+
+from django.db import migrations
+
+
+FOLLOW_WORKFLOW = {'follow_request', 'req_approved', 'req_rejected'}
+
+
+def aggregation_key(n):
+    # Mirrors trend.services.notifications.aggregation_key at the time of this migration
+    if n.notification_type in FOLLOW_WORKFLOW:
+        return f'follow:{n.sender_id}'
+    if n.notification_type == 'follow_accept':
+        return f'follow_accept:{n.sender_id}'
+    target = n.post_id or n.reel_id or n.twist_id or n.story_id
+    return f'{n.notification_type}:{target}'
+
+
+def fold_duplicates(apps, schema_editor):
+    """Keys the existing rows and folds each group into its newest one (a handled follow request wins)."""
+    Notification = apps.get_model('trend', 'Notification')
+    NotificationActor = apps.get_model('trend', 'NotificationActor')
+
+    groups = {}
+    for n in Notification.objects.order_by('-created_at', '-id').iterator():
+        groups.setdefault((n.recipient_id, aggregation_key(n)), []).append(n)
+
+    doomed, actors = [], []
+    for (_, key), rows in groups.items():
+        rows.sort(key=lambda n: n.notification_type in ('req_approved', 'req_rejected'), reverse=True)
+        keep = rows[0]
+        senders = list(dict.fromkeys(n.sender_id for n in rows))
+        keep.aggregation_key = key
+        keep.actor_count = len(senders)
+        keep.save(update_fields=['aggregation_key', 'actor_count'])
+        actors.extend(NotificationActor(notification_id=keep.pk, user_id=sender_id) for sender_id in senders)
+        doomed.extend(n.pk for n in rows[1:])
+
+    NotificationActor.objects.bulk_create(actors, batch_size=1000)
+    for start in range(0, len(doomed), 1000):
+        Notification.objects.filter(pk__in=doomed[start:start + 1000]).delete()
+
+
+class Migration(migrations.Migration):
+    # The fold deletes rows inside its own transaction, so the unique constraint is added by
+    # the next migration: on PostgreSQL, altering the table while deferred FK trigger events
+    # from these deletes are still pending fails.
+    atomic = True
+
+    dependencies = [
+        ('trend', '0040_notification_aggregation'),
+    ]
+
+    operations = [
+        migrations.RunPython(fold_duplicates, migrations.RunPython.noop),
+    ]
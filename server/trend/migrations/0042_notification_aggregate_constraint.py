@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trend', '0041_fold_notification_duplicates'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(fields=('recipient', 'aggregation_key'), name='unique_notification_aggregate'),
+        ),
+    ]
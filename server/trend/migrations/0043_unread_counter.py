@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_room_counters(apps, schema_editor):
+    """
+    DM counters start from the existing is_read flags. Group messages never had
+    a per-member read state, so group counters start at zero.
+    """
+    ChatMessage = apps.get_model('trend', 'ChatMessage')
+    ChatRoom = apps.get_model('trend', 'ChatRoom')
+    UnreadCounter = apps.get_model('trend', 'UnreadCounter')
+
+    unread = ChatMessage.objects.filter(room__isnull=False, is_read=False) \
+        .values_list('room_id', 'author_id').annotate(n=Count('id')).order_by()
+    rooms = ChatRoom.objects.in_bulk({room_id for room_id, _, _ in unread})
+    counters = []
+    for room_id, author_id, n in unread:
+        room = rooms[room_id]
+        reader_id = room.user2_id if author_id == room.user1_id else room.user1_id
+        counters.append(UnreadCounter(user_id=reader_id, room_id=room_id, count=n))
+    UnreadCounter.objects.bulk_create(counters, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trend', '0042_notification_aggregate_constraint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='trend.chatgroup')),
+                ('room', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='trend.chatroom')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unread_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'room'), name='unique_unread_room'), models.UniqueConstraint(fields=('user', 'group'), name='unique_unread_group')],
+            },
+        ),
+        migrations.RunPython(backfill_room_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trend', '0043_unread_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hashtag',
+            name='reels',
+            field=models.ManyToManyField(blank=True, related_name='hashtags', to='trend.reel'),
+        ),
+        migrations.AddField(
+            model_name='hashtag',
+            name='twists',
+            field=models.ManyToManyField(blank=True, related_name='hashtags', to='trend.twist'),
+        ),
+    ]
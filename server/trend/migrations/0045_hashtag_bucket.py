@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trend', '0044_hashtag_twists_reels'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HashtagBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField(db_index=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='trend.hashtag')),
+            ],
+            options={
+                'unique_together': {('hashtag', 'bucket_start')},
+            },
+        ),
+    ]
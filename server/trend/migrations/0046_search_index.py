@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:01
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+
+# Postgres only: (app, model, index). Built from the same expressions
+# trend/services/search.py queries with, so the planner can use them.
+def _postgres_indexes():
+    return [
+        ('auth', 'User', GinIndex(OpClass(Upper('username'), name='gin_trgm_ops'), name='user_username_trgm')),
+        ('auth', 'User', GinIndex(OpClass(Upper('first_name'), name='gin_trgm_ops'), name='user_first_name_trgm')),
+        ('auth', 'User', GinIndex(OpClass(Upper('last_name'), name='gin_trgm_ops'), name='user_last_name_trgm')),
+        ('trend', 'Post', GinIndex(SearchVector('content', config='simple'), name='post_content_fts')),
+        ('trend', 'Twist', GinIndex(SearchVector('content', config='simple'), name='twist_content_fts')),
+        ('trend', 'Reel', GinIndex(SearchVector('caption', config='simple'), name='reel_caption_fts')),
+    ]
+
+
+def add_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    # Not TrigramExtension(): its reverse queries pg_extension on every backend
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for app_label, model_name, index in _postgres_indexes():
+        schema_editor.add_index(apps.get_model(app_label, model_name), index)
+
+
+def remove_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for app_label, model_name, index in _postgres_indexes():
+        schema_editor.remove_index(apps.get_model(app_label, model_name), index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('trend', '0045_hashtag_bucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('users', 'Users'), ('posts', 'Posts'), ('twists', 'Twists'), ('reels', 'Reels')], max_length=8)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'term'], name='search_token_term')],
+                'unique_together': {('kind', 'object_id', 'term')},
+            },
+        ),
+        migrations.RunPython(add_postgres_indexes, remove_postgres_indexes),
+    ]
@@ -56,6 +56,12 @@ class Profile(models.Model):
     # Withdrawal Information (Stored as JSON for flexibility: Bank, UPI, etc.)
     withdrawal_info = models.JSONField(default=dict, blank=True, null=True)
 
+    # Denormalized counters (kept in sync by services/counters.py, repaired by reconcile_counters)
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    subscribers_count = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return self.user.username
 
@@ -241,16 +247,63 @@ class Post(models.Model):
     is_exclusive = models.BooleanField(default=False)
     required_tier = models.CharField(max_length=10, choices=SubscriptionPlan.TIER_CHOICES, blank=True, null=True)
 
+    # Denormalized counters (kept in sync by services/counters.py, repaired by reconcile_counters)
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    twists_count = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return f"Post by {self.author.username} at {self.created_at.strftime('%Y-%m-%d')}"
 
+class TimelineEntry(models.Model):
+    """
+    Materialized home timeline row: `post` is visible in `owner`'s main feed.
+    Written by services/timeline.py when posts are created and when follows /
+    subscriptions change, so feed reads are a range scan on (owner, created_at).
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField()  # Copied from the post so the timeline sorts without a join
+
+    class Meta:
+        unique_together = ('owner', 'post')
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-post'], name='timeline_owner_recent'),
+            models.Index(fields=['owner', 'author'], name='timeline_owner_author'),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} in {self.owner_id}'s timeline"
+
 class Hashtag(models.Model):
+    """
+    A #tag (stored lowercased, without the '#'). The post / twist / reel links
+    are maintained from their text by services/hashtags.py.
+    """
     name = models.CharField(max_length=100, unique=True)
     posts = models.ManyToManyField(Post, related_name='hashtags', blank=True)
+    twists = models.ManyToManyField('Twist', related_name='hashtags', blank=True)
+    reels = models.ManyToManyField('Reel', related_name='hashtags', blank=True)
 
     def __str__(self):
         return self.name
 
+class HashtagBucket(models.Model):
+    """
+    Mentions of a hashtag in one time bucket (services/trending.py), for the
+    sliding-window trending ranking. Buckets older than the window are pruned.
+    """
+    hashtag = models.ForeignKey(Hashtag, on_delete=models.CASCADE, related_name='buckets')
+    bucket_start = models.DateTimeField(db_index=True)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('hashtag', 'bucket_start')
+
+    def __str__(self):
+        return f"#{self.hashtag_id} x{self.count} at {self.bucket_start:%H:%M}"
+
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     author = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -289,6 +342,11 @@ class Twist(models.Model):
     is_exclusive = models.BooleanField(default=False)
     required_tier = models.CharField(max_length=10, choices=SubscriptionPlan.TIER_CHOICES, blank=True, null=True)
 
+    # Denormalized counters (kept in sync by services/counters.py, repaired by reconcile_counters)
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    retwists_count = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return f"Twist by {self.author.username}"
 
@@ -331,6 +389,10 @@ class Story(models.Model):
     is_exclusive = models.BooleanField(default=False)
     required_tier = models.CharField(max_length=10, choices=SubscriptionPlan.TIER_CHOICES, blank=True, null=True)
 
+    # Denormalized counters (kept in sync by services/counters.py, repaired by reconcile_counters)
+    likes_count = models.PositiveIntegerField(default=0)
+    views_count = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return f"Story by {self.author.username} at {self.created_at.strftime('%H:%M')}"
 
@@ -399,7 +461,8 @@ class ChatMessage(models.Model):
     group = models.ForeignKey(ChatGroup, on_delete=models.CASCADE, related_name='messages', null=True, blank=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Defaulted rather than auto_now_add so the chat write-behind path can keep the broadcast timestamp
+    timestamp = models.DateTimeField(default=timezone.now, editable=False, db_index=True)
     is_read = models.BooleanField(default=False)
     
     # Optional: Attach a reel to the message
@@ -414,6 +477,13 @@ class ChatMessage(models.Model):
     # Optional: Reply to a story
     story_reply = models.ForeignKey(Story, on_delete=models.SET_NULL, null=True, blank=True, related_name='replies')
 
+    class Meta:
+        indexes = [
+            # Inbox last-message lookups and history paging are range scans per conversation
+            models.Index(fields=['room', '-timestamp', '-id'], name='chatmsg_room_recent'),
+            models.Index(fields=['group', '-timestamp', '-id'], name='chatmsg_group_recent'),
+        ]
+
     def __str__(self):
         if self.room:
             return f"Message in Room {self.room.id} by {self.author.username}"
@@ -422,6 +492,27 @@ class ChatMessage(models.Model):
         return f"Message {self.id}"
 
 
+class UnreadCounter(models.Model):
+    """
+    Unread messages for one user in one DM room or group, kept up to date by
+    services/unread.py. For groups this is the per-member read state as well:
+    ChatMessage.is_read is shared by everyone in the conversation.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='unread_counters')
+    room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    group = models.ForeignKey(ChatGroup, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'room'], name='unique_unread_room'),
+            models.UniqueConstraint(fields=['user', 'group'], name='unique_unread_group'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.count} unread in {'group ' + str(self.group_id) if self.group_id else 'room ' + str(self.room_id)}"
+
+
 # --- 7. Reel Models (Instagram Reels Clone) ---
 
 class Reel(models.Model):
@@ -445,6 +536,10 @@ class Reel(models.Model):
     is_exclusive = models.BooleanField(default=False)
     required_tier = models.CharField(max_length=10, choices=SubscriptionPlan.TIER_CHOICES, blank=True, null=True)
 
+    # Denormalized counters (kept in sync by services/counters.py, repaired by reconcile_counters)
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return f"Reel by {self.author.username} - {self.id}"
 
@@ -500,12 +595,35 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
+    # Repeat events fold into one row per (recipient, aggregation_key), e.g. every like
+    # on a post: `sender` is the latest actor and `actor_count` the distinct actors so far
+    aggregation_key = models.CharField(max_length=64, null=True, blank=True)
+    actor_count = models.PositiveIntegerField(default=1)
+
     class Meta:
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['recipient', 'aggregation_key'], name='unique_notification_aggregate'),
+        ]
+        indexes = [
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notification_inbox'),
+            models.Index(fields=['recipient', 'is_read'], name='notification_unread'),
+        ]
 
     def __str__(self):
         return f"{self.sender} -> {self.recipient}: {self.notification_type}"
 
+
+class NotificationActor(models.Model):
+    """Who has been folded into an aggregated notification, so repeat actions don't count twice."""
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='actors')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['notification', 'user'], name='unique_notification_actor'),
+        ]
+
 # --- 9. Report Model ---
 
 class Report(models.Model):
@@ -548,3 +666,64 @@ class SavedItem(models.Model):
 
     def __str__(self):
         return f"{self.user.username} saved an item ({self.id})"
+
+# --- 11. Background Jobs ---
+
+class BackgroundJob(models.Model):
+    """
+    A queued call to a task from trend/tasks.py when the database broker is in use
+    (see trend/services/jobs.py). Finished jobs are kept for a while so their
+    idempotency keys keep deduplicating, then purged by the worker.
+    """
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    task = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict)  # {'args': [...], 'kwargs': {...}}
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    # A running job whose lease has expired belonged to a worker that died; it is picked up again
+    locked_until = models.DateTimeField(null=True, blank=True)
+    idempotency_key = models.CharField(max_length=200, null=True, blank=True, unique=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_at'], name='job_due')]
+
+    def __str__(self):
+        return f"{self.task} #{self.id} ({self.status})"
+
+# --- 12. Search Index ---
+
+class SearchToken(models.Model):
+    """
+    One term of a user's names or of a post / twist / reel's text, for the
+    inverted-index search backend used when the database has no full-text
+    search (SQLite). Maintained by trend/services/search.py; unused on Postgres.
+    """
+    KIND_CHOICES = (
+        ('users', 'Users'),
+        ('posts', 'Posts'),
+        ('twists', 'Twists'),
+        ('reels', 'Reels'),
+    )
+
+    kind = models.CharField(max_length=8, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    term = models.CharField(max_length=64)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        unique_together = ('kind', 'object_id', 'term')
+        indexes = [models.Index(fields=['kind', 'term'], name='search_token_term')]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} '{self.term}' x{self.weight}"
@@ -0,0 +1,276 @@
+"""
+Keyset (seek) pagination shared by the list endpoints.
+
+Pages are addressed by an opaque cursor holding the sort key of the last row
+seen, e.g. (created_at, id), so every page is an indexed range scan with a
+LIMIT instead of an OFFSET scan plus COUNT(*). Responses look like DRF's:
+{"next": <url|null>, "previous": <url|null>, "results": [...]}.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import models
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def keyset_q(ordering, position):
+    """
+    Q object matching rows strictly after `position` in `ordering`.
+    ('-created_at', '-id') and (t, 5) -> created_at < t OR (created_at = t AND id < 5)
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, position):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def _flip(ordering):
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+
+def _jsonable(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _ordering_fields(queryset, ordering):
+    """The model field (or annotation output field) behind each column of `ordering`."""
+    fields = []
+    for column in ordering:
+        name = column.lstrip('-')
+        if name in queryset.query.annotations:
+            fields.append(queryset.query.annotations[name].output_field)
+        else:
+            try:
+                fields.append(queryset.model._meta.get_field(name))
+            except FieldDoesNotExist:
+                fields.append(None)  # Left as decoded
+    return fields
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginates a queryset by `ordering`, which must end in a unique column.
+    Views can override the ordering with a `keyset_ordering` attribute.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, 'keyset_ordering', None) or self.ordering)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        """Returns (position, reverse) from the request, or (None, False) for the first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            return list(data['p']), bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def coerce_position(self, position, fields):
+        """
+        Parses each cursor value with the field it was encoded from, so a
+        well-formed cursor with bad values is a 404 rather than a query error.
+        """
+        if len(position) != len(fields):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            position = [field.to_python(value) if field else value for field, value in zip(fields, position)]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if any(value is None for value in position):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, position, reverse=False):
+        data = {'p': [_jsonable(v) for v in position]}
+        if reverse:
+            data['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def position_of(self, obj):
+        return [getattr(obj, field.lstrip('-')) for field in self.current_ordering]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.current_ordering = self.get_ordering(view)
+        position, reverse = self.decode_cursor(request)
+
+        ordering = _flip(self.current_ordering) if reverse else self.current_ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            position = self.coerce_position(position, _ordering_fields(queryset, ordering))
+            queryset = queryset.filter(keyset_q(ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        # Walking backwards means there is always a page after this one (the one we came from)
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = has_more if reverse else position is not None
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.position_of(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.position_of(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class FeedPagination(KeysetPagination):
+    """Content feeds (posts, twists, reels, saved items), newest first."""
+    page_size = 10
+
+
+class ThreadPagination(KeysetPagination):
+    """Comment threads read top-down, oldest first."""
+    ordering = ('created_at', 'id')
+
+
+class SearchPagination(KeysetPagination):
+    """Search results (services/search.py), best match first."""
+    ordering = ('-search_rank', '-id')
+
+
+class InboxPagination(KeysetPagination):
+    """Chat rooms and groups, most recently active first."""
+    ordering = ('-last_message_at', '-id')
+
+
+class MessageHistoryPagination(KeysetPagination):
+    """
+    Chat history, read from the newest message backwards. Each page is returned
+    oldest-first for display; `next` pages further back in time and `previous`
+    towards newer messages.
+
+    `?since=<message_id>` switches to delta sync for reconnecting clients:
+    messages after that one, oldest first, with `next` continuing from the last
+    one while more remain. "After" is by (timestamp, id) when the message is
+    known, since write-behind ids (services/chat_writer.py) are reserved in
+    blocks per process and are not strictly in send order.
+    """
+    ordering = ('-timestamp', '-id')
+    page_size = 50
+    max_page_size = 200
+    since_query_param = 'since'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        since = request.query_params.get(self.since_query_param)
+        if since is None:
+            newest_first = super().paginate_queryset(queryset, request, view)
+            return newest_first[::-1]
+
+        try:
+            since = int(since)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        self.base_url = remove_query_param(request.build_absolute_uri(), self.cursor_query_param)
+        self.page_size = self.get_page_size(request)
+        anchor = queryset.filter(id=since).values_list('timestamp', flat=True).first()
+        after = keyset_q(('timestamp', 'id'), (anchor, since)) if anchor else Q(id__gt=since)
+        rows = list(queryset.filter(after).order_by('timestamp', 'id')[:self.page_size + 1])
+        self.delta = rows[:self.page_size]
+        self.has_more_delta = len(rows) > self.page_size
+        return self.delta
+
+    def get_next_link(self):
+        if not hasattr(self, 'delta'):
+            return super().get_next_link()
+        if not self.has_more_delta or not self.delta:
+            return None
+        return replace_query_param(self.base_url, self.since_query_param, self.delta[-1].id)
+
+    def get_previous_link(self):
+        return None if hasattr(self, 'delta') else super().get_previous_link()
+
+
+class HomeFeedPagination(FeedPagination):
+    """
+    The main feed is two streams (followed timeline, then public posts), served
+    by services.timeline.HomeFeed. Its cursor carries the section alongside
+    (created_at, id). Forward-only, which is all infinite scroll needs.
+    """
+    position_fields = (models.PositiveSmallIntegerField(), models.DateTimeField(), models.BigIntegerField())
+
+    def paginate_queryset(self, feed, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        position, _ = self.decode_cursor(request)
+        if position is not None:
+            position = self.coerce_position(position, self.position_fields)
+            if position[0] not in (0, 1):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = feed.page(position, self.page_size + 1)
+        self.has_next = len(rows) > self.page_size
+        self.has_previous = False
+        self.positions = [key for key, _ in rows[:self.page_size]]
+        self.page = [post for _, post in rows[:self.page_size]]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.positions:
+            return None
+        return self.encode_cursor(self.positions[-1])
+
+
+class ReelFeedPagination(FeedPagination):
+    """
+    The reels tab is an endless stream (services.reels.ReelStream) that tracks
+    what each viewer has already seen server-side, so `next` simply asks for
+    another page while there is anything to show.
+    """
+
+    def paginate_queryset(self, stream, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.page = stream.next_page(self.get_page_size(request))
+        return self.page
+
+    def get_next_link(self):
+        if not self.page:
+            return None
+        return remove_query_param(self.base_url, self.cursor_query_param)
+
+    def get_previous_link(self):
+        return None
@@ -11,28 +11,27 @@ from .models import (
 from django.db.models import Q # Used for efficient chat room lookup
 from django.utils import timezone
 from .models import UserSubscription, SubscriptionPlan
+from .services import presence, unread
+from .services.viewer import get_viewer
 
 def has_subscription_access(user, creator, required_tier=None):
-    if user == creator or user.is_staff:
-        return True
-    
-    sub = UserSubscription.objects.filter(subscriber=user, creator=creator, status='active').first()
-    if not sub:
-        return False
-        
-    if sub.expiry_date and sub.expiry_date < timezone.now():
-        return False
-        
-    if required_tier:
-        tiers = ['basic', 'pro', 'elite']
-        try:
-            user_tier_idx = tiers.index(sub.tier)
-            req_tier_idx = tiers.index(required_tier)
-            return user_tier_idx >= req_tier_idx
-        except ValueError:
-            return False
-            
-    return True
+    """Whether `user` may see `creator`'s exclusive content, answered from the cached viewer context."""
+    creator_id = getattr(creator, 'id', creator)
+    return get_viewer(user).has_subscription_access(creator_id, required_tier)
+
+def batched_flag(context, obj, field, compute):
+    """Reads a viewer flag (liked/saved) from the EngagementBatch in context, computing it live if absent."""
+    batch = context.get('engagement')
+    value = batch.flag(obj, field) if batch is not None else None
+    return compute() if value is None else value
+
+def presence_status(context, profile):
+    """(is_online, last_seen) from the page's bulk presence lookup in context['presence'], or a single lookup."""
+    if profile is None:
+        return False, None
+    if not hasattr(profile, '_presence'):
+        profile._presence = presence.status(profile, context.get('presence'))
+    return profile._presence
 
 # --- Subscriptions Serializers ---
 class SubscriptionPlanSerializer(serializers.ModelSerializer):
@@ -57,14 +56,24 @@ class ProfileSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(source='user.email')
     first_name = serializers.CharField(source='user.first_name', required=False, allow_blank=True)
     last_name = serializers.CharField(source='user.last_name', required=False, allow_blank=True)
+    # Live presence (services/presence.py), not the periodically flushed columns
+    is_online = serializers.SerializerMethodField()
+    last_seen = serializers.SerializerMethodField()
 
     class Meta:
         model = Profile
         # Added is_private and is_creator fields, and User fields
         # Added is_private, is_creator, and withdrawal_info
-        fields = ['username', 'email', 'first_name', 'last_name', 'bio', 'profile_picture', 'website_url', 'is_trendsetter', 'is_private', 'is_creator', 'gender', 'withdrawal_info']
+        fields = ['username', 'email', 'first_name', 'last_name', 'bio', 'profile_picture', 'website_url', 'is_trendsetter', 'is_private', 'is_creator', 'gender', 'withdrawal_info', 'is_online', 'last_seen']
         read_only_fields = ['is_trendsetter']
 
+    def get_is_online(self, obj):
+        return presence_status(self.context, obj)[0]
+
+    def get_last_seen(self, obj):
+        last_seen = presence_status(self.context, obj)[1]
+        return last_seen.isoformat() if last_seen else None
+
     def update(self, instance, validated_data):
         # Extract nested user data under 'user' key because of source='user.field'
         user_data = validated_data.pop('user', {})
@@ -90,10 +99,11 @@ class UserSerializer(serializers.ModelSerializer):
     has_pending_request = serializers.SerializerMethodField()
     is_subscribed = serializers.SerializerMethodField()
     has_active_plans = serializers.SerializerMethodField() # NEW
-    posts_count = serializers.SerializerMethodField()
-    followers_count = serializers.SerializerMethodField()
-    following_count = serializers.SerializerMethodField()
-    subscribers_count = serializers.SerializerMethodField()
+    # Stored counters on Profile (see services/counters.py)
+    posts_count = serializers.IntegerField(source='profile.posts_count', read_only=True)
+    followers_count = serializers.IntegerField(source='profile.followers_count', read_only=True)
+    following_count = serializers.IntegerField(source='profile.following_count', read_only=True)
+    subscribers_count = serializers.IntegerField(source='profile.subscribers_count', read_only=True)
     is_creator = serializers.SerializerMethodField()
     creator_balance = serializers.SerializerMethodField()
     creator_pending_withdrawals = serializers.SerializerMethodField()
@@ -147,27 +157,56 @@ class UserSerializer(serializers.ModelSerializer):
     def get_is_following(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated and request.user.id != obj.id:
-            return Follow.objects.filter(follower=request.user, following=obj).exists()
+            return get_viewer(request.user).is_following(obj.id)
         return False
     
     def get_has_pending_request(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated and request.user.id != obj.id:
-            return FollowRequest.objects.filter(sender=request.user, receiver=obj).exists()
+            return get_viewer(request.user).has_pending_request(obj.id)
         return False
 
-    def get_posts_count(self, obj):
-        return obj.posts.count() 
+class UserCardSerializer(serializers.ModelSerializer):
+    """
+    The lightweight tier for users embedded in lists (followers / following,
+    search, story viewers, chat): names, avatar and flags from a
+    select_related('profile') row plus the request's cached viewer context, so a
+    page costs no queries per user. UserSerializer is the full profile tier.
+    """
+    profile = serializers.SerializerMethodField()
+    is_following = serializers.SerializerMethodField()
+    has_pending_request = serializers.SerializerMethodField()
 
-    def get_followers_count(self, obj):
-        return obj.followers.count()
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name', 'profile', 'is_following', 'has_pending_request']
+
+    def get_profile(self, obj):
+        profile = getattr(obj, 'profile', None)
+        if profile is None:
+            return {'profile_picture': None, 'is_private': False, 'is_creator': False, 'is_trendsetter': False}
+        url = profile.profile_picture.url if profile.profile_picture else None
+        request = self.context.get('request')
+        if url and request:
+            url = request.build_absolute_uri(url)
+        return {
+            'profile_picture': url,
+            'is_private': profile.is_private,
+            'is_creator': profile.is_creator,
+            'is_trendsetter': profile.is_trendsetter,
+        }
 
-    def get_following_count(self, obj):
-        return obj.following.count()
+    def get_is_following(self, obj):
+        request = self.context.get('request')
+        if request and request.user.is_authenticated and request.user.id != obj.id:
+            return get_viewer(request.user).is_following(obj.id)
+        return False
 
-    def get_subscribers_count(self, obj):
-        # We only count active subscriptions
-        return obj.subscribers.filter(status='active').count()
+    def get_has_pending_request(self, obj):
+        request = self.context.get('request')
+        if request and request.user.is_authenticated and request.user.id != obj.id:
+            return get_viewer(request.user).has_pending_request(obj.id)
+        return False
 
 class LoginSerializer(serializers.Serializer):
     username_or_email = serializers.CharField()
@@ -279,9 +318,9 @@ class CommentSerializer(serializers.ModelSerializer):
 class PostSerializer(serializers.ModelSerializer):
     author_username = serializers.ReadOnlyField(source='author.username')
     author_profile_picture = serializers.ImageField(source='author.profile.profile_picture', read_only=True)
-    likes_count = serializers.SerializerMethodField()
-    twists_count = serializers.SerializerMethodField()
-    comments_count = serializers.SerializerMethodField()
+    likes_count = serializers.IntegerField(read_only=True)
+    twists_count = serializers.IntegerField(read_only=True)
+    comments_count = serializers.IntegerField(read_only=True)
     is_saved = serializers.SerializerMethodField()
     has_access = serializers.SerializerMethodField()
     is_following = serializers.SerializerMethodField()
@@ -294,14 +333,15 @@ class PostSerializer(serializers.ModelSerializer):
             'likes_count', 'is_liked', 'is_saved', 'hashtags', 'comments_count', 'twists_count',
             'is_exclusive', 'required_tier', 'has_access', 'is_following'
         ]
-        read_only_fields = ['author']
+        # hashtags are indexed from the content (services/hashtags.py), never written by clients
+        read_only_fields = ['author', 'hashtags']
 
     def get_is_following(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            if request.user == obj.author:
+            if request.user.id == obj.author_id:
                 return False
-            return Follow.objects.filter(follower=request.user, following=obj.author).exists()
+            return get_viewer(request.user).is_following(obj.author_id)
         return False
 
     def get_has_access(self, obj):
@@ -323,24 +363,15 @@ class PostSerializer(serializers.ModelSerializer):
     def get_is_saved(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.saved_records.filter(user=request.user).exists()
+            return batched_flag(self.context, obj, 'saved', lambda: obj.saved_records.filter(user=request.user).exists())
         return False
 
-    def get_likes_count(self, obj):
-        return obj.likes.count()
-
-    def get_twists_count(self, obj):
-        return obj.twists.count()
-
-    def get_comments_count(self, obj):
-        return obj.comments.count()
-
     is_liked = serializers.SerializerMethodField()
 
     def get_is_liked(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.likes.filter(user=request.user).exists()
+            return batched_flag(self.context, obj, 'liked', lambda: obj.likes.filter(user=request.user).exists())
         return False
 
 # --- 5. Story Serializers (No change) ---
@@ -349,7 +380,7 @@ class StorySerializer(serializers.ModelSerializer):
     author_username = serializers.ReadOnlyField(source='author.username')
     author_profile_picture = serializers.ImageField(source='author.profile.profile_picture', read_only=True)
     is_viewed = serializers.SerializerMethodField()
-    likes_count = serializers.SerializerMethodField()
+    likes_count = serializers.IntegerField(read_only=True)
     is_liked = serializers.SerializerMethodField()
 
     class Meta:
@@ -363,9 +394,6 @@ class StorySerializer(serializers.ModelSerializer):
             return obj.views.filter(user=request.user).exists()
         return False
 
-    def get_likes_count(self, obj):
-        return obj.likes.count()
-
     def get_is_liked(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
@@ -430,10 +458,45 @@ class ChatMessageSerializer(serializers.ModelSerializer):
             }
         return None
 
+class ChatPeerSerializer(UserCardSerializer):
+    """A user card plus live presence, for the inbox, chat header and group members."""
+    is_online = serializers.SerializerMethodField()
+    last_seen = serializers.SerializerMethodField()
+
+    class Meta(UserCardSerializer.Meta):
+        fields = UserCardSerializer.Meta.fields + ['is_online', 'last_seen']
+
+    def get_is_online(self, obj):
+        return presence_status(self.context, getattr(obj, 'profile', None))[0]
+
+    def get_last_seen(self, obj):
+        last_seen = presence_status(self.context, getattr(obj, 'profile', None))[1]
+        return last_seen.isoformat() if last_seen else None
+
+def inbox_last_message(serializer, obj):
+    batch = serializer.context.get('inbox')
+    if batch is not None and batch.covers(obj):
+        last_msg = batch.last_message(obj)
+    else:
+        last_msg = obj.messages.order_by('-timestamp', '-id').first()
+    if last_msg:
+        return ChatMessageSerializer(last_msg, context=serializer.context).data
+    return None
+
+def inbox_unread_count(serializer, obj):
+    request = serializer.context.get('request')
+    if not request or not request.user.is_authenticated:
+        return 0
+    batch = serializer.context.get('inbox')
+    if batch is not None and batch.covers(obj):
+        return batch.unread_count(obj)
+    counts = unread.chat_counts(request.user.id)
+    return counts['groups' if isinstance(obj, ChatGroup) else 'rooms'].get(obj.pk, 0)
+
 class ChatGroupSerializer(serializers.ModelSerializer):
     last_message = serializers.SerializerMethodField()
     unread_count = serializers.SerializerMethodField()
-    members_count = serializers.IntegerField(source='members.count', read_only=True)
+    members_count = serializers.SerializerMethodField()
     
     members_list = serializers.SerializerMethodField()
     admin_details = serializers.SerializerMethodField()
@@ -443,23 +506,20 @@ class ChatGroupSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'icon', 'admin', 'admin_details', 'members', 'members_list', 'created_at', 'last_message', 'unread_count', 'members_count', 'last_message_at']
         read_only_fields = ['admin', 'created_at']
 
+    def get_members_count(self, obj):
+        return len(obj.members.all())  # Served from the members prefetch in list / detail views
+
     def get_members_list(self, obj):
-        return UserSerializer(obj.members.all(), many=True, context=self.context).data
+        return ChatPeerSerializer(obj.members.all(), many=True, context=self.context).data
 
     def get_admin_details(self, obj):
-        return UserSerializer(obj.admin, context=self.context).data
+        return ChatPeerSerializer(obj.admin, context=self.context).data
 
     def get_last_message(self, obj):
-        last_msg = obj.messages.order_by('-timestamp').first()
-        if last_msg:
-            return ChatMessageSerializer(last_msg, context=self.context).data
-        return None
+        return inbox_last_message(self, obj)
 
     def get_unread_count(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return obj.messages.filter(~Q(author=request.user), is_read=False).count()
-        return 0
+        return inbox_unread_count(self, obj)
 
 class ChatRoomSerializer(serializers.ModelSerializer):
     # Finds the 'other' user in the conversation
@@ -476,24 +536,15 @@ class ChatRoomSerializer(serializers.ModelSerializer):
         # Returns the user who is NOT the current requesting user
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            other_user = obj.user1 if obj.user2 == request.user else obj.user2
-            # Use UserSerializer to return full user details (excluding sensitive data)
-            return UserSerializer(other_user, context={'request': request}).data 
+            other_user = obj.user1 if obj.user2_id == request.user.id else obj.user2
+            return ChatPeerSerializer(other_user, context=self.context).data
         return None
 
     def get_last_message(self, obj):
-        # Gets the content and timestamp of the very last message
-        last_msg = obj.messages.order_by('-timestamp').first()
-        if last_msg:
-            return ChatMessageSerializer(last_msg, context=self.context).data
-        return None
+        return inbox_last_message(self, obj)
         
     def get_unread_count(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            # Count messages in this room not authored by current user and not read
-            return obj.messages.filter(~Q(author=request.user), is_read=False).count()
-        return 0
+        return inbox_unread_count(self, obj)
 
 
 # --- 7. Utility Serializers (No change) ---
@@ -515,9 +566,9 @@ class TwistCommentSerializer(serializers.ModelSerializer):
 class TwistSerializer(serializers.ModelSerializer):
     author_username = serializers.ReadOnlyField(source='author.username')
     author_profile_picture = serializers.ImageField(source='author.profile.profile_picture', read_only=True)
-    likes_count = serializers.SerializerMethodField()
-    comments_count = serializers.SerializerMethodField()
-    retwists_count = serializers.SerializerMethodField()
+    likes_count = serializers.IntegerField(read_only=True)
+    comments_count = serializers.IntegerField(read_only=True)
+    retwists_count = serializers.IntegerField(read_only=True)
     is_liked = serializers.SerializerMethodField()
     is_saved = serializers.SerializerMethodField()
     has_access = serializers.SerializerMethodField()
@@ -552,32 +603,26 @@ class TwistSerializer(serializers.ModelSerializer):
     def get_is_saved(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.saved_records.filter(user=request.user).exists()
+            return batched_flag(self.context, obj, 'saved', lambda: obj.saved_records.filter(user=request.user).exists())
         return False
 
     def get_original_post_data(self, obj):
         if obj.original_post:
+            # Shares self.context, so the page's EngagementBatch covers the nested post too
             return PostSerializer(obj.original_post, context=self.context).data
         return None
 
-    def get_likes_count(self, obj):
-        return obj.likes.count()
-
-    def get_comments_count(self, obj):
-        return obj.comments.count()
-        
-    def get_retwists_count(self, obj):
-        return obj.retwists.count()
-
     def get_is_liked(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.likes.filter(user=request.user).exists()
+            return batched_flag(self.context, obj, 'liked', lambda: obj.likes.filter(user=request.user).exists())
         return False
 class HashtagSerializer(serializers.ModelSerializer):
+    post_count = serializers.IntegerField(read_only=True)
+
     class Meta:
         model = Hashtag
-        fields = ['id', 'name', 'posts']
+        fields = ['id', 'name', 'post_count']
 
 
 class FollowerSerializer(serializers.ModelSerializer):
@@ -616,8 +661,8 @@ class ReelCommentSerializer(serializers.ModelSerializer):
 class ReelSerializer(serializers.ModelSerializer):
     author_username = serializers.ReadOnlyField(source='author.username')
     author_profile_picture = serializers.ImageField(source='author.profile.profile_picture', read_only=True)
-    likes_count = serializers.SerializerMethodField()
-    comments_count = serializers.SerializerMethodField()
+    likes_count = serializers.IntegerField(read_only=True)
+    comments_count = serializers.IntegerField(read_only=True)
     is_liked = serializers.SerializerMethodField()
     is_saved = serializers.SerializerMethodField()
     is_following = serializers.SerializerMethodField()
@@ -652,28 +697,21 @@ class ReelSerializer(serializers.ModelSerializer):
     def get_is_saved(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.saved_records.filter(user=request.user).exists()
+            return batched_flag(self.context, obj, 'saved', lambda: obj.saved_records.filter(user=request.user).exists())
         return False
 
-    def get_likes_count(self, obj):
-        return obj.likes.count()
-
-    def get_comments_count(self, obj):
-        return obj.comments.count()
-
     def get_is_liked(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.likes.filter(user=request.user).exists()
+            return batched_flag(self.context, obj, 'liked', lambda: obj.likes.filter(user=request.user).exists())
         return False 
 
     def get_is_following(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            if request.user == obj.author:
+            if request.user.id == obj.author_id:
                 return False
-            # Follow is imported at the top of serializers.py
-            return Follow.objects.filter(follower=request.user, following=obj.author).exists()
+            return get_viewer(request.user).is_following(obj.author_id)
         return False
 
 # --- 9. Notification Serializer ---
@@ -689,8 +727,8 @@ class NotificationSerializer(serializers.ModelSerializer):
         model = Notification
         fields = ['id', 'recipient', 'sender', 'sender_username', 'sender_profile_picture', 
                   'notification_type', 'post', 'reel', 'follow_request_ref', 
-                  'post_image', 'reel_thumbnail', 'is_read', 'created_at']
-        read_only_fields = ['recipient', 'sender', 'created_at'] 
+                  'post_image', 'reel_thumbnail', 'is_read', 'created_at', 'actor_count']
+        read_only_fields = ['recipient', 'sender', 'created_at', 'actor_count']
 
 # --- 10. Report Serializer ---
 from .models import Report, SavedItem
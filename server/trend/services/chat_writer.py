@@ -0,0 +1,257 @@
+"""
+Chat Write-Behind Service (opt-in: CHAT_WRITE_BEHIND=True)
+Takes the database out of the chat delivery path. With it switched on,
+ChatConsumer assigns the message id and timestamp itself, broadcasts straight
+away and hands the row to this writer, which persists it shortly after.
+
+- Ids come from blocks reserved on the ChatMessage id sequence, so they never
+  collide with rows created through the ORM elsewhere (views, admin). Only
+  PostgreSQL and SQLite have an allocator; on other databases the setting is
+  ignored with a warning and messages are saved synchronously.
+- A background task per process drains the queue every CHAT_WRITE_BEHIND_FLUSH_MS
+  (or as soon as CHAT_WRITE_BEHIND_BATCH rows are waiting) with one bulk_create
+  plus one last_message_at update per conversation.
+- Ids are fixed before the insert, so a batch can be retried safely
+  (ignore_conflicts). Batches that keep failing are appended to a JSONL spool
+  file and replayed with backoff, on the next start-up, or by
+  `python manage.py flush_chat_spool`.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import weakref
+from datetime import datetime
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Max
+
+from ..models import ChatGroup, ChatMessage, ChatRoom
+from . import unread
+
+logger = logging.getLogger(__name__)
+
+ID_BLOCK_SIZE = 50
+MAX_ATTEMPTS = 3
+MAX_BACKOFF = 30
+ID_VENDORS = {'postgresql', 'sqlite'}  # Databases reserve_ids() can allocate on
+
+_unsupported_warned = False
+
+
+def enabled():
+    global _unsupported_warned
+    if not getattr(settings, 'CHAT_WRITE_BEHIND', False):
+        return False
+    if connection.vendor not in ID_VENDORS:
+        if not _unsupported_warned:
+            _unsupported_warned = True
+            logger.warning(
+                f"[chat-writer] CHAT_WRITE_BEHIND is on but {connection.vendor} has no id allocator; "
+                f"saving chat messages synchronously instead"
+            )
+        return False
+    return True
+
+
+def _flush_interval():
+    return getattr(settings, 'CHAT_WRITE_BEHIND_FLUSH_MS', 20) / 1000
+
+
+def _batch_size():
+    return getattr(settings, 'CHAT_WRITE_BEHIND_BATCH', 500)
+
+
+def _spool_path():
+    return getattr(settings, 'CHAT_WRITE_BEHIND_SPOOL', None) or os.path.join(settings.BASE_DIR, 'chat_spool.jsonl')
+
+
+# --- Id allocation ---
+
+def reserve_ids(count):
+    """Reserves `count` ChatMessage ids from the table's own sequence."""
+    table = ChatMessage._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)", [table, count])
+            return sorted(row[0] for row in cursor.fetchall())
+        if connection.vendor == 'sqlite':
+            # AUTOINCREMENT tables keep their high-water mark in sqlite_sequence
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = %s", [table])
+            row = cursor.fetchone()
+            if row:
+                current = row[0]
+                cursor.execute("UPDATE sqlite_sequence SET seq = %s WHERE name = %s", [current + count, table])
+            else:
+                current = ChatMessage.objects.aggregate(m=Max('id'))['m'] or 0
+                cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)", [table, current + count])
+            return list(range(current + 1, current + count + 1))
+    raise NotImplementedError(f"Chat write-behind has no id allocator for {connection.vendor}")
+
+
+class IdAllocator:
+    """Hands out reserved ids from the current block, reserving a new block when it runs out."""
+
+    def __init__(self, block_size=ID_BLOCK_SIZE):
+        self.block_size = block_size
+        self._ids = []
+        self._lock = asyncio.Lock()
+
+    async def next_id(self):
+        async with self._lock:
+            if not self._ids:
+                self._ids = await database_sync_to_async(self._reserve)()
+            return self._ids.pop(0)
+
+    def _reserve(self):
+        close_old_connections()
+        return reserve_ids(self.block_size)
+
+
+# --- Persistence ---
+
+def persist(rows):
+    """Writes a batch of queued rows (dicts from MessageWriter.submit). Safe to repeat."""
+    messages = []
+    latest = {}  # {('room' | 'group', id): timestamp}
+    for row in rows:
+        ts = row['timestamp']
+        if isinstance(ts, str):
+            ts = datetime.fromisoformat(ts)
+        messages.append(ChatMessage(
+            id=row['id'], room_id=row.get('room_id'), group_id=row.get('group_id'),
+            author_id=row['author_id'], content=row['content'], timestamp=ts,
+        ))
+        key = ('group', row['group_id']) if row.get('group_id') else ('room', row['room_id'])
+        latest[key] = max(latest.get(key, ts), ts)
+
+    with transaction.atomic():
+        # Rows already written by an earlier attempt are skipped, and must not be counted unread twice
+        stored = set(ChatMessage.objects.filter(id__in=[m.id for m in messages]).values_list('id', flat=True))
+        ChatMessage.objects.bulk_create(messages, ignore_conflicts=True)
+        unread.messages_added([m for m in messages if m.id not in stored])
+        for (kind, pk), ts in latest.items():
+            model = ChatGroup if kind == 'group' else ChatRoom
+            model.objects.filter(id=pk, last_message_at__lt=ts).update(last_message_at=ts)
+
+
+_spool_lock = threading.Lock()
+
+
+def spool(rows):
+    """Appends rows that could not be written to the durable spool file."""
+    path = _spool_path()
+    with _spool_lock, open(path, 'a') as f:
+        for row in rows:
+            f.write(json.dumps({**row, 'timestamp': _iso(row['timestamp'])}) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    logger.warning(f"[chat-writer] Spooled {len(rows)} messages to {path}")
+
+
+def replay_spool():
+    """Persists everything in the spool file and empties it. Returns how many rows were written."""
+    path = _spool_path()
+    with _spool_lock:
+        if not os.path.exists(path):
+            return 0
+        processing = f'{path}.replaying'
+        os.replace(path, processing)
+    with open(processing) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    try:
+        for start in range(0, len(rows), _batch_size()):
+            persist(rows[start:start + _batch_size()])
+    except Exception:
+        # Put them back for the next attempt
+        spool(rows)
+        os.remove(processing)
+        raise
+    os.remove(processing)
+    if rows:
+        logger.info(f"[chat-writer] Replayed {len(rows)} spooled messages")
+    return len(rows)
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class MessageWriter:
+    """Per-process queue plus the background task that flushes it."""
+
+    def __init__(self):
+        self.queue = []
+        self.ids = IdAllocator()
+        self._wakeup = None
+        self._task = None
+        self._backoff = 0
+
+    def _ensure_task(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, **row):
+        """Queues one message row (id, room_id / group_id, author_id, content, timestamp)."""
+        self._ensure_task()
+        self.queue.append(row)
+        if len(self.queue) >= _batch_size():
+            self._wakeup.set()
+
+    async def _run(self):
+        await self._replay()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=_flush_interval())
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self.queue:
+                await self.flush()
+
+    async def flush(self):
+        batch, self.queue = self.queue[:_batch_size()], self.queue[_batch_size():]
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                await database_sync_to_async(self._persist)(batch)
+                if self._backoff:
+                    self._backoff = 0
+                    await self._replay()
+                return
+            except Exception as e:
+                logger.warning(f"[chat-writer] Flush of {len(batch)} messages failed (attempt {attempt}): {e}")
+                await asyncio.sleep(0.05 * 2 ** attempt)
+        # The database is unhealthy: keep the rows on disk and slow down
+        await database_sync_to_async(spool)(batch)
+        self._backoff = min(max(self._backoff * 2, 1), MAX_BACKOFF)
+        await asyncio.sleep(self._backoff)
+
+    async def _replay(self):
+        try:
+            await database_sync_to_async(self._replay_spool)()
+        except Exception as e:
+            logger.warning(f"[chat-writer] Spool replay failed, will retry: {e}")
+
+    def _persist(self, batch):
+        close_old_connections()
+        persist(batch)
+
+    def _replay_spool(self):
+        close_old_connections()
+        replay_spool()
+
+
+_writers = weakref.WeakKeyDictionary()
+
+
+def get_writer():
+    """The writer bound to the running event loop (one per worker process in practice)."""
+    loop = asyncio.get_running_loop()
+    writer = _writers.get(loop)
+    if writer is None:
+        writer = _writers[loop] = MessageWriter()
+    return writer
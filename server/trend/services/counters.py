@@ -0,0 +1,109 @@
+"""
+Denormalized Counter Service
+Engagement and social-graph counts (likes, comments, retwists, followers, ...) are
+stored as columns on Post / Reel / Twist / Story / Profile so feeds and profile
+pages can read them without COUNT(*) queries.
+
+Views adjust the columns atomically with `adjust()` / `adjust_profile()` when the
+underlying rows are created or deleted. Anything that bypasses the views (admin
+deletes, cascades, bulk seeding) is corrected by `reconcile()`, which the
+`reconcile_counters` management command runs periodically.
+"""
+import logging
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from ..models import (
+    Profile, Post, Like, Comment, Twist, TwistLike, TwistComment,
+    Reel, ReelLike, ReelComment, Story, StoryLike, StoryView,
+    Follow, UserSubscription,
+)
+from . import mentions, timeline
+
+logger = logging.getLogger(__name__)
+
+
+def _increments(deltas):
+    # Greatest(..., 0) keeps a counter from going negative if it had already drifted low
+    return {field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items()}
+
+
+def adjust(model, pk, **deltas):
+    """Atomically adds `deltas` to counter columns of a single row, e.g. adjust(Post, 1, likes_count=1)."""
+    if pk is None:
+        return
+    model.objects.filter(pk=pk).update(**_increments(deltas))
+
+
+def adjust_profile(user_id, **deltas):
+    """Same as adjust() for the Profile belonging to `user_id`."""
+    if user_id is None:
+        return
+    Profile.objects.filter(user_id=user_id).update(**_increments(deltas))
+    if 'followers_count' in deltas:
+        # .update() sends no post_save, and the mention index ranks on this count
+        mentions.refresh(user_id)
+        if deltas['followers_count'] < 0:
+            timeline.followers_removed(user_id, -deltas['followers_count'])
+
+
+def sync_subscribers_count(creator_id):
+    """Subscription status changes are rare and come from several Stripe paths, so recount instead of diffing."""
+    count = UserSubscription.objects.filter(creator_id=creator_id, status='active').count()
+    Profile.objects.filter(user_id=creator_id).update(subscribers_count=count)
+
+
+# (model, counter field, source queryset, FK on source pointing at the model, outer key)
+COUNTER_SPECS = [
+    (Post, 'likes_count', Like.objects.all(), 'post', 'pk'),
+    (Post, 'comments_count', Comment.objects.all(), 'post', 'pk'),
+    (Post, 'twists_count', Twist.objects.all(), 'original_post', 'pk'),
+    (Reel, 'likes_count', ReelLike.objects.all(), 'reel', 'pk'),
+    (Reel, 'comments_count', ReelComment.objects.all(), 'reel', 'pk'),
+    (Twist, 'likes_count', TwistLike.objects.all(), 'twist', 'pk'),
+    (Twist, 'comments_count', TwistComment.objects.all(), 'twist', 'pk'),
+    (Twist, 'retwists_count', Twist.objects.all(), 'original_twist', 'pk'),
+    (Story, 'likes_count', StoryLike.objects.all(), 'story', 'pk'),
+    (Story, 'views_count', StoryView.objects.all(), 'story', 'pk'),
+    (Profile, 'posts_count', Post.objects.all(), 'author', 'user_id'),
+    (Profile, 'followers_count', Follow.objects.all(), 'following', 'user_id'),
+    (Profile, 'following_count', Follow.objects.all(), 'follower', 'user_id'),
+    (Profile, 'subscribers_count', UserSubscription.objects.filter(status='active'), 'creator', 'user_id'),
+]
+
+
+def reconcile(model, field, source, fk, outer='pk', batch_size=1000):
+    """
+    Recomputes `field` from `source` for rows where the stored value has drifted.
+    Returns the number of rows corrected.
+    """
+    live = source.filter(**{fk: OuterRef(outer)}).order_by().values(fk).annotate(n=Count('pk')).values('n')
+    drifted = (
+        model.objects.annotate(live=Coalesce(Subquery(live), 0))
+        .exclude(**{field: F('live')})
+        .values_list('pk', 'live')
+    )
+
+    fixed, pending = 0, []
+    for pk, value in drifted.iterator(chunk_size=batch_size):
+        pending.append(model(pk=pk, **{field: value}))
+        if len(pending) >= batch_size:
+            model.objects.bulk_update(pending, [field])
+            fixed += len(pending)
+            pending = []
+    if pending:
+        model.objects.bulk_update(pending, [field])
+        fixed += len(pending)
+
+    if fixed:
+        logger.info(f"[counters] Reconciled {fixed} {model.__name__}.{field} values")
+    return fixed
+
+
+def reconcile_all(batch_size=1000):
+    """Runs reconcile() for every counter. Returns {'Model.field': rows_fixed}."""
+    return {
+        f"{model.__name__}.{field}": reconcile(model, field, source, fk, outer, batch_size)
+        for model, field, source, fk, outer in COUNTER_SPECS
+    }
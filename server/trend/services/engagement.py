@@ -0,0 +1,106 @@
+"""
+Engagement Batching Service
+Computes viewer-relative flags (liked / saved) for a whole page of Posts, Reels
+or Twists in a fixed number of queries. Engagement counts themselves are stored
+columns (see services/counters.py) and "following" comes from the viewer context
+(services/viewer.py), so neither needs batching here.
+
+List views put the resulting `EngagementBatch` into the serializer context under
+the 'engagement' key. Serializers read from it and only fall back to per-object
+queries for objects the batch does not cover (e.g. detail views).
+"""
+from ..models import (
+    Post, Like, Twist, TwistLike, Reel, ReelLike, SavedItem,
+)
+
+
+class EngagementBatch:
+    """Lookup table of precomputed engagement data, keyed by model and primary key."""
+
+    def __init__(self):
+        self._covered = set()   # {(model, pk)}
+        self._flags = {}        # {(model, field): {pk}}
+
+    def cover(self, model, ids, flags=None):
+        for pk in ids:
+            self._covered.add((model, pk))
+        for field, values in (flags or {}).items():
+            self._flags.setdefault((model, field), set()).update(values)
+
+    def covers(self, obj):
+        return (type(obj), obj.pk) in self._covered
+
+    def flag(self, obj, field):
+        """Returns the batched viewer flag for `obj`, or None if `obj` is not in the batch."""
+        if not self.covers(obj):
+            return None
+        return obj.pk in self._flags.get((type(obj), field), set())
+
+
+def _viewer_ids(model, fk, ids, user, user_field='user'):
+    """Set of `fk` values in `ids` that `user` has a row for (likes, saves)."""
+    if not user or not user.is_authenticated:
+        return set()
+    return set(model.objects.filter(**{f'{fk}__in': ids, user_field: user}).values_list(fk, flat=True))
+
+
+def _add_posts(batch, posts, user):
+    ids = [p.pk for p in posts]
+    if not ids:
+        return
+    batch.cover(Post, ids, flags={
+        'liked': _viewer_ids(Like, 'post_id', ids, user),
+        'saved': _viewer_ids(SavedItem, 'post_id', ids, user),
+    })
+
+
+def _add_reels(batch, reels, user):
+    ids = [r.pk for r in reels]
+    if not ids:
+        return
+    batch.cover(Reel, ids, flags={
+        'liked': _viewer_ids(ReelLike, 'reel_id', ids, user),
+        'saved': _viewer_ids(SavedItem, 'reel_id', ids, user),
+    })
+
+
+def _add_twists(batch, twists, user):
+    ids = [t.pk for t in twists]
+    if not ids:
+        return
+    batch.cover(Twist, ids, flags={
+        'liked': _viewer_ids(TwistLike, 'twist_id', ids, user),
+        'saved': _viewer_ids(SavedItem, 'twist_id', ids, user),
+    })
+
+
+def build_engagement(objects, user):
+    """
+    Builds an EngagementBatch for a page of objects.
+    Accepts any mix of Post, Reel, Twist and SavedItem instances. Quote-twists pull
+    their `original_post` into the batch so the nested PostSerializer is covered too.
+    """
+    posts, reels, twists = {}, {}, {}
+
+    for obj in objects:
+        if isinstance(obj, SavedItem):
+            if obj.post_id: posts[obj.post_id] = obj.post
+            if obj.reel_id: reels[obj.reel_id] = obj.reel
+            if obj.twist_id: twists[obj.twist_id] = obj.twist
+        elif isinstance(obj, Post):
+            posts[obj.pk] = obj
+        elif isinstance(obj, Reel):
+            reels[obj.pk] = obj
+        elif isinstance(obj, Twist):
+            twists[obj.pk] = obj
+
+    for twist in twists.values():
+        if twist.original_post_id and twist.original_post_id not in posts:
+            posts[twist.original_post_id] = twist.original_post
+
+    batch = EngagementBatch()
+    _add_posts(batch, list(posts.values()), user)
+    _add_reels(batch, list(reels.values()), user)
+    _add_twists(batch, list(twists.values()), user)
+
+    return batch
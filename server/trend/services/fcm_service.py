@@ -1,77 +1,311 @@
 """
 FCM Push Notification Service
-Sends push notifications via FCM HTTP v1 Legacy API.
+Sends push notifications via the FCM legacy HTTP API without blocking the caller.
 Set FCM_SERVER_KEY in your .env file (from Firebase Console → Project Settings → Cloud Messaging).
+
+- `send_fcm_notification` / `send_fcm_to_users` only queue the push and return.
+- A dispatcher thread per process collects everything queued within
+  FCM_BATCH_WINDOW_MS, resolves the device tokens of all recipients in one
+  query and collapses bursts per device: for the same device and collapse key
+  only the latest push is sent, with the number it stands for in
+  data['collapsed']; exact duplicates are dropped.
+- Pushes with the same payload go out as one multicast request
+  (registration_ids, up to 1000 tokens), over a pooled requests.Session on
+  FCM_CONCURRENCY worker threads, retrying 5xx / timeouts / Unavailable with
+  backoff.
+- Tokens FCM reports as invalid are deleted in one query per batch, and
+  canonical ids it hands back replace the old token.
+
+FCM_ENDPOINT points at Google by default; `python manage.py fcm_stub` serves
+a local stand-in for testing.
 """
-import requests
+import atexit
 import json
 import logging
+import math
 import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from django.conf import settings
+from django.db import close_old_connections
+from requests.adapters import HTTPAdapter
+
+from ..models import FCMDevice
 
 logger = logging.getLogger(__name__)
 
 FCM_URL = 'https://fcm.googleapis.com/fcm/send'
+MULTICAST_LIMIT = 1000
+MAX_ATTEMPTS = 3
+MAX_RETRY_AFTER = 30  # Seconds; a send thread waiting longer holds up the rest of the batch
+INVALID_TOKEN_ERRORS = {'NotRegistered', 'InvalidRegistration', 'MismatchSenderId'}
+RETRYABLE_ERRORS = {'Unavailable', 'InternalServerError'}
+
+
+def _endpoint():
+    return getattr(settings, 'FCM_ENDPOINT', None) or FCM_URL
+
+
+def _concurrency():
+    return getattr(settings, 'FCM_CONCURRENCY', 8)
+
+
+def _batch_window():
+    return getattr(settings, 'FCM_BATCH_WINDOW_MS', 200) / 1000
+
+
+def _timeout():
+    return getattr(settings, 'FCM_TIMEOUT', 5)
+
+
+def _retry_after(resp, default):
+    """Seconds FCM asks us to wait (Retry-After as delta-seconds or an HTTP-date), else `default`."""
+    value = resp.headers.get('Retry-After')
+    if not value:
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return default
+    if not math.isfinite(seconds):
+        return default
+    return min(max(seconds, 0), MAX_RETRY_AFTER)
+
+
+class PushJob:
+    __slots__ = ('user_ids', 'title', 'body', 'data', 'collapse_key')
+
+    def __init__(self, user_ids, title, body, data, collapse_key):
+        self.user_ids = user_ids
+        self.title = title
+        self.body = body
+        self.data = data
+        self.collapse_key = collapse_key
+
+
+class PushDispatcher:
+    """Per-process queue plus the thread that batches and sends it."""
+
+    def __init__(self):
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._thread = None
+        self._session = None
+        self._executor = None
+
+    def submit(self, job):
+        with self._lock:
+            self._pending.append(job)
+            self._idle.clear()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='fcm-dispatcher', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def drain(self, timeout=None):
+        """Blocks until everything queued so far has been sent. Returns False on timeout."""
+        return self._idle.wait(timeout)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            time.sleep(_batch_window())  # Let the rest of a burst arrive
+            with self._lock:
+                jobs, self._pending = self._pending, []
+                self._wakeup.clear()
+            try:
+                close_old_connections()
+                self.deliver(jobs)
+            except Exception as exc:
+                logger.exception(f"[FCM] Dispatch of {len(jobs)} jobs failed: {exc}")
+            finally:
+                close_old_connections()
+                with self._lock:
+                    if not self._pending:
+                        self._idle.set()
+
+    # --- Batching ---
+
+    def deliver(self, jobs):
+        user_ids = {uid for job in jobs for uid in job.user_ids}
+        devices = defaultdict(list)
+        for user_id, token in FCMDevice.objects.filter(user_id__in=user_ids).values_list('user_id', 'registration_id'):
+            devices[user_id].append(token)
+
+        # {(token, collapse key or payload): [payload, count]}, later jobs replacing earlier ones
+        per_device = {}
+        for job in jobs:
+            payload = _payload(job)
+            signature = job.collapse_key or json.dumps(payload, sort_keys=True)
+            for user_id in job.user_ids:
+                for token in devices.get(user_id, ()):
+                    previous = per_device.get((token, signature))
+                    per_device[(token, signature)] = [payload, previous[1] + 1 if previous else 1]
+
+        multicast = defaultdict(list)  # {payload json: [token]}
+        for (token, _), (payload, count) in per_device.items():
+            if count > 1 and payload.get('collapse_key'):
+                payload = {**payload, 'data': {**payload['data'], 'collapsed': str(count)}}
+            multicast[json.dumps(payload, sort_keys=True)].append(token)
+
+        requests_to_send = [
+            (json.loads(body), tokens[start:start + MULTICAST_LIMIT])
+            for body, tokens in multicast.items()
+            for start in range(0, len(tokens), MULTICAST_LIMIT)
+        ]
+        if not requests_to_send:
+            return
+
+        sent, invalid, canonical = 0, set(), {}
+        futures = [self._pool().submit(self._post, *request) for request in requests_to_send]
+        for future in futures:
+            try:
+                ok, bad, renamed = future.result()
+            except Exception as exc:
+                # One bad response must not cost the invalid tokens the other requests found
+                logger.error(f"[FCM] Multicast request failed: {exc}")
+                continue
+            sent += ok
+            invalid |= bad
+            canonical.update(renamed)
+        self._prune(invalid, canonical)
+        logger.info(
+            f"[FCM] {len(jobs)} jobs -> {sent}/{len(per_device)} pushes in {len(requests_to_send)} requests"
+            f" ({len(invalid)} invalid tokens pruned)"
+        )
 
+    # --- HTTP ---
 
-def send_fcm_notification(user, title: str, body: str, data: dict = None):
+    def _pool(self):
+        if self._executor is None:
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=_concurrency())
+            self._session.mount('https://', adapter)
+            self._session.mount('http://', adapter)
+            self._executor = ThreadPoolExecutor(max_workers=_concurrency(), thread_name_prefix='fcm-send')
+        return self._executor
+
+    def _post(self, payload, tokens):
+        """Sends one multicast request. Returns (delivered, invalid tokens, {old token: canonical token})."""
+        headers = {'Content-Type': 'application/json', 'Authorization': f"key={os.environ.get('FCM_SERVER_KEY')}"}
+        delivered, invalid, canonical = 0, set(), {}
+        delay = 0
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            if delay:
+                time.sleep(delay)  # Between attempts only, never after the last one
+            delay = 0.5 * 2 ** attempt
+            try:
+                resp = self._session.post(
+                    _endpoint(), headers=headers, timeout=_timeout(),
+                    data=json.dumps({**payload, 'registration_ids': tokens}),
+                )
+            except requests.RequestException as exc:
+                logger.warning(f"[FCM] Request for {len(tokens)} devices failed (attempt {attempt}): {exc}")
+                continue
+
+            if resp.status_code >= 500:
+                delay = _retry_after(resp, delay)
+                logger.warning(f"[FCM] HTTP {resp.status_code} for {len(tokens)} devices (attempt {attempt})")
+                continue
+            if resp.status_code != 200:
+                logger.error(f"[FCM] HTTP {resp.status_code}: {resp.text}")
+                return delivered, invalid, canonical
+
+            retry = []
+            for token, result in zip(tokens, resp.json().get('results', [])):
+                error = result.get('error')
+                if error in INVALID_TOKEN_ERRORS:
+                    invalid.add(token)
+                elif error in RETRYABLE_ERRORS:
+                    retry.append(token)
+                elif error:
+                    logger.warning(f"[FCM] Push failed: {error}")
+                else:
+                    delivered += 1
+                    if result.get('registration_id'):
+                        canonical[token] = result['registration_id']
+            if not retry:
+                break
+            tokens = retry
+        return delivered, invalid, canonical
+
+    def _prune(self, invalid, canonical):
+        if invalid:
+            FCMDevice.objects.filter(registration_id__in=invalid).delete()
+        if canonical:
+            known = set(FCMDevice.objects.filter(registration_id__in=canonical.values()).values_list('registration_id', flat=True))
+            # The device is already registered under its new token: drop the old row, otherwise rename it
+            FCMDevice.objects.filter(registration_id__in=[old for old, new in canonical.items() if new in known]).delete()
+            for old, new in canonical.items():
+                if new not in known:
+                    FCMDevice.objects.filter(registration_id=old).update(registration_id=new)
+
+
+def _payload(job):
+    payload = {
+        'priority': 'high',
+        'notification': {
+            'title': job.title,
+            'body': job.body,
+            'sound': 'default',
+            'badge': '1',
+        },
+        # FCM requires all data values to be strings
+        'data': {k: str(v) for k, v in (job.data or {}).items()},
+    }
+    if job.collapse_key:
+        payload['collapse_key'] = job.collapse_key
+    return payload
+
+
+_dispatcher = PushDispatcher()
+atexit.register(_dispatcher.drain, 5)
+
+
+def drain(timeout=None):
+    """Waits for queued pushes to go out (management commands, tests)."""
+    return _dispatcher.drain(timeout)
+
+
+def send_fcm_to_users(user_ids, title: str, body: str, data: dict = None, collapse_key: str = None):
     """
-    Send a push notification to all FCM devices registered for `user`.
+    Queue a push notification to all FCM devices registered for `user_ids` and return immediately.
 
-    All values in `data` are coerced to strings as required by FCM.
-    If FCM_SERVER_KEY is not set, logs a warning but does not raise.
+    Pushes to the same device with the same `collapse_key` that are queued close
+    together are collapsed into the latest one. If FCM_SERVER_KEY is not set,
+    logs a warning but does not raise.
     """
-    server_key = os.environ.get('FCM_SERVER_KEY')
-    if not server_key:
-        logger.warning(
-            f"[FCM] FCM_SERVER_KEY not configured. "
-            f"Notification '{title}' for {user.username} skipped."
-        )
+    user_ids = list(user_ids)
+    if not os.environ.get('FCM_SERVER_KEY'):
+        logger.warning(f"[FCM] FCM_SERVER_KEY not configured. Notification '{title}' for {len(user_ids)} users skipped.")
         return
+    if user_ids:
+        _dispatcher.submit(PushJob(user_ids, title, body, data, collapse_key))
 
-    devices = list(user.fcm_devices.values_list('registration_id', flat=True))
-    if not devices:
-        logger.debug(f"[FCM] No devices for {user.username}")
-        return
 
-    # FCM requires all data values to be strings
-    safe_data = {k: str(v) for k, v in (data or {}).items()}
+def send_fcm_notification(user, title: str, body: str, data: dict = None, collapse_key: str = None):
+    """Queue a push notification to all FCM devices registered for `user`."""
+    send_fcm_to_users([user.id], title, body, data, collapse_key)
 
-    headers = {
-        'Content-Type': 'application/json',
-        'Authorization': f'key={server_key}',
-    }
 
-    for token in devices:
-        payload = {
-            'to': token,
-            'priority': 'high',
-            'notification': {
-                'title': title,
-                'body': body,
-                'sound': 'default',
-                'badge': '1',
-            },
-            'data': safe_data,
-        }
-        try:
-            resp = requests.post(
-                FCM_URL,
-                headers=headers,
-                data=json.dumps(payload),
-                timeout=5,
-            )
-            if resp.status_code == 200:
-                result = resp.json()
-                if result.get('failure', 0) > 0:
-                    # Token is invalid — delete it
-                    logger.warning(f"[FCM] Invalid token for {user.username}, removing.")
-                    user.fcm_devices.filter(registration_id=token).delete()
-                else:
-                    logger.info(f"[FCM] Sent to {user.username}")
-            else:
-                logger.error(f"[FCM] HTTP {resp.status_code}: {resp.text}")
-        except Exception as exc:
-            logger.error(f"[FCM] Exception: {exc}")
+def _picture(user):
+    return (
+        user.profile.profile_picture.url
+        if hasattr(user, 'profile') and user.profile.profile_picture
+        else ''
+    )
 
 
 def send_call_notification(caller, recipient, call_type: str, signal_data: dict):
@@ -84,31 +318,40 @@ def send_call_notification(caller, recipient, call_type: str, signal_data: dict)
             'type': 'call_offer',
             'caller_id': str(caller.id),
             'caller_username': caller.username,
-            'caller_profile_picture': (
-                caller.profile.profile_picture.url
-                if hasattr(caller, 'profile') and caller.profile.profile_picture
-                else ''
-            ),
+            'caller_profile_picture': _picture(caller),
             'call_type': call_type,
         },
+        collapse_key=f'call:{caller.id}',
     )
 
 
+def _message_data(sender, content):
+    return {
+        'type': 'chat_message',
+        'sender_id': str(sender.id),
+        'sender_username': sender.username,
+        'sender_profile_picture': _picture(sender),
+        'content': content[:100],
+    }
+
+
 def send_message_notification(sender, recipient, content: str):
     """Convenience wrapper for new message push notifications."""
     send_fcm_notification(
         user=recipient,
         title=sender.username,
         body=content[:100],
-        data={
-            'type': 'chat_message',
-            'sender_id': str(sender.id),
-            'sender_username': sender.username,
-            'sender_profile_picture': (
-                sender.profile.profile_picture.url
-                if hasattr(sender, 'profile') and sender.profile.profile_picture
-                else ''
-            ),
-            'content': content[:100],
-        },
+        data=_message_data(sender, content),
+        collapse_key=f'chat:{sender.id}',
+    )
+
+
+def send_group_message_notification(sender, group, recipient_ids, content: str):
+    """One queued push for every member of `group` in `recipient_ids`."""
+    send_fcm_to_users(
+        recipient_ids,
+        title=group.name,
+        body=content[:100],
+        data={**_message_data(sender, content), 'group_id': str(group.id), 'group_name': group.name},
+        collapse_key=f'group:{group.id}',
     )
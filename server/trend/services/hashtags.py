@@ -0,0 +1,117 @@
+"""
+Hashtag Index Service
+Keeps the Hashtag relations (Hashtag.posts / .twists / .reels) in step with
+the text they come from, so tag feeds are a join on the through tables
+instead of a LIKE scan over every post.
+
+- `extract(text)` pulls the tags out of a post / twist body or a reel caption,
+  lowercased, without the '#', in order of first appearance.
+- `index(instance)` runs from the post_save signals on Post, Twist and Reel:
+  it creates any missing Hashtag rows and adds / removes the instance's
+  through-table links to match its current text.
+- `index_many(model, instances)` does the same for a batch with a fixed
+  number of queries; the index_hashtags command uses it to backfill.
+- Added and removed links are counted as mentions by services/trending.py;
+  `unindex(instance)` takes a deleted instance's mentions back out.
+
+Tag names are stored lowercased, so `#Django` and `#django` are one tag;
+`normalize()` applies the same rule to a `?tag=` filter.
+"""
+import logging
+import re
+
+from ..models import Hashtag, Post, Reel, Twist
+from . import trending
+
+logger = logging.getLogger(__name__)
+
+MAX_TAG_LENGTH = Hashtag._meta.get_field('name').max_length
+TAG_RE = re.compile(r'(?<!\w)#(\w+)')
+
+# {model: (text field, Hashtag relation)}
+SOURCES = {
+    Post: ('content', 'posts'),
+    Twist: ('content', 'twists'),
+    Reel: ('caption', 'reels'),
+}
+
+
+def normalize(tag):
+    return (tag or '').strip().lstrip('#').lower()
+
+
+def extract(text):
+    """['django', 'python'] for "Loving #Django and #python #django"."""
+    names = {}
+    for match in TAG_RE.finditer(text or ''):
+        name = match.group(1).lower()
+        if len(name) <= MAX_TAG_LENGTH:
+            names.setdefault(name, None)
+    return list(names)
+
+
+def text_field(model):
+    return SOURCES[model][0]
+
+
+def _through(model):
+    """(through model, fk column of `model` on it)."""
+    relation = getattr(Hashtag, SOURCES[model][1])
+    return relation.through, f'{model._meta.model_name}_id'
+
+
+def _hashtag_ids(names):
+    """{name: hashtag id}, creating the missing tags."""
+    if not names:
+        return {}
+    Hashtag.objects.bulk_create([Hashtag(name=name) for name in names], ignore_conflicts=True)
+    return dict(Hashtag.objects.filter(name__in=names).values_list('name', 'id'))
+
+
+def index(instance):
+    return index_many(type(instance), [instance])
+
+
+def index_many(model, instances):
+    """
+    Syncs the tag links of `instances` (all of `model`) with their text.
+    Returns the number of links added plus removed.
+    """
+    instances = [instance for instance in instances if instance.pk]
+    if not instances:
+        return 0
+    field = text_field(model)
+    through, fk = _through(model)
+
+    wanted = {instance.pk: extract(getattr(instance, field)) for instance in instances}
+    ids = _hashtag_ids({name for names in wanted.values() for name in names})
+    wanted = {pk: {ids[name] for name in names} for pk, names in wanted.items()}
+
+    current = {pk: set() for pk in wanted}
+    for pk, hashtag_id in through.objects.filter(**{f'{fk}__in': list(wanted)}).values_list(fk, 'hashtag_id'):
+        current[pk].add(hashtag_id)
+
+    added = [
+        through(**{fk: pk, 'hashtag_id': hashtag_id})
+        for pk, hashtag_ids in wanted.items() for hashtag_id in hashtag_ids - current[pk]
+    ]
+    removed = [(pk, current[pk] - hashtag_ids) for pk, hashtag_ids in wanted.items() if current[pk] - hashtag_ids]
+
+    if added:
+        through.objects.bulk_create(added, ignore_conflicts=True)
+    for pk, hashtag_ids in removed:
+        through.objects.filter(**{fk: pk, 'hashtag_id__in': hashtag_ids}).delete()
+
+    created_at = {instance.pk: instance.created_at for instance in instances}
+    trending.record(
+        [(link.hashtag_id, created_at[getattr(link, fk)], 1) for link in added]
+        + [(hashtag_id, created_at[pk], -1) for pk, hashtag_ids in removed for hashtag_id in hashtag_ids]
+    )
+    return len(added) + sum(len(hashtag_ids) for _, hashtag_ids in removed)
+
+
+def unindex(instance):
+    """Takes the mentions of `instance` (about to be deleted) out of the trending counts."""
+    through, fk = _through(type(instance))
+    hashtag_ids = through.objects.filter(**{fk: instance.pk}).values_list('hashtag_id', flat=True)
+    trending.record([(hashtag_id, instance.created_at, -1) for hashtag_id in hashtag_ids])
@@ -0,0 +1,102 @@
+"""
+Chat Inbox Service
+Builds the DM inbox and group list in a constant number of queries per page,
+however many conversations or messages there are:
+
+1. The page of rooms / groups itself, with the id of each conversation's
+   latest message annotated as a correlated subquery (an index range scan on
+   chatmsg_room_recent / chatmsg_group_recent) and peers / members joined or
+   prefetched.
+2. Those last messages, with their attachments, in one IN query.
+3. Unread counts from the viewer's counters in services/unread.py (cached,
+   usually no query).
+
+Presence for every peer / member on the page is looked up in one call to
+services/presence.py (no query) and passed on as context['presence'].
+
+List views put the resulting `InboxBatch` into the serializer context under
+the 'inbox' key, the same way feeds use 'engagement'. Serializers fall back to
+per-object queries for anything the batch does not cover (e.g. detail views).
+"""
+from django.contrib.auth.models import User
+from django.db.models import OuterRef, Prefetch, Q, Subquery
+
+from ..models import ChatGroup, ChatMessage, ChatRoom
+from . import presence, unread
+
+# Everything ChatMessageSerializer touches on a message
+MESSAGE_RELATED = (
+    'author', 'shared_reel__author', 'shared_post__author', 'shared_twist__author', 'story_reply__author',
+)
+
+
+def _last_message_id(field):
+    return Subquery(
+        ChatMessage.objects.filter(**{field: OuterRef('pk')}).order_by('-timestamp', '-id').values('id')[:1]
+    )
+
+
+def room_inbox(user):
+    """The viewer's DM rooms, ready to paginate and serialize with ChatRoomSerializer."""
+    return ChatRoom.objects.filter(Q(user1=user) | Q(user2=user)) \
+        .select_related('user1__profile', 'user2__profile') \
+        .annotate(last_message_id=_last_message_id('room'))
+
+
+def group_inbox(user):
+    """The viewer's groups, ready to paginate and serialize with ChatGroupSerializer."""
+    return with_group_members(
+        ChatGroup.objects.filter(members=user).annotate(last_message_id=_last_message_id('group'))
+    )
+
+
+def with_group_members(queryset):
+    """Admin and members (with profiles) loaded up front; members_count is read from the prefetch."""
+    return queryset.select_related('admin__profile').prefetch_related(
+        Prefetch('members', queryset=User.objects.select_related('profile').order_by('id'))
+    )
+
+
+class InboxBatch:
+    """Last message and unread count per conversation, keyed by (model, pk)."""
+
+    def __init__(self):
+        self.last_messages = {}  # {(model, pk): ChatMessage | None}
+        self.unread = {}         # {(model, pk): int}
+        self.presence = {}       # {user_id: (is_online, last_seen)} for peers / members
+
+    def covers(self, obj):
+        return (type(obj), obj.pk) in self.unread
+
+    def last_message(self, obj):
+        return self.last_messages.get((type(obj), obj.pk))
+
+    def unread_count(self, obj):
+        return self.unread.get((type(obj), obj.pk), 0)
+
+
+def build_inbox(conversations, user):
+    """Builds an InboxBatch for a page of ChatRooms and/or ChatGroups annotated by room_inbox / group_inbox."""
+    batch = InboxBatch()
+    message_ids = {getattr(c, 'last_message_id', None) for c in conversations} - {None}
+    messages = ChatMessage.objects.select_related(*MESSAGE_RELATED).in_bulk(message_ids) if message_ids else {}
+    unread_counts = unread.chat_counts(user.id)
+
+    for model in (ChatRoom, ChatGroup):
+        page = [c for c in conversations if isinstance(c, model)]
+        if not page:
+            continue
+        counts = unread_counts['groups' if model is ChatGroup else 'rooms']
+        for conversation in page:
+            key = (model, conversation.pk)
+            batch.last_messages[key] = messages.get(getattr(conversation, 'last_message_id', None))
+            batch.unread[key] = counts.get(conversation.pk, 0)
+
+    people = set()
+    for conversation in conversations:
+        if isinstance(conversation, ChatRoom):
+            people.update((conversation.user1_id, conversation.user2_id))
+        else:
+            people.update(member.id for member in conversation.members.all())
+    batch.presence = presence.lookup(people - {user.id})
+    return batch
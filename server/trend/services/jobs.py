@@ -0,0 +1,375 @@
+"""
+Background Jobs Service
+Runs slow side effects (email, notification fan-out, shares) outside the
+request. Tasks are plain functions in trend/tasks.py decorated with @task;
+callers use `func.delay(*args)` or `func.apply_async(args, kwargs,
+idempotency_key=..., countdown=...)` with JSON-serializable arguments.
+
+- Jobs reach the broker when the surrounding transaction commits, so a worker
+  never sees a job for rows that were rolled back.
+- Brokers: Redis (a sorted set scored by due time plus a payload hash, claimed
+  atomically with a lease) when REDIS_URL is set, otherwise the BackgroundJob
+  table (claimed with a conditional UPDATE, so several workers can share it).
+  JOBS_BROKER forces one; 'eager' runs tasks inline (tests, scripts).
+- A failing job is retried with exponential backoff and jitter up to the
+  task's max_attempts, then kept as failed with its last error. A job whose
+  worker died is picked up again once its lease runs out.
+- An idempotency key turns repeated enqueues of the same work into no-ops for
+  JOBS_IDEMPOTENCY_TTL seconds.
+- Workers: `python manage.py run_worker`, or the embedded worker thread each
+  web process starts on first enqueue (JOBS_EMBEDDED_WORKER, on by default so
+  a single-service deploy keeps working). A standalone worker needs the Redis
+  channel layer for its broadcasts to reach WebSocket clients.
+"""
+import functools
+import importlib
+import json
+import logging
+import random
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ..models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+PREFIX = 'jobs:'
+LEASE = 300              # Seconds a claimed job may run before another worker takes it over
+DEFAULT_MAX_ATTEMPTS = 5
+MAX_BACKOFF = 600
+FAILED_RETENTION = timedelta(days=7)
+PURGE_EVERY = 300
+
+
+def _idempotency_ttl():
+    return getattr(settings, 'JOBS_IDEMPOTENCY_TTL', 24 * 60 * 60)
+
+
+def _poll_interval():
+    return getattr(settings, 'JOBS_POLL_INTERVAL', 1)
+
+
+# --- Tasks ---
+
+class Task:
+    def __init__(self, func, name, max_attempts, backoff):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return self.apply_async(args, kwargs)
+
+    def apply_async(self, args=(), kwargs=None, idempotency_key=None, countdown=0):
+        """Queues the task once the current transaction commits. Returns the job id."""
+        job = {
+            'id': uuid.uuid4().hex, 'task': self.name, 'args': list(args), 'kwargs': kwargs or {},
+            'attempts': 0, 'max_attempts': self.max_attempts, 'key': idempotency_key,
+        }
+        json.dumps(job)  # Fail in the caller, not the worker, on arguments that can't be queued
+        broker = get_broker()
+        transaction.on_commit(lambda: broker.push(job, countdown))
+        return job['id']
+
+    def retry_delay(self, attempts):
+        return min(self.backoff * 2 ** (attempts - 1), MAX_BACKOFF) * random.uniform(0.8, 1.2)
+
+
+def task(name=None, max_attempts=DEFAULT_MAX_ATTEMPTS, backoff=2):
+    """Registers a function as a background task (retried `max_attempts` times, `backoff` seconds doubling)."""
+    def decorator(func):
+        registered = Task(func, name or f'{func.__module__}.{func.__name__}', max_attempts, backoff)
+        REGISTRY[registered.name] = registered
+        return registered
+    return decorator
+
+
+def autodiscover():
+    """Imports every installed app's tasks module so its tasks are registered."""
+    for app in apps.get_app_configs():
+        try:
+            importlib.import_module(f'{app.name}.tasks')
+        except ModuleNotFoundError as e:
+            if e.name != f'{app.name}.tasks':
+                raise
+
+
+def execute(job, broker):
+    """Runs one claimed job and records the outcome with the broker."""
+    registered = REGISTRY.get(job['task'])
+    close_old_connections()
+    try:
+        if registered is None:
+            raise LookupError(f"Unknown task {job['task']}")
+        registered.func(*job['args'], **job['kwargs'])
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        if registered is not None and job['attempts'] < job['max_attempts']:
+            delay = registered.retry_delay(job['attempts'])
+            logger.warning(
+                f"[jobs] {job['task']} {job['id']} failed (attempt {job['attempts']}/{job['max_attempts']}), "
+                f"retrying in {delay:.0f}s: {error}"
+            )
+            broker.retry(job, delay, error)
+        else:
+            logger.error(f"[jobs] {job['task']} {job['id']} gave up after {job['attempts']} attempts: {error}")
+            broker.fail(job, traceback.format_exc())
+    else:
+        broker.ack(job)
+    finally:
+        close_old_connections()
+
+
+# --- Database broker ---
+
+class DatabaseBroker:
+    def push(self, job, countdown=0):
+        try:
+            with transaction.atomic():
+                BackgroundJob.objects.create(
+                    task=job['task'], payload={'id': job['id'], 'args': job['args'], 'kwargs': job['kwargs']},
+                    max_attempts=job['max_attempts'], idempotency_key=job['key'],
+                    run_at=timezone.now() + timedelta(seconds=countdown),
+                )
+        except IntegrityError:
+            logger.info(f"[jobs] Skipped {job['task']}: already queued as {job['key']}")
+            return
+        _wake_embedded_worker()
+
+    def claim(self, limit):
+        now = timezone.now()
+        due = Q(status='queued', run_at__lte=now) | Q(status='running', locked_until__lt=now)
+        claimed = []
+        for job_id in BackgroundJob.objects.filter(due).order_by('run_at').values_list('id', flat=True)[:limit * 2]:
+            # Only one worker's UPDATE can match while the row is still due
+            if BackgroundJob.objects.filter(due, id=job_id).update(
+                status='running', locked_until=now + timedelta(seconds=LEASE), attempts=F('attempts') + 1,
+            ):
+                claimed.append(job_id)
+                if len(claimed) == limit:
+                    break
+        return [
+            {**row.payload, 'pk': row.pk, 'task': row.task, 'attempts': row.attempts,
+             'max_attempts': row.max_attempts, 'key': row.idempotency_key}
+            for row in BackgroundJob.objects.filter(id__in=claimed).order_by('run_at')
+        ]
+
+    def ack(self, job):
+        rows = BackgroundJob.objects.filter(pk=job['pk'])
+        if job['key']:
+            rows.update(status='done', locked_until=None)  # Kept until purge so the key keeps deduplicating
+        else:
+            rows.delete()
+
+    def retry(self, job, delay, error):
+        BackgroundJob.objects.filter(pk=job['pk']).update(
+            status='queued', locked_until=None, last_error=error,
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+
+    def fail(self, job, error):
+        BackgroundJob.objects.filter(pk=job['pk']).update(status='failed', locked_until=None, last_error=error)
+
+    def purge(self):
+        now = timezone.now()
+        BackgroundJob.objects.filter(status='done', updated_at__lt=now - timedelta(seconds=_idempotency_ttl())).delete()
+        BackgroundJob.objects.filter(status='failed', updated_at__lt=now - FAILED_RETENTION).delete()
+
+
+# --- Redis broker ---
+
+CLAIM_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, id in ipairs(ids) do redis.call('ZADD', KEYS[1], ARGV[3], id) end
+return ids
+"""
+
+
+class RedisBroker:
+    """jobs:due scores job ids by due time (claimed jobs by lease expiry); jobs:data holds the payloads."""
+
+    def __init__(self, url):
+        import redis
+        self.redis = redis.Redis.from_url(url)
+        self._claim = self.redis.register_script(CLAIM_SCRIPT)
+
+    def push(self, job, countdown=0):
+        if job['key'] and not self.redis.set(f"{PREFIX}key:{job['key']}", job['id'], nx=True, ex=_idempotency_ttl()):
+            logger.info(f"[jobs] Skipped {job['task']}: already queued as {job['key']}")
+            return
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(f'{PREFIX}data', job['id'], json.dumps(job))
+        pipe.zadd(f'{PREFIX}due', {job['id']: time.time() + countdown})
+        pipe.execute()
+        _wake_embedded_worker()
+
+    def claim(self, limit):
+        now = time.time()
+        ids = self._claim(keys=[f'{PREFIX}due'], args=[now, limit, now + LEASE])
+        if not ids:
+            return []
+        jobs = []
+        pipe = self.redis.pipeline(transaction=False)
+        for job_id, raw in zip(ids, self.redis.hmget(f'{PREFIX}data', ids)):
+            if raw is None:
+                pipe.zrem(f'{PREFIX}due', job_id)  # Acknowledged by a worker whose lease had expired
+                continue
+            job = json.loads(raw)
+            job['attempts'] += 1
+            pipe.hset(f'{PREFIX}data', job['id'], json.dumps(job))
+            jobs.append(job)
+        pipe.execute()
+        return jobs
+
+    def ack(self, job):
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zrem(f'{PREFIX}due', job['id'])
+        pipe.hdel(f'{PREFIX}data', job['id'])
+        pipe.execute()
+
+    def retry(self, job, delay, error):
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(f'{PREFIX}data', job['id'], json.dumps({**job, 'last_error': error}))
+        pipe.zadd(f'{PREFIX}due', {job['id']: time.time() + delay})
+        pipe.execute()
+
+    def fail(self, job, error):
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zrem(f'{PREFIX}due', job['id'])
+        pipe.hdel(f'{PREFIX}data', job['id'])
+        pipe.lpush(f'{PREFIX}failed', json.dumps({**job, 'last_error': error}))
+        pipe.ltrim(f'{PREFIX}failed', 0, 999)
+        pipe.execute()
+
+    def purge(self):
+        pass  # Idempotency keys expire on their own
+
+
+# --- Eager broker ---
+
+class EagerBroker:
+    """Runs each job inline as it is queued (one attempt, failures logged)."""
+
+    def push(self, job, countdown=0):
+        if job['key'] and not cache.add(f"{PREFIX}key:{job['key']}", job['id'], _idempotency_ttl()):
+            return
+        execute({**job, 'attempts': job['max_attempts']}, self)
+
+    def claim(self, limit):
+        return []
+
+    def ack(self, job):
+        pass
+
+    def retry(self, job, delay, error):
+        pass
+
+    def fail(self, job, error):
+        pass
+
+    def purge(self):
+        pass
+
+
+_brokers = {}
+
+
+def get_broker():
+    name = getattr(settings, 'JOBS_BROKER', None) or ('redis' if getattr(settings, 'REDIS_URL', None) else 'db')
+    if name not in _brokers:
+        if name == 'redis':
+            _brokers[name] = RedisBroker(settings.REDIS_URL)
+        elif name == 'eager':
+            _brokers[name] = EagerBroker()
+        else:
+            _brokers[name] = DatabaseBroker()
+    return _brokers[name]
+
+
+# --- Worker ---
+
+class Worker:
+    def __init__(self, broker=None, concurrency=None):
+        self.broker = broker or get_broker()
+        self.concurrency = concurrency or getattr(settings, 'JOBS_CONCURRENCY', 4)
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+
+    def run(self, burst=False):
+        """Claims and runs jobs until stopped (or, with `burst`, until nothing is due)."""
+        autodiscover()
+        pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job')
+        running, last_purge = set(), 0
+        try:
+            while not self.stopped.is_set():
+                running = {f for f in running if not f.done()}
+                free = self.concurrency - len(running)
+                jobs = self._claim(free) if free else []
+                for job in jobs:
+                    running.add(pool.submit(execute, job, self.broker))
+                if burst and not jobs and not running:
+                    break
+                if time.monotonic() - last_purge > PURGE_EVERY:
+                    last_purge = time.monotonic()
+                    self._purge()
+                if jobs:
+                    continue
+                if running and not free:
+                    wait(running, timeout=_poll_interval(), return_when=FIRST_COMPLETED)
+                else:
+                    self.wakeup.wait(_poll_interval())
+                    self.wakeup.clear()
+        finally:
+            pool.shutdown(wait=True)
+
+    def stop(self):
+        self.stopped.set()
+        self.wakeup.set()
+
+    def _claim(self, limit):
+        try:
+            close_old_connections()
+            return self.broker.claim(limit)
+        except Exception as e:
+            logger.warning(f"[jobs] Claim failed, will retry: {e}")
+            self.stopped.wait(_poll_interval())
+            return []
+
+    def _purge(self):
+        try:
+            self.broker.purge()
+        except Exception as e:
+            logger.warning(f"[jobs] Purge failed: {e}")
+
+
+_embedded = None
+_embedded_lock = threading.Lock()
+standalone = False  # Set by run_worker so its process doesn't also start an embedded worker
+
+
+def _wake_embedded_worker():
+    global _embedded
+    if standalone or not getattr(settings, 'JOBS_EMBEDDED_WORKER', True):
+        return
+    with _embedded_lock:
+        if _embedded is None:
+            _embedded = Worker()
+            threading.Thread(target=_embedded.run, name='job-worker', daemon=True).start()
+    _embedded.wakeup.set()
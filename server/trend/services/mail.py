@@ -0,0 +1,48 @@
+"""
+Mail Service
+Sends transactional email (OTPs) through the Brevo REST API. Called from the
+send_email background task (trend/tasks.py), never inline in a request.
+"""
+import json
+import os
+import urllib.error
+import urllib.request
+
+
+def send_email_via_api(to_email, subject, text_content):
+    """
+    Sends email via Brevo REST API (HTTPS port 443) 
+    to bypass Render's block on SMTP ports (25, 465, 587).
+    """
+    url = "https://api.brevo.com/v3/smtp/email"
+    
+    # Brevo API keys typically start with 'xkeysib-'
+    api_key = os.environ.get('BREVO_API_KEY') or os.environ.get('SENDINBLUE_API_KEY')
+    
+    if not api_key:
+        api_key = os.environ.get('EMAIL_HOST_PASSWORD')
+        
+    sender_email = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@trendtwist.com')
+    
+    if not api_key or api_key.startswith('xsmtpsib-'):
+        raise Exception("API Key required! The key 'xsmtpsib-...' is an SMTP password, NOT a REST API key. Generate a real API Key (starts with 'xkeysib-') from your Brevo Dashboard -> 'SMTP & API' -> 'API Keys'. Add it as 'BREVO_API_KEY' in your backend environment.")
+        
+    data = {
+        "sender": {"name": "Trend Twist", "email": sender_email},
+        "to": [{"email": to_email}],
+        "subject": subject,
+        "textContent": text_content
+    }
+    
+    encoded_data = json.dumps(data).encode('utf-8')
+    req = urllib.request.Request(url, data=encoded_data)
+    req.add_header('api-key', api_key)
+    req.add_header('Content-Type', 'application/json')
+    req.add_header('Accept', 'application/json')
+    
+    try:
+        with urllib.request.urlopen(req, timeout=15) as response:
+            return response.read()
+    except urllib.error.HTTPError as e:
+        error_msg = e.read().decode()
+        raise Exception(f"Brevo API Error {e.code}: {error_msg}")
@@ -0,0 +1,277 @@
+"""
+Stranger Talk Matchmaking Service
+Pairs waiting users without a global lock or a full scan of the waiting list.
+
+- Waiting users sit in FIFO buckets keyed by (own gender, preferred gender).
+  A searcher only looks at the handful of buckets it is compatible with, and
+  only at the first SCAN_LIMIT tickets of each, so a match attempt costs the
+  same with ten or ten thousand people waiting.
+- Each connection registers its profile info and its block set (users it has
+  blocked or been blocked by, loaded once from services/viewer.py) when it
+  connects. Blocks are checked in both directions against those sets, with no
+  database access while matching.
+- Pop-and-pair is one atomic step: a Lua script in Redis, or a lock-guarded
+  method in the in-memory backend. It also prunes tickets whose connection
+  has gone away and records both sides of the pair in the peer map, so a user
+  can never be matched twice at once.
+
+`get_matchmaker()` returns the Redis backend when REDIS_URL is configured and
+the in-memory one otherwise (single process, tests, local development). Set
+STRANGER_MATCH_BACKEND to 'redis' or 'memory' to force one.
+"""
+import asyncio
+import logging
+import random
+import threading
+import weakref
+from collections import deque
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'stranger_talk:'
+TTL = 60 * 60
+SCAN_LIMIT = 25
+GENDERS = ('male', 'female', 'other', 'prefer_not_to_say')
+UNKNOWN = 'x'
+ANY = 'any'
+
+
+def bucket_for(gender, preferred_gender):
+    return f"{gender or UNKNOWN}:{preferred_gender or ANY}"
+
+
+def candidate_buckets(gender, preferred_gender):
+    """Buckets holding users compatible with (gender, preferred_gender), in random order for fairness."""
+    their_genders = [preferred_gender] if preferred_gender else [*GENDERS, UNKNOWN]
+    their_prefs = [ANY] + ([gender] if gender else [])
+    buckets = [f"{g}:{p}" for g in their_genders for p in their_prefs]
+    random.shuffle(buckets)
+    return buckets
+
+
+# --- Redis backend ---
+
+MATCH_SCRIPT = """
+local prefix, me, my_uid, exclude = ARGV[1], ARGV[2], ARGV[3], ARGV[4]
+local own_bucket, scan, ttl = ARGV[5], tonumber(ARGV[6]), tonumber(ARGV[7])
+
+local partner = redis.call('GET', prefix .. 'peer:' .. me)
+if partner then return {'paired', partner} end
+
+for i = 8, #ARGV do
+  local bucket = prefix .. 'q:' .. ARGV[i]
+  for _, ch in ipairs(redis.call('LRANGE', bucket, 0, scan - 1)) do
+    if ch ~= me and ch ~= exclude then
+      local uid = redis.call('HGET', prefix .. 'info:' .. ch, 'id')
+      if not uid then
+        -- The connection behind this ticket is gone
+        redis.call('LREM', bucket, 0, ch)
+        redis.call('DEL', prefix .. 'where:' .. ch)
+      elseif uid ~= my_uid
+          and redis.call('SISMEMBER', prefix .. 'blocks:' .. me, uid) == 0
+          and redis.call('SISMEMBER', prefix .. 'blocks:' .. ch, my_uid) == 0 then
+        redis.call('LREM', bucket, 0, ch)
+        redis.call('DEL', prefix .. 'where:' .. ch)
+        local where = redis.call('GET', prefix .. 'where:' .. me)
+        if where then
+          redis.call('LREM', prefix .. 'q:' .. where, 0, me)
+          redis.call('DEL', prefix .. 'where:' .. me)
+        end
+        redis.call('SET', prefix .. 'peer:' .. me, ch, 'EX', ttl)
+        redis.call('SET', prefix .. 'peer:' .. ch, me, 'EX', ttl)
+        return {'matched', ch}
+      end
+    end
+  end
+end
+
+if not redis.call('GET', prefix .. 'where:' .. me) then
+  redis.call('RPUSH', prefix .. 'q:' .. own_bucket, me)
+  redis.call('SET', prefix .. 'where:' .. me, own_bucket, 'EX', ttl)
+end
+return {'waiting', ''}
+"""
+
+LEAVE_SCRIPT = """
+local prefix, me = ARGV[1], ARGV[2]
+local where = redis.call('GET', prefix .. 'where:' .. me)
+if where then redis.call('LREM', prefix .. 'q:' .. where, 0, me) end
+redis.call('DEL', prefix .. 'where:' .. me)
+return where
+"""
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class RedisMatchmaker:
+    def __init__(self, url):
+        import redis.asyncio as aioredis
+        self.redis = aioredis.from_url(url)
+        self._match = self.redis.register_script(MATCH_SCRIPT)
+        self._leave = self.redis.register_script(LEAVE_SCRIPT)
+
+    async def register(self, channel, info, blocked_ids):
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(f'{PREFIX}info:{channel}', f'{PREFIX}blocks:{channel}')
+        pipe.hset(f'{PREFIX}info:{channel}', mapping={k: '' if v is None else str(v) for k, v in info.items()})
+        pipe.expire(f'{PREFIX}info:{channel}', TTL)
+        if blocked_ids:
+            pipe.sadd(f'{PREFIX}blocks:{channel}', *blocked_ids)
+            pipe.expire(f'{PREFIX}blocks:{channel}', TTL)
+        await pipe.execute()
+
+    async def info(self, channel):
+        raw = await self.redis.hgetall(f'{PREFIX}info:{channel}')
+        if not raw:
+            return None
+        info = {_text(k): _text(v) or None for k, v in raw.items()}
+        info['id'] = int(info['id']) if info.get('id') else None
+        return info
+
+    async def add_block(self, channel, user_id):
+        await self.redis.sadd(f'{PREFIX}blocks:{channel}', user_id)
+        await self.redis.expire(f'{PREFIX}blocks:{channel}', TTL)
+
+    async def find_or_enqueue(self, channel, info, exclude=None):
+        status, partner = await self._match(args=[
+            PREFIX, channel, info['id'], exclude or '',
+            bucket_for(info.get('gender'), info.get('preferred_gender')), SCAN_LIMIT, TTL,
+            *candidate_buckets(info.get('gender'), info.get('preferred_gender')),
+        ])
+        return _text(status), _text(partner) or None
+
+    async def leave_queue(self, channel):
+        await self._leave(args=[PREFIX, channel])
+
+    async def partner_of(self, channel):
+        return _text(await self.redis.get(f'{PREFIX}peer:{channel}'))
+
+    async def unpair(self, channel):
+        await self.redis.delete(f'{PREFIX}peer:{channel}')
+
+    async def unregister(self, channel):
+        await self.leave_queue(channel)
+        await self.redis.delete(f'{PREFIX}info:{channel}', f'{PREFIX}blocks:{channel}', f'{PREFIX}peer:{channel}')
+
+    async def snapshot(self):
+        """{bucket: [channel, ...]} plus the channels whose connection info is gone (for diagnostics)."""
+        queues, orphaned = {}, []
+        async for key in self.redis.scan_iter(match=f'{PREFIX}q:*'):
+            bucket = _text(key)[len(PREFIX) + 2:]
+            queues[bucket] = [_text(c) for c in await self.redis.lrange(key, 0, -1)]
+            for ch in queues[bucket]:
+                if not await self.redis.exists(f'{PREFIX}info:{ch}'):
+                    orphaned.append(ch)
+        return {'queues': queues, 'waiting': sum(len(q) for q in queues.values()), 'orphaned': orphaned}
+
+
+# --- In-memory backend ---
+
+class MemoryMatchmaker:
+    """Same semantics as the Redis backend for a single process (tests, local development)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queues = {}    # {bucket: deque([channel])}
+        self.where = {}     # {channel: bucket}
+        self.infos = {}     # {channel: info}
+        self.blocks = {}    # {channel: {user_id}}
+        self.peers = {}     # {channel: partner_channel}
+
+    async def register(self, channel, info, blocked_ids):
+        with self._lock:
+            self.infos[channel] = dict(info)
+            self.blocks[channel] = set(blocked_ids)
+
+    async def info(self, channel):
+        return self.infos.get(channel)
+
+    async def add_block(self, channel, user_id):
+        with self._lock:
+            self.blocks.setdefault(channel, set()).add(user_id)
+
+    async def find_or_enqueue(self, channel, info, exclude=None):
+        my_uid = info['id']
+        with self._lock:
+            if channel in self.peers:
+                return 'paired', self.peers[channel]
+            for bucket in candidate_buckets(info.get('gender'), info.get('preferred_gender')):
+                queue = self.queues.get(bucket)
+                if not queue:
+                    continue
+                for ch in list(queue)[:SCAN_LIMIT]:
+                    if ch == channel or ch == exclude:
+                        continue
+                    cand = self.infos.get(ch)
+                    if cand is None:
+                        queue.remove(ch)
+                        self.where.pop(ch, None)
+                    elif (cand['id'] != my_uid and cand['id'] not in self.blocks.get(channel, ())
+                          and my_uid not in self.blocks.get(ch, ())):
+                        queue.remove(ch)
+                        self.where.pop(ch, None)
+                        self._remove(channel)
+                        self.peers[channel], self.peers[ch] = ch, channel
+                        return 'matched', ch
+            if channel not in self.where:
+                bucket = bucket_for(info.get('gender'), info.get('preferred_gender'))
+                self.queues.setdefault(bucket, deque()).append(channel)
+                self.where[channel] = bucket
+            return 'waiting', None
+
+    def _remove(self, channel):
+        bucket = self.where.pop(channel, None)
+        if bucket is not None:
+            try:
+                self.queues[bucket].remove(channel)
+            except ValueError:
+                pass
+
+    async def leave_queue(self, channel):
+        with self._lock:
+            self._remove(channel)
+
+    async def partner_of(self, channel):
+        return self.peers.get(channel)
+
+    async def unpair(self, channel):
+        with self._lock:
+            self.peers.pop(channel, None)
+
+    async def unregister(self, channel):
+        with self._lock:
+            self._remove(channel)
+            self.infos.pop(channel, None)
+            self.blocks.pop(channel, None)
+            self.peers.pop(channel, None)
+
+    async def snapshot(self):
+        with self._lock:
+            queues = {bucket: list(q) for bucket, q in self.queues.items() if q}
+            orphaned = [ch for q in queues.values() for ch in q if ch not in self.infos]
+        return {'queues': queues, 'waiting': sum(len(q) for q in queues.values()), 'orphaned': orphaned}
+
+    def reset(self):
+        with self._lock:
+            for store in (self.queues, self.where, self.infos, self.blocks, self.peers):
+                store.clear()
+
+
+_memory = MemoryMatchmaker()
+_redis = weakref.WeakKeyDictionary()  # redis.asyncio connections are bound to their event loop
+
+
+def get_matchmaker():
+    backend = getattr(settings, 'STRANGER_MATCH_BACKEND', None) or \
+        ('redis' if getattr(settings, 'REDIS_URL', None) else 'memory')
+    if backend == 'memory':
+        return _memory
+    loop = asyncio.get_running_loop()
+    matchmaker = _redis.get(loop)
+    if matchmaker is None:
+        matchmaker = _redis[loop] = RedisMatchmaker(settings.REDIS_URL)
+    return matchmaker
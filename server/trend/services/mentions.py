@@ -0,0 +1,332 @@
+"""
+Mention Autocomplete Service
+Per-keystroke user lookups for @mentions and "send to" pickers, answered from
+a prefix index instead of the database.
+
+- Every user has a compact card (id, username, first / last name, avatar
+  path, follower count, suspension end) and is filed under its lowercased
+  username ("u:<username>") and its first, last and full name ("n:<name>").
+  The index is kept in lexical order, so a prefix is one range read per
+  namespace; usernames get their own read so a common first name can't crowd
+  them out.
+- `suggest(viewer, query)` takes up to CANDIDATES users from each range, plus
+  everyone the viewer follows whose names match (from the cached viewer
+  context, up to FOLLOWED_SCAN of them), and ranks them: exact username, then
+  username prefix, then name prefix, with people the viewer follows boosted
+  and followers_count as the tie-break. Blocked and suspended users and the
+  viewer themselves are left out. No database query is made once the viewer's
+  following / block sets are cached.
+- `update(user)` refreshes one card from the post_save signals on User and
+  Profile, `refresh(user_id)` re-reads one after a change made with
+  `.update()` (follower counts, from counters.adjust_profile), and
+  `remove(user_id)` drops a deleted user. The index builds itself
+  from the database on first use, and `python manage.py build_mention_index`
+  rebuilds it.
+
+The Redis backend (a lexically ordered sorted set of "<key>\\0<user id>" plus
+a hash of cards, shared by every process) is used when REDIS_URL is
+configured, the in-memory one otherwise (single process, local development).
+Set MENTIONS_BACKEND to 'redis' or 'memory' to force one.
+"""
+import bisect
+import json
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+
+from ..models import Profile
+from .viewer import get_viewer
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'mentions:'
+CANDIDATES = 200     # Users read from the prefix range per lookup
+FOLLOWED_SCAN = 500  # Followed users checked for a match per lookup
+MAX_LIMIT = 20
+BUILD_BATCH_SIZE = 2000
+
+
+def normalize(query):
+    return (query or '').strip().lstrip('@').lower()
+
+
+def _card(user, profile):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'picture': profile.profile_picture.name if profile and profile.profile_picture else '',
+        'followers': profile.followers_count if profile else 0,
+        'suspended_until': profile.blocked_until.timestamp() if profile and profile.blocked_until else None,
+    }
+
+
+def _names(card):
+    names = [card['first_name'], card['last_name'], f"{card['first_name']} {card['last_name']}"]
+    return {name.strip().lower() for name in names if name.strip()}
+
+
+def _keys(card):
+    return sorted({f"u:{card['username'].lower()}"} | {f'n:{name}' for name in _names(card)})
+
+
+# --- Redis backend ---
+
+class RedisMentionIndex:
+    """keys: sorted set of b"<key>\\0<user id>", all scored 0 so ZRANGEBYLEX applies; cards: hash of JSON cards."""
+
+    def __init__(self, url):
+        import redis
+        self.redis = redis.Redis.from_url(url)
+        self.keys = f'{PREFIX}keys'
+        self.cards = f'{PREFIX}cards'
+        self.built = f'{PREFIX}built'
+
+    @staticmethod
+    def _member(key, user_id):
+        return f'{key}\0{user_id}'.encode()
+
+    def is_built(self):
+        return bool(self.redis.exists(self.built))
+
+    def build(self, cards):
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(self.keys, self.cards)
+        for card in cards:
+            self._write(pipe, card)
+        pipe.set(self.built, 1)
+        pipe.execute()
+
+    def _write(self, pipe, card):
+        pipe.zadd(self.keys, {self._member(key, card['id']): 0 for key in _keys(card)})
+        pipe.hset(self.cards, card['id'], json.dumps(card))
+
+    def put(self, card):
+        old = self.redis.hget(self.cards, card['id'])
+        pipe = self.redis.pipeline(transaction=True)
+        if old:
+            stale = set(_keys(json.loads(old))) - set(_keys(card))
+            if stale:
+                pipe.zrem(self.keys, *(self._member(key, card['id']) for key in stale))
+        self._write(pipe, card)
+        pipe.execute()
+
+    def remove(self, user_id):
+        old = self.redis.hget(self.cards, user_id)
+        if not old:
+            return
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zrem(self.keys, *(self._member(key, user_id) for key in _keys(json.loads(old))))
+        pipe.hdel(self.cards, user_id)
+        pipe.execute()
+
+    def candidates(self, prefix, limit):
+        start = prefix.encode()
+        members = self.redis.zrangebylex(self.keys, b'[' + start, b'[' + start + b'\xff', start=0, num=limit)
+        return list(dict.fromkeys(int(member.rsplit(b'\0', 1)[1]) for member in members))
+
+    def get_cards(self, user_ids):
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        return {user_id: json.loads(raw) for user_id, raw in zip(user_ids, self.redis.hmget(self.cards, user_ids)) if raw}
+
+
+# --- In-memory backend ---
+
+class MemoryMentionIndex:
+    """Same semantics as the Redis backend for a single process: a sorted list of (key, user id)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.keys = []
+        self.cards = {}
+        self.built = False
+
+    def is_built(self):
+        return self.built
+
+    def build(self, cards):
+        cards = {card['id']: card for card in cards}
+        keys = sorted((key, user_id) for user_id, card in cards.items() for key in _keys(card))
+        with self._lock:
+            self.keys, self.cards, self.built = keys, cards, True
+
+    def _drop_keys(self, card):
+        for key in _keys(card):
+            i = bisect.bisect_left(self.keys, (key, card['id']))
+            if i < len(self.keys) and self.keys[i] == (key, card['id']):
+                del self.keys[i]
+
+    def put(self, card):
+        with self._lock:
+            old = self.cards.get(card['id'])
+            if old:
+                self._drop_keys(old)
+            for key in _keys(card):
+                bisect.insort(self.keys, (key, card['id']))
+            self.cards[card['id']] = card
+
+    def remove(self, user_id):
+        with self._lock:
+            old = self.cards.pop(user_id, None)
+            if old:
+                self._drop_keys(old)
+
+    def candidates(self, prefix, limit):
+        found = {}
+        with self._lock:
+            i = bisect.bisect_left(self.keys, (prefix,))
+            while i < len(self.keys) and len(found) < limit:
+                key, user_id = self.keys[i]
+                if not key.startswith(prefix):
+                    break
+                found[user_id] = None
+                i += 1
+        return list(found)
+
+    def get_cards(self, user_ids):
+        with self._lock:
+            return {user_id: self.cards[user_id] for user_id in user_ids if user_id in self.cards}
+
+    def reset(self):
+        with self._lock:
+            self.keys, self.cards, self.built = [], {}, False
+
+
+_memory = MemoryMentionIndex()
+_redis = None
+_build_lock = threading.Lock()
+
+
+def get_backend():
+    global _redis
+    backend = getattr(settings, 'MENTIONS_BACKEND', None) or \
+        ('redis' if getattr(settings, 'REDIS_URL', None) else 'memory')
+    if backend == 'memory':
+        return _memory
+    if _redis is None:
+        _redis = RedisMentionIndex(settings.REDIS_URL)
+    return _redis
+
+
+# --- Maintenance ---
+
+def _all_cards():
+    users = User.objects.select_related('profile').only(
+        'id', 'username', 'first_name', 'last_name',
+        'profile__profile_picture', 'profile__followers_count', 'profile__blocked_until',
+    ).order_by('id')
+    for user in users.iterator(chunk_size=BUILD_BATCH_SIZE):
+        yield _card(user, getattr(user, 'profile', None))
+
+
+def rebuild():
+    """Rebuilds the whole index from the database. Returns the number of users indexed."""
+    cards = list(_all_cards())
+    get_backend().build(cards)
+    logger.info(f"[mentions] Indexed {len(cards)} users")
+    return len(cards)
+
+
+def _ensure_built(backend):
+    if backend.is_built():
+        return
+    with _build_lock:
+        if not backend.is_built():
+            rebuild()
+
+
+def update(user, profile=None):
+    """Refreshes one user's card, if the index has been built (otherwise the build picks them up)."""
+    backend = get_backend()
+    if backend.is_built():
+        backend.put(_card(user, profile or getattr(user, 'profile', None)))
+
+
+def refresh(user_id):
+    """Re-reads one user's card from the database, for changes that send no post_save."""
+    backend = get_backend()
+    if not backend.is_built():
+        return
+    user = User.objects.select_related('profile').filter(pk=user_id).first()
+    if user:
+        backend.put(_card(user, getattr(user, 'profile', None)))
+
+
+def remove(user_id):
+    backend = get_backend()
+    if backend.is_built():
+        backend.remove(user_id)
+
+
+# --- Lookup ---
+
+def _avatar_url(name, request):
+    if not name:
+        return None
+    url = Profile._meta.get_field('profile_picture').storage.url(name)
+    return request.build_absolute_uri(url) if request else url
+
+
+def _score(card, prefix, followed):
+    username = card['username'].lower()
+    if username == prefix:
+        score = 6
+    elif username.startswith(prefix):
+        score = 4
+    elif any(name.startswith(prefix) for name in _names(card)):
+        score = 2
+    else:
+        return None
+    if followed:
+        score += 5
+    return score + math.log10(card['followers'] + 1) / 10
+
+
+def suggest(viewer, query, limit=8, request=None):
+    """
+    Up to `limit` users matching the typed prefix, best first, as
+    [{id, username, first_name, last_name, profile_picture, is_following}].
+    """
+    prefix = normalize(query)
+    if not prefix:
+        return []
+    limit = max(1, min(limit, MAX_LIMIT))
+    backend = get_backend()
+    _ensure_built(backend)
+
+    context = get_viewer(viewer)
+    following = context.following_ids
+    blocked = context.blocked_ids
+    user_ids = set(backend.candidates(f'u:{prefix}', CANDIDATES)) | set(backend.candidates(f'n:{prefix}', CANDIDATES))
+    user_ids.update(list(following)[:FOLLOWED_SCAN])
+    user_ids.discard(viewer.id)
+    user_ids -= blocked
+
+    now = time.time()
+    ranked = []
+    for user_id, card in backend.get_cards(user_ids).items():
+        if card['suspended_until'] and card['suspended_until'] > now:
+            continue
+        score = _score(card, prefix, user_id in following)
+        if score is not None:
+            ranked.append((-score, card['username'].lower(), card))
+    ranked.sort(key=lambda row: row[:2])
+
+    return [
+        {
+            'id': card['id'],
+            'username': card['username'],
+            'first_name': card['first_name'],
+            'last_name': card['last_name'],
+            'profile_picture': _avatar_url(card['picture'], request),
+            'is_following': card['id'] in following,
+        }
+        for _, _, card in ranked[:limit]
+    ]
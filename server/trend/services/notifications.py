@@ -0,0 +1,258 @@
+"""
+Notification Service
+Everything that creates, updates or removes a notification goes through here,
+so rows are written and pushed to NotificationConsumer the same way everywhere.
+
+Aggregation: notifications are folded together when they are written rather
+than deduplicated when they are read. Every notification carries an
+aggregation key: its target for likes and comments (`like_post:<post id>`,
+`comment_reel:<reel id>`, ...) and its sender for the follow workflow
+(`follow:<sender id>`, shared by a request and its approval / rejection).
+There is one row per (recipient, key): the first event inserts it, later ones
+bring it back to the top as unread with the new sender and, for someone not
+seen on it before, one more in `actor_count` ("alice and 24 others liked your
+post"). Repeats by the same person, like an unlike followed by a like, change
+nothing.
+
+Emitting: `emit(events)` takes a batch of NotificationEvents and writes them
+with one lookup, one bulk_create and one bulk_update. Everything that changed
+is re-read with its sender / post / reel in one query, serialized, and sent
+once the transaction commits, with all channel-layer sends of the batch
+gathered into a single flush.
+
+The unread count is cached per user and dropped on every write; services/unread.py
+serves it together with the chat counts and pushes the new counts after commit.
+"""
+import asyncio
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from ..models import Notification, NotificationActor
+
+logger = logging.getLogger(__name__)
+
+UNREAD_TTL = 300
+FOLLOW_WORKFLOW = {'follow_request', 'req_approved', 'req_rejected'}
+TARGETS = ('post_id', 'reel_id', 'twist_id', 'story_id')
+FOLDED_FIELDS = ['sender', 'notification_type', 'follow_request_ref', 'actor_count', 'is_read', 'created_at']
+
+
+def aggregation_key(notification_type, sender_id, post_id=None, reel_id=None, twist_id=None, story_id=None):
+    if notification_type in FOLLOW_WORKFLOW:
+        return f'follow:{sender_id}'
+    if notification_type == 'follow_accept':
+        return f'follow_accept:{sender_id}'
+    return f'{notification_type}:{post_id or reel_id or twist_id or story_id}'
+
+
+class NotificationEvent:
+    """One thing that happened to `recipient_id`: `targets` are post_id / reel_id / twist_id / story_id."""
+    __slots__ = ('recipient_id', 'sender_id', 'notification_type', 'follow_request_ref', 'targets', 'key')
+
+    def __init__(self, recipient_id, sender_id, notification_type, follow_request_ref=None, **targets):
+        self.recipient_id = recipient_id
+        self.sender_id = sender_id
+        self.notification_type = notification_type
+        self.follow_request_ref = follow_request_ref
+        self.targets = {name: targets.get(name) for name in TARGETS}
+        self.key = aggregation_key(notification_type, sender_id, **self.targets)
+
+    def differs_from(self, notif):
+        ref_id = self.follow_request_ref.pk if self.follow_request_ref else None
+        return notif.notification_type != self.notification_type or notif.follow_request_ref_id != ref_id
+
+    def apply(self, notif, now):
+        notif.sender_id = self.sender_id
+        notif.notification_type = self.notification_type
+        notif.follow_request_ref = self.follow_request_ref
+        notif.is_read = False
+        notif.created_at = now
+
+
+# --- Writing ---
+
+def emit(events, context=None, push=True):
+    """
+    Records a batch of events and, unless `push` is False, sends every
+    notification that changed to its recipient after commit. Returns the
+    changed notifications.
+    """
+    from . import unread
+
+    events = list(events)
+    if not events:
+        return []
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                if len(events) > 1:
+                    changed = _fold(events)
+                    # Bulk writes skip the post_save signal that pushes the new badge counts
+                    unread.changed({e.recipient_id for e in events})
+                else:
+                    changed = _record_changed(events)
+        except IntegrityError:
+            # A concurrent writer inserted one of these keys first: upsert one at a time instead
+            changed = _record_changed(events)
+        invalidate_unread(*{e.recipient_id for e in events})
+        if push:
+            broadcast(changed, context)
+    return changed
+
+
+def _fold(events):
+    groups = {}  # {(recipient, key): [event]}, in arrival order
+    for event in events:
+        groups.setdefault((event.recipient_id, event.key), []).append(event)
+
+    lookup = Q()
+    for recipient_id, key in groups:
+        lookup |= Q(recipient_id=recipient_id, aggregation_key=key)
+    existing = {(n.recipient_id, n.aggregation_key): n for n in Notification.objects.select_for_update().filter(lookup)}
+    counted = set(NotificationActor.objects.filter(
+        notification__in=existing.values(), user_id__in={e.sender_id for e in events},
+    ).values_list('notification_id', 'user_id'))
+
+    now = timezone.now()
+    created, updated, actors = [], [], []
+    for (recipient_id, key), group in groups.items():
+        notif = existing.get((recipient_id, key))
+        if notif is None:
+            notif = Notification(recipient_id=recipient_id, aggregation_key=key, actor_count=0, **group[0].targets)
+            created.append(notif)
+        seen = {user_id for notif_id, user_id in counted if notif_id == notif.pk} if notif.pk else set()
+        changed = notif.pk is None
+        for event in group:
+            new_actor = event.sender_id not in seen
+            if new_actor:
+                seen.add(event.sender_id)
+                actors.append((notif, event.sender_id))
+                notif.actor_count += 1
+            if new_actor or event.differs_from(notif):
+                event.apply(notif, now)
+                changed = True
+        if changed and notif.pk is not None:
+            updated.append(notif)
+
+    Notification.objects.bulk_create(created)
+    if updated:
+        Notification.objects.bulk_update(updated, FOLDED_FIELDS)
+    NotificationActor.objects.bulk_create([NotificationActor(notification=n, user_id=uid) for n, uid in actors])
+    return created + updated
+
+
+def _record_changed(events):
+    return [notif for notif, changed in map(record, events) if changed]
+
+
+def record(event):
+    """
+    The row-at-a-time upsert of one event. Inserts first, so a lone event takes
+    the write lock up front; also the fallback when a batch collides with a
+    concurrent insert. Returns (notification, changed).
+    """
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                notif = Notification.objects.create(
+                    recipient_id=event.recipient_id, sender_id=event.sender_id,
+                    notification_type=event.notification_type, follow_request_ref=event.follow_request_ref,
+                    aggregation_key=event.key, **event.targets,
+                )
+        except IntegrityError:
+            notif = Notification.objects.select_for_update().get(recipient_id=event.recipient_id, aggregation_key=event.key)
+        else:
+            NotificationActor.objects.create(notification=notif, user_id=event.sender_id)
+            return notif, True
+
+        _, new_actor = NotificationActor.objects.get_or_create(notification=notif, user_id=event.sender_id)
+        if not new_actor and not event.differs_from(notif):
+            return notif, False
+        event.apply(notif, timezone.now())
+        notif.actor_count += int(new_actor)
+        notif.save(update_fields=FOLDED_FIELDS)
+        return notif, True
+
+
+# --- Pushing ---
+
+def broadcast(notifications, context=None):
+    """Serializes `notifications` with their relations preloaded and pushes them to their recipients after commit."""
+    from ..serializers import NotificationSerializer
+
+    ids = [n.pk for n in notifications]
+    if not ids:
+        return
+    rows = list(Notification.objects.filter(pk__in=ids).select_related('sender__profile', 'post', 'reel'))
+    data = NotificationSerializer(rows, many=True, context=context or {}).data
+    messages = [
+        (f"user_{notif.recipient_id}", {'type': 'notification_message', 'data': payload})
+        for notif, payload in zip(rows, data)
+    ]
+    transaction.on_commit(lambda: send(messages))
+
+
+def broadcast_deleted(recipient_id, notification_id):
+    """Tells the recipient's clients to drop a notification, after commit."""
+    message = {'type': 'notification_message', 'data': {'id': notification_id, 'action': 'deleted'}}
+    transaction.on_commit(lambda: send([(f"user_{recipient_id}", message)]))
+
+
+def send(messages):
+    """
+    Sends (group, message) pairs over the channel layer, gathered on one
+    event loop instead of one blocking round trip each. Best effort: the rows
+    are what count, clients catch up on their next fetch.
+    """
+    layer = get_channel_layer()
+    if layer is None or not messages:
+        return
+
+    async def flush():
+        results = await asyncio.gather(
+            *(layer.group_send(group, message) for group, message in messages), return_exceptions=True,
+        )
+        for (group, _), result in zip(messages, results):
+            if isinstance(result, Exception):
+                logger.warning(f"[notifications] Push to {group} failed: {result}")
+
+    try:
+        async_to_sync(flush)()
+    except Exception as e:
+        logger.warning(f"[notifications] Push of {len(messages)} messages failed: {e}")
+
+
+# --- Unread count ---
+
+def _unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user_id):
+    return unread_counts([user_id])[user_id]
+
+
+def unread_counts(user_ids):
+    """{user id: unread notifications}: cached counts in one get_many, the rest in one grouped COUNT."""
+    keys = {_unread_key(user_id): user_id for user_id in user_ids}
+    counts = {keys[key]: count for key, count in cache.get_many(keys).items()}
+    missing = [user_id for user_id in keys.values() if user_id not in counts]
+    if missing:
+        fresh = dict(
+            Notification.objects.filter(recipient_id__in=missing, is_read=False)
+            .values_list('recipient_id').annotate(n=Count('id')).order_by()
+        )
+        fresh = {user_id: fresh.get(user_id, 0) for user_id in missing}
+        cache.set_many({_unread_key(user_id): count for user_id, count in fresh.items()}, UNREAD_TTL)
+        counts.update(fresh)
+    return counts
+
+
+def invalidate_unread(*user_ids):
+    cache.delete_many([_unread_key(user_id) for user_id in user_ids])
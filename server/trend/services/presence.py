@@ -0,0 +1,285 @@
+"""
+Presence Service
+Tracks who is online from their open WebSocket connections instead of
+writing Profile.is_online / last_seen on every connect and disconnect.
+
+- Every ChatConsumer / NotificationConsumer connection is registered under
+  its user with an expiry that the consumer's heartbeat keeps pushing forward.
+  A user is online while at least one connection is live, so extra tabs don't
+  flip their status, and connections of a worker that died without running
+  disconnect() simply expire after PRESENCE_TTL_SECONDS.
+- connect() / disconnect() report whether the user just came online or went
+  offline, so status is only broadcast on real transitions.
+- last_seen is kept in the store and the users whose status changed are
+  marked dirty; `flush()` writes them to Profile in one bulk_update every
+  PRESENCE_FLUSH_SECONDS (a background task per worker, see `ensure_flusher`).
+- `lookup(user_ids)` answers for a whole page of users in one round trip.
+  Users the store knows nothing about are offline; callers fall back to the
+  persisted Profile.last_seen for them.
+
+The Redis backend is used when REDIS_URL is configured, the in-memory one
+otherwise (single process, local development). Set PRESENCE_BACKEND to
+'redis' or 'memory' to force one.
+"""
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from datetime import datetime, timezone as dt_timezone
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from ..models import Profile
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'presence:'
+
+
+def _ttl():
+    return getattr(settings, 'PRESENCE_TTL_SECONDS', 90)
+
+
+def heartbeat_interval():
+    return getattr(settings, 'PRESENCE_HEARTBEAT_SECONDS', 30)
+
+
+def _flush_interval():
+    return getattr(settings, 'PRESENCE_FLUSH_SECONDS', 30)
+
+
+def _as_datetime(ts):
+    return datetime.fromtimestamp(float(ts), tz=dt_timezone.utc) if ts else None
+
+
+# --- Redis backend ---
+
+class RedisPresence:
+    """conns:<user_id> is a sorted set of channel names scored by expiry; seen / dirty are shared."""
+
+    def __init__(self, url):
+        import redis
+        self.redis = redis.Redis.from_url(url)
+
+    def _conns(self, user_id):
+        return f'{PREFIX}conns:{user_id}'
+
+    def _change(self, user_id, channel, add):
+        now, key = time.time(), self._conns(user_id)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zremrangebyscore(key, '-inf', now)
+        pipe.zcard(key)
+        if add:
+            pipe.zadd(key, {channel: now + _ttl()})
+        else:
+            pipe.zrem(key, channel)
+        pipe.zcard(key)
+        pipe.expire(key, _ttl())
+        pipe.hset(f'{PREFIX}seen', user_id, now)
+        pipe.sadd(f'{PREFIX}dirty', user_id)
+        _, before, _, after, *_ = pipe.execute()
+        return before, after
+
+    def connect(self, user_id, channel):
+        before, _ = self._change(user_id, channel, add=True)
+        return before == 0
+
+    def disconnect(self, user_id, channel):
+        before, after = self._change(user_id, channel, add=False)
+        return before > 0 and after == 0
+
+    def heartbeat(self, user_id, channel):
+        now, key = time.time(), self._conns(user_id)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zadd(key, {channel: now + _ttl()}, xx=True)  # Never resurrects a closed connection
+        pipe.expire(key, _ttl())
+        pipe.hset(f'{PREFIX}seen', user_id, now)
+        pipe.execute()
+
+    def lookup(self, user_ids):
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        now = time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.zcount(self._conns(user_id), now, '+inf')
+        pipe.hmget(f'{PREFIX}seen', user_ids)
+        *counts, seen = pipe.execute()
+        return {
+            user_id: (count > 0, _as_datetime(ts))
+            for user_id, count, ts in zip(user_ids, counts, seen) if count or ts
+        }
+
+    def drain_dirty(self):
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.smembers(f'{PREFIX}dirty')
+        pipe.delete(f'{PREFIX}dirty')
+        members, _ = pipe.execute()
+        return self.lookup(int(m) for m in members)
+
+
+# --- In-memory backend ---
+
+class MemoryPresence:
+    """Same semantics as the Redis backend for a single process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.conns = {}    # {user_id: {channel: expiry}}
+        self.seen = {}     # {user_id: unix time}
+        self.dirty = set()
+
+    def _live(self, user_id, now):
+        conns = self.conns.get(user_id, {})
+        for channel in [c for c, expiry in conns.items() if expiry <= now]:
+            del conns[channel]
+        return conns
+
+    def connect(self, user_id, channel):
+        now = time.time()
+        with self._lock:
+            conns = self._live(user_id, now)
+            came_online = not conns
+            self.conns.setdefault(user_id, conns)[channel] = now + _ttl()
+            self.seen[user_id] = now
+            self.dirty.add(user_id)
+        return came_online
+
+    def disconnect(self, user_id, channel):
+        now = time.time()
+        with self._lock:
+            conns = self._live(user_id, now)
+            was_online = bool(conns)
+            conns.pop(channel, None)
+            if not conns:
+                self.conns.pop(user_id, None)
+            self.seen[user_id] = now
+            self.dirty.add(user_id)
+        return was_online and not conns
+
+    def heartbeat(self, user_id, channel):
+        now = time.time()
+        with self._lock:
+            conns = self.conns.get(user_id)
+            if conns and channel in conns:
+                conns[channel] = now + _ttl()
+                self.seen[user_id] = now
+
+    def lookup(self, user_ids):
+        now = time.time()
+        result = {}
+        with self._lock:
+            for user_id in user_ids:
+                online = bool(self._live(user_id, now))
+                if online or user_id in self.seen:
+                    result[user_id] = (online, _as_datetime(self.seen.get(user_id)))
+        return result
+
+    def drain_dirty(self):
+        with self._lock:
+            dirty, self.dirty = self.dirty, set()
+        return self.lookup(dirty)
+
+    def reset(self):
+        with self._lock:
+            self.conns.clear()
+            self.seen.clear()
+            self.dirty.clear()
+
+
+_memory = MemoryPresence()
+_redis = None
+
+
+def get_backend():
+    global _redis
+    backend = getattr(settings, 'PRESENCE_BACKEND', None) or \
+        ('redis' if getattr(settings, 'REDIS_URL', None) else 'memory')
+    if backend == 'memory':
+        return _memory
+    if _redis is None:
+        _redis = RedisPresence(settings.REDIS_URL)
+    return _redis
+
+
+def connect(user_id, channel):
+    """Registers a connection. True if the user just came online."""
+    return get_backend().connect(user_id, channel)
+
+
+def disconnect(user_id, channel):
+    """Drops a connection. True if it was the user's last one."""
+    return get_backend().disconnect(user_id, channel)
+
+
+def heartbeat(user_id, channel):
+    get_backend().heartbeat(user_id, channel)
+
+
+def lookup(user_ids):
+    """{user_id: (is_online, last_seen)} for the users the store knows about; anyone missing is offline."""
+    return get_backend().lookup(user_ids)
+
+
+def status(profile, known=None):
+    """(is_online, last_seen) for one user, from `known` (a lookup result) or the store, else their profile."""
+    found = (known if known is not None else lookup([profile.user_id])).get(profile.user_id)
+    return found or (False, profile.last_seen)
+
+
+# --- Persistence ---
+
+def flush():
+    """Writes is_online / last_seen for every user whose presence changed since the last flush."""
+    changed = get_backend().drain_dirty()
+    if not changed:
+        return 0
+    profiles = list(Profile.objects.filter(user_id__in=changed.keys()).only('id', 'user_id'))
+    for profile in profiles:
+        profile.is_online, profile.last_seen = changed[profile.user_id]
+    Profile.objects.bulk_update(profiles, ['is_online', 'last_seen'], batch_size=500)
+    return len(profiles)
+
+
+class _Flusher:
+    def __init__(self):
+        self.task = None
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(_flush_interval())
+            try:
+                await database_sync_to_async(self._flush)()
+            except Exception as e:
+                logger.warning(f"[presence] Flush failed, will retry: {e}")
+
+    def _flush(self):
+        close_old_connections()
+        flush()
+
+
+_flushers = weakref.WeakKeyDictionary()
+
+
+def ensure_flusher():
+    """Starts the flush task for the running event loop (one per worker process) if it isn't running."""
+    loop = asyncio.get_running_loop()
+    flusher = _flushers.get(loop)
+    if flusher is None:
+        flusher = _flushers[loop] = _Flusher()
+    if flusher.task is None or flusher.task.done():
+        flusher.task = loop.create_task(flusher.run())
+
+
+async def heartbeat_loop(user_id, channel):
+    """Keeps one connection alive in the store; cancel it on disconnect."""
+    while True:
+        await asyncio.sleep(heartbeat_interval())
+        try:
+            await database_sync_to_async(heartbeat)(user_id, channel)
+        except Exception as e:
+            logger.warning(f"[presence] Heartbeat failed: {e}")
@@ -0,0 +1,216 @@
+"""
+Query Budget Instrumentation
+Records what a request (or any block of code) does against the database:
+query count, total DB time, duplicate query signatures (the usual N+1 tell)
+and the time spent serializing the response.
+
+- `QueryRecorder` is a context manager built on `connection.execute_wrapper`.
+- `QueryBudgetMiddleware` (trend/middleware.py) wraps every request in one when
+  QUERY_BUDGET_ENABLED is set, adds X-Query-* response headers and feeds the
+  per-endpoint aggregate in `REPORT`.
+- `query_budget()` is the assertion form for tests:
+
+      with query_budget(12):
+          client.get('/api/posts/')
+
+- `python manage.py query_report` exercises every route in trend/urls.py and
+  prints the aggregate, flagging endpoints over their budget.
+
+Per-endpoint budgets come from settings.QUERY_BUDGETS ({url_name: max_queries}),
+falling back to QUERY_BUDGET_DEFAULT.
+"""
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET = 20
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_active = contextvars.ContextVar('query_recorder', default=None)
+
+
+def signature(sql):
+    """Normalizes SQL so the same query with different parameters compares equal."""
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+def budget_for(url_name):
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(url_name, getattr(settings, 'QUERY_BUDGET_DEFAULT', DEFAULT_BUDGET))
+
+
+class QueryRecorder:
+    """Collects every query executed on the default connection while active."""
+
+    def __init__(self):
+        self.queries = []          # [(signature, seconds)]
+        self.serializer_time = 0.0
+        self.serializer_queries = 0
+        self._serializing = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((signature(sql), time.perf_counter() - start))
+            if self._serializing:
+                self.serializer_queries += 1
+
+    def __enter__(self):
+        self._token = _active.set(self)
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self._wrapper.__exit__(*exc)
+        _active.reset(self._token)
+        return False
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def db_time(self):
+        return sum(seconds for _, seconds in self.queries)
+
+    def duplicates(self):
+        """{signature: times} for queries that ran more than once."""
+        counts = Counter(sig for sig, _ in self.queries)
+        return {sig: n for sig, n in counts.most_common() if n > 1}
+
+    @property
+    def duplicate_count(self):
+        return sum(n - 1 for n in self.duplicates().values())
+
+    def summary(self):
+        return {
+            'queries': self.count,
+            'db_ms': round(self.db_time * 1000, 2),
+            'duplicates': self.duplicate_count,
+            'serializer_ms': round(self.serializer_time * 1000, 2),
+            'serializer_queries': self.serializer_queries,
+        }
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class query_budget:
+    """Context manager that fails if the wrapped block runs more than `max_queries` queries."""
+
+    def __init__(self, max_queries, allow_duplicates=True):
+        self.max_queries = max_queries
+        self.allow_duplicates = allow_duplicates
+
+    def __enter__(self):
+        self.recorder = QueryRecorder().__enter__()
+        return self.recorder
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder.__exit__(exc_type, exc, tb)
+        if exc_type is not None:
+            return False
+        if self.recorder.count > self.max_queries:
+            raise QueryBudgetExceeded(
+                f"{self.recorder.count} queries, budget is {self.max_queries}. Most repeated: "
+                f"{list(self.recorder.duplicates().items())[:3]}"
+            )
+        if not self.allow_duplicates and self.recorder.duplicates():
+            raise QueryBudgetExceeded(f"Duplicate queries: {list(self.recorder.duplicates().items())[:3]}")
+        return False
+
+
+# --- Serializer timing ---
+
+_instrumented = False
+
+
+def instrument_serializers():
+    """
+    Times the outermost `serializer.data` call of each request into the active
+    recorder. Patched once, and only when instrumentation is switched on.
+    """
+    global _instrumented
+    if _instrumented:
+        return
+    from rest_framework import serializers
+
+    def timed(prop):
+        def data(self):
+            recorder = _active.get()
+            if recorder is None or recorder._serializing:
+                return prop.fget(self)
+            recorder._serializing += 1
+            start = time.perf_counter()
+            try:
+                return prop.fget(self)
+            finally:
+                recorder.serializer_time += time.perf_counter() - start
+                recorder._serializing -= 1
+        return property(data)
+
+    serializers.Serializer.data = timed(serializers.Serializer.data)
+    serializers.ListSerializer.data = timed(serializers.ListSerializer.data)
+    _instrumented = True
+
+
+# --- Aggregate report ---
+
+class EndpointReport:
+    """Per-endpoint aggregate of recorded requests, shared by the middleware and query_report."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+
+    def add(self, key, url_name, recorder):
+        with self._lock:
+            row = self.endpoints.setdefault(key, {
+                'url_name': url_name, 'budget': budget_for(url_name), 'calls': 0,
+                'queries_total': 0, 'queries_max': 0, 'db_ms_total': 0.0,
+                'serializer_ms_total': 0.0, 'over_budget': 0, 'duplicates': Counter(),
+            })
+            row['calls'] += 1
+            row['queries_total'] += recorder.count
+            row['queries_max'] = max(row['queries_max'], recorder.count)
+            row['db_ms_total'] += recorder.db_time * 1000
+            row['serializer_ms_total'] += recorder.serializer_time * 1000
+            row['over_budget'] += recorder.count > row['budget']
+            row['duplicates'].update(recorder.duplicates())
+
+    def rows(self):
+        with self._lock:
+            result = []
+            for key, row in self.endpoints.items():
+                calls = row['calls']
+                result.append({
+                    'endpoint': key,
+                    'url_name': row['url_name'],
+                    'calls': calls,
+                    'budget': row['budget'],
+                    'queries_avg': round(row['queries_total'] / calls, 1),
+                    'queries_max': row['queries_max'],
+                    'db_ms_avg': round(row['db_ms_total'] / calls, 2),
+                    'serializer_ms_avg': round(row['serializer_ms_total'] / calls, 2),
+                    'over_budget': row['over_budget'],
+                    'top_duplicates': row['duplicates'].most_common(3),
+                })
+            return sorted(result, key=lambda r: r['queries_max'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self.endpoints.clear()
+
+
+REPORT = EndpointReport()
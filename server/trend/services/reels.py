@@ -0,0 +1,194 @@
+"""
+Reel Recommendation Service
+Serves the reels tab as an endless, non-repeating stream without ORDER BY RANDOM().
+
+- A global candidate pool (the best recent public reels, scored by recency,
+  views, likes and comments) is built periodically by `build_reel_pool` and
+  kept in the cache. A cold cache rebuilds it inline once.
+- Each viewer gets a small personal pool on top: recent reels from people they
+  follow or subscribe to (including private / exclusive ones they may see),
+  plus a proximity map that boosts authors they follow and authors followed by
+  the people they follow. Both are cached for a few minutes.
+- Every request draws a weighted random sample of unseen candidates, so the
+  order rotates per user, and records them in the viewer's seen-set. When the
+  pool is exhausted the seen-set is reset and the cycle starts again.
+- The page itself is re-checked against current drafts, suspensions,
+  exclusivity and private accounts, since the pools can be minutes old;
+  `invalidate_pool()` drops the global pool once a reel in it stops being
+  public.
+"""
+import logging
+import math
+import random
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from ..models import Follow, Reel, UserSubscription
+from .viewer import get_viewer
+
+logger = logging.getLogger(__name__)
+
+POOL_KEY = 'reels:pool'
+POOL_SIZE = 1000           # Candidates kept in the global pool
+POOL_SCAN = 5000           # Most recent reels considered when building it
+POOL_TTL = 60 * 60         # A scheduled build should refresh well before this
+PERSONAL_TTL = 60 * 5
+PERSONAL_SCAN = 300
+SEEN_TTL = 60 * 60 * 12
+SEEN_MAX = 2000
+RECENCY_HALF_LIFE_HOURS = 48
+DIRECT_FOLLOW_BOOST = 2.0
+SECOND_DEGREE_BOOST = 0.5
+SECOND_DEGREE_LIMIT = 500
+
+
+def score_reel(created_at, views, likes, comments, now):
+    """Blends recency (exponential decay) with log-scaled engagement."""
+    age_hours = max((now - created_at).total_seconds() / 3600, 0)
+    recency = 0.5 ** (age_hours / RECENCY_HALF_LIFE_HOURS)
+    popularity = math.log1p(views) + 2 * math.log1p(likes) + 1.5 * math.log1p(comments)
+    return (1 + popularity) * (0.25 + recency)
+
+
+def _scored(reels, now):
+    return [
+        (pk, author_id, score_reel(created_at, views, likes, comments, now))
+        for pk, author_id, created_at, views, likes, comments in reels
+    ]
+
+
+def _candidate_fields(queryset):
+    return queryset.values_list('id', 'author_id', 'created_at', 'views_count', 'likes_count', 'comments_count')
+
+
+def build_pool():
+    """Rebuilds the global candidate pool: [(reel_id, author_id, score)], best first."""
+    now = timezone.now()
+    recent = Reel.objects.filter(
+        is_draft=False, is_exclusive=False, author__profile__is_private=False
+    ).exclude(author__profile__blocked_until__gt=now).order_by('-created_at')[:POOL_SCAN]
+
+    pool = sorted(_scored(_candidate_fields(recent), now), key=lambda c: c[2], reverse=True)[:POOL_SIZE]
+    cache.set(POOL_KEY, pool, POOL_TTL)
+    logger.info(f"[reels] Built candidate pool with {len(pool)} reels")
+    return pool
+
+
+def get_pool():
+    pool = cache.get(POOL_KEY)
+    return build_pool() if pool is None else pool
+
+
+def invalidate_pool(author_id=None, reel_id=None):
+    """
+    Drops the global pool if it holds a reel of `author_id` or the reel
+    `reel_id` (after the author went private or the reel stopped being
+    public), so the next request rebuilds it. One cache read otherwise.
+    """
+    pool = cache.get(POOL_KEY)
+    if pool and any(author == author_id or pk == reel_id for pk, author, _ in pool):
+        cache.delete(POOL_KEY)
+
+
+def _personal_pool(user):
+    """Recent reels from followed / subscribed authors (and the viewer's own) that the viewer may see."""
+    key = f'reels:personal:{user.id}'
+    pool = cache.get(key)
+    if pool is not None:
+        return pool
+
+    now = timezone.now()
+    following = Follow.objects.filter(follower=user).values('following_id')
+    subscribed = UserSubscription.objects.filter(subscriber=user, status='active').filter(
+        Q(expiry_date__isnull=True) | Q(expiry_date__gt=now)
+    ).values('creator_id')
+    reels = Reel.objects.filter(is_draft=False).filter(
+        (Q(is_exclusive=False) & Q(author_id__in=following)) | Q(author=user) | Q(author_id__in=subscribed)
+    ).exclude(author__profile__blocked_until__gt=now).order_by('-created_at')[:PERSONAL_SCAN]
+
+    pool = _scored(_candidate_fields(reels), now)
+    cache.set(key, pool, PERSONAL_TTL)
+    return pool
+
+
+def _proximity(user):
+    """{author_id: boost} for authors one or two follow-hops away from the viewer."""
+    key = f'reels:proximity:{user.id}'
+    boosts = cache.get(key)
+    if boosts is not None:
+        return boosts
+
+    direct = list(Follow.objects.filter(follower=user).values_list('following_id', flat=True))
+    second = (
+        Follow.objects.filter(follower_id__in=direct).exclude(following_id__in=direct + [user.id])
+        .values('following_id').annotate(n=Count('id')).order_by('-n')
+        .values_list('following_id', flat=True)[:SECOND_DEGREE_LIMIT]
+    ) if direct else []
+
+    boosts = {author_id: SECOND_DEGREE_BOOST for author_id in second}
+    boosts.update({author_id: DIRECT_FOLLOW_BOOST for author_id in direct})
+    cache.set(key, boosts, PERSONAL_TTL)
+    return boosts
+
+
+def _seen_key(user):
+    return f'reels:seen:{user.id}'
+
+
+def invalidate_user(user_id):
+    """Drops a viewer's cached personal pool and proximity map (e.g. after a follow change)."""
+    cache.delete_many([f'reels:personal:{user_id}', f'reels:proximity:{user_id}'])
+
+
+def _sample(candidates, boosts, exclude, count):
+    """Weighted random sample without replacement (Efraimidis-Spirakis keys)."""
+    keyed = []
+    for pk, author_id, score in candidates:
+        if pk in exclude:
+            continue
+        weight = score * (1 + boosts.get(author_id, 0))
+        keyed.append((random.random() ** (1 / weight), pk))
+    keyed.sort(reverse=True)
+    return [pk for _, pk in keyed[:count]]
+
+
+class ReelStream:
+    """A viewer's endless reel feed, read a page at a time."""
+
+    def __init__(self, user):
+        self.user = user
+
+    def candidates(self):
+        personal = _personal_pool(self.user)
+        self.personal_ids = {pk for pk, _, _ in personal}
+        merged = {pk: (pk, author_id, score) for pk, author_id, score in get_pool()}
+        merged.update({pk: (pk, author_id, score) for pk, author_id, score in personal})
+        return list(merged.values())
+
+    def next_page(self, size):
+        candidates = self.candidates()
+        boosts = _proximity(self.user)
+        seen = cache.get(_seen_key(self.user)) or []
+        seen_set = set(seen)
+
+        ids = _sample(candidates, boosts, seen_set, size)
+        if len(ids) < size and seen:
+            # Everything has been shown: start a new cycle, avoiding what this page already has
+            seen = []
+            ids += _sample(candidates, boosts, set(ids), size - len(ids))
+
+        seen = (seen + ids)[-SEEN_MAX:]
+        cache.set(_seen_key(self.user), seen, SEEN_TTL)
+
+        # Re-check visibility on the final page: the pools may be a few minutes old
+        reels = Reel.objects.select_related('author__profile').filter(id__in=ids, is_draft=False) \
+            .exclude(author__profile__blocked_until__gt=timezone.now()).in_bulk()
+        following = get_viewer(self.user).following_ids
+        return [
+            reels[pk] for pk in ids
+            if pk in reels and (not reels[pk].is_exclusive or pk in self.personal_ids)
+            and (not reels[pk].author.profile.is_private or reels[pk].author_id == self.user.id
+                 or reels[pk].author_id in following)
+        ]
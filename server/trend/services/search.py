@@ -0,0 +1,230 @@
+"""
+Search Service
+Ranked, paginated search over users, posts, twists and reel captions, with
+prefix matching on the last word so results can follow the user's typing.
+
+Backends (SEARCH_BACKEND, defaulting to the database's vendor):
+- 'postgres': full-text search for content, `to_tsvector('simple', ...)`
+  matched against a prefix tsquery and ranked with ts_rank; trigram
+  similarity plus prefix LIKE for user names. Both are served by the GIN
+  indexes created in migration 0046, which Postgres keeps current on every
+  write, so nothing else needs maintaining.
+- 'index': an inverted index in the SearchToken table for databases without
+  either (SQLite). Each user / post / twist / reel is tokenized in Python into
+  weighted terms, rewritten from the post_save signals whenever its text
+  changes and dropped on delete. A query matches objects holding every query
+  term (the last one as a prefix, through a range scan on (kind, term)) and
+  ranks them by the summed weights, exact matches counting double.
+  `python manage.py rebuild_search_index` fills it for existing content.
+
+`ranked(kind, query, queryset)` returns `queryset` narrowed to the matches and
+annotated with `search_rank`, for SearchPagination's ('-search_rank', '-id')
+keyset. `matching_ids(kind, query)` is the unranked id subquery, for filtering
+an existing feed.
+"""
+import logging
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Case, F, FloatField, IntegerField, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast, Greatest, Upper
+
+from ..models import Post, Reel, SearchToken, Twist
+
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r'[^\W_]+')
+MAX_TERM_LENGTH = SearchToken._meta.get_field('term').max_length
+MAX_QUERY_TERMS = 8
+BULK_BATCH_SIZE = 1000
+
+USER_FIELDS = ('username', 'first_name', 'last_name')
+# {kind: (model, {field: weight})}
+SOURCES = {
+    'users': (User, {'username': 4, 'first_name': 2, 'last_name': 2}),
+    'posts': (Post, {'content': 1}),
+    'twists': (Twist, {'content': 1}),
+    'reels': (Reel, {'caption': 1}),
+}
+KINDS = {model: kind for kind, (model, _) in SOURCES.items()}
+
+
+def backend():
+    configured = getattr(settings, 'SEARCH_BACKEND', None)
+    if configured:
+        return configured
+    return 'postgres' if connection.vendor == 'postgresql' else 'index'
+
+
+def terms(text):
+    return [word for word in WORD_RE.findall((text or '').lower()) if len(word) <= MAX_TERM_LENGTH]
+
+
+class Query:
+    """A parsed search string: its terms, the last one matched as a prefix unless the query ends in a space."""
+
+    def __init__(self, text):
+        text = text or ''
+        self.terms = list(dict.fromkeys(terms(text)))[:MAX_QUERY_TERMS]
+        self.prefix = bool(self.terms) and not text[-1:].isspace()
+
+    def __bool__(self):
+        return bool(self.terms)
+
+    def parts(self):
+        """[(term, is_prefix)]"""
+        return [(term, self.prefix and i == len(self.terms) - 1) for i, term in enumerate(self.terms)]
+
+
+# --- Indexing (the 'index' backend) ---
+
+def _tokens(kind, instance):
+    """{term: weight} for one object."""
+    weights = Counter()
+    for field, weight in SOURCES[kind][1].items():
+        value = getattr(instance, field) or ''
+        if kind == 'users':
+            for term in terms(value):
+                weights[term] = max(weights[term], weight)
+            if field == 'username' and len(value) <= MAX_TERM_LENGTH:
+                weights[value.lower()] = max(weights[value.lower()], weight)
+        else:
+            # Repeating a word counts, up to three times
+            for term, count in Counter(terms(value)).items():
+                weights[term] = max(weights[term], min(count, 3) * weight)
+    return weights
+
+
+def index(instance):
+    index_many(KINDS[type(instance)], [instance])
+
+
+def index_many(kind, instances):
+    """Rewrites the tokens of `instances` (all of one kind). Returns the number of tokens written."""
+    if backend() != 'index':
+        return 0
+    instances = [instance for instance in instances if instance.pk]
+    if not instances:
+        return 0
+    tokens = [
+        SearchToken(kind=kind, object_id=instance.pk, term=term, weight=weight)
+        for instance in instances for term, weight in _tokens(kind, instance).items()
+    ]
+    with transaction.atomic():
+        SearchToken.objects.filter(kind=kind, object_id__in=[instance.pk for instance in instances]).delete()
+        SearchToken.objects.bulk_create(tokens, batch_size=BULK_BATCH_SIZE)
+    return len(tokens)
+
+
+def remove(instance):
+    if backend() == 'index':
+        SearchToken.objects.filter(kind=KINDS[type(instance)], object_id=instance.pk).delete()
+
+
+def indexed_fields(model):
+    return SOURCES[KINDS[model]][1]
+
+
+# --- Querying ---
+
+def _term_q(term, is_prefix):
+    if is_prefix:
+        # A range rather than LIKE, so the (kind, term) index is used on every database
+        return Q(term__gte=term, term__lt=term + '\uffff')
+    return Q(term=term)
+
+
+def _token_matches(kind, query):
+    """SearchToken rows grouped per object_id holding every query term, with their summed `rank`."""
+    parts = query.parts()
+    matched = Q()
+    for term, is_prefix in parts:
+        matched |= _term_q(term, is_prefix)
+    per_term = {
+        f'term_{i}': Max(Case(
+            When(term=term, then=F('weight') * 2),
+            When(_term_q(term, is_prefix), then=F('weight')),
+            default=Value(0), output_field=IntegerField(),
+        ))
+        for i, (term, is_prefix) in enumerate(parts)
+    }
+    rows = SearchToken.objects.filter(kind=kind).filter(matched).values('object_id').annotate(**per_term)
+    rows = rows.filter(**{f'{name}__gt': 0 for name in per_term})
+    rank = sum((F(name) for name in per_term), Value(0))
+    return rows.annotate(rank=rank)
+
+
+def _user_match(query):
+    match = Q()
+    for term, _ in query.parts():
+        term_match = Q()
+        for field in USER_FIELDS:
+            term_match |= Q(**{f'{field}__istartswith': term}) | Q(**{f'{field}_upper__trigram_word_similar': term.upper()})
+        match &= term_match
+    return match
+
+
+def _user_rank(query):
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    rank = Value(0.0)
+    for term, _ in query.parts():
+        rank += Greatest(*(TrigramWordSimilarity(Value(term.upper()), F(f'{field}_upper')) for field in USER_FIELDS))
+    whole = ' '.join(query.terms)
+    return Cast(rank + Case(When(username__iexact=whole, then=Value(2.0)), When(username__istartswith=whole, then=Value(1.0)), default=Value(0.0)), FloatField())
+
+
+def _tsquery(query):
+    from django.contrib.postgres.search import SearchQuery
+
+    raw = ' & '.join(f'{term}:*' if is_prefix else term for term, is_prefix in query.parts())
+    return SearchQuery(raw, search_type='raw', config='simple')
+
+
+def _vector(kind):
+    from django.contrib.postgres.search import SearchVector
+
+    (field,) = SOURCES[kind][1]
+    return SearchVector(field, config='simple')
+
+
+def _postgres_filter(kind, query, queryset):
+    if kind == 'users':
+        return queryset.alias(**{f'{field}_upper': Upper(field) for field in USER_FIELDS}).filter(_user_match(query))
+    return queryset.alias(search_vector=_vector(kind)).filter(search_vector=_tsquery(query))
+
+
+def ranked(kind, query, queryset=None):
+    """`queryset` (default: everything of `kind`) narrowed to matches of `query`, annotated with `search_rank`."""
+    model = SOURCES[kind][0]
+    queryset = model.objects.all() if queryset is None else queryset
+    query = query if isinstance(query, Query) else Query(query)
+    if not query:
+        return queryset.annotate(search_rank=Value(0)).none()
+
+    if backend() == 'postgres':
+        from django.contrib.postgres.search import SearchRank
+
+        queryset = _postgres_filter(kind, query, queryset)
+        if kind == 'users':
+            return queryset.annotate(search_rank=_user_rank(query))
+        return queryset.annotate(search_rank=Cast(SearchRank(F('search_vector'), _tsquery(query)), FloatField()))
+
+    matches = _token_matches(kind, query)
+    return queryset.filter(pk__in=matches.values('object_id')).annotate(
+        search_rank=Subquery(matches.filter(object_id=OuterRef('pk')).values('rank')[:1], output_field=IntegerField()),
+    )
+
+
+def matching_ids(kind, query):
+    """Subquery of the ids of `kind` matching `query` (nothing for an empty query)."""
+    model = SOURCES[kind][0]
+    query = query if isinstance(query, Query) else Query(query)
+    if not query:
+        return model.objects.none().values('pk')
+    if backend() == 'postgres':
+        return _postgres_filter(kind, query, model.objects.all()).values('pk')
+    return _token_matches(kind, query).values('object_id')
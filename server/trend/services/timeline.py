@@ -0,0 +1,235 @@
+"""
+Home Timeline Service
+Materializes each user's main feed into TimelineEntry rows (fan-out on write).
+
+- A new post is pushed to its author's timeline and to every follower's
+  (subscribers only, for exclusive posts).
+- Following someone / subscribing to them backfills their recent posts;
+  unfollowing / losing a subscription removes them again.
+- Authors with more than TIMELINE_FANOUT_MAX_FOLLOWERS followers are not fanned
+  out. Their posts are pulled at read time (fan-out on read) and merged in.
+  When one drops back to the limit, a background job copies their recent posts
+  into every follower's timeline, since nothing pulls them any more.
+
+`HomeFeed` is the read side: the followed section comes from the timeline
+range scan (plus the pulled authors), followed by recent public posts from
+everyone else, mirroring the old `(-is_followed, -created_at)` ordering.
+Both sections are read with keyset bounds (see trend/pagination.py).
+"""
+import heapq
+import logging
+from functools import cached_property
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import Follow, Post, Profile, TimelineEntry, UserSubscription
+from ..pagination import keyset_q
+from . import search
+
+logger = logging.getLogger(__name__)
+
+BULK_BATCH_SIZE = 1000
+TIMELINE_ORDERING = ('-created_at', '-post_id')
+POST_ORDERING = ('-created_at', '-id')
+
+
+def fanout_limit():
+    return getattr(settings, 'TIMELINE_FANOUT_MAX_FOLLOWERS', 5000)
+
+
+def _is_fanned_out(author_id):
+    """False for large-follower authors whose posts are pulled at read time."""
+    followers = Profile.objects.filter(user_id=author_id).values_list('followers_count', flat=True).first()
+    return (followers or 0) <= fanout_limit()
+
+
+def _active_subscriptions():
+    return UserSubscription.objects.filter(status='active').filter(
+        Q(expiry_date__isnull=True) | Q(expiry_date__gt=timezone.now())
+    )
+
+
+def _insert(owner_ids, posts):
+    entries = [
+        TimelineEntry(owner_id=owner_id, post_id=post.id, author_id=post.author_id, created_at=post.created_at)
+        for owner_id in owner_ids for post in posts
+    ]
+    TimelineEntry.objects.bulk_create(entries, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+    return len(entries)
+
+
+# --- Write side ---
+
+def fan_out_post(post, created=True):
+    """
+    Pushes `post` into the timelines of everyone who should see it.
+    On edits (`created=False`) entries that are no longer visible, e.g. after
+    the post was made exclusive, are removed as well.
+    """
+    owners = {post.author_id}
+    if _is_fanned_out(post.author_id):
+        followers = Follow.objects.filter(following_id=post.author_id).values_list('follower_id', flat=True)
+        if post.is_exclusive:
+            followers = followers.filter(
+                follower_id__in=_active_subscriptions().filter(creator_id=post.author_id).values('subscriber_id')
+            )
+        owners.update(followers)
+
+    if not created:
+        TimelineEntry.objects.filter(post_id=post.id).exclude(owner_id__in=owners).delete()
+    _insert(owners, [post])
+    return len(owners)
+
+
+def backfill(owner_id, author_id, limit=None):
+    """Copies `author_id`'s recent visible posts into `owner_id`'s timeline."""
+    if owner_id != author_id and not _is_fanned_out(author_id):
+        return 0  # Pulled at read time instead
+
+    posts = Post.objects.filter(author_id=author_id)
+    if owner_id != author_id and not _active_subscriptions().filter(subscriber_id=owner_id, creator_id=author_id).exists():
+        posts = posts.filter(is_exclusive=False)
+    limit = limit or getattr(settings, 'TIMELINE_BACKFILL_LIMIT', 200)
+    posts = posts.order_by('-created_at').only('id', 'author_id', 'created_at')[:limit]
+    return _insert([owner_id], list(posts))
+
+
+def fan_out_author(author_id, limit=None):
+    """Copies `author_id`'s recent posts into the timelines of all their followers."""
+    if not _is_fanned_out(author_id):
+        return 0  # Back over the limit by the time this ran
+
+    limit = limit or getattr(settings, 'TIMELINE_BACKFILL_LIMIT', 200)
+    posts = list(
+        Post.objects.filter(author_id=author_id).order_by('-created_at')
+        .only('id', 'author_id', 'created_at', 'is_exclusive')[:limit]
+    )
+    if not posts:
+        return 0
+    followers = list(Follow.objects.filter(following_id=author_id).values_list('follower_id', flat=True))
+    subscribers = set(
+        _active_subscriptions().filter(creator_id=author_id, subscriber_id__in=followers)
+        .values_list('subscriber_id', flat=True)
+    )
+    public = [post for post in posts if not post.is_exclusive]
+
+    written = 0
+    chunk = max(1, BULK_BATCH_SIZE // len(posts))  # About one bulk_create batch of entries at a time
+    for start in range(0, len(followers), chunk):
+        owners = followers[start:start + chunk]
+        written += _insert([owner_id for owner_id in owners if owner_id in subscribers], posts)
+        written += _insert([owner_id for owner_id in owners if owner_id not in subscribers], public)
+    logger.info(f"[timeline] Fanned out {len(posts)} posts of user {author_id} to {len(followers)} followers")
+    return written
+
+
+def followers_removed(author_id, removed):
+    """Queues fan_out_author() when losing `removed` followers took `author_id` back to the fan-out limit."""
+    followers = Profile.objects.filter(user_id=author_id).values_list('followers_count', flat=True).first()
+    if followers is not None and followers <= fanout_limit() < followers + removed:
+        from ..tasks import fan_out_author as fan_out_author_task
+        fan_out_author_task.delay(author_id)
+
+
+def remove_author(owner_id, author_id, exclusive_only=False):
+    """Drops `author_id`'s posts from `owner_id`'s timeline (unfollow / subscription ended)."""
+    entries = TimelineEntry.objects.filter(owner_id=owner_id, author_id=author_id)
+    if exclusive_only:
+        entries = entries.filter(post__is_exclusive=True)
+    entries.delete()
+
+
+def sync_subscription(subscription):
+    """Adds or removes a creator's exclusive posts after a subscription changes state."""
+    owner_id, author_id = subscription.subscriber_id, subscription.creator_id
+    if subscription.is_valid():
+        if Follow.objects.filter(follower_id=owner_id, following_id=author_id).exists():
+            backfill(owner_id, author_id)
+    else:
+        remove_author(owner_id, author_id, exclusive_only=True)
+
+
+def rebuild(user_id):
+    """Rebuilds one user's timeline from scratch. Returns the number of entries written."""
+    TimelineEntry.objects.filter(owner_id=user_id).delete()
+    written = backfill(user_id, user_id)
+    for author_id in Follow.objects.filter(follower_id=user_id).values_list('following_id', flat=True):
+        written += backfill(user_id, author_id)
+    return written
+
+
+# --- Read side ---
+
+class HomeFeed:
+    """
+    A user's main feed, read a page at a time. A position is (section, created_at, id):
+    section 0 is the followed timeline (plus pulled authors), section 1 the public stream.
+    """
+
+    def __init__(self, user, search=None):
+        self.user = user
+        self.search = search
+        self.now = timezone.now()
+
+    def _visible(self, queryset, prefix=''):
+        queryset = queryset.exclude(**{f'{prefix}author__profile__blocked_until__gt': self.now})
+        if self.search:
+            queryset = queryset.filter(**{f'{prefix}id__in': search.matching_ids('posts', self.search)})
+        return queryset
+
+    def _exclusive_ok(self, prefix=''):
+        # Checked on every read: a subscription that lapses by expiry_date sends no signal to prune the timeline
+        subscribed = _active_subscriptions().filter(subscriber=self.user).values('creator_id')
+        return Q(**{f'{prefix}is_exclusive': False}) | Q(**{f'{prefix}author': self.user}) \
+            | Q(**{f'{prefix}author_id__in': subscribed})
+
+    @cached_property
+    def pulled_author_ids(self):
+        """Followed authors that are too large to fan out; their posts are read on demand."""
+        return list(
+            Follow.objects.filter(follower=self.user, following__profile__followers_count__gt=fanout_limit())
+            .values_list('following_id', flat=True)
+        )
+
+    def _timeline(self, bound):
+        entries = TimelineEntry.objects.filter(owner=self.user).filter(self._exclusive_ok(prefix='post__'))
+        entries = self._visible(entries, prefix='post__')
+        if bound:
+            entries = entries.filter(keyset_q(TIMELINE_ORDERING, bound))
+        return entries.order_by(*TIMELINE_ORDERING).values_list('created_at', 'post_id')
+
+    def _pulled(self, bound):
+        if not self.pulled_author_ids:
+            return Post.objects.none().values_list('created_at', 'id')
+        posts = Post.objects.filter(author_id__in=self.pulled_author_ids).filter(self._exclusive_ok())
+        # Entries written before the author crossed the fan-out limit are already in the timeline
+        posts = self._visible(posts.exclude(timeline_entries__owner=self.user))
+        if bound:
+            posts = posts.filter(keyset_q(POST_ORDERING, bound))
+        return posts.order_by(*POST_ORDERING).values_list('created_at', 'id')
+
+    def _public(self, bound):
+        followed = Follow.objects.filter(follower=self.user).values('following_id')
+        posts = Post.objects.filter(author__profile__is_private=False).exclude(author=self.user) \
+            .exclude(author_id__in=followed).filter(self._exclusive_ok())
+        posts = self._visible(posts)
+        if bound:
+            posts = posts.filter(keyset_q(POST_ORDERING, bound))
+        return posts.order_by(*POST_ORDERING).values_list('created_at', 'id')
+
+    def page(self, position=None, limit=10):
+        """Returns up to `limit` (position, post) pairs following `position`."""
+        section, bound = (position[0], position[1:]) if position else (0, None)
+        keys = []
+        if section == 0:
+            merged = heapq.merge(self._timeline(bound)[:limit], self._pulled(bound)[:limit], reverse=True)
+            keys = [(0, *row) for row in islice(merged, limit)]
+            bound = None
+        if len(keys) < limit:
+            keys += [(1, *row) for row in self._public(bound)[:limit - len(keys)]]
+
+        posts = Post.objects.select_related('author__profile').prefetch_related('hashtags').in_bulk([k[2] for k in keys])
+        return [(key, posts[key[2]]) for key in keys if key[2] in posts]
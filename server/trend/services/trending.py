@@ -0,0 +1,175 @@
+"""
+Trending Hashtags Service
+Ranks hashtags by recent activity instead of all-time post counts.
+
+- Counting: every hashtag link added by services/hashtags.py (a post, twist or
+  reel created or edited with the tag) adds one mention to a HashtagBucket
+  row for the BUCKET_SECONDS slot the content was created in. Removed links
+  and deleted content take it back out. Mentions older than the window are
+  not counted at all, so editing or backfilling old content moves nothing.
+- Scoring: over the last TRENDING_WINDOW_HOURS, each bucket counts
+  `count * 0.5 ** (age / half-life)` towards the tag's decayed score, which is
+  then boosted by its velocity: the mention rate over the last hour against
+  the rate over the rest of the window. A tag that is suddenly picking up beats
+  one that has been steady all day at the same volume.
+- Serving: `refresh()` ranks the top TRENDING_TOP_N into the cache as compact
+  summaries and prunes expired buckets. `top()` only reads that cache entry;
+  once it is older than TRENDING_REFRESH_SECONDS it queues one refresh job
+  (deduplicated per interval) and keeps serving the old list meanwhile.
+  `python manage.py refresh_trending` does the same from cron, and
+  `--rebuild` recounts the buckets from the hashtag links.
+"""
+import logging
+import math
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from ..models import Hashtag, HashtagBucket
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 300
+VELOCITY_WINDOW = timedelta(hours=1)
+CACHE_KEY = 'trending:hashtags'
+
+
+def _window():
+    return timedelta(hours=getattr(settings, 'TRENDING_WINDOW_HOURS', 24))
+
+
+def _half_life():
+    return getattr(settings, 'TRENDING_HALF_LIFE_MINUTES', 120) * 60
+
+
+def _refresh_seconds():
+    return getattr(settings, 'TRENDING_REFRESH_SECONDS', 60)
+
+
+def _top_n():
+    return getattr(settings, 'TRENDING_TOP_N', 50)
+
+
+def bucket_start(when):
+    seconds = int(when.timestamp()) // BUCKET_SECONDS * BUCKET_SECONDS
+    return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+
+
+# --- Counting ---
+
+def record(mentions):
+    """
+    Adds (hashtag id, content created_at, n) mentions to their buckets; `n` is
+    negative for removed links. Mentions outside the window are dropped.
+    """
+    since = timezone.now() - _window()
+    deltas = Counter()
+    for hashtag_id, when, n in mentions:
+        if when and when >= since:
+            deltas[(bucket_start(when), hashtag_id)] += n
+
+    added = defaultdict(list)  # {(bucket, n): [hashtag id]}
+    removed = defaultdict(list)
+    for (bucket, hashtag_id), n in deltas.items():
+        if n > 0:
+            added[(bucket, n)].append(hashtag_id)
+        elif n < 0:
+            removed[(bucket, -n)].append(hashtag_id)
+    if not added and not removed:
+        return
+
+    with transaction.atomic():
+        HashtagBucket.objects.bulk_create([
+            HashtagBucket(hashtag_id=hashtag_id, bucket_start=bucket)
+            for (bucket, _), hashtag_ids in added.items() for hashtag_id in hashtag_ids
+        ], ignore_conflicts=True)
+        for (bucket, n), hashtag_ids in added.items():
+            HashtagBucket.objects.filter(bucket_start=bucket, hashtag_id__in=hashtag_ids).update(count=F('count') + n)
+        for (bucket, n), hashtag_ids in removed.items():
+            HashtagBucket.objects.filter(bucket_start=bucket, hashtag_id__in=hashtag_ids).update(count=Greatest(F('count') - n, 0))
+
+
+def rebuild():
+    """Recounts the buckets of the current window from the hashtag links. Returns the mentions counted."""
+    from .hashtags import SOURCES
+
+    since = timezone.now() - _window()
+    with transaction.atomic():
+        HashtagBucket.objects.all().delete()
+        total = 0
+        for model, (_, relation) in SOURCES.items():
+            through = getattr(Hashtag, relation).through
+            created_at = f'{model._meta.model_name}__created_at'
+            mentions = [
+                (hashtag_id, when, 1)
+                for hashtag_id, when in through.objects.filter(**{f'{created_at}__gte': since}).values_list('hashtag_id', created_at)
+            ]
+            record(mentions)
+            total += len(mentions)
+    return total
+
+
+# --- Ranking ---
+
+def compute(now=None):
+    """The current top TRENDING_TOP_N as [{'id', 'name', 'post_count', 'score', 'velocity'}]."""
+    now = now or timezone.now()
+    window = _window()
+    half_life = _half_life()
+    recent_since = now - VELOCITY_WINDOW
+
+    totals, recent, decayed = Counter(), Counter(), Counter()
+    rows = HashtagBucket.objects.filter(bucket_start__gte=now - window, count__gt=0).values_list('hashtag_id', 'bucket_start', 'count')
+    for hashtag_id, start, count in rows:
+        age = max((now - start).total_seconds() - BUCKET_SECONDS / 2, 0)
+        totals[hashtag_id] += count
+        decayed[hashtag_id] += count * 0.5 ** (age / half_life)
+        if start >= recent_since:
+            recent[hashtag_id] += count
+
+    recent_seconds = VELOCITY_WINDOW.total_seconds()
+    earlier_seconds = max(window.total_seconds() - recent_seconds, recent_seconds)
+    scored = []
+    for hashtag_id, total in totals.items():
+        earlier_rate = (total - recent[hashtag_id] + 1) / earlier_seconds
+        velocity = (recent[hashtag_id] / recent_seconds) / earlier_rate
+        scored.append((decayed[hashtag_id] * (1 + math.log1p(velocity)), velocity, hashtag_id))
+    scored.sort(reverse=True)
+    scored = scored[:_top_n()]
+
+    names = Hashtag.objects.in_bulk([hashtag_id for _, _, hashtag_id in scored])
+    return [
+        {'id': hashtag_id, 'name': names[hashtag_id].name, 'post_count': totals[hashtag_id],
+         'score': round(score, 3), 'velocity': round(velocity, 2)}
+        for score, velocity, hashtag_id in scored if hashtag_id in names
+    ]
+
+
+def refresh():
+    """Recomputes the cached ranking and prunes expired buckets. Returns the ranking."""
+    now = timezone.now()
+    tags = compute(now)
+    cache.set(CACHE_KEY, {'computed_at': time.time(), 'tags': tags}, None)
+    pruned, _ = HashtagBucket.objects.filter(bucket_start__lt=now - _window()).delete()
+    if pruned:
+        logger.info(f"[trending] Pruned {pruned} expired buckets")
+    return tags
+
+
+def top(limit=10):
+    """The cached top `limit` tags: a single cache read, refreshed in the background when stale."""
+    entry = cache.get(CACHE_KEY)
+    if entry is None:
+        return refresh()[:limit]
+    interval = _refresh_seconds()
+    if time.time() - entry['computed_at'] > interval:
+        from ..tasks import refresh_trending
+        refresh_trending.apply_async(idempotency_key=f'trending:{int(time.time() // interval)}')
+    return entry['tags'][:limit]
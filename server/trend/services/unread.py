@@ -0,0 +1,145 @@
+"""
+Unread Counter Service
+Badge counts for the whole app, per user, from one place: unread
+notifications, unread DMs per room and unread group messages per group.
+
+- Chat counts are UnreadCounter rows, one per (user, room) / (user, group).
+  `messages_added()` bumps everyone else in the conversation whenever messages
+  are stored (views, ChatConsumer, chat_writer batches, share jobs), with one
+  insert and one UPDATE per conversation however many readers it has.
+  `conversation_read()` zeroes the reader's row when a conversation is opened
+  or marked read.
+- The notification count is services/notifications.unread_counts(), a cached
+  indexed COUNT: aggregated notifications flip back to unread in place, which
+  a counter bumped blindly would drift on.
+- `summary(user_id)` is what GET /api/unread/ returns. The chat part is
+  cached per user and dropped on every change; after commit, the new
+  summaries are pushed to each affected user's NotificationConsumer as
+  `unread_counts` in one flush.
+"""
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from ..models import ChatGroup, ChatRoom, UnreadCounter
+from . import notifications
+
+SUMMARY_TTL = 300
+
+
+def _key(user_id):
+    return f'unread:{user_id}'
+
+
+# --- Reading ---
+
+def _chat_counts(user_ids):
+    """{user id: chat part of the summary}, in one query."""
+    result = {user_id: {'dms': 0, 'rooms': {}, 'group_messages': 0, 'groups': {}} for user_id in user_ids}
+    rows = UnreadCounter.objects.filter(user_id__in=user_ids, count__gt=0).values_list('user_id', 'room_id', 'group_id', 'count')
+    for user_id, room_id, group_id, count in rows:
+        counts = result[user_id]
+        if group_id:
+            counts['groups'][group_id] = count
+            counts['group_messages'] += count
+        else:
+            counts['rooms'][room_id] = count
+            counts['dms'] += count
+    return result
+
+
+def chat_counts(user_id):
+    """{'dms': n, 'rooms': {room id: n}, 'group_messages': n, 'groups': {group id: n}}, cached."""
+    counts = cache.get(_key(user_id))
+    if counts is None:
+        counts = _chat_counts([user_id])[user_id]
+        cache.set(_key(user_id), counts, SUMMARY_TTL)
+    return counts
+
+
+def summary(user_id):
+    """chat_counts() plus 'notifications', from the caches when possible."""
+    return {'notifications': notifications.unread_count(user_id), **chat_counts(user_id)}
+
+
+# --- Writing ---
+
+def messages_added(messages):
+    """
+    Counts newly stored messages (anything with room_id / group_id / author_id)
+    as unread for everyone in their conversation but the author.
+    """
+    authors = {'room_id': Counter(), 'group_id': Counter()}  # {field: {(conversation, author): n}}
+    for message in messages:
+        if message.group_id:
+            authors['group_id'][(message.group_id, message.author_id)] += 1
+        elif message.room_id:
+            authors['room_id'][(message.room_id, message.author_id)] += 1
+
+    participants = defaultdict(list)  # {(field, conversation): [user id]}
+    if authors['room_id']:
+        rooms = ChatRoom.objects.filter(id__in={room_id for room_id, _ in authors['room_id']})
+        for room_id, user1_id, user2_id in rooms.values_list('id', 'user1_id', 'user2_id'):
+            participants[('room_id', room_id)] = [user1_id, user2_id]
+    if authors['group_id']:
+        members = ChatGroup.members.through.objects.filter(chatgroup_id__in={group_id for group_id, _ in authors['group_id']})
+        for group_id, user_id in members.values_list('chatgroup_id', 'user_id'):
+            participants[('group_id', group_id)].append(user_id)
+
+    bumps = defaultdict(Counter)  # {(field, conversation): {reader: n}}
+    for field, counts in authors.items():
+        for (conversation_id, author_id), n in counts.items():
+            for user_id in participants.get((field, conversation_id), ()):
+                if user_id != author_id:
+                    bumps[(field, conversation_id)][user_id] += n
+    if bumps:
+        _bump(bumps)
+
+
+def _bump(bumps):
+    with transaction.atomic():
+        UnreadCounter.objects.bulk_create([
+            UnreadCounter(user_id=user_id, **{field: conversation_id})
+            for (field, conversation_id), readers in bumps.items() for user_id in readers
+        ], ignore_conflicts=True)
+        for (field, conversation_id), readers in bumps.items():
+            by_amount = defaultdict(list)
+            for user_id, n in readers.items():
+                by_amount[n].append(user_id)
+            for n, user_ids in by_amount.items():
+                UnreadCounter.objects.filter(user_id__in=user_ids, **{field: conversation_id}).update(count=F('count') + n)
+        changed({user_id for readers in bumps.values() for user_id in readers})
+
+
+def conversation_read(user_id, room_id=None, group_id=None):
+    """Zeroes `user_id`'s unread count for a DM room or a group."""
+    conversation = {'group_id': group_id} if group_id else {'room_id': room_id}
+    if UnreadCounter.objects.filter(user_id=user_id, count__gt=0, **conversation).update(count=0):
+        changed([user_id])
+
+
+def members_left(group_id, user_ids):
+    """Drops the counters of people removed from a group."""
+    if UnreadCounter.objects.filter(group_id=group_id, user_id__in=user_ids).delete()[0]:
+        changed(user_ids)
+
+
+def changed(user_ids):
+    """Drops the cached summaries of `user_ids` and pushes the new ones after commit."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    cache.delete_many([_key(user_id) for user_id in user_ids])
+    transaction.on_commit(lambda: push(user_ids))
+
+
+def push(user_ids):
+    chats = _chat_counts(user_ids)
+    cache.set_many({_key(user_id): counts for user_id, counts in chats.items()}, SUMMARY_TTL)
+    notification_counts = notifications.unread_counts(user_ids)
+    notifications.send([
+        (f"user_{user_id}", {'type': 'unread_counts', 'data': {'notifications': notification_counts[user_id], **counts}})
+        for user_id, counts in chats.items()
+    ])
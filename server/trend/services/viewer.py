@@ -0,0 +1,180 @@
+"""
+Viewer Context Service
+Everything "relative to the requesting user" that serializers and views keep
+asking about other users: who they follow, who they subscribe to (tier and
+expiry), who they have a pending follow request with and who is blocked
+either way.
+
+Each relationship is loaded once per request as a set / map and shared by
+every serializer and view through `get_viewer(user)`. ViewerContextMiddleware
+opens a request scope so every caller in the request gets the same context;
+outside a request (consumers, commands) each call builds a fresh one. Across
+requests the sets are cached for VIEWER_CONTEXT_TTL seconds; signals.py
+invalidates them whenever a Follow, FollowRequest, UserSubscription or
+UserBlock row changes.
+"""
+import contextvars
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import Follow, FollowRequest, UserBlock, UserSubscription
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 60
+TIERS = ['basic', 'pro', 'elite']
+PARTS = ('following', 'subscriptions', 'pending', 'blocked')
+_scope = contextvars.ContextVar('viewer_scope', default=None)
+
+
+def _key(user_id, part):
+    return f'viewer:{user_id}:{part}'
+
+
+def _ttl():
+    return getattr(settings, 'VIEWER_CONTEXT_TTL', DEFAULT_TTL)
+
+
+def invalidate(user_id, *parts):
+    """Drops cached relationship sets for `user_id` (all of them if no parts are given)."""
+    cache.delete_many([_key(user_id, part) for part in (parts or PARTS)])
+
+
+def _load_following(user_id):
+    return set(Follow.objects.filter(follower_id=user_id).values_list('following_id', flat=True))
+
+
+def _load_subscriptions(user_id):
+    # {creator_id: (tier, expiry_date)} for active subscriptions; expiry is checked at read time
+    return {
+        creator_id: (tier, expiry)
+        for creator_id, tier, expiry in UserSubscription.objects.filter(subscriber_id=user_id, status='active')
+        .values_list('creator_id', 'tier', 'expiry_date')
+    }
+
+
+def _load_pending(user_id):
+    return set(FollowRequest.objects.filter(sender_id=user_id).values_list('receiver_id', flat=True))
+
+
+def _load_blocked(user_id):
+    # Blocks hide people from each other, so both directions count
+    rows = UserBlock.objects.filter(Q(blocker_id=user_id) | Q(blocked_id=user_id)).values_list('blocker_id', 'blocked_id')
+    return {blocked if blocker == user_id else blocker for blocker, blocked in rows}
+
+
+LOADERS = {
+    'following': _load_following,
+    'subscriptions': _load_subscriptions,
+    'pending': _load_pending,
+    'blocked': _load_blocked,
+}
+
+
+def cached(user_id, part):
+    """One relationship set for `user_id`, from the cache or loaded and cached."""
+    key = _key(user_id, part)
+    value = cache.get(key)
+    if value is None:
+        value = LOADERS[part](user_id)
+        cache.set(key, value, _ttl())
+    return value
+
+
+def is_blocked_between(user_id, other_id):
+    """Whether either user has blocked the other (for code paths without a request user)."""
+    return other_id in cached(user_id, 'blocked')
+
+
+class ViewerContext:
+    """Relationship sets for one viewer, each loaded (from cache or DB) on first use."""
+
+    def __init__(self, user):
+        self.user = user
+        self.user_id = user.id if user is not None and user.is_authenticated else None
+        self._loaded = {}
+
+    def _get(self, part):
+        if part not in self._loaded:
+            if self.user_id is None:
+                self._loaded[part] = {} if part == 'subscriptions' else set()
+            else:
+                self._loaded[part] = cached(self.user_id, part)
+        return self._loaded[part]
+
+    @property
+    def following_ids(self):
+        return self._get('following')
+
+    @property
+    def subscriptions(self):
+        return self._get('subscriptions')
+
+    @property
+    def pending_ids(self):
+        return self._get('pending')
+
+    @property
+    def blocked_ids(self):
+        return self._get('blocked')
+
+    def is_following(self, user_id):
+        return user_id in self.following_ids
+
+    def has_pending_request(self, user_id):
+        return user_id in self.pending_ids
+
+    def is_blocked(self, user_id):
+        return user_id in self.blocked_ids
+
+    def subscribed_creator_ids(self):
+        now = timezone.now()
+        return {creator_id for creator_id, (_, expiry) in self.subscriptions.items() if not expiry or expiry >= now}
+
+    def has_subscription_access(self, creator_id, required_tier=None):
+        """Staff, the creator themself, or an active, unexpired subscription at or above `required_tier`."""
+        if self.user_id is None:
+            return False
+        if creator_id == self.user_id or self.user.is_staff:
+            return True
+        sub = self.subscriptions.get(creator_id)
+        if not sub:
+            return False
+        tier, expiry = sub
+        if expiry and expiry < timezone.now():
+            return False
+        if required_tier:
+            try:
+                return TIERS.index(tier) >= TIERS.index(required_tier)
+            except ValueError:
+                return False
+        return True
+
+
+class viewer_scope:
+    """Shares one ViewerContext per user for the duration of a request."""
+
+    def __enter__(self):
+        self._token = _scope.set({})
+        return self
+
+    def __exit__(self, *exc):
+        _scope.reset(self._token)
+        return False
+
+
+def get_viewer(user):
+    """The ViewerContext for `user`, shared by everything handling the current request."""
+    if user is None or not user.is_authenticated:
+        return ViewerContext(None)
+    contexts = _scope.get()
+    if contexts is None:
+        return ViewerContext(user)
+    viewer = contexts.get(user.id)
+    if viewer is None:
+        viewer = contexts[user.id] = ViewerContext(user)
+    return viewer
@@ -1,5 +1,5 @@
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from .models import Profile
 
@@ -19,100 +19,250 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
 
 
 # ─────────────────────────────────────────────────────────────
-# 2. Notification WebSocket Helper
+# 2. Notification Deleted → real-time removal
 # ─────────────────────────────────────────────────────────────
 
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 from .models import Notification
+from .services import notifications, unread
 
 
-def send_notification_socket(notification_instance):
-    """
-    Sends a real-time WebSocket push to the notification recipient.
-    Wraps all I/O in try/except so a channel-layer failure never
-    propagates and crashes the calling Django view or signal.
-    """
-    try:
-        channel_layer = get_channel_layer()
-        if not channel_layer:
-            return  # channels not configured (e.g. tests)
-
-        group_name = f"user_{notification_instance.recipient.id}"
-
-        # Build a minimal but complete payload
-        sender_profile = getattr(notification_instance.sender, 'profile', None)
-        profile_pic = None
-        if sender_profile and sender_profile.profile_picture:
-            try:
-                profile_pic = sender_profile.profile_picture.url
-            except Exception:
-                pass
-
-        data = {
-            'id': notification_instance.id,
-            'sender_username': notification_instance.sender.username,
-            'sender_profile_picture': profile_pic,
-            'notification_type': notification_instance.notification_type,
-            'created_at': notification_instance.created_at.isoformat(),
-            'is_read': False,
-            'post_id': notification_instance.post_id,    # FK id fields are safe (no extra query)
-            'reel_id': notification_instance.reel_id,
-            'story_id': notification_instance.story_id,
-            'twist_id': notification_instance.twist_id,
-        }
-
-        async_to_sync(channel_layer.group_send)(
-            group_name,
-            {
-                'type': 'notification_message',
-                'data': data,
-            }
-        )
-    except Exception as e:
-        # Log but never raise — a push failure must not break DB operations
-        import logging
-        logging.getLogger(__name__).warning(
-            f"[signals] send_notification_socket failed for notification "
-            f"{getattr(notification_instance, 'id', '?')}: {e}"
-        )
-
-
-# ─────────────────────────────────────────────────────────────
-# 3. Notification Deleted → real-time removal
-# ─────────────────────────────────────────────────────────────
-
 @receiver(post_delete, sender=Notification)
 def notify_notification_deleted(sender, instance, **kwargs):
     """Notify the client to remove the notification from its UI in real time."""
-    try:
-        channel_layer = get_channel_layer()
-        if not channel_layer:
-            return
-
-        group_name = f"user_{instance.recipient_id}"  # Use _id to avoid extra query
-
-        async_to_sync(channel_layer.group_send)(
-            group_name,
-            {
-                'type': 'notification_message',
-                'data': {
-                    'id': instance.id,
-                    'action': 'deleted',
-                },
-            }
-        )
-    except Exception as e:
-        import logging
-        logging.getLogger(__name__).warning(
-            f"[signals] notify_notification_deleted failed for notification "
-            f"{getattr(instance, 'id', '?')}: {e}"
-        )
-
-# ─────────────────────────────────────────────────────────────
-# NOTE: Like / Comment notifications are fired directly inside
-# the views (LikeToggleView, CommentListCreateView, etc.) and
-# broadcast over the channel layer there. We intentionally do
+    notifications.broadcast_deleted(instance.recipient_id, instance.id)
+
+
+# ─────────────────────────────────────────────────────────────
+# NOTE: Like / Comment notifications are emitted by the views
+# (LikeToggleView, CommentListCreateView, etc.) through the
+# notify job and services/notifications.py. We intentionally do
 # NOT duplicate them here with signal-based receivers to avoid
 # creating two notifications for every like/comment.
 # ─────────────────────────────────────────────────────────────
+
+
+# ─────────────────────────────────────────────────────────────
+# 3. Subscriber Counter
+# ─────────────────────────────────────────────────────────────
+# Subscription status is changed from several Stripe webhook paths,
+# so the creator's stored subscribers_count is recounted on every
+# save/delete rather than adjusted in each view.
+
+from .models import UserSubscription
+from .services.counters import sync_subscribers_count
+
+
+@receiver(post_save, sender=UserSubscription)
+@receiver(post_delete, sender=UserSubscription)
+def update_subscribers_count(sender, instance, **kwargs):
+    sync_subscribers_count(instance.creator_id)
+
+
+# ─────────────────────────────────────────────────────────────
+# 4. Home Timeline Fan-out
+# ─────────────────────────────────────────────────────────────
+# Keeps the materialized TimelineEntry rows in step with posts,
+# follows and subscriptions. Fan-out runs after the transaction
+# commits so a rolled-back post never reaches anyone's feed.
+
+from django.db import transaction
+from .models import Follow, Post
+from .services import timeline
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    transaction.on_commit(lambda: timeline.fan_out_post(instance, created=created))
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline_on_follow(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.follower_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline_on_unfollow(sender, instance, **kwargs):
+    timeline.remove_author(instance.follower_id, instance.following_id)
+
+
+@receiver(post_save, sender=UserSubscription)
+def sync_timeline_on_subscription(sender, instance, **kwargs):
+    timeline.sync_subscription(instance)
+
+
+@receiver(post_delete, sender=UserSubscription)
+def prune_timeline_on_unsubscribe(sender, instance, **kwargs):
+    timeline.remove_author(instance.subscriber_id, instance.creator_id, exclusive_only=True)
+
+
+# ─────────────────────────────────────────────────────────────
+# 5. Reel Recommendation Caches
+# ─────────────────────────────────────────────────────────────
+# Per-viewer reel pools and follow-proximity maps are cached for a
+# few minutes; drop them when the inputs change so follows and new
+# uploads show up in the reels tab right away. The global pool is
+# dropped when a reel in it stops being public.
+
+from .models import Reel
+from .services.reels import invalidate_pool as invalidate_reel_pool, invalidate_user as invalidate_reel_caches
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def reset_reel_caches_on_follow(sender, instance, **kwargs):
+    invalidate_reel_caches(instance.follower_id)
+
+
+@receiver(post_save, sender=UserSubscription)
+@receiver(post_delete, sender=UserSubscription)
+def reset_reel_caches_on_subscription(sender, instance, **kwargs):
+    invalidate_reel_caches(instance.subscriber_id)
+
+
+@receiver(post_save, sender=Reel)
+def reset_reel_caches_on_upload(sender, instance, created, **kwargs):
+    if created:
+        invalidate_reel_caches(instance.author_id)
+    elif instance.is_exclusive or instance.is_draft:
+        invalidate_reel_pool(reel_id=instance.id)
+
+
+@receiver(post_save, sender=Profile)
+def reset_reel_pool_on_private(sender, instance, **kwargs):
+    if instance.is_private:
+        invalidate_reel_pool(author_id=instance.user_id)
+
+
+# ─────────────────────────────────────────────────────────────
+# 6. Viewer Context Caches
+# ─────────────────────────────────────────────────────────────
+# Following / subscription / pending-request / block sets are
+# cached per user (services/viewer.py). Drop the affected set
+# whenever one of the underlying rows changes.
+
+from .models import FollowRequest, UserBlock
+from .services import viewer
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_viewer_following(sender, instance, **kwargs):
+    viewer.invalidate(instance.follower_id, 'following')
+
+
+@receiver(post_save, sender=FollowRequest)
+@receiver(post_delete, sender=FollowRequest)
+def invalidate_viewer_pending(sender, instance, **kwargs):
+    viewer.invalidate(instance.sender_id, 'pending')
+
+
+@receiver(post_save, sender=UserSubscription)
+@receiver(post_delete, sender=UserSubscription)
+def invalidate_viewer_subscriptions(sender, instance, **kwargs):
+    viewer.invalidate(instance.subscriber_id, 'subscriptions')
+
+
+@receiver(post_save, sender=UserBlock)
+@receiver(post_delete, sender=UserBlock)
+def invalidate_viewer_blocks(sender, instance, **kwargs):
+    viewer.invalidate(instance.blocker_id, 'blocked')
+    viewer.invalidate(instance.blocked_id, 'blocked')
+
+
+# ─────────────────────────────────────────────────────────────
+# 7. Notification Unread Count
+# ─────────────────────────────────────────────────────────────
+# The unread badge count is cached per user (services/notifications.py)
+# and the new counts pushed to the recipient after commit (services/unread.py).
+# Bulk writes (notifications.emit, mark all read) do both themselves.
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def invalidate_notification_unread(sender, instance, **kwargs):
+    notifications.invalidate_unread(instance.recipient_id)
+    unread.changed([instance.recipient_id])
+
+
+# ─────────────────────────────────────────────────────────────
+# 8. Hashtag Index
+# ─────────────────────────────────────────────────────────────
+# Posts, twists and reels are linked to the hashtags in their text
+# whenever that text is written. Saves that name their fields and
+# leave the text out (counter repairs, media updates) are skipped.
+# Deleting content takes its mentions out of the trending counts.
+
+from .models import Twist
+from .services import hashtags
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Twist)
+@receiver(post_save, sender=Reel)
+def index_hashtags(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or hashtags.text_field(sender) in update_fields:
+        hashtags.index(instance)
+
+
+@receiver(pre_delete, sender=Post)
+@receiver(pre_delete, sender=Twist)
+@receiver(pre_delete, sender=Reel)
+def unindex_hashtags(sender, instance, **kwargs):
+    hashtags.unindex(instance)
+
+
+# ─────────────────────────────────────────────────────────────
+# 9. Search Index
+# ─────────────────────────────────────────────────────────────
+# With the inverted-index search backend (no Postgres), user names
+# and post / twist / reel text are re-tokenized whenever they are
+# written, like the hashtags above, and dropped on delete.
+# services/search.py makes these no-ops on Postgres.
+
+from .services import search
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Twist)
+@receiver(post_save, sender=Reel)
+def index_search_terms(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or not update_fields.isdisjoint(search.indexed_fields(sender)):
+        search.index(instance)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Twist)
+@receiver(post_delete, sender=Reel)
+def remove_search_terms(sender, instance, **kwargs):
+    search.remove(instance)
+
+
+# ─────────────────────────────────────────────────────────────
+# 10. Mention Autocomplete Index
+# ─────────────────────────────────────────────────────────────
+# Keeps each user's card in the @mention prefix index current
+# when their names, avatar, follower count or suspension change.
+
+from .services import mentions
+
+MENTION_USER_FIELDS = {'username', 'first_name', 'last_name'}
+MENTION_PROFILE_FIELDS = {'profile_picture', 'followers_count', 'blocked_until'}
+
+
+@receiver(post_save, sender=User)
+def update_mention_card(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or not update_fields.isdisjoint(MENTION_USER_FIELDS):
+        mentions.update(instance)
+
+
+@receiver(post_save, sender=Profile)
+def update_mention_card_on_profile(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or not update_fields.isdisjoint(MENTION_PROFILE_FIELDS):
+        mentions.update(instance.user, instance)
+
+
+@receiver(post_delete, sender=User)
+def remove_mention_card(sender, instance, **kwargs):
+    mentions.remove(instance.id)
@@ -4,15 +4,14 @@ import json
 import asyncio
 import logging
 from channels.generic.websocket import AsyncWebsocketConsumer
-from django.core.cache import cache
+from channels.db import database_sync_to_async
 from .middleware import get_user_from_scope
+from .services.matchmaking import get_matchmaker
 
 logger = logging.getLogger(__name__)
 
-# --- KEYS AND CONSTANTS ---
-WAITING_QUEUE_KEY = "stranger_talk:waiting_queue" # Redis List
-USER_INFO_KEY_PREFIX = "stranger_talk:user:"     # Hash (Expiry-based)
-PEER_MAP_KEY_PREFIX = "stranger_talk:peer:"       # Simple Key (Expiry-based)
+# Queues, per-connection info / block sets and the peer map live in the
+# matchmaker (services/matchmaking.py): Redis in production, memory otherwise.
 
 class StrangerConsumer(AsyncWebsocketConsumer):
     async def connect(self):
@@ -36,27 +35,32 @@ class StrangerConsumer(AsyncWebsocketConsumer):
 
         self.partner_channel = None
         self.last_partner = None
+        self.matchmaker = get_matchmaker()
         display = f"{self.user.first_name} {self.user.last_name}".strip() or self.user.username
         
-        # 4. Store Info in Distributed Cache
-        await self.set_user_info({
+        # 4. Register info + block set (both directions, loaded once) with the matchmaker
+        self.info = {
             "id": self.user.id,
             "username": self.user.username,
             "display_name": display,
             "gender": user_gender,
             "preferred_gender": preferred_gender,
-        })
+        }
+        await self.matchmaker.register(self.channel_name, self.info, await self.get_blocked_ids(self.user.id))
 
         await self.accept()
         logger.info(f"Stranger Talk Connected: {self.user.username} (Pref: {preferred_gender or 'Any'})")
         await self._enter_queue()
 
     async def get_user_gender(self, user):
-        from channels.db import database_sync_to_async
         @database_sync_to_async
         def _get(): return user.profile.gender
         return await _get()
 
+    async def get_blocked_ids(self, user_id):
+        from .services.viewer import cached
+        return await database_sync_to_async(cached)(user_id, 'blocked')
+
     async def disconnect(self, close_code):
         logger.info(f"Stranger Talk Disconnected (Code: {close_code}): {getattr(self, 'user', 'Unknown')}")
         await self._cleanup(notify_partner=True)
@@ -85,97 +89,22 @@ class StrangerConsumer(AsyncWebsocketConsumer):
                         "payload": {"type": "chat_message", "content": content, "sender": self.user.username},
                     })
 
-    # --- Redis Persistence Handlers ---
-    async def set_user_info(self, info):
-        cache.set(f"{USER_INFO_KEY_PREFIX}{self.channel_name}", info, timeout=3600)
-
+    # --- Matchmaking ---
     async def get_user_info(self, channel_name):
-        return cache.get(f"{USER_INFO_KEY_PREFIX}{channel_name}")
+        return await self.matchmaker.info(channel_name)
 
     async def _enter_queue(self):
-        # Use a simple cache-based lock to prevent race conditions during matching
-        lock_key = "stranger_talk:matching_lock"
-        lock_acquired = False
-        
-        try:
-            # Try to acquire lock for 3 seconds
-            for _ in range(30):
-                if cache.add(lock_key, "locked", timeout=5):
-                    lock_acquired = True
-                    break
-                await asyncio.sleep(0.1)
-
-            if not lock_acquired:
-                # If lock fails, we are likely under heavy load, just put them in waiting
-                await self.send(text_data=json.dumps({"type": "waiting"}))
-                return
-
-            # --- START CRITICAL SECTION ---
-            queue = cache.get(WAITING_QUEUE_KEY) or []
-            
-            # If we are already paired (could have happened while waiting for lock), exit
-            if self.partner_channel:
-                return
-
-            matched = None
-            for ch in queue:
-                if ch == self.channel_name or ch == self.last_partner: continue
-                # Check compatibility (including gender and blocks)
-                if await self._is_compatible(self.channel_name, ch):
-                    matched = ch
-                    break
-            
-            if matched:
-                # Remove both from queue
-                if matched in queue: queue.remove(matched)
-                if self.channel_name in queue: queue.remove(self.channel_name)
-                cache.set(WAITING_QUEUE_KEY, queue, timeout=None)
-                
-                # Pair them up
-                await self._pair_with(matched)
-            else:
-                # No match, enter queue if not there
-                if self.channel_name not in queue:
-                    queue.append(self.channel_name)
-                    cache.set(WAITING_QUEUE_KEY, queue, timeout=None)
-                await self.send(text_data=json.dumps({"type": "waiting"}))
-            # --- END CRITICAL SECTION ---
-
-        finally:
-            if lock_acquired:
-                cache.delete(lock_key)
-
-    async def _is_compatible(self, my_ch, cand_ch):
-        my_info = await self.get_user_info(my_ch)
-        cand_info = await self.get_user_info(cand_ch)
-        if not my_info or not cand_info: return False
-
-        my_pref, cand_pref = my_info.get("preferred_gender"), cand_info.get("preferred_gender")
-        my_gen, cand_gen = my_info.get("gender"), cand_info.get("gender")
-
-        if my_pref and cand_gen != my_pref: return False
-        if cand_pref and my_gen != cand_pref: return False
-
-        my_id = my_info.get("id")
-        cand_id = cand_info.get("id")
-        if my_id and cand_id:
-            has_block = await self.check_block(my_id, cand_id)
-            if has_block: return False
-
-        return True
-
-    async def check_block(self, user1_id, user2_id):
-        from channels.db import database_sync_to_async
-        from .models import UserBlock
-        
-        @database_sync_to_async
-        def _check():
-            return UserBlock.objects.filter(blocker_id=user1_id, blocked_id=user2_id).exists() or \
-                   UserBlock.objects.filter(blocker_id=user2_id, blocked_id=user1_id).exists()
-        return await _check()
+        # If we are already paired (e.g. matched while a re-enter event was in flight), exit
+        if self.partner_channel:
+            return
+        status, partner = await self.matchmaker.find_or_enqueue(self.channel_name, self.info, exclude=self.last_partner)
+        if status == 'matched':
+            await self._pair_with(partner)
+        elif status == 'waiting':
+            await self.send(text_data=json.dumps({"type": "waiting"}))
+        # 'paired': another searcher just took us; its stranger_matched event is on the way
 
     async def create_block(self, blocker_id, blocked_id):
-        from channels.db import database_sync_to_async
         from .models import UserBlock
         
         @database_sync_to_async
@@ -184,14 +113,12 @@ class StrangerConsumer(AsyncWebsocketConsumer):
         await _create()
 
     async def _pair_with(self, partner_channel):
+        # The matchmaker has already recorded both sides in its peer map
         self.partner_channel = partner_channel
-        cache.set(f"{PEER_MAP_KEY_PREFIX}{self.channel_name}", partner_channel, timeout=3600)
-        cache.set(f"{PEER_MAP_KEY_PREFIX}{partner_channel}", self.channel_name, timeout=3600)
-
-        my_info = await self.get_user_info(self.channel_name)
-        partner_info = await self.get_user_info(partner_channel)
+        my_info = self.info
+        partner_info = await self.get_user_info(partner_channel) or {}
         
-        logger.info(f"Match Found: {my_info['username']} <-> {partner_info['username']}")
+        logger.info(f"Match Found: {my_info['username']} <-> {partner_info.get('username')}")
 
         i_am_offerer = self.channel_name < partner_channel
         await self.send(text_data=json.dumps({
@@ -232,6 +159,7 @@ class StrangerConsumer(AsyncWebsocketConsumer):
             partner_info = await self.get_user_info(old)
             if partner_info and partner_info.get("id"):
                 await self.create_block(self.user.id, partner_info["id"])
+                await self.matchmaker.add_block(self.channel_name, partner_info["id"])
             await self.channel_layer.send(old, {"type": "stranger_disconnected", "payload": {"type": "partner_left", "reason": "blocked"}})
         
         await self._cleanup_pair()
@@ -240,7 +168,7 @@ class StrangerConsumer(AsyncWebsocketConsumer):
         if old: await self.channel_layer.send(old, {"type": "stranger_re_enter_queue"})
 
     async def _cleanup_pair(self):
-        cache.delete(f"{PEER_MAP_KEY_PREFIX}{self.channel_name}")
+        await self.matchmaker.unpair(self.channel_name)
         self.partner_channel = None
 
     async def _cleanup(self, notify_partner=False):
@@ -251,16 +179,14 @@ class StrangerConsumer(AsyncWebsocketConsumer):
                 await self.channel_layer.send(old, {"type": "stranger_re_enter_queue"})
             except: pass
         
-        cache.delete(f"{PEER_MAP_KEY_PREFIX}{self.channel_name}")
-        cache.delete(f"{USER_INFO_KEY_PREFIX}{self.channel_name}")
-        
-        queue = cache.get(WAITING_QUEUE_KEY) or []
-        if self.channel_name in queue:
-            queue.remove(self.channel_name)
-            cache.set(WAITING_QUEUE_KEY, queue, timeout=None)
+        if hasattr(self, 'matchmaker'):
+            await self.matchmaker.unregister(self.channel_name)
         self.partner_channel = None
 
     async def stranger_disconnected(self, event):
+        await self.matchmaker.unpair(self.channel_name)
+        # Don't get matched straight back to whoever just left
+        self.last_partner = self.partner_channel
         self.partner_channel = None
         await self.send(text_data=json.dumps(event["payload"]))
 
@@ -0,0 +1,93 @@
+"""
+Background tasks, run by the job workers in trend/services/jobs.py.
+Arguments must be JSON-serializable: pass ids, not model instances.
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ChatMessage, ChatRoom, Post, Reel, Twist
+from .services import notifications, timeline, trending, unread
+from .services.notifications import NotificationEvent
+from .services.jobs import task
+from .services.mail import send_email_via_api
+
+logger = logging.getLogger(__name__)
+
+
+@task(max_attempts=5, backoff=5)
+def send_email(to_email, subject, text_content):
+    send_email_via_api(to_email=to_email, subject=subject, text_content=text_content)
+
+
+@task()
+def notify(recipient_id, sender_id, notification_type, post_id=None, reel_id=None, twist_id=None, story_id=None):
+    """Records the notification (folding it into an existing aggregate) and pushes it to the recipient."""
+    notifications.emit([NotificationEvent(
+        recipient_id, sender_id, notification_type,
+        post_id=post_id, reel_id=reel_id, twist_id=twist_id, story_id=story_id,
+    )])
+
+
+# kind -> (model, ChatMessage field, fallback text)
+SHAREABLE = {
+    'reel': (Reel, 'shared_reel', lambda reel: f"Shared a reel: {reel.caption[:20] if reel.caption else 'Reel'}"),
+    'post': (Post, 'shared_post', lambda post: f"Shared a post: {post.content[:20] if post.content else 'Post'}"),
+    'twist': (Twist, 'shared_twist', lambda twist: f"Shared a twist: {twist.content[:20] if twist.content else 'Twist'}"),
+}
+
+
+@task()
+def share_with(sender_id, kind, object_id, recipient_id):
+    """Posts a shared reel / post / twist into the DM room between sender and recipient."""
+    from .serializers import ChatMessageSerializer
+
+    model, field, fallback_text = SHAREABLE[kind]
+    shared = model.objects.select_related('author').get(pk=object_id)
+    sender = User.objects.get(pk=sender_id)
+    user1_id, user2_id = sorted([sender_id, recipient_id])
+
+    # Everything a retry would repeat happens in one transaction: the job is only
+    # retried if this raised, and then nothing of it was saved.
+    with transaction.atomic():
+        room, _ = ChatRoom.objects.get_or_create(user1_id=user1_id, user2_id=user2_id)
+        ChatRoom.objects.filter(pk=room.pk).update(last_message_at=timezone.now())
+        msg = ChatMessage.objects.create(room=room, author=sender, content=fallback_text(shared), **{field: shared})
+        unread.messages_added([msg])
+
+    # Best effort from here on: failing now would retry the job and post the share twice.
+    # Clients that miss the broadcast still get the message from the inbox and history.
+    try:
+        serialized_msg = ChatMessageSerializer(msg).data
+        async_to_sync(get_channel_layer().group_send)(
+            f'chat_{user1_id}_{user2_id}',
+            {
+                'type': 'chat_message',
+                'id': msg.id,
+                'content': msg.content,
+                'author': sender.id,
+                'author_username': sender.username,
+                'timestamp': msg.timestamp.isoformat(),
+                'is_read': False,
+                field: shared.id,
+                f'{field}_data': serialized_msg[f'{field}_data'],
+            }
+        )
+    except Exception as e:
+        logger.warning(f"[tasks] Broadcast of shared {kind} {object_id} (message {msg.id}) failed: {e}")
+
+
+@task()
+def fan_out_author(author_id):
+    """Copies an author's recent posts to their followers' timelines once they are small enough to fan out again."""
+    timeline.fan_out_author(author_id)
+
+
+@task(max_attempts=1)
+def refresh_trending():
+    """Re-ranks the trending hashtags into the cache (queued by trending.top() once the list is stale)."""
+    trending.refresh()
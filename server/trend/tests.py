@@ -1,3 +1,433 @@
-from django.test import TestCase
+import base64
+import json
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .models import (
+    BackgroundJob, ChatMessage, ChatRoom, Follow, Hashtag, Notification, Post, Profile, Reel,
+    TimelineEntry, UnreadCounter, UserSubscription,
+)
+from .services import chat_writer, fcm_service, jobs, notifications, search, unread
+from .services.counters import adjust_profile
+from .services.notifications import NotificationEvent
+from .services.query_budget import QueryBudgetExceeded, budget_for, query_budget, signature
+from . import tasks
+
+
+def make_users(count, prefix='user'):
+    return [User.objects.create_user(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com') for i in range(count)]
+
+
+def cursor_for(position):
+    return base64.urlsafe_b64encode(json.dumps({'p': position}).encode()).decode()
+
+
+class CacheResetMixin:
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+# --- Query budgets ---
+
+class QueryBudgetTests(CacheResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.viewer, *authors = make_users(6)
+        for author in authors:
+            Follow.objects.create(follower=self.viewer, following=author)
+            for i in range(3):
+                Post.objects.create(author=author, content=f'post {i}')
+        self.client.force_authenticate(self.viewer)
+
+    def test_budget_exceeded_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(1):
+                list(User.objects.all())
+                list(Post.objects.all())
+
+    def test_duplicates_can_be_forbidden(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(10, allow_duplicates=False):
+                list(Post.objects.filter(id__in=[1, 2]))
+                list(Post.objects.filter(id__in=[3]))
+
+    def test_signature_ignores_in_list_length(self):
+        self.assertEqual(signature('SELECT 1 WHERE id IN (%s, %s)'), signature('SELECT 1 WHERE id IN (%s)'))
+
+    def test_feeds_stay_within_budget(self):
+        for url, name in [('/api/posts/', 'post_list_create'), ('/api/notifications/', 'notification_list'),
+                          ('/api/reels/', 'reel_list_create')]:
+            with self.subTest(url=url), query_budget(budget_for(name)):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+
+# --- Keyset cursors ---
+
+class KeysetPaginationTests(CacheResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.viewer, *self.others = make_users(7)
+        for other in self.others:
+            Follow.objects.create(follower=self.viewer, following=other)
+        self.posts = [Post.objects.create(author=self.others[i % 6], content=f'post {i}') for i in range(7)]
+        self.client.force_authenticate(self.viewer)
+
+    def walk(self, url):
+        seen, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [row['id'] for row in response.data['results']]
+            url, pages = response.data['next'], pages + 1
+        return seen, pages
+
+    def test_following_list_walks_every_page_once(self):
+        seen, pages = self.walk(f'/api/profiles/{self.viewer.username}/following/?page_size=2')
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(len(set(seen)), 6)
+        self.assertEqual(pages, 3)
+
+    def test_comments_walk_oldest_first(self):
+        post = self.posts[0]
+        for i in range(5):
+            self.client.post(f'/api/posts/{post.id}/comments/', {'text': f'comment {i}'})
+        seen, _ = self.walk(f'/api/posts/{post.id}/comments/?page_size=2')
+        self.assertEqual(seen, sorted(seen))
+        self.assertEqual(len(seen), 5)
+
+    def test_malformed_cursors_are_not_found(self):
+        bad = {
+            'not base64 json': 'bm90IGpzb24',
+            'wrong length': cursor_for(['2026-01-01T00:00:00+00:00']),
+            'bad datetime': cursor_for(['yesterday', 1]),
+            'bad id': cursor_for(['2026-01-01T00:00:00+00:00', 'one']),
+            'null value': cursor_for([None, 1]),
+        }
+        for label, cursor in bad.items():
+            with self.subTest(label):
+                self.assertEqual(self.client.get(f'/api/posts/{self.posts[0].id}/comments/?cursor={cursor}').status_code, 404)
+
+    def test_home_feed_rejects_unknown_section(self):
+        cursor = cursor_for([7, '2026-01-01T00:00:00+00:00', 1])
+        self.assertEqual(self.client.get(f'/api/posts/?cursor={cursor}').status_code, 404)
+
+
+# --- Notifications ---
+
+class NotificationTests(CacheResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner, self.alice, self.bob = make_users(3)
+        self.post = Post.objects.create(author=self.owner, content='hello')
+
+    def like(self, sender):
+        return NotificationEvent(self.owner.id, sender.id, 'like_post', post_id=self.post.id)
+
+    def test_likes_fold_into_one_notification(self):
+        notifications.emit([self.like(self.alice)])
+        notifications.emit([self.like(self.bob)])
+        notif = Notification.objects.get(recipient=self.owner)
+        self.assertEqual(notif.actor_count, 2)
+        self.assertEqual(notif.sender_id, self.bob.id)
+
+    def test_repeat_by_same_sender_changes_nothing(self):
+        notifications.emit([self.like(self.alice)])
+        self.assertEqual(notifications.emit([self.like(self.alice)]), [])
+        self.assertEqual(Notification.objects.get(recipient=self.owner).actor_count, 1)
+
+    def test_batch_fold_matches_single_upserts(self):
+        notifications.emit([self.like(self.alice)])
+        Notification.objects.update(is_read=True)
+        notifications.emit([self.like(self.alice), self.like(self.bob)])
+        notif = Notification.objects.get(recipient=self.owner)
+        self.assertEqual((notif.actor_count, notif.is_read), (2, False))
+
+    def test_badge_counts_pushed_after_changes(self):
+        pushed = []
+        self.client.force_authenticate(self.owner)
+        with mock.patch.object(notifications, 'send', side_effect=pushed.extend):
+            with self.captureOnCommitCallbacks(execute=True):
+                notifications.emit([self.like(self.alice), NotificationEvent(self.alice.id, self.bob.id, 'follow')])
+            notif = Notification.objects.get(recipient=self.owner)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(f'/api/notifications/{notif.id}/read/')
+        counts = [(group, message['data']['notifications']) for group, message in pushed if message['type'] == 'unread_counts']
+        self.assertIn((f'user_{self.owner.id}', 1), counts)
+        self.assertIn((f'user_{self.alice.id}', 1), counts)
+        self.assertEqual(counts[-1], (f'user_{self.owner.id}', 0))
+
+
+# --- Background jobs ---
+
+calls = []
+
+
+@jobs.task(name='trend.tests.flaky', max_attempts=2, backoff=1)
+def flaky(fail):
+    calls.append(fail)
+    if fail:
+        raise RuntimeError('boom')
+
+
+@override_settings(JOBS_EMBEDDED_WORKER=False)  # The tests claim the jobs themselves
+class JobBrokerTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.broker = jobs.DatabaseBroker()
+
+    def job(self, fail=False, key=None):
+        return {'id': f'job-{fail}-{key}', 'task': 'trend.tests.flaky', 'args': [fail], 'kwargs': {},
+                'attempts': 0, 'max_attempts': 2, 'key': key}
+
+    def test_claimed_job_is_leased(self):
+        self.broker.push(self.job())
+        self.assertEqual(len(self.broker.claim(5)), 1)
+        self.assertEqual(self.broker.claim(5), [])
+
+    def test_success_is_acknowledged(self):
+        self.broker.push(self.job())
+        jobs.execute(self.broker.claim(1)[0], self.broker)
+        self.assertEqual(calls, [False])
+        self.assertFalse(BackgroundJob.objects.exists())
+
+    def test_failure_retries_then_gives_up(self):
+        self.broker.push(self.job(fail=True))
+        jobs.execute(self.broker.claim(1)[0], self.broker)
+        row = BackgroundJob.objects.get()
+        self.assertEqual((row.status, row.attempts), ('queued', 1))
+        self.assertGreater(row.run_at, timezone.now())
+
+        BackgroundJob.objects.update(run_at=timezone.now())
+        jobs.execute(self.broker.claim(1)[0], self.broker)
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ('failed', 2))
+        self.assertIn('boom', row.last_error)
+
+    def test_idempotency_key_deduplicates(self):
+        self.broker.push(self.job(key='once'))
+        self.broker.push({**self.job(key='once'), 'id': 'another'})
+        self.assertEqual(BackgroundJob.objects.count(), 1)
+
+    def test_share_survives_failed_broadcast(self):
+        sender, recipient = make_users(2)
+        post = Post.objects.create(author=sender, content='look')
+        with mock.patch.object(tasks, 'get_channel_layer', side_effect=ConnectionError('layer down')):
+            tasks.share_with(sender.id, 'post', post.id, recipient.id)
+        message = ChatMessage.objects.get()
+        self.assertEqual(message.shared_post_id, post.id)
+        self.assertEqual(UnreadCounter.objects.get(user=recipient).count, 1)
+
+
+# --- Unread counters ---
+
+class UnreadCounterTests(CacheResetMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice, self.bob = make_users(2)
+        self.room = ChatRoom.objects.create(user1=self.alice, user2=self.bob)
+
+    def send(self, author, count=1):
+        messages = [ChatMessage.objects.create(room=self.room, author=author, content='hi') for _ in range(count)]
+        unread.messages_added(messages)
+
+    def test_messages_count_for_the_other_participant(self):
+        self.send(self.alice, 3)
+        self.assertEqual(unread.summary(self.bob.id)['dms'], 3)
+        self.assertEqual(unread.summary(self.bob.id)['rooms'], {self.room.id: 3})
+        self.assertEqual(unread.summary(self.alice.id)['dms'], 0)
+
+    def test_reading_the_conversation_resets_it(self):
+        self.send(self.alice, 2)
+        unread.conversation_read(self.bob.id, room_id=self.room.id)
+        self.send(self.alice)
+        self.assertEqual(unread.summary(self.bob.id)['dms'], 1)
+
+
+# --- Hashtags ---
+
+class HashtagIndexTests(CacheResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.author, = make_users(1)
+        self.client.force_authenticate(self.author)
+
+    def tags(self, post):
+        return set(post.hashtags.values_list('name', flat=True))
+
+    def test_tags_follow_the_text(self):
+        post = Post.objects.create(author=self.author, content='#Django and #python #django')
+        self.assertEqual(self.tags(post), {'django', 'python'})
+        post.content = 'only #python now'
+        post.save()
+        self.assertEqual(self.tags(post), {'python'})
+
+    def test_counter_updates_leave_tags_alone(self):
+        post = Post.objects.create(author=self.author, content='#keep')
+        post.content = 'edited in memory only'
+        post.save(update_fields=['likes_count'])
+        self.assertEqual(self.tags(post), {'keep'})
+
+    def test_clients_cannot_wipe_tags_through_the_serializer(self):
+        post = Post.objects.create(author=self.author, content='tagged #keep')
+        response = self.client.patch(f'/api/posts/{post.id}/', {'content': 'tagged #keep #more', 'hashtags': []}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.tags(post), {'keep', 'more'})
+        self.assertEqual(Hashtag.objects.filter(name='keep').count(), 1)
+
+
+# --- Search ---
+
+@override_settings(SEARCH_BACKEND='index')
+class SearchIndexTests(CacheResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.author, = make_users(1, prefix='writer')
+        self.match = Post.objects.create(author=self.author, content='Roasting coffee beans at home')
+        self.other = Post.objects.create(author=self.author, content='Brewing tea')
+
+    def ids(self, query):
+        return set(search.ranked('posts', query).values_list('id', flat=True))
+
+    def test_last_word_matches_as_prefix(self):
+        self.assertEqual(self.ids('coffee be'), {self.match.id})
+        self.assertEqual(self.ids('coff'), {self.match.id})
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.ids('coffee tea'), set())
+
+    def test_index_follows_edits_and_deletes(self):
+        self.match.content = 'Roasting cocoa'
+        self.match.save()
+        self.assertEqual(self.ids('coffee'), set())
+        self.other.delete()
+        self.assertEqual(self.ids('tea'), set())
+
+    def test_search_endpoint_ranks_and_paginates(self):
+        response = self.client.get('/api/search/', {'q': 'roasting', 'type': 'posts'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']], [self.match.id])
+        self.assertEqual(self.client.get('/api/search/', {'q': 'x', 'type': 'nope'}).status_code, 400)
+
+
+# --- Home timeline ---
+
+@override_settings(JOBS_BROKER='eager', TIMELINE_FANOUT_MAX_FOLLOWERS=2)
+class TimelineTests(CacheResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.author, *self.fans = make_users(4)
+        for fan in self.fans:
+            Follow.objects.create(follower=fan, following=self.author)
+        Profile.objects.filter(user=self.author).update(followers_count=len(self.fans))
+
+    def feed_ids(self, user):
+        self.client.force_authenticate(user)
+        return [row['id'] for row in self.client.get('/api/posts/').data['results']]
+
+    def test_large_authors_are_pulled_at_read_time(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(author=self.author, content='big news')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exclude(owner=self.author).exists())
+        self.assertIn(post.id, self.feed_ids(self.fans[0]))
+
+    def test_dropping_under_the_limit_backfills_followers(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(author=self.author, content='written while big')
+        Follow.objects.filter(follower=self.fans[0], following=self.author).delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            adjust_profile(self.author.id, followers_count=-1)
+        owners = set(TimelineEntry.objects.filter(post=post).values_list('owner_id', flat=True))
+        self.assertEqual(owners, {self.author.id, self.fans[1].id, self.fans[2].id})
+        self.assertIn(post.id, self.feed_ids(self.fans[1]))
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=5000)
+    def test_lapsed_subscription_hides_exclusive_posts(self):
+        fan = self.fans[0]
+        subscription = UserSubscription.objects.create(subscriber=fan, creator=self.author, tier='basic', status='active')
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(author=self.author, content='members only', is_exclusive=True)
+        self.assertIn(post.id, self.feed_ids(fan))
+
+        # Expiry sends no signal, so the timeline still holds the entry; the read must filter it
+        UserSubscription.objects.filter(pk=subscription.pk).update(expiry_date=timezone.now() - timedelta(days=1))
+        self.assertNotIn(post.id, self.feed_ids(fan))
+
+
+# --- Reels ---
+
+class ReelFeedTests(CacheResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.viewer, self.follower, self.private, self.public = make_users(4)
+        Profile.objects.filter(user=self.private).update(is_private=True)
+        Follow.objects.create(follower=self.follower, following=self.private)
+        self.hidden = Reel.objects.create(author=self.private, caption='private', media_file='reels/a.mp4')
+        self.shown = Reel.objects.create(author=self.public, caption='public', media_file='reels/b.mp4')
+
+    def feed_ids(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get('/api/reels/')
+        self.assertEqual(response.status_code, 200)
+        return {row['id'] for row in response.data['results']}
+
+    def test_private_authors_only_reach_followers(self):
+        self.assertEqual(self.feed_ids(self.viewer), {self.shown.id})
+        self.assertEqual(self.feed_ids(self.follower), {self.shown.id, self.hidden.id})
+        self.assertIn(self.hidden.id, self.feed_ids(self.private))
+
+    def test_going_private_drops_cached_reels(self):
+        self.assertIn(self.shown.id, self.feed_ids(self.viewer))
+        profile = Profile.objects.get(user=self.public)
+        profile.is_private = True
+        profile.save()
+        self.assertNotIn(self.shown.id, self.feed_ids(self.viewer))
+
+
+# --- Push and chat delivery ---
+
+class FCMRetryAfterTests(TestCase):
+    def response(self, value):
+        return mock.Mock(headers={'Retry-After': value} if value is not None else {})
+
+    def test_parses_seconds_and_http_dates(self):
+        self.assertEqual(fcm_service._retry_after(self.response('7'), 1), 7)
+        later = timezone.now() + timedelta(seconds=10)
+        self.assertAlmostEqual(fcm_service._retry_after(self.response(later.strftime('%a, %d %b %Y %H:%M:%S GMT')), 1), 10, delta=2)
+
+    def test_falls_back_to_backoff(self):
+        for value in (None, 'soon', 'nan'):
+            with self.subTest(value=value):
+                self.assertEqual(fcm_service._retry_after(self.response(value), 1.5), 1.5)
+        self.assertEqual(fcm_service._retry_after(self.response('9999'), 1), fcm_service.MAX_RETRY_AFTER)
+
+    def test_no_sleep_after_last_attempt(self):
+        dispatcher = fcm_service.PushDispatcher()
+        dispatcher._session = mock.Mock()
+        dispatcher._session.post.return_value = mock.Mock(status_code=503, headers={'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+        with mock.patch.object(fcm_service.time, 'sleep') as sleep:
+            self.assertEqual(dispatcher._post({'data': {}}, ['token']), (0, set(), {}))
+        self.assertEqual(dispatcher._session.post.call_count, fcm_service.MAX_ATTEMPTS)
+        self.assertEqual(sleep.call_count, 0)  # A past HTTP-date means retry at once
+
+
+class ChatWriteBehindTests(TestCase):
+    @override_settings(CHAT_WRITE_BEHIND=True)
+    def test_unsupported_database_falls_back_to_synchronous_saves(self):
+        self.assertTrue(chat_writer.enabled())
+        with mock.patch.object(type(connection._connections[connection._alias]), 'vendor', 'mysql'):
+            self.assertFalse(chat_writer.enabled())
+
+    def test_reserved_ids_do_not_collide(self):
+        alice, bob = make_users(2)
+        room = ChatRoom.objects.create(user1=alice, user2=bob)
+        first = chat_writer.reserve_ids(3)
+        created = ChatMessage.objects.create(room=room, author=alice, content='via ORM')
+        self.assertEqual(len(set(first) | set(chat_writer.reserve_ids(3)) | {created.id}), 7)
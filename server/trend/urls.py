@@ -41,6 +41,8 @@ urlpatterns = [
     
     # Live User Search (NEW)
     path('users/search/', views.UserSearchView.as_view(), name='user_search'),
+    path('users/mentions/', views.UserMentionView.as_view(), name='user_mentions'),
+    path('search/', views.ContentSearchView.as_view(), name='content_search'),
 
     # User Block functionality
     path('blocks/', views.UserBlockListView.as_view(), name='user_block_list'),
@@ -135,6 +137,7 @@ path('stories/<int:story_id>/analytics/', views.StoryAnalyticsView.as_view(), na
     path('notifications/', views.NotificationListView.as_view(), name='notification_list'),
     path('notifications/read-all/', views.MarkAllNotificationsReadView.as_view(), name='mark_all_unread'),
     path('notifications/<int:pk>/<str:action>/', views.NotificationActionView.as_view(), name='notification_action'),
+    path('unread/', views.UnreadCountsView.as_view(), name='unread_counts'),
     path('reports/', views.ReportCreateView.as_view(), name='report_create'),
     path('save/', views.SaveToggleView.as_view(), name='save_toggle'),
     path('saved/', views.SavedItemsListView.as_view(), name='saved_list'),
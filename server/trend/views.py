@@ -4,53 +4,15 @@ import os
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 from django.contrib.auth.models import User
-from django.db.models import Count, Q 
+from django.db.models import Count, F, Q 
 from django.utils import timezone
 from django.core.mail import send_mail
 from django.conf import settings
 from django.shortcuts import get_object_or_404
 import random
-import urllib.request
 import json
 import os
-
-def send_email_via_api(to_email, subject, text_content):
-    """
-    Sends email via Brevo REST API (HTTPS port 443) 
-    to bypass Render's block on SMTP ports (25, 465, 587).
-    """
-    url = "https://api.brevo.com/v3/smtp/email"
-    
-    # Brevo API keys typically start with 'xkeysib-'
-    api_key = os.environ.get('BREVO_API_KEY') or os.environ.get('SENDINBLUE_API_KEY')
-    
-    if not api_key:
-        api_key = os.environ.get('EMAIL_HOST_PASSWORD')
-        
-    sender_email = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@trendtwist.com')
-    
-    if not api_key or api_key.startswith('xsmtpsib-'):
-        raise Exception("API Key required! The key 'xsmtpsib-...' is an SMTP password, NOT a REST API key. Generate a real API Key (starts with 'xkeysib-') from your Brevo Dashboard -> 'SMTP & API' -> 'API Keys'. Add it as 'BREVO_API_KEY' in your backend environment.")
-        
-    data = {
-        "sender": {"name": "Trend Twist", "email": sender_email},
-        "to": [{"email": to_email}],
-        "subject": subject,
-        "textContent": text_content
-    }
-    
-    encoded_data = json.dumps(data).encode('utf-8')
-    req = urllib.request.Request(url, data=encoded_data)
-    req.add_header('api-key', api_key)
-    req.add_header('Content-Type', 'application/json')
-    req.add_header('Accept', 'application/json')
-    
-    try:
-        with urllib.request.urlopen(req) as response:
-            return response.read()
-    except urllib.error.HTTPError as e:
-        error_msg = e.read().decode()
-        raise Exception(f"Brevo API Error {e.code}: {error_msg}")
+from datetime import timedelta
 
 from rest_framework import generics, permissions, status, viewsets, serializers
 from rest_framework.response import Response
@@ -68,13 +30,13 @@ from .models import (
     Profile, Post, Comment, Like, Twist, Hashtag, Follow, OTPRequest,
     Story, StoryView, FollowRequest, ChatRoom, ChatMessage,
     Reel, ReelLike, ReelComment, StoryLike, TwistComment, TwistLike, ChatGroup,
-    SavedItem, WithdrawalRequest
+    SavedItem, WithdrawalRequest, FCMDevice
 )
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 # Import all serializers
 from .serializers import (
-    UserSerializer, ProfileSerializer, PostSerializer, CommentSerializer, TwistSerializer,
+    UserSerializer, UserCardSerializer, ProfileSerializer, PostSerializer, CommentSerializer, TwistSerializer,
     FollowerSerializer, FollowingSerializer, HashtagSerializer,
     LoginSerializer, RegisterSerializer,
     StorySerializer, FollowRequestSerializer, ChatRoomSerializer, ChatMessageSerializer,
@@ -83,6 +45,16 @@ from .serializers import (
     WithdrawalRequestSerializer, AdminWithdrawalActionSerializer
 )
 from channels.db import database_sync_to_async
+from .services.engagement import build_engagement
+from .services.viewer import get_viewer
+from .services.inbox import MESSAGE_RELATED, build_inbox, group_inbox, room_inbox, with_group_members
+from .services.counters import adjust, adjust_profile
+from .services import hashtags, mentions, notifications, search, trending, unread
+from .services.notifications import NotificationEvent
+from .services.timeline import HomeFeed
+from .services.reels import ReelStream
+from .tasks import notify, send_email, share_with
+from .pagination import KeysetPagination, FeedPagination, ThreadPagination, InboxPagination, MessageHistoryPagination, HomeFeedPagination, ReelFeedPagination, SearchPagination
 # --- Permissions ---
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
@@ -97,6 +69,39 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         return False
 
 
+# --- View Mixins ---
+
+class EngagementContextMixin:
+    """
+    For list views of Posts, Reels, Twists or SavedItems: computes counts and
+    liked/saved flags for the whole page in a handful of grouped
+    queries and passes them to the serializer as context['engagement'].
+    """
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get('many') and args:
+            page = list(args[0])
+            args = (page,) + args[1:]
+            context = kwargs.setdefault('context', self.get_serializer_context())
+            context['engagement'] = build_engagement(page, self.request.user)
+        return super().get_serializer(*args, **kwargs)
+
+
+class InboxContextMixin:
+    """
+    For the DM / group inbox: loads last messages and unread counts for the
+    whole page in two queries and passes them as context['inbox'], plus the
+    peers' presence as context['presence'].
+    """
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get('many') and args:
+            page = list(args[0])
+            args = (page,) + args[1:]
+            context = kwargs.setdefault('context', self.get_serializer_context())
+            context['inbox'] = build_inbox(page, self.request.user)
+            context['presence'] = context['inbox'].presence
+        return super().get_serializer(*args, **kwargs)
+
+
 # ----------------------------------------------------------------------
 #                             AUTHENTICATION
 # ----------------------------------------------------------------------
@@ -229,6 +234,28 @@ class PasswordLoginView(APIView):
         
         return Response({"error": "Invalid credentials."}, status=status.HTTP_401_UNAUTHORIZED)
 
+def issue_otp(email, purpose, subject, message):
+    """
+    Stores an OTP for `email` and queues the email carrying it. A code sent in the
+    last OTP_RESEND_SECONDS is reused, so repeated taps don't send a burst of
+    different codes (the idempotency key drops the duplicate email).
+    """
+    from .models import OTPRequest
+
+    recent = OTPRequest.objects.filter(
+        email=email, created_at__gte=timezone.now() - timedelta(seconds=getattr(settings, 'OTP_RESEND_SECONDS', 60))
+    ).order_by('-created_at').first()
+    if recent and not recent.is_expired():
+        otp = recent.otp
+    else:
+        otp = str(random.randint(100000, 999999))
+        OTPRequest.objects.filter(email=email).delete()
+        OTPRequest.objects.create(email=email, otp=otp)
+    send_email.apply_async(
+        args=(email, subject, message.format(otp=otp)),
+        idempotency_key=f'otp:{purpose}:{email}:{otp}',
+    )
+
 class SendSecurityOTPView(APIView):
     """Sends OTP to the authenticated user's current email for security changes."""
     permission_classes = [IsAuthenticated]
@@ -238,24 +265,11 @@ class SendSecurityOTPView(APIView):
         if not email:
             return Response({"error": "No email associated with this account."}, status=status.HTTP_400_BAD_REQUEST)
             
-        import random
-        from .models import OTPRequest
-        
-        otp = str(random.randint(100000, 999999))
-        
-        try:
-            send_email_via_api(
-                to_email=email,
-                subject='Trend Twist Security Update OTP',
-                text_content=f'Your OTP to change your password is {otp}. It is valid for 5 minutes.'
-            )
-        except Exception as e:
-            print("Mail Error:", str(e))
-            return Response({"error": f"Failed to send email: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
-        OTPRequest.objects.filter(email=email).delete()
-        OTPRequest.objects.create(email=email, otp=otp)
-        
+        issue_otp(
+            email, 'security',
+            subject='Trend Twist Security Update OTP',
+            message='Your OTP to change your password is {otp}. It is valid for 5 minutes.',
+        )
         return Response({"message": f"OTP sent to {email}."}, status=status.HTTP_200_OK)
 
 class UpdatePasswordView(APIView):
@@ -314,24 +328,11 @@ class ForgotPasswordSendOTPView(APIView):
             
         email = user.email
             
-        import random
-        from .models import OTPRequest
-        
-        otp = str(random.randint(100000, 999999))
-        
-        try:
-            send_email_via_api(
-                to_email=email,
-                subject='Trend Twist Password Reset OTP',
-                text_content=f'Your OTP to reset your password is {otp}. It is valid for 5 minutes.'
-            )
-        except Exception as e:
-            print("Mail Error:", str(e))
-            return Response({"error": f"Failed to send email: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
-        OTPRequest.objects.filter(email=email).delete()
-        OTPRequest.objects.create(email=email, otp=otp)
-        
+        issue_otp(
+            email, 'password_reset',
+            subject='Trend Twist Password Reset OTP',
+            message='Your OTP to reset your password is {otp}. It is valid for 5 minutes.',
+        )
         return Response({"message": f"OTP sent to {email}."}, status=status.HTTP_200_OK)
 
 
@@ -388,22 +389,11 @@ class SendOTPView(APIView):
         if User.objects.filter(email__iexact=email).exists():
             return Response({"error": "This email is already registered."}, status=status.HTTP_400_BAD_REQUEST)
             
-        # Generate 6 digit OTP
-        otp = str(random.randint(100000, 999999))
-        
-        try:
-            send_email_via_api(
-                to_email=email,
-                subject='Trend Twist Registration OTP',
-                text_content=f'Your OTP for registration is {otp}. It is valid for 5 minutes.'
-            )
-        except Exception as e:
-            print("Mail Error:", str(e))
-            return Response({"error": f"Failed to send email: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
-        OTPRequest.objects.filter(email=email).delete()
-        OTPRequest.objects.create(email=email, otp=otp)
-        
+        issue_otp(
+            email, 'registration',
+            subject='Trend Twist Registration OTP',
+            message='Your OTP for registration is {otp}. It is valid for 5 minutes.',
+        )
         return Response({"message": "OTP sent successfully."}, status=status.HTTP_200_OK)
 
 class PasswordRegisterView(APIView):
@@ -473,7 +463,8 @@ class UserProfileDetailView(generics.RetrieveAPIView):
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         is_private = instance.profile.is_private
-        is_following = Follow.objects.filter(follower=request.user, following=instance).exists()
+        viewer = get_viewer(request.user)
+        is_following = viewer.is_following(instance.id)
         is_owner = request.user == instance
 
         # Check privacy condition
@@ -482,7 +473,7 @@ class UserProfileDetailView(generics.RetrieveAPIView):
                 'id': instance.id,
                 'username': instance.username,
                 'profile': {'is_private': True, 'profile_picture': instance.profile.profile_picture.url if instance.profile.profile_picture else None},
-                'has_pending_request': FollowRequest.objects.filter(sender=request.user, receiver=instance).exists()
+                'has_pending_request': viewer.has_pending_request(instance.id)
             }
             return Response(basic_data, status=status.HTTP_200_OK)
 
@@ -491,23 +482,69 @@ class UserProfileDetailView(generics.RetrieveAPIView):
 
 
 class UserSearchView(generics.ListAPIView):
-    """GET /api/users/search/?q=<query> - Searches users by username or name."""
-    serializer_class = UserSerializer
+    """
+    GET /api/users/search/?q=<query> - Searches users by username or name.
+    Ranked by services/search.py, best match first; the last word matches as a prefix.
+    """
+    serializer_class = UserCardSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = SearchPagination
 
     def get_queryset(self):
-        query = self.request.query_params.get('q', None)
-        if query:
-            return User.objects.filter(
-                Q(username__icontains=query) |
-                Q(first_name__icontains=query) |
-                Q(last_name__icontains=query)
-            ).exclude(id=self.request.user.id).exclude(profile__blocked_until__gt=timezone.now()).order_by('username')
-        return User.objects.none()
+        users = User.objects.exclude(id=self.request.user.id).exclude(profile__blocked_until__gt=timezone.now()).select_related('profile')
+        return search.ranked('users', self.request.query_params.get('q', ''), users)
         
     def get_serializer_context(self): return {'request': self.request}
 
-class UserPostListView(generics.ListAPIView):
+
+class UserMentionView(APIView):
+    """
+    GET /api/users/mentions/?q=<prefix>&limit=8
+    Per-keystroke @mention / share-picker suggestions from the prefix index
+    (services/mentions.py): people you follow first, no database queries.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', 8))
+        except ValueError:
+            limit = 8
+        return Response(mentions.suggest(request.user, request.query_params.get('q', ''), limit, request))
+
+
+class ContentSearchView(EngagementContextMixin, generics.ListAPIView):
+    """
+    GET /api/search/?q=<query>&type=posts|twists|reels
+    Ranked full-text search over public content (services/search.py), paginated best match first.
+    """
+    permission_classes = [AllowAny]
+    pagination_class = SearchPagination
+    serializer_classes = {'posts': PostSerializer, 'twists': TwistSerializer, 'reels': ReelSerializer}
+
+    def get_kind(self):
+        kind = self.request.query_params.get('type', 'posts')
+        if kind not in self.serializer_classes:
+            raise serializers.ValidationError({'type': f"Must be one of {', '.join(self.serializer_classes)}."})
+        return kind
+
+    def get_serializer_class(self):
+        return self.serializer_classes[self.get_kind()]
+
+    def get_queryset(self):
+        kind = self.get_kind()
+        if kind == 'posts':
+            queryset = Post.objects.select_related('author__profile').prefetch_related('hashtags')
+        elif kind == 'twists':
+            queryset = Twist.objects.select_related('author__profile', 'original_post__author__profile').prefetch_related('original_post__hashtags')
+        else:
+            queryset = Reel.objects.select_related('author__profile').filter(is_draft=False)
+        queryset = queryset.filter(author__profile__is_private=False, is_exclusive=False).exclude(author__profile__blocked_until__gt=timezone.now())
+        return search.ranked(kind, self.request.query_params.get('q', ''), queryset)
+
+    def get_serializer_context(self): return {'request': self.request}
+
+class UserPostListView(EngagementContextMixin, generics.ListAPIView):
     """
     GET /api/users/<user_id>/posts/
     Retrieves a list of all posts made by a specific user.
@@ -515,20 +552,17 @@ class UserPostListView(generics.ListAPIView):
     """
     serializer_class = PostSerializer
     permission_classes = [AllowAny] # Permissions are handled by the PostSerializer/ProfilePage logic
+    pagination_class = FeedPagination
     
     def get_queryset(self):
         user_id = self.kwargs['user_id']
         requesting_user = self.request.user
         
         # Base queryset
-        queryset = Post.objects.filter(author_id=user_id).exclude(author__profile__blocked_until__gt=timezone.now())
+        queryset = Post.objects.select_related('author__profile').prefetch_related('hashtags').filter(author_id=user_id).exclude(author__profile__blocked_until__gt=timezone.now())
         
         # Check if the requesting user has access to exclusive content
-        try:
-            target_author = User.objects.get(id=user_id)
-            can_see_exclusive = has_subscription_access(requesting_user, target_author)
-        except User.DoesNotExist:
-            can_see_exclusive = False
+        can_see_exclusive = has_subscription_access(requesting_user, int(user_id))
             
         if not can_see_exclusive:
             queryset = queryset.filter(is_exclusive=False)
@@ -557,6 +591,8 @@ class FollowToggleView(APIView):
         follow_obj = Follow.objects.filter(follower=request.user, following=user_to_follow).first()
         if follow_obj:
             follow_obj.delete()
+            adjust_profile(request.user.id, following_count=-1)
+            adjust_profile(user_to_follow.id, followers_count=-1)
             return Response({"status": "unfollowed"}, status=status.HTTP_200_OK)
 
         is_private = user_to_follow.profile.is_private
@@ -566,26 +602,8 @@ class FollowToggleView(APIView):
             # Request already pending, delete it (cancel request)
             
             # NEW: Also remove the associated notification so it doesn't stay in the receiver's list
-            notif_to_delete = Notification.objects.filter(follow_request_ref=pending_request).first()
-            if notif_to_delete:
-                notif_id = notif_to_delete.id
-                notif_to_delete.delete()
-                
-                # Broadcast deletion to receiver to remove from their list in real-time
-                try:
-                    channel_layer = get_channel_layer()
-                    async_to_sync(channel_layer.group_send)(
-                        f"user_{user_to_follow.id}",
-                        {
-                            'type': 'notification_message',
-                            'data': {
-                                'action': 'deleted',
-                                'id': notif_id 
-                            }
-                        }
-                    )
-                except: pass
-            
+            # (signals.py tells the receiver's clients to drop it in real-time)
+            Notification.objects.filter(follow_request_ref=pending_request).delete()
             pending_request.delete()
 
             return Response({"status": "request_cancelled"}, status=status.HTTP_200_OK)
@@ -594,48 +612,19 @@ class FollowToggleView(APIView):
             # Private: Send request
             req, created = FollowRequest.objects.get_or_create(sender=request.user, receiver=user_to_follow)
 
-            # Check if Notification already exists (e.g. from signal)
-            existing_notif = Notification.objects.filter(
-                recipient=user_to_follow, 
-                sender=request.user, 
-                notification_type='follow_request', 
-                follow_request_ref=req
-            ).first()
-
-            if not existing_notif:
-                # Creating Notification
-                try:
-                    notif = Notification.objects.create(
-                        recipient=user_to_follow,
-                        sender=request.user,
-                        notification_type='follow_request',
-                        follow_request_ref=req
-                    )
-                    
-                    # Broadcast
-                    channel_layer = get_channel_layer()
-                    async_to_sync(channel_layer.group_send)(
-                        f"user_{user_to_follow.id}",
-                        {
-                            'type': 'notification_message', # This triggers the frontend update
-                            'data': NotificationSerializer(notif).data
-                        }
-                    )
-                except Exception as e:
-                    print(f"Notification error: {e}")
+            # Upserts on the (receiver, sender) follow key, so a repeat request reuses the row
+            notifications.emit([NotificationEvent(user_to_follow.id, request.user.id, 'follow_request', follow_request_ref=req)])
 
             return Response({"status": "request_sent"}, status=status.HTTP_201_CREATED)
         else:
             # Public: Instant follow
             Follow.objects.create(follower=request.user, following=user_to_follow)
+            adjust_profile(request.user.id, following_count=1)
+            adjust_profile(user_to_follow.id, followers_count=1)
             
             # Creating Notification (Optional for Follow Accept/Public Follow)
             try:
-                notif = Notification.objects.create(
-                    recipient=user_to_follow,
-                    sender=request.user,
-                    notification_type='follow_accept' # or create a new type 'new_follower'
-                )
+                notifications.emit([NotificationEvent(user_to_follow.id, request.user.id, 'follow_accept')], push=False) # or create a new type 'new_follower'
                 # Note: 'follow_accept' usually implies a request was accepted. 
                 # Ideally, we should have a 'new_follower' type. 
                 # For now, using 'follow_accept' broadly or skipping notification for public follow if not desired.
@@ -656,6 +645,7 @@ class FollowRequestListView(generics.ListAPIView):
     """GET /api/requests/ - Lists all pending follow requests for the current user."""
     serializer_class = FollowRequestSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     def get_queryset(self):
         return FollowRequest.objects.filter(receiver=self.request.user).order_by('-created_at')
 
@@ -672,6 +662,8 @@ class FollowRequestActionView(APIView):
 
         if action == 'accept':
             Follow.objects.create(follower=follow_request.sender, following=follow_request.receiver)
+            adjust_profile(follow_request.sender_id, following_count=1)
+            adjust_profile(follow_request.receiver_id, followers_count=1)
             follow_request.delete()
             return Response({"status": "request_accepted"}, status=status.HTTP_200_OK)
 
@@ -685,18 +677,22 @@ class FollowRequestActionView(APIView):
 #                               LIVE CHAT
 # ----------------------------------------------------------------------
 
-class ChatRoomListView(generics.ListAPIView):
+class ChatRoomListView(InboxContextMixin, generics.ListAPIView):
     """GET /api/chats/ - Lists all chat rooms for the authenticated user (Inbox)."""
     serializer_class = ChatRoomSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = InboxPagination
 
     def get_queryset(self):
-        return ChatRoom.objects.filter(Q(user1=self.request.user) | Q(user2=self.request.user)).order_by('-last_message_at')
+        return room_inbox(self.request.user).order_by('-last_message_at')
         
     def get_serializer_context(self): return {'request': self.request}
 
 class ChatRoomDetailView(APIView):
-    """GET /api/chats/<user_id>/ - Retrieves the chat history with a specific user."""
+    """
+    GET /api/chats/<user_id>/ - The chat history with a specific user, newest page first
+    (see MessageHistoryPagination for ?cursor= and ?since=<message_id>).
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request, user_id):
@@ -712,21 +708,25 @@ class ChatRoomDetailView(APIView):
 
         # Mark all unread messages from the other user as read
         ChatMessage.objects.filter(room=room, is_read=False).exclude(author=request.user).update(is_read=True)
+        unread.conversation_read(request.user.id, room_id=room.id)
 
-        messages = ChatMessage.objects.filter(room=room).order_by('timestamp')
+        paginator = MessageHistoryPagination()
+        messages = paginator.paginate_queryset(
+            ChatMessage.objects.filter(room=room).select_related(*MESSAGE_RELATED), request, view=self
+        )
         serializer = ChatMessageSerializer(messages, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
 
-
-class ChatGroupListView(generics.ListCreateAPIView):
+class ChatGroupListView(InboxContextMixin, generics.ListCreateAPIView):
     """GET /api/groups/ - List all chat groups | POST - Create new group"""
     serializer_class = ChatGroupSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = InboxPagination
     parser_classes = [MultiPartParser, FormParser]
 
     def get_queryset(self):
-        return self.request.user.chat_groups.all().order_by('-last_message_at')
+        return group_inbox(self.request.user).order_by('-last_message_at')
 
     def perform_create(self, serializer):
         group = serializer.save(admin=self.request.user)
@@ -742,7 +742,7 @@ class ChatGroupListView(generics.ListCreateAPIView):
 
 class ChatGroupDetailView(generics.RetrieveUpdateDestroyAPIView):
     """GET/PUT/DELETE /api/groups/<pk>/"""
-    queryset = ChatGroup.objects.all()
+    queryset = with_group_members(ChatGroup.objects.all())
     serializer_class = ChatGroupSerializer
     permission_classes = [IsAuthenticated]
 
@@ -762,23 +762,26 @@ class ChatGroupDetailView(generics.RetrieveUpdateDestroyAPIView):
              member_ids = [int(id) for id in remove_members_str.split(',') if id.isdigit()]
              users = User.objects.filter(id__in=member_ids)
              group.members.remove(*users)
+             unread.members_left(group.id, member_ids)
 
 class ChatGroupMessageListView(generics.ListAPIView):
-    """GET /api/groups/<pk>/messages/"""
+    """GET /api/groups/<pk>/messages/ - Paginated like ChatRoomDetailView."""
     serializer_class = ChatMessageSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = MessageHistoryPagination
 
     def get_queryset(self):
-        group_id = self.kwargs['pk']
-        try:
-             group = ChatGroup.objects.get(pk=group_id)
-        except ChatGroup.DoesNotExist: return ChatMessage.objects.none()
-
         # Verify membership
-        if self.request.user not in group.members.all():
+        if not ChatGroup.objects.filter(pk=self.kwargs['pk'], members=self.request.user).exists():
             return ChatMessage.objects.none()
 
-        return ChatMessage.objects.filter(group=group).order_by('timestamp')
+        return ChatMessage.objects.filter(group_id=self.kwargs['pk']).select_related(*MESSAGE_RELATED)
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        # Opening the group reads it (a no-op for non-members, who have no counter)
+        unread.conversation_read(request.user.id, group_id=self.kwargs['pk'])
+        return response
 
 
 class SendMessageView(APIView):
@@ -803,7 +806,8 @@ class SendMessageView(APIView):
         if group_id:
             try:
                 group = ChatGroup.objects.get(pk=group_id)
-                if request.user not in group.members.all():
+                members = list(group.members.all())
+                if request.user not in members:
                      return Response({"error": "Not a member."}, status=status.HTTP_403_FORBIDDEN)
 
                 group.last_message_at = timezone.now()
@@ -815,6 +819,7 @@ class SendMessageView(APIView):
                     content=content,
                     story_reply=story_ref
                 )
+                unread.messages_added([msg])
 
                 # Broadcast to Group Room
                 channel_layer = get_channel_layer()
@@ -830,7 +835,7 @@ class SendMessageView(APIView):
                 )
 
                 # Broadcast Global Alert to all members (Except Sender)
-                for member in group.members.all():
+                for member in members:
                     if member != request.user:
                         alert_data = {
                             'type': 'chat_alert',
@@ -844,14 +849,15 @@ class SendMessageView(APIView):
                             }
                         }
                         async_to_sync(channel_layer.group_send)(f"user_{member.id}", alert_data)
-                        
-                        # Send FCM for background/killed state
-                        from .services.fcm_service import send_message_notification
-                        send_message_notification(
-                            sender=request.user,
-                            recipient=member,
-                            content=f"{request.user.username}: {msg.content}",
-                        )
+
+                # FCM for background/killed state: one queued job for the whole group
+                from .services.fcm_service import send_group_message_notification
+                send_group_message_notification(
+                    sender=request.user,
+                    group=group,
+                    recipient_ids=[m.id for m in members if m.id != request.user.id],
+                    content=f"{request.user.username}: {msg.content}",
+                )
 
                 return Response(ChatMessageSerializer(msg, context={'request': request}).data, status=status.HTTP_201_CREATED)
 
@@ -880,6 +886,7 @@ class SendMessageView(APIView):
                 content=content,
                 story_reply=story_ref
             )
+            unread.messages_added([msg])
 
             # Broadcast to WebSocket Group
             channel_layer = get_channel_layer()
@@ -930,87 +937,43 @@ class SendMessageView(APIView):
 # ----------------------------------------------------------------------
 
 
-from rest_framework.pagination import PageNumberPagination
-
-class FeedPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 100
-
-class PostListCreateView(generics.ListCreateAPIView):
+class PostListCreateView(EngagementContextMixin, generics.ListCreateAPIView):
     """List posts from followed users (Main Feed) or create a new post."""
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
-    pagination_class = FeedPagination
+    pagination_class = HomeFeedPagination
     
     def get_queryset(self):
-        from django.db.models import Case, When, Value, IntegerField
-        user = self.request.user
+        # Followed + self posts come from the precomputed timeline (services/timeline.py),
+        # followed by public posts from everyone else.
         search_query = self.request.query_params.get('search', None) # Simplified search
-        
-        # Base Feed: Following + Self + Public users
-        following_users = Follow.objects.filter(follower=user).values_list('following_id', flat=True)
-        following_users = list(following_users) + [user.id]
-
-        # EXCLUDE exclusive posts from the main feed UNLESS the user is the author or a subscriber
-        # Get users I am subscribed to
-        from .models import UserSubscription
-        subscribed_to_ids = UserSubscription.objects.filter(
-            subscriber=user, status='active'
-        ).filter(
-            Q(expiry_date__isnull=True) | Q(expiry_date__gt=timezone.now())
-        ).values_list('creator_id', flat=True)
-
-        is_following_or_self = Q(author_id__in=following_users)
-
-        queryset = Post.objects.filter(
-            is_following_or_self | Q(author__profile__is_private=False)
-        ).exclude(
-            author__profile__blocked_until__gt=timezone.now()
-        ).filter(
-            Q(is_exclusive=False) | Q(author=user) | Q(author_id__in=subscribed_to_ids)
-        )
+        return HomeFeed(self.request.user, search=search_query)
 
-        # Basic text search support for main feed
-        if search_query:
-            queryset = queryset.filter(content__icontains=search_query)
-
-        # Annotate whether the user is followed (or self). 
-        # Then sort by 'is_followed' descending (followed users at top), then created_at descending.
-        queryset = queryset.annotate(
-            is_followed=Case(
-                When(author_id__in=following_users, then=Value(1)),
-                default=Value(0),
-                output_field=IntegerField()
-            )
-        )
-
-        return queryset.order_by('-is_followed', '-created_at')
-
-    def perform_create(self, serializer): serializer.save(author=self.request.user)
+    def perform_create(self, serializer):
+        serializer.save(author=self.request.user)
+        adjust_profile(self.request.user.id, posts_count=1)
     def get_serializer_context(self): return {'request': self.request}
 
 
 # NEW: Public/Trending Feed View
-class PublicPostListView(generics.ListAPIView):
+class PublicPostListView(EngagementContextMixin, generics.ListAPIView):
     """
     GET /api/posts/public/?tag=<trend>
     Returns PUBLIC posts matching a specific hashtag or search term.
     """
     serializer_class = PostSerializer
     permission_classes = [AllowAny] # It's a public discovery feed
+    pagination_class = FeedPagination
     
     def get_queryset(self):
         tag = self.request.query_params.get('tag', None)
         # Exclude exclusive posts from public feed
-        queryset = Post.objects.filter(author__profile__is_private=False, is_exclusive=False).exclude(author__profile__blocked_until__gt=timezone.now()).order_by('-created_at')
+        queryset = Post.objects.select_related('author__profile').prefetch_related('hashtags').filter(author__profile__is_private=False, is_exclusive=False).exclude(author__profile__blocked_until__gt=timezone.now()).order_by('-created_at')
         
         if tag:
-            # Filter by hashtag (naive text search for now, ideally use Hashtag model relations)
-            # Or use the Hashtag model reverse lookup if it was reliably populated.
-            # For robustness sake -> Text Search
-            queryset = queryset.filter(content__icontains=f"#{tag}")
+            # Indexed join through Hashtag.posts (kept in sync by services/hashtags.py)
+            queryset = queryset.filter(hashtags__name=hashtags.normalize(tag))
             
         return queryset
 
@@ -1022,6 +985,11 @@ class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
     def get_serializer_context(self): return {'request': self.request}
 
+    def perform_destroy(self, instance):
+        author_id = instance.author_id
+        instance.delete()
+        adjust_profile(author_id, posts_count=-1)
+
 class LikeToggleView(APIView):
     permission_classes = [IsAuthenticated]
     def post(self, request, pk):
@@ -1031,28 +999,16 @@ class LikeToggleView(APIView):
         like_obj, created = Like.objects.get_or_create(user=request.user, post=post)
         if not created:
             like_obj.delete()
+            adjust(Post, post.pk, likes_count=-1)
             return Response({"status": "unliked"}, status=status.HTTP_200_OK)
+        adjust(Post, post.pk, likes_count=1)
         
-        # Create Notification
-        if post.author != request.user:
-            try:
-                notif = Notification.objects.create(
-                    recipient=post.author,
-                    sender=request.user,
-                    notification_type='like_post',
-                    post=post
-                )
-                
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    f"user_{post.author.id}",
-                    {
-                        'type': 'notification_message',
-                        'data': NotificationSerializer(notif).data
-                    }
-                )
-            except Exception as e:
-                print(f"Notification error: {e}")
+        # Create Notification (background job)
+        if post.author_id != request.user.id:
+            notify.apply_async(
+                args=(post.author_id, request.user.id, 'like_post'), kwargs={'post_id': post.id},
+                idempotency_key=f'like_post:{like_obj.pk}',
+            )
 
         return Response({"status": "liked"}, status=status.HTTP_201_CREATED)
 
@@ -1060,6 +1016,7 @@ class CommentListCreateView(generics.ListCreateAPIView):
     """GET/POST /api/posts/<pk>/comments/"""
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ThreadPagination
 
     def get_queryset(self):
         post_id = self.kwargs['pk']
@@ -1067,28 +1024,15 @@ class CommentListCreateView(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         post = Post.objects.get(pk=self.kwargs['pk'])
-        serializer.save(author=self.request.user, post=post)
-        
-        # Create Notification
-        if post.author != self.request.user:
-            try:
-                notif = Notification.objects.create(
-                    recipient=post.author,
-                    sender=self.request.user,
-                    notification_type='comment_post',
-                    post=post
-                )
-
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    f"user_{post.author.id}",
-                    {
-                        'type': 'notification_message',
-                        'data': NotificationSerializer(notif).data
-                    }
-                )
-            except Exception as e:
-                print(f"Notification error: {e}")
+        comment = serializer.save(author=self.request.user, post=post)
+        adjust(Post, post.pk, comments_count=1)
+        
+        # Create Notification (background job)
+        if post.author_id != self.request.user.id:
+            notify.apply_async(
+                args=(post.author_id, self.request.user.id, 'comment_post'), kwargs={'post_id': post.id},
+                idempotency_key=f'comment_post:{comment.pk}',
+            )
         
     def get_serializer_context(self): return {'request': self.request}
 
@@ -1100,50 +1044,56 @@ class CommentDetailView(generics.DestroyAPIView):
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
     def get_serializer_context(self): return {'request': self.request}
 
+    def perform_destroy(self, instance):
+        post_id = instance.post_id
+        instance.delete()
+        adjust(Post, post_id, comments_count=-1)
+
 
 
 # --- Twist Views (Standalone) ---
 
-class TwistListCreateView(generics.ListCreateAPIView):
+class TwistListCreateView(EngagementContextMixin, generics.ListCreateAPIView):
     """
     GET /api/twists/ - List twists from following users (Feed)
     POST /api/twists/ - Create a new twist
     """
     serializer_class = TwistSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = FeedPagination
     parser_classes = [MultiPartParser, FormParser]
 
     def get_queryset(self):
         user = self.request.user
-        following_users = list(Follow.objects.filter(follower=user).values_list('following_id', flat=True))
-        following_users.append(user.id) # Include self in the twist feed
+        viewer = get_viewer(user)
+        following_users = viewer.following_ids | {user.id} # Include self in the twist feed
 
         # Exclude exclusive twists from the main twist feed UNLESS the user is the author or a subscriber
-        from .models import UserSubscription
-        subscribed_to_ids = UserSubscription.objects.filter(
-            subscriber=user, status='active'
-        ).filter(
-            Q(expiry_date__isnull=True) | Q(expiry_date__gt=timezone.now())
-        ).values_list('creator_id', flat=True)
+        subscribed_to_ids = viewer.subscribed_creator_ids()
 
-        return Twist.objects.filter(author_id__in=following_users).exclude(
+        return Twist.objects.select_related('author__profile', 'original_post__author__profile').prefetch_related('original_post__hashtags').filter(author_id__in=following_users).exclude(
             author__profile__blocked_until__gt=timezone.now()
         ).filter(
             Q(is_exclusive=False) | Q(author=user) | Q(author_id__in=subscribed_to_ids)
         ).order_by('-created_at')
 
-    def perform_create(self, serializer): serializer.save(author=self.request.user)
+    def perform_create(self, serializer):
+        twist = serializer.save(author=self.request.user)
+        adjust(Post, twist.original_post_id, twists_count=1)
+        adjust(Twist, twist.original_twist_id, retwists_count=1)
+
     def get_serializer_context(self): return {'request': self.request}
 
 
-class PostTwistListView(generics.ListAPIView):
+class PostTwistListView(EngagementContextMixin, generics.ListAPIView):
     """GET /api/posts/<post_id>/twists/"""
     serializer_class = TwistSerializer
     permission_classes = [AllowAny] # Allow viewing twists on public posts
+    pagination_class = FeedPagination
     
     def get_queryset(self):
         post_id = self.kwargs['post_id']
-        return Twist.objects.filter(original_post_id=post_id).exclude(author__profile__blocked_until__gt=timezone.now()).order_by('-created_at')
+        return Twist.objects.select_related('author__profile', 'original_post__author__profile').prefetch_related('original_post__hashtags').filter(original_post_id=post_id).exclude(author__profile__blocked_until__gt=timezone.now()).order_by('-created_at')
 
     def get_serializer_context(self): return {'request': self.request}
 
@@ -1155,6 +1105,12 @@ class TwistDetailView(generics.RetrieveDestroyAPIView):
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
     def get_serializer_context(self): return {'request': self.request}
 
+    def perform_destroy(self, instance):
+        original_post_id, original_twist_id = instance.original_post_id, instance.original_twist_id
+        instance.delete()
+        adjust(Post, original_post_id, twists_count=-1)
+        adjust(Twist, original_twist_id, retwists_count=-1)
+
 
 class TwistLikeToggleView(APIView):
     permission_classes = [IsAuthenticated]
@@ -1166,26 +1122,27 @@ class TwistLikeToggleView(APIView):
         like_obj, created = TwistLike.objects.get_or_create(user=request.user, twist=twist)
         if not created:
             like_obj.delete()
+            adjust(Twist, twist.pk, likes_count=-1)
             return Response({"status": "unliked"}, status=status.HTTP_200_OK)
+        adjust(Twist, twist.pk, likes_count=1)
         
-        # Make notification
-        if twist.author != request.user:
-            Notification.objects.create(
-                recipient=twist.author,
-                sender=request.user,
-                notification_type='like_twist',
-                twist=twist
+        # Make notification (background job)
+        if twist.author_id != request.user.id:
+            notify.apply_async(
+                args=(twist.author_id, request.user.id, 'like_twist'), kwargs={'twist_id': twist.id},
+                idempotency_key=f'like_twist:{like_obj.pk}',
             )
             
         return Response({"status": "liked"}, status=status.HTTP_201_CREATED)
 
-class PublicTwistListView(generics.ListAPIView):
+class PublicTwistListView(EngagementContextMixin, generics.ListAPIView):
     """
     GET /api/twists/public/?tag=<trend>
     Returns PUBLIC twists matching a specific hashtag or search term.
     """
     serializer_class = TwistSerializer
     permission_classes = [AllowAny] 
+    pagination_class = FeedPagination
     
     def get_queryset(self):
         tag = self.request.query_params.get('tag', None)
@@ -1193,33 +1150,30 @@ class PublicTwistListView(generics.ListAPIView):
         # but we can assume author.profile.is_private. Let's add that check.)
         
         # Exclude exclusive twists from public feed
-        queryset = Twist.objects.filter(author__profile__is_private=False, is_exclusive=False).exclude(author__profile__blocked_until__gt=timezone.now()).order_by('-created_at')
+        queryset = Twist.objects.select_related('author__profile', 'original_post__author__profile').prefetch_related('original_post__hashtags').filter(author__profile__is_private=False, is_exclusive=False).exclude(author__profile__blocked_until__gt=timezone.now()).order_by('-created_at')
         
         if tag:
-            queryset = queryset.filter(content__icontains=f"#{tag}")
+            queryset = queryset.filter(hashtags__name=hashtags.normalize(tag))
             
         return queryset
 
     def get_serializer_context(self): return {'request': self.request}
     
-class UserTwistListView(generics.ListAPIView):
+class UserTwistListView(EngagementContextMixin, generics.ListAPIView):
     """GET /api/twists/user/<user_id>/"""
     serializer_class = TwistSerializer
     permission_classes = [AllowAny] 
+    pagination_class = FeedPagination
     
     def get_queryset(self):
         user_id = self.kwargs['user_id']
         requesting_user = self.request.user
         
         # Base queryset
-        queryset = Twist.objects.filter(author_id=user_id).exclude(author__profile__blocked_until__gt=timezone.now())
+        queryset = Twist.objects.select_related('author__profile', 'original_post__author__profile').prefetch_related('original_post__hashtags').filter(author_id=user_id).exclude(author__profile__blocked_until__gt=timezone.now())
         
         # Check if the requesting user has access to exclusive content
-        try:
-            target_author = User.objects.get(id=user_id)
-            can_see_exclusive = has_subscription_access(requesting_user, target_author)
-        except User.DoesNotExist:
-            can_see_exclusive = False
+        can_see_exclusive = has_subscription_access(requesting_user, int(user_id))
             
         if not can_see_exclusive:
             queryset = queryset.filter(is_exclusive=False)
@@ -1233,6 +1187,7 @@ class TwistCommentListCreateView(generics.ListCreateAPIView):
     """GET/POST /api/twists/<pk>/comments/"""
     serializer_class = TwistCommentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ThreadPagination
 
     def get_queryset(self):
         twist_id = self.kwargs['pk']
@@ -1241,14 +1196,13 @@ class TwistCommentListCreateView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         twist = Twist.objects.get(pk=self.kwargs['pk'])
         comment = serializer.save(author=self.request.user, twist=twist)
+        adjust(Twist, twist.pk, comments_count=1)
         
-        # Notify author
-        if twist.author != self.request.user:
-            Notification.objects.create(
-                recipient=twist.author,
-                sender=self.request.user,
-                notification_type='comment_twist',
-                twist=twist
+        # Notify author (background job)
+        if twist.author_id != self.request.user.id:
+            notify.apply_async(
+                args=(twist.author_id, self.request.user.id, 'comment_twist'), kwargs={'twist_id': twist.id},
+                idempotency_key=f'comment_twist:{comment.pk}',
             )
         
     def get_serializer_context(self): return {'request': self.request}
@@ -1260,6 +1214,11 @@ class TwistCommentDetailView(generics.DestroyAPIView):
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
     def get_serializer_context(self): return {'request': self.request}
 
+    def perform_destroy(self, instance):
+        twist_id = instance.twist_id
+        instance.delete()
+        adjust(Twist, twist_id, comments_count=-1)
+
 
 # --- Story Views ---
 
@@ -1271,8 +1230,7 @@ class StoryListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        following_ids = list(Follow.objects.filter(follower=user).values_list('following_id', flat=True))
-        following_ids.append(user.id)
+        following_ids = get_viewer(user).following_ids | {user.id}
         return Story.objects.filter(author_id__in=following_ids, expires_at__gt=timezone.now()).exclude(author__profile__blocked_until__gt=timezone.now()).order_by('-created_at')
 
     def perform_create(self, serializer):
@@ -1317,7 +1275,9 @@ class RegisterStoryView(APIView):
         try:
             story = Story.objects.get(id=story_id)
         except Story.DoesNotExist: return Response({"error": "Story not found."}, status=status.HTTP_404_NOT_FOUND)
-        StoryView.objects.get_or_create(story=story, user=request.user)
+        _, created = StoryView.objects.get_or_create(story=story, user=request.user)
+        if created:
+            adjust(Story, story.pk, views_count=1)
         return Response({"status": "view registered"}, status=status.HTTP_201_CREATED)
 
 
@@ -1343,15 +1303,15 @@ class StoryLikeToggleView(APIView):
         if not created:
             # Unlike
             like_obj.delete()
+            adjust(Story, story.pk, likes_count=-1)
             return Response({"status": "unliked"}, status=status.HTTP_200_OK)
+        adjust(Story, story.pk, likes_count=1)
         
         # Like
         if story.author != request.user:
-             Notification.objects.create(
-                recipient=story.author,
-                sender=request.user,
-                notification_type='story_like',
-                story=story
+            notify.apply_async(
+                args=(story.author_id, request.user.id, 'story_like'), kwargs={'story_id': story.pk},
+                idempotency_key=f'story_like:{like_obj.pk}',
             )
             
         return Response({"status": "liked"}, status=status.HTTP_201_CREATED)
@@ -1365,6 +1325,7 @@ class StoryArchiveView(generics.ListAPIView):
     """
     serializer_class = StorySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return Story.objects.filter(author=self.request.user).order_by('-created_at')
@@ -1378,8 +1339,10 @@ class StoryAnalyticsView(generics.ListAPIView):
     Retrieves the list of users who have viewed a specific story.
     ONLY the story's AUTHOR can access this endpoint.
     """
-    serializer_class = FollowingSerializer # We can reuse FollowingSerializer to list User details
+    serializer_class = UserCardSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-view_id',)  # Most recent viewers first
 
     def get_queryset(self):
         story_id = self.kwargs['story_id']
@@ -1407,7 +1370,7 @@ class StoryAnalyticsView(generics.ListAPIView):
         
         # 2. Return User objects who have viewed this story, ordered by view time
         # We filter by the specific story to ensure the join only brings in the relevant view time
-        return User.objects.filter(storyview__story=story).distinct().order_by('-storyview__viewed_at')
+        return User.objects.filter(storyview__story=story).annotate(view_id=F('storyview__id')).select_related('profile')
         
     # We override the serializer_class just to list the users, 
     # but we'll return the raw User data which is simple.
@@ -1421,12 +1384,14 @@ class StoryAnalyticsView(generics.ListAPIView):
             except Story.DoesNotExist:
                 return Response({"error": "Story not found."}, status=status.HTTP_404_NOT_FOUND)
         
-        # Using UserSerializer to display the list of viewers (User objects)
-        serializer = UserSerializer(queryset, many=True, context={'request': request})
+        # Viewers are listed as user cards (no per-viewer counts or subscription checks)
+        page = self.paginate_queryset(queryset)
+        serializer = UserCardSerializer(page, many=True, context={'request': request})
         
         return Response({
-            'total_views': queryset.count(),
-            'viewers': serializer.data
+            'total_views': Story.objects.filter(id=self.kwargs['story_id']).values_list('views_count', flat=True).first() or 0,
+            'viewers': serializer.data,
+            'next': self.paginator.get_next_link(),
         }, status=status.HTTP_200_OK)
 
 class UserStoryListView(generics.ListAPIView):
@@ -1450,7 +1415,7 @@ class UserStoryListView(generics.ListAPIView):
         # 1. Determine Access Rights
         is_owner = target_user == current_user
         is_private = target_user.profile.is_private
-        is_following = current_user.is_authenticated and Follow.objects.filter(follower=current_user, following=target_user).exists()
+        is_following = get_viewer(current_user).is_following(target_user.id)
         
         # 2. Check Privacy Condition
         if is_private and not is_owner and not is_following:
@@ -1466,72 +1431,66 @@ class UserStoryListView(generics.ListAPIView):
 class FollowerListView(generics.ListAPIView):
     """
     Returns a list of User objects who follow the target user.
-    Uses UserSerializer for rich profile data and follow state.
+    Uses UserCardSerializer: avatar, names and follow state, no per-user queries.
     """
-    serializer_class = UserSerializer
+    serializer_class = UserCardSerializer
     permission_classes = [AllowAny]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-follow_id',)  # Most recent follows first
     
     def get_queryset(self):
         username = self.kwargs['username']
         user = get_object_or_404(User, username__iexact=username)
         # return the User objects from the follow records
-        return User.objects.filter(following__following=user).distinct().exclude(profile__blocked_until__gt=timezone.now())
+        return User.objects.filter(following__following=user).annotate(follow_id=F('following__id')).exclude(profile__blocked_until__gt=timezone.now()).select_related('profile')
 
 class FollowingListView(generics.ListAPIView):
     """
     Returns a list of User objects whom the target user is following.
-    Uses UserSerializer for rich profile data and follow state.
+    Uses UserCardSerializer: avatar, names and follow state, no per-user queries.
     """
-    serializer_class = UserSerializer
+    serializer_class = UserCardSerializer
     permission_classes = [AllowAny]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-follow_id',)  # Most recent follows first
     
     def get_queryset(self):
         username = self.kwargs['username']
         user = get_object_or_404(User, username__iexact=username)
-        return User.objects.filter(followers__follower=user).distinct().exclude(profile__blocked_until__gt=timezone.now())
+        return User.objects.filter(followers__follower=user).annotate(follow_id=F('followers__id')).exclude(profile__blocked_until__gt=timezone.now()).select_related('profile')
 
-class TrendingHashtagsView(generics.ListAPIView):
-    serializer_class = HashtagSerializer
+class TrendingHashtagsView(APIView):
+    """
+    GET /api/trends/hashtags/?limit=10
+    The precomputed sliding-window ranking (services/trending.py): one cache read.
+    """
     permission_classes = [AllowAny]
-    def get_queryset(self):
-        return Hashtag.objects.annotate(
-            post_count=Count('posts')
-        ).order_by('-post_count')[:10]
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), settings.TRENDING_TOP_N)
+        except ValueError:
+            limit = 10
+        return Response(trending.top(limit))
 
 
 # --- Reels Views ---
 
-class ReelListCreateView(generics.ListCreateAPIView):
+class ReelListCreateView(EngagementContextMixin, generics.ListCreateAPIView):
     """
-    GET: List reels (Feed logic: Recent reels from everyone or following? For now, public feed = everyone, sorted by recent).
+    GET: Endless recommended reel feed (recency, engagement and follow-graph proximity, never repeating until exhausted).
     POST: Create a new reel.
     """
     serializer_class = ReelSerializer
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
 
-    def get_queryset(self):
-        user = self.request.user
-        following_ids = list(Follow.objects.filter(follower=user).values_list('following_id', flat=True))
-        
-        # Exclusive check logic: I see my own, or I see if subscribed, or I see if PUBLIC and NOT EXCLUSIVE
-        from .models import UserSubscription
-        subscribed_to_ids = UserSubscription.objects.filter(
-            subscriber=user, status='active'
-        ).filter(
-            Q(expiry_date__isnull=True) | Q(expiry_date__gt=timezone.now())
-        ).values_list('creator_id', flat=True)
-
-        # Base filters
-        is_mine = Q(author=user)
-        is_not_exclusive = Q(is_exclusive=False)
-        is_subscribed = Q(author_id__in=subscribed_to_ids)
+    pagination_class = ReelFeedPagination
 
-        return Reel.objects.filter(
-            (is_not_exclusive & (Q(author__profile__is_private=False) | Q(author_id__in=following_ids))) | 
-            is_mine | 
-            is_subscribed
-        ).filter(is_draft=False).exclude(author__profile__blocked_until__gt=timezone.now()).distinct().order_by('?')
+    def get_queryset(self):
+        # Ranked, non-repeating stream from precomputed candidate pools (services/reels.py).
+        # Visibility: my own, subscribed creators, or NOT EXCLUSIVE from public / followed authors.
+        return ReelStream(self.request.user)
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -1545,24 +1504,21 @@ class ReelDetailView(generics.RetrieveDestroyAPIView):
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
     def get_serializer_context(self): return {'request': self.request}
 
-class UserReelListView(generics.ListAPIView):
+class UserReelListView(EngagementContextMixin, generics.ListAPIView):
     """GET /api/reels/user/<user_id>/ - List reels by a specific user."""
     serializer_class = ReelSerializer
     permission_classes = [AllowAny]
+    pagination_class = FeedPagination
     
     def get_queryset(self):
         user_id = self.kwargs['user_id']
         requesting_user = self.request.user
         
         # Base queryset
-        queryset = Reel.objects.filter(author_id=user_id).exclude(author__profile__blocked_until__gt=timezone.now())
+        queryset = Reel.objects.select_related('author__profile').filter(author_id=user_id).exclude(author__profile__blocked_until__gt=timezone.now())
         
         # Check if the requesting user has access to exclusive content
-        try:
-            target_author = User.objects.get(id=user_id)
-            can_see_exclusive = has_subscription_access(requesting_user, target_author)
-        except User.DoesNotExist:
-            can_see_exclusive = False
+        can_see_exclusive = has_subscription_access(requesting_user, int(user_id))
             
         if not can_see_exclusive:
             queryset = queryset.filter(is_exclusive=False)
@@ -1581,28 +1537,16 @@ class ReelLikeToggleView(APIView):
         like_obj, created = ReelLike.objects.get_or_create(reel=reel, user=request.user)
         if not created:
             like_obj.delete()
+            adjust(Reel, reel.pk, likes_count=-1)
             return Response({"status": "unliked"}, status=status.HTTP_200_OK)
+        adjust(Reel, reel.pk, likes_count=1)
             
-        # Create Notification
-        if reel.author != request.user:
-            try:
-                notif = Notification.objects.create(
-                    recipient=reel.author,
-                    sender=request.user,
-                    notification_type='like_reel',
-                    reel=reel
-                )
-                
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    f"user_{reel.author.id}",
-                    {
-                        'type': 'notification_message',
-                        'data': NotificationSerializer(notif).data
-                    }
-                )
-            except Exception as e:
-                print(f"Notification error: {e}")
+        # Create Notification (background job)
+        if reel.author_id != request.user.id:
+            notify.apply_async(
+                args=(reel.author_id, request.user.id, 'like_reel'), kwargs={'reel_id': reel.id},
+                idempotency_key=f'like_reel:{like_obj.pk}',
+            )
 
         return Response({"status": "liked"}, status=status.HTTP_201_CREATED)
 
@@ -1610,6 +1554,7 @@ class ReelCommentListCreateView(generics.ListCreateAPIView):
     """GET/POST /api/reels/<pk>/comments/"""
     serializer_class = ReelCommentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ThreadPagination
 
     def get_queryset(self):
         reel_id = self.kwargs['pk']
@@ -1617,28 +1562,15 @@ class ReelCommentListCreateView(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         reel = Reel.objects.get(pk=self.kwargs['pk'])
-        serializer.save(author=self.request.user, reel=reel)
-        
-        # Create Notification
-        if reel.author != self.request.user:
-            try:
-                notif = Notification.objects.create(
-                    recipient=reel.author,
-                    sender=self.request.user,
-                    notification_type='comment_reel',
-                    reel=reel
-                )
-
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    f"user_{reel.author.id}",
-                    {
-                        'type': 'notification_message',
-                        'data': NotificationSerializer(notif).data
-                    }
-                )
-            except Exception as e:
-                print(f"Notification error: {e}")
+        comment = serializer.save(author=self.request.user, reel=reel)
+        adjust(Reel, reel.pk, comments_count=1)
+        
+        # Create Notification (background job)
+        if reel.author_id != self.request.user.id:
+            notify.apply_async(
+                args=(reel.author_id, self.request.user.id, 'comment_reel'), kwargs={'reel_id': reel.id},
+                idempotency_key=f'comment_reel:{comment.pk}',
+            )
         
     def get_serializer_context(self): return {'request': self.request}
 
@@ -1667,69 +1599,19 @@ from .models import Notification
 from .serializers import NotificationSerializer
 
 class NotificationListView(generics.ListAPIView):
-    """GET /api/notifications/ - List all notifications."""
+    """GET /api/notifications/ - Notifications newest first, plus the unread count."""
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        qs = Notification.objects.filter(recipient=self.request.user).order_by('-created_at')
-        
-        # Self-healing: Advanced Deduplication
-        from collections import defaultdict
-        grouped = defaultdict(list)
-        
-        all_notifs = list(qs)
-        
-        for notif in all_notifs:
-            # Key generation
-            if notif.notification_type in ['follow_request', 'req_approved', 'req_rejected']:
-                key = (notif.sender_id, 'inbound_follow_workflow')
-            else:
-                key = (
-                    notif.sender_id,
-                    notif.notification_type,
-                    notif.post_id or 0,
-                    notif.reel_id or 0,
-                    notif.story_id or 0,
-                    notif.twist_id or 0,
-                    notif.follow_request_ref_id or 0
-                )
-            grouped[key].append(notif)
-            
-        duplicates_to_delete = []
-        
-        for key, notifs in grouped.items():
-            if len(notifs) > 1:
-                # Resolve conflict: Prioritize Handled > Pending
-                # Sort by: 
-                # 1. Is Handled (Approved/Rejected) - True first
-                # 2. Created At - Newest first
-                
-                def sort_key(n):
-                    is_handled = n.notification_type in ['req_approved', 'req_rejected']
-                    return (is_handled, n.created_at)
+        # Duplicates are folded in at write time (services/notifications.py), so this is a plain index read
+        return Notification.objects.filter(recipient=self.request.user).select_related('sender__profile', 'post', 'reel')
 
-                # Python sort is stable. We want Best Last? No, we want Best at index 0?
-                # reverse=True -> True (Handled) comes before False. Newest comes before Oldest.
-                notifs.sort(key=sort_key, reverse=True)
-                
-                # Keep first, delete rest
-                keep = notifs[0]
-                for junk in notifs[1:]:
-                    duplicates_to_delete.append(junk.id)
-                    
-        if duplicates_to_delete:
-            from django.db import transaction
-            try:
-                with transaction.atomic():
-                    Notification.objects.filter(id__in=duplicates_to_delete).delete()
-            except Exception as e:
-                print(f"Dedupe error: {e}")
-            
-            # Refetch to ensure clean list return
-            return Notification.objects.filter(recipient=self.request.user).order_by('-created_at')
-            
-        return qs
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        response.data['unread_count'] = notifications.unread_count(request.user.id)
+        return response
 
 class NotificationActionView(APIView):
     """POST /api/notifications/<pk>/<action>/ - Perform an action (read, accept_follow, reject_follow)."""
@@ -1773,81 +1655,49 @@ class NotificationActionView(APIView):
                 original_sender_id = follow_req.sender_id
                 receiver_user = follow_req.receiver
                 
-                Follow.objects.get_or_create(follower=follow_req.sender, following=follow_req.receiver)
+                _, followed = Follow.objects.get_or_create(follower=follow_req.sender, following=follow_req.receiver)
+                if followed:
+                    adjust_profile(follow_req.sender_id, following_count=1)
+                    adjust_profile(follow_req.receiver_id, followers_count=1)
                 follow_req.delete()
+                notification.follow_request_ref = None  # SET NULL in the DB already; the deleted instance can't be saved
                 
                 notification.is_read = True
                 notification.notification_type = 'req_approved'
                 notification.save()
-                
-                from channels.layers import get_channel_layer
-                from asgiref.sync import async_to_sync
-                from .serializers import NotificationSerializer
-                channel_layer = get_channel_layer()
 
-                # 1. Create & BROADCAST "Follow Accept" notification back to the person who requested
-                try:
-                    new_notif = Notification.objects.create(
-                        recipient_id=original_sender_id,
-                        sender=request.user,
-                        notification_type='follow_accept'
-                    )
-                    
-                    async_to_sync(channel_layer.group_send)(
-                        f"user_{original_sender_id}",
-                        {
-                            'type': 'notification_message',
-                            'data': NotificationSerializer(new_notif, context={'request': request}).data
-                        }
-                    )
-                except Exception as e:
-                    print(f"Follow accept broadcast failed: {e}")
-
-                # 2. BROADCAST UPDATE to current user (the acceptor) to update UI state
-                try:
-                     group_name = f"user_{request.user.id}"
-                     data = NotificationSerializer(notification, context={'request': request}).data
-                     async_to_sync(channel_layer.group_send)(
-                        group_name,
-                        {
-                            'type': 'notification_message',
-                            'data': data
-                        }
-                     )
-                except Exception: pass
+                # 1. "Follow Accept" notification back to the person who requested, and
+                # 2. the updated request to the acceptor's own clients, in one push
+                accepted = notifications.emit([NotificationEvent(original_sender_id, request.user.id, 'follow_accept')], push=False)
+                notifications.broadcast(accepted + [notification], context={'request': request})
 
                 return Response({"status": "follow_accepted"}, status=status.HTTP_200_OK)
             
             elif action == 'reject_follow':
                 follow_req.delete()
+                notification.follow_request_ref = None  # SET NULL in the DB already; the deleted instance can't be saved
                 notification.is_read = True
                 notification.notification_type = 'req_rejected'
                 notification.save()
 
                 # BROADCAST UPDATE
-                try:
-                     from channels.layers import get_channel_layer
-                     from asgiref.sync import async_to_sync
-                     from .serializers import NotificationSerializer
-                     
-                     channel_layer = get_channel_layer()
-                     group_name = f"user_{request.user.id}"
-                     data = NotificationSerializer(notification, context={'request': request}).data
-                     
-                     async_to_sync(channel_layer.group_send)(
-                        group_name,
-                        {
-                            'type': 'notification_message',
-                            'data': data
-                        }
-                     )
-                except Exception as e:
-                     print(f"Socket update failed: {e}")
+                notifications.broadcast([notification], context={'request': request})
 
                 return Response({"status": "follow_rejected"}, status=status.HTTP_200_OK)
 
         return Response({"error": "Invalid action"}, status=status.HTTP_400_BAD_REQUEST)
 
+class UnreadCountsView(APIView):
+    """
+    GET /api/unread/ - Badge counts: unread notifications, DMs (per room) and group messages (per group).
+    The same payload is pushed over the notification socket as `unread_counts` whenever it changes.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(unread.summary(request.user.id))
+
+
 class MarkAllNotificationsReadView(APIView):
     """POST /api/notifications/read-all/ - Mark all unread notifications as read."""
     permission_classes = [IsAuthenticated]
@@ -1857,6 +1707,8 @@ class MarkAllNotificationsReadView(APIView):
         unread_notifications = Notification.objects.filter(recipient=request.user, is_read=False)
         count = unread_notifications.count()
         unread_notifications.update(is_read=True)
+        notifications.invalidate_unread(request.user.id)
+        unread.changed([request.user.id])
         return Response({"status": "all_read", "marked_count": count}, status=status.HTTP_200_OK)
 
 
@@ -1877,60 +1729,16 @@ class ShareReelView(APIView):
         if not recipient_ids:
              return Response({"error": "No recipients selected"}, status=status.HTTP_400_BAD_REQUEST)
 
-        created_messages = []
-        
-        from channels.layers import get_channel_layer
-        from asgiref.sync import async_to_sync
-        from .serializers import ChatMessageSerializer
-        channel_layer = get_channel_layer()
-
-        for user_id in recipient_ids:
-            try:
-                recipient = User.objects.get(pk=user_id)
-                # Ensure Chat Room Exists
-                room, _ = ChatRoom.objects.get_or_create(
-                    user1=min(request.user, recipient, key=lambda u: u.id),
-                    user2=max(request.user, recipient, key=lambda u: u.id)
-                )
-                room.last_message_at = timezone.now()
-                room.save()
-
-                # Create Message
-                msg = ChatMessage.objects.create(
-                    room=room,
-                    author=request.user,
-                    content=f"Shared a reel: {reel.caption[:20] if reel.caption else 'Reel'}", # Fallback text
-                    shared_reel=reel
-                )
-                
-                # Broadcast via WebSocket
-                # We need to construct the room group name: 'chat_X_Y'
-                user_ids = sorted([str(request.user.id), str(recipient.id)])
-                room_group_name = f'chat_{user_ids[0]}_{user_ids[1]}'
-                
-                serialized_msg = ChatMessageSerializer(msg).data
-                
-                # We reuse the structure from consumers.property
-                async_to_sync(channel_layer.group_send)(
-                    room_group_name,
-                    {
-                        'type': 'chat_message',
-                        'id': msg.id,
-                        'content': msg.content,
-                        'author': request.user.id,
-                        'author_username': request.user.username,
-                        'timestamp': msg.timestamp.isoformat(),
-                        'is_read': False,
-                        'shared_reel': msg.shared_reel.id,
-                        'shared_reel_data': serialized_msg['shared_reel_data']
-                    }
-                )
-                created_messages.append(msg.id)
+        # One background job per recipient; an Idempotency-Key header makes client retries safe
+        request_key = request.headers.get('Idempotency-Key')
+        recipients = list(User.objects.filter(pk__in=recipient_ids).values_list('id', flat=True))
+        for recipient_id in recipients:
+            share_with.apply_async(
+                args=(request.user.id, 'reel', reel.id, recipient_id),
+                idempotency_key=f'share:{request.user.id}:{request_key}:{recipient_id}' if request_key else None,
+            )
 
-            except User.DoesNotExist:
-                continue
-        
-        return Response({"status": "shared", "count": len(created_messages)}, status=status.HTTP_200_OK)
+        return Response({"status": "shared", "count": len(recipients)}, status=status.HTTP_200_OK)
 
 class SharePostView(APIView):
     """
@@ -1949,58 +1757,16 @@ class SharePostView(APIView):
         if not recipient_ids:
              return Response({"error": "No recipients selected"}, status=status.HTTP_400_BAD_REQUEST)
 
-        created_messages = []
-        
-        from channels.layers import get_channel_layer
-        from asgiref.sync import async_to_sync
-        from .serializers import ChatMessageSerializer
-        channel_layer = get_channel_layer()
-
-        for user_id in recipient_ids:
-            try:
-                recipient = User.objects.get(pk=user_id)
-                # Ensure Chat Room Exists
-                room, _ = ChatRoom.objects.get_or_create(
-                    user1=min(request.user, recipient, key=lambda u: u.id),
-                    user2=max(request.user, recipient, key=lambda u: u.id)
-                )
-                room.last_message_at = timezone.now()
-                room.save()
-
-                # Create Message
-                msg = ChatMessage.objects.create(
-                    room=room,
-                    author=request.user,
-                    content=f"Shared a post: {post.content[:20] if post.content else 'Post'}", # Fallback text
-                    shared_post=post
-                )
-                
-                # Broadcast via WebSocket
-                user_ids = sorted([str(request.user.id), str(recipient.id)])
-                room_group_name = f'chat_{user_ids[0]}_{user_ids[1]}'
-                
-                serialized_msg = ChatMessageSerializer(msg).data
-                
-                async_to_sync(channel_layer.group_send)(
-                    room_group_name,
-                    {
-                        'type': 'chat_message',
-                        'id': msg.id,
-                        'content': msg.content,
-                        'author': request.user.id,
-                        'author_username': request.user.username,
-                        'timestamp': msg.timestamp.isoformat(),
-                        'is_read': False,
-                        'shared_post': msg.shared_post.id,
-                        'shared_post_data': serialized_msg['shared_post_data']
-                    }
-                )
-                created_messages.append(msg.id)
+        # One background job per recipient; an Idempotency-Key header makes client retries safe
+        request_key = request.headers.get('Idempotency-Key')
+        recipients = list(User.objects.filter(pk__in=recipient_ids).values_list('id', flat=True))
+        for recipient_id in recipients:
+            share_with.apply_async(
+                args=(request.user.id, 'post', post.id, recipient_id),
+                idempotency_key=f'share:{request.user.id}:{request_key}:{recipient_id}' if request_key else None,
+            )
 
-            except User.DoesNotExist:
-                continue
-        
-        return Response({"status": "shared", "count": len(created_messages)}, status=status.HTTP_200_OK)
+        return Response({"status": "shared", "count": len(recipients)}, status=status.HTTP_200_OK)
 
 class ShareTwistView(APIView):
     """
@@ -2019,58 +1785,16 @@ class ShareTwistView(APIView):
         if not recipient_ids:
              return Response({"error": "No recipients selected"}, status=status.HTTP_400_BAD_REQUEST)
 
-        created_messages = []
-        
-        from channels.layers import get_channel_layer
-        from asgiref.sync import async_to_sync
-        from .serializers import ChatMessageSerializer
-        channel_layer = get_channel_layer()
-
-        for user_id in recipient_ids:
-            try:
-                recipient = User.objects.get(pk=user_id)
-                # Ensure Chat Room Exists
-                room, _ = ChatRoom.objects.get_or_create(
-                    user1=min(request.user, recipient, key=lambda u: u.id),
-                    user2=max(request.user, recipient, key=lambda u: u.id)
-                )
-                room.last_message_at = timezone.now()
-                room.save()
-
-                # Create Message
-                msg = ChatMessage.objects.create(
-                    room=room,
-                    author=request.user,
-                    content=f"Shared a twist: {twist.content[:20] if twist.content else 'Twist'}",
-                    shared_twist=twist
-                )
-                
-                # Broadcast via WebSocket
-                user_ids = sorted([str(request.user.id), str(recipient.id)])
-                room_group_name = f'chat_{user_ids[0]}_{user_ids[1]}'
-                
-                serialized_msg = ChatMessageSerializer(msg).data
-                
-                async_to_sync(channel_layer.group_send)(
-                    room_group_name,
-                    {
-                        'type': 'chat_message',
-                        'id': msg.id,
-                        'content': msg.content,
-                        'author': request.user.id,
-                        'author_username': request.user.username,
-                        'timestamp': msg.timestamp.isoformat(),
-                        'is_read': False,
-                        'shared_twist': msg.shared_twist.id,
-                        'shared_twist_data': serialized_msg['shared_twist_data']
-                    }
-                )
-                created_messages.append(msg.id)
+        # One background job per recipient; an Idempotency-Key header makes client retries safe
+        request_key = request.headers.get('Idempotency-Key')
+        recipients = list(User.objects.filter(pk__in=recipient_ids).values_list('id', flat=True))
+        for recipient_id in recipients:
+            share_with.apply_async(
+                args=(request.user.id, 'twist', twist.id, recipient_id),
+                idempotency_key=f'share:{request.user.id}:{request_key}:{recipient_id}' if request_key else None,
+            )
 
-            except User.DoesNotExist:
-                continue
-        
-        return Response({"status": "shared", "count": len(created_messages)}, status=status.HTTP_200_OK)
+        return Response({"status": "shared", "count": len(recipients)}, status=status.HTTP_200_OK)
 
 # --- 10. REPORT SYSTEM ---
 
@@ -2132,17 +1856,21 @@ class SaveToggleView(APIView):
             SavedItem.objects.create(**filters)
             return Response({"status": "saved"}, status=status.HTTP_201_CREATED)
 
-class SavedItemsListView(generics.ListAPIView):
+class SavedItemsListView(EngagementContextMixin, generics.ListAPIView):
     """
     GET /api/saved/?type=post
     Lists all saved items for the current user, optionally filtered by type.
     """
     serializer_class = SavedItemSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = FeedPagination
 
     def get_queryset(self):
         item_type = self.request.query_params.get('type')
-        queryset = SavedItem.objects.filter(user=self.request.user)
+        queryset = SavedItem.objects.filter(user=self.request.user).select_related(
+            'post__author__profile', 'reel__author__profile',
+            'twist__author__profile', 'twist__original_post__author__profile',
+        ).prefetch_related('post__hashtags', 'twist__original_post__hashtags')
         
         if item_type == 'post':
             queryset = queryset.filter(post__isnull=False)
@@ -2178,6 +1906,7 @@ class WithdrawalListCreateView(generics.ListCreateAPIView):
     """
     serializer_class = WithdrawalRequestSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return WithdrawalRequest.objects.filter(creator=self.request.user).order_by('-created_at')
@@ -2277,7 +2006,10 @@ class UserBlockListView(APIView):
 
     def get(self, request):
         from .models import UserBlock
-        blocks = UserBlock.objects.filter(blocker=request.user).select_related('blocked__profile')
+        paginator = KeysetPagination()
+        blocks = paginator.paginate_queryset(
+            UserBlock.objects.filter(blocker=request.user).select_related('blocked__profile'), request, view=self
+        )
         results = []
         for block in blocks:
             profile = block.blocked.profile
@@ -2287,7 +2019,7 @@ class UserBlockListView(APIView):
                 "display_name": f"{block.blocked.first_name} {block.blocked.last_name}".strip() or block.blocked.username,
                 "profile_picture": request.build_absolute_uri(profile.profile_picture.url) if profile.profile_picture else None,
             })
-        return Response(results)
+        return paginator.get_paginated_response(results)
 
 class UserUnblockView(APIView):
     permission_classes = [IsAuthenticated]
@@ -11,6 +11,7 @@ from django.shortcuts import get_object_or_404
 from django.contrib.auth.models import User
 from .models import SubscriptionPlan, UserSubscription, CreatorEarning, WithdrawalRequest
 from .serializers import SubscriptionPlanSerializer, UserSubscriptionSerializer
+from .pagination import KeysetPagination
 from rest_framework_simplejwt.authentication import JWTAuthentication
 import datetime
 
@@ -557,15 +558,18 @@ class CreatorSubscribersListView(APIView):
     Lists all active subscribers for a creator.
     """
     permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ('-start_date', '-id')
 
     def get(self, request, username):
         creator = get_object_or_404(User, username__iexact=username)
         # In a real app, you might restrict this to the creator or following logic.
         # For now, we'll allow viewing if the account is public or follow-linked.
         active_subs = UserSubscription.objects.filter(creator=creator, status='active').select_related('subscriber', 'subscriber__profile')
+        paginator = KeysetPagination()
+        active_subs = paginator.paginate_queryset(active_subs, request, view=self)
         
         # We can reuse UserSerializer (imported from .serializers if possible)
         from .serializers import UserSerializer
         subscribers = [sub.subscriber for sub in active_subs]
         serializer = UserSerializer(subscribers, many=True, context={'request': request})
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
@@ -33,6 +33,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # Trigram lookups for search (trend/services/search.py)
     'channels',
     'rest_framework',
     'rest_framework_simplejwt',
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'trend.middleware.QueryBudgetMiddleware',  # No-op unless QUERY_BUDGET_ENABLED
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -51,6 +53,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'trend.middleware.ViewerContextMiddleware',
 ]
 
 ROOT_URLCONF = 'trend_twist_api.urls'
@@ -196,4 +199,97 @@ USE_TZ = True
 STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY', '')
 STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET', '')
 
+# --- QUERY BUDGETS ---
+# Opt-in per-request SQL instrumentation (see trend/services/query_budget.py).
+# Adds X-Query-* headers and logs endpoints that exceed their budget.
+QUERY_BUDGET_ENABLED = os.environ.get('QUERY_BUDGET_ENABLED', 'False') == 'True'
+QUERY_BUDGET_LOG = os.environ.get('QUERY_BUDGET_LOG')  # Optional JSON-lines file, read by `query_report --from-log`
+QUERY_BUDGET_DEFAULT = int(os.environ.get('QUERY_BUDGET_DEFAULT', 20))
+QUERY_BUDGETS = {
+    # Feeds must stay constant-query regardless of page size
+    'post_list_create': 10,
+    'twist_list_create_standalone': 10,
+    'reel_list_create': 8,
+    'public_post_list': 8,
+    'public_twist_list': 10,
+    'user_posts_list': 8,
+    'user_twist_list': 10,
+    'user_reel_list': 8,
+    'saved_list': 10,
+    'notification_list': 6,
+    'chat_inbox': 8,
+    'group_list': 8,
+    'user_profile_detail': 10,
+}
+
+# --- HOME TIMELINE ---
+# Authors with more followers than this are not fanned out on write; their posts
+# are pulled into followers' feeds at read time instead (see trend/services/timeline.py)
+TIMELINE_FANOUT_MAX_FOLLOWERS = int(os.environ.get('TIMELINE_FANOUT_MAX_FOLLOWERS', 5000))
+# How many of an author's recent posts are copied into a timeline on follow / subscribe
+TIMELINE_BACKFILL_LIMIT = int(os.environ.get('TIMELINE_BACKFILL_LIMIT', 200))
+
+# --- VIEWER CONTEXT ---
+# Seconds a user's following / subscription / pending-request / block sets stay cached
+# (invalidated on change by trend/signals.py, see trend/services/viewer.py)
+VIEWER_CONTEXT_TTL = int(os.environ.get('VIEWER_CONTEXT_TTL', 60))
+
+# --- CHAT WRITE-BEHIND ---
+# When enabled, ChatConsumer broadcasts messages immediately and persists them in
+# batched bulk_create flushes (see trend/services/chat_writer.py)
+CHAT_WRITE_BEHIND = os.environ.get('CHAT_WRITE_BEHIND', 'False') == 'True'
+CHAT_WRITE_BEHIND_FLUSH_MS = int(os.environ.get('CHAT_WRITE_BEHIND_FLUSH_MS', 20))
+CHAT_WRITE_BEHIND_BATCH = int(os.environ.get('CHAT_WRITE_BEHIND_BATCH', 500))
+# Failed batches are kept here until they can be written (replayed automatically or via flush_chat_spool)
+CHAT_WRITE_BEHIND_SPOOL = os.environ.get('CHAT_WRITE_BEHIND_SPOOL', str(BASE_DIR / 'chat_spool.jsonl'))
+
+# --- STRANGER TALK MATCHMAKING ---
+# 'redis' or 'memory'; defaults to redis when REDIS_URL is set (see trend/services/matchmaking.py)
+STRANGER_MATCH_BACKEND = os.environ.get('STRANGER_MATCH_BACKEND')
+
+# --- PRESENCE ---
+# Online status lives in Redis (or memory) per connection; Profile.last_seen / is_online are
+# written in batches every PRESENCE_FLUSH_SECONDS (see trend/services/presence.py)
+PRESENCE_BACKEND = os.environ.get('PRESENCE_BACKEND')
+PRESENCE_HEARTBEAT_SECONDS = int(os.environ.get('PRESENCE_HEARTBEAT_SECONDS', 30))
+# A connection that misses heartbeats for this long (e.g. its worker died) no longer counts
+PRESENCE_TTL_SECONDS = int(os.environ.get('PRESENCE_TTL_SECONDS', 90))
+PRESENCE_FLUSH_SECONDS = int(os.environ.get('PRESENCE_FLUSH_SECONDS', 30))
+
+# --- PUSH NOTIFICATIONS (FCM) ---
+# Pushes are queued and sent in batches off the request thread (see trend/services/fcm_service.py).
+# Point FCM_ENDPOINT at `python manage.py fcm_stub` (http://127.0.0.1:8765/fcm/send) for local testing.
+FCM_ENDPOINT = os.environ.get('FCM_ENDPOINT', 'https://fcm.googleapis.com/fcm/send')
+FCM_CONCURRENCY = int(os.environ.get('FCM_CONCURRENCY', 8))
+FCM_BATCH_WINDOW_MS = int(os.environ.get('FCM_BATCH_WINDOW_MS', 200))
+FCM_TIMEOUT = int(os.environ.get('FCM_TIMEOUT', 5))
+
+# --- TRENDING HASHTAGS ---
+# Mentions are counted in 5-minute buckets over the window, decayed with this half-life and
+# re-ranked into the cache at most every TRENDING_REFRESH_SECONDS (see trend/services/trending.py)
+TRENDING_WINDOW_HOURS = int(os.environ.get('TRENDING_WINDOW_HOURS', 24))
+TRENDING_HALF_LIFE_MINUTES = int(os.environ.get('TRENDING_HALF_LIFE_MINUTES', 120))
+TRENDING_REFRESH_SECONDS = int(os.environ.get('TRENDING_REFRESH_SECONDS', 60))
+TRENDING_TOP_N = int(os.environ.get('TRENDING_TOP_N', 50))
+
+# --- SEARCH ---
+# 'postgres' (full-text + trigram indexes) or 'index' (SearchToken inverted index);
+# defaults to postgres on a Postgres database (see trend/services/search.py)
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND')
+
+# --- MENTION AUTOCOMPLETE ---
+# 'redis' or 'memory'; defaults to redis when REDIS_URL is set (see trend/services/mentions.py)
+MENTIONS_BACKEND = os.environ.get('MENTIONS_BACKEND')
+
+# --- BACKGROUND JOBS ---
+# 'redis', 'db' or 'eager'; defaults to redis when REDIS_URL is set (see trend/services/jobs.py)
+JOBS_BROKER = os.environ.get('JOBS_BROKER')
+# Each web process runs a worker thread unless a dedicated `manage.py run_worker` is deployed
+JOBS_EMBEDDED_WORKER = os.environ.get('JOBS_EMBEDDED_WORKER', 'True') == 'True'
+JOBS_CONCURRENCY = int(os.environ.get('JOBS_CONCURRENCY', 4))
+JOBS_POLL_INTERVAL = float(os.environ.get('JOBS_POLL_INTERVAL', 1))
+JOBS_IDEMPOTENCY_TTL = int(os.environ.get('JOBS_IDEMPOTENCY_TTL', 24 * 60 * 60))
+# Repeated "send OTP" taps within this window reuse the code instead of mailing a new one
+OTP_RESEND_SECONDS = int(os.environ.get('OTP_RESEND_SECONDS', 60))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'